@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Proc calls on the bytecode VM
+Runs fib and fact from examples_main/perf_benchmark.lyra on the
+tree-walker, on BytecodeVM and on FastBytecodeVM (frames with local
+slots), memoization off so every call really runs
+"""
+
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_bytecode import BytecodeCompiler, BytecodeVM
+from fast_bytecode_vm import FastBytecodeVM
+
+# Driver code appended to the benchmark's procs
+WORKLOADS = {
+    "fib(20)": "println(fib(20));",
+    "fact(20) x 500": """
+var k: i32 = 0;
+var total: i32 = 0;
+while k < 500 {
+    total = total + fact(20);
+    k = k + 1;
+}
+println(total);
+""",
+    # Tree-walker stops at ~160 levels (Python recursion limit)
+    "fact(2000)": "println(fact(2000) > 0);",
+}
+
+def benchmark_procs() -> str:
+    """Source of fib and fact, cut out of perf_benchmark.lyra"""
+    with open(os.path.join(ROOT, "examples_main", "perf_benchmark.lyra")) as f:
+        source = f.read()
+    procs = []
+    for name in ("fib", "fact"):
+        start = source.index(f"proc {name}(")
+        end = source.index("\n}\n", start) + 3
+        procs.append(source[start:end])
+    return "\n".join(procs)
+
+def run_tree(code: str) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0  # Measure calls, not memo hits
+    start = time.perf_counter()
+    try:
+        Interpreter(context=ctx).interpret(program, ctx)
+    except RecursionError:
+        return None, "RecursionError", 0
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), 0
+
+def run_vm(vm_class: type, code: str) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0
+    start = time.perf_counter()
+    compiler = BytecodeCompiler()
+    bytecode = compiler.compile_program(program)
+    vm = vm_class(bytecode, compiler.constants, compiler.get_names(), ctx, compiler=compiler)
+    vm.execute()
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), vm.max_depth
+
+def main():
+    print("="*80)
+    print("BENCHMARK: PROC CALLS ON THE BYTECODE VM")
+    print("="*80)
+    print()
+
+    procs = benchmark_procs()
+    runners = [("Tree-walker", run_tree),
+               ("BytecodeVM", lambda code: run_vm(BytecodeVM, code)),
+               ("FastBytecodeVM", lambda code: run_vm(FastBytecodeVM, code))]
+    for label, driver in WORKLOADS.items():
+        code = procs + "\n" + driver
+        best = [float("inf")] * len(runners)
+        outputs = [""] * len(runners)
+        depth = 0
+        # Best of 5, interleaved so every backend sees the same noise
+        for _ in range(5):
+            for i, (_, run) in enumerate(runners):
+                elapsed, outputs[i], frames = run(code)
+                best[i] = min(best[i], elapsed) if elapsed is not None else None
+                depth = max(depth, frames)
+        assert outputs[1] == outputs[2], "VM outputs differ"
+        assert outputs[0] in (outputs[1], "RecursionError"), "outputs differ"
+        print(f"{label}  -> {outputs[1]}  (max frames: {depth})")
+        print("-"*80)
+        for (name, _), elapsed in zip(runners, best):
+            if elapsed is None:
+                print(f"{name:<16} RecursionError")
+            else:
+                print(f"{name:<16} {elapsed*1000:8.2f}ms")
+        if best[0] is not None:
+            print(f"{'VM vs tree':<16} {best[0]/best[2]:8.2f}x (FastBytecodeVM)")
+        print()
+
+if __name__ == '__main__':
+    main()
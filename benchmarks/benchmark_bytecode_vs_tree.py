@@ -2,11 +2,22 @@
 """
 Benchmark: Tree-Walking Interpreter vs Bytecode VM
 Measures performance improvement from bytecode compilation
+Each program runs on the tree-walker, on BytecodeVM and on FastBytecodeVM
+with its dispatch-table loop and its threaded engine; cycles (bytecode
+instructions executed) per second are reported for every VM
 """
 
+import io
+import os
+import sys
 import time
-from lyra_interpreter.lyra_interpreter import Lexer, Parser, Interpreter
-from lyra_bytecode import BytecodeCompiler, BytecodeVM, OpCode
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Lexer, Parser, Interpreter, ExecutionContext, parse_code
+from lyra_bytecode import BytecodeCompiler, BytecodeVM
+from fast_bytecode_vm import FastBytecodeVM
 
 # Test programs
 test_programs = {
@@ -53,9 +64,10 @@ def benchmark_tree_walking(code: str, iterations: int = 10) -> float:
             parser = Parser(tokens)
             ast = parser.parse()
             
+            ctx = ExecutionContext(output=io.StringIO())
             start = time.perf_counter()
-            interpreter = Interpreter()
-            interpreter.interpret(ast)
+            interpreter = Interpreter(context=ctx)
+            interpreter.interpret(ast, ctx)
             elapsed = time.perf_counter() - start
             
             times.append(elapsed)
@@ -65,94 +77,47 @@ def benchmark_tree_walking(code: str, iterations: int = 10) -> float:
     
     return sum(times) / len(times)
 
-def manually_compile_simple_arithmetic() -> tuple:
-    """Manually compile simple arithmetic for bytecode VM"""
+def compile_program(code: str) -> tuple:
+    """Bytecode, constants and names of a test program"""
     compiler = BytecodeCompiler()
-    
-    # var x = 10
-    compiler.compile_number(10)
-    compiler.compile_assignment("x")
-    
-    # var y = 20
-    compiler.compile_number(20)
-    compiler.compile_assignment("y")
-    
-    # var z = x + y
-    compiler.compile_variable("x")
-    compiler.compile_variable("y")
-    compiler.compile_binary_op("+")
-    compiler.compile_assignment("z")
-    
-    # print(z)
-    compiler.compile_variable("z")
-    compiler.compile_print()
-    
-    return compiler.get_bytecode(), compiler.constants
+    bytecode = compiler.compile_program(parse_code(code))
+    return bytecode, compiler.constants, compiler.get_names(), compiler
 
-def manually_compile_loop_100() -> tuple:
-    """Manually compile loop_100 for bytecode VM"""
-    compiler = BytecodeCompiler()
-    
-    # var sum = 0
-    compiler.compile_number(0)
-    compiler.compile_assignment("sum")
-    
-    # var i = 0
-    compiler.compile_number(0)
-    compiler.compile_assignment("i")
-    
-    # Loop start (label: loop_start)
-    loop_start = len(compiler.bytecode)
-    
-    # Check: i < 100
-    compiler.compile_variable("i")
-    compiler.compile_number(100)
-    compiler.compile_binary_op("<")
-    
-    # If false, jump to loop_end
-    loop_end = compiler.add_instruction(OpCode.JUMP_IF_FALSE, None)
-    
-    # Loop body: sum = sum + i
-    compiler.compile_variable("sum")
-    compiler.compile_variable("i")
-    compiler.compile_binary_op("+")
-    compiler.compile_assignment("sum")
-    
-    # i = i + 1
-    compiler.compile_variable("i")
-    compiler.compile_number(1)
-    compiler.compile_binary_op("+")
-    compiler.compile_assignment("i")
-    
-    # Jump back to loop_start
-    compiler.add_instruction(OpCode.JUMP, loop_start)
-    
-    # Fix jump_if_false target
-    compiler.bytecode[loop_end].arg = len(compiler.bytecode)
-    
-    # print(sum)
-    compiler.compile_variable("sum")
-    compiler.compile_print()
-    
-    return compiler.get_bytecode(), compiler.constants
-
-def benchmark_bytecode(bytecode, constants, iterations: int = 10) -> float:
-    """Benchmark bytecode VM"""
+def benchmark_bytecode(make_vm: Callable, compiled: tuple, iterations: int = 10) -> tuple:
+    """Benchmark a bytecode VM: (average time, cycles per run)"""
+    bytecode, constants, names, compiler = compiled
     times = []
+    cycles = 0
     
     for _ in range(iterations):
         try:
+            ctx = ExecutionContext(output=io.StringIO())
             start = time.perf_counter()
-            vm = BytecodeVM(bytecode, constants)
+            vm = make_vm(bytecode, constants, names, ctx, compiler=compiler)
             vm.execute()
             elapsed = time.perf_counter() - start
             
             times.append(elapsed)
+            cycles = vm.cycles
         except Exception as e:
             print(f"Error: {e}")
-            return 0
+            return 0, 0
     
-    return sum(times) / len(times)
+    return sum(times) / len(times), cycles
+
+# VMs compared on every program; the dispatch-table loop was FastBytecodeVM's engine
+# before the threaded one
+VMS = [
+    ("BytecodeVM", BytecodeVM),
+    ("Fast, dispatch table", lambda *args, **kwargs: FastBytecodeVM(*args, threaded=False, **kwargs)),
+    ("Fast, threaded", FastBytecodeVM),
+]
+
+TESTS = [
+    ("simple_arithmetic", "Simple Arithmetic (x=10, y=20, z=x+y, print z)", 1000),
+    ("loop_100", "Loop 100 (sum 0..99)", 200),
+    ("nested_loop", "Nested Loops (10x10)", 200),
+]
 
 def main():
     print("="*80)
@@ -160,37 +125,23 @@ def main():
     print("="*80)
     print()
     
-    # Test 1: Simple arithmetic
-    print("TEST 1: Simple Arithmetic (x=10, y=20, z=x+y, print z)")
-    print("-"*80)
-    
-    tree_time = benchmark_tree_walking(test_programs["simple_arithmetic"], iterations=100)
-    print(f"Tree-walking interpreter: {tree_time*1000:.4f}ms")
-    
-    bytecode, constants = manually_compile_simple_arithmetic()
-    bytecode_time = benchmark_bytecode(bytecode, constants, iterations=100)
-    print(f"Bytecode VM:             {bytecode_time*1000:.4f}ms")
-    
-    if tree_time > 0:
-        speedup = tree_time / bytecode_time
-        print(f"Speedup:                 {speedup:.2f}x FASTER")
-    print()
-    
-    # Test 2: Loop 100
-    print("TEST 2: Loop 100 (sum 0..99)")
-    print("-"*80)
-    
-    tree_time = benchmark_tree_walking(test_programs["loop_100"], iterations=10)
-    print(f"Tree-walking interpreter: {tree_time*1000:.4f}ms")
-    
-    bytecode, constants = manually_compile_loop_100()
-    bytecode_time = benchmark_bytecode(bytecode, constants, iterations=10)
-    print(f"Bytecode VM:             {bytecode_time*1000:.4f}ms")
-    
-    if tree_time > 0:
-        speedup = tree_time / bytecode_time
-        print(f"Speedup:                 {speedup:.2f}x FASTER")
-    print()
+    for number, (name, title, iterations) in enumerate(TESTS, 1):
+        print(f"TEST {number}: {title}")
+        print("-"*80)
+        code = test_programs[name]
+        
+        tree_time = benchmark_tree_walking(code, iterations=iterations)
+        print(f"{'Tree-walking interpreter':<26} {tree_time*1000:8.4f}ms")
+        
+        compiled = compile_program(code)
+        rates = []
+        for label, make_vm in VMS:
+            bytecode_time, cycles = benchmark_bytecode(make_vm, compiled, iterations=iterations)
+            rates.append(cycles / bytecode_time)
+            print(f"{label:<26} {bytecode_time*1000:8.4f}ms  {cycles:>6} cycles  "
+                  f"{rates[-1]/1e6:6.2f}M cycles/s  {tree_time/bytecode_time:5.2f}x vs tree")
+        print(f"{'Threaded vs dispatch table':<26} {rates[2]/rates[1]:8.2f}x cycles/s")
+        print()
     
     # Summary
     print("="*80)
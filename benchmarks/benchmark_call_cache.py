@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Call-site inline caches on recursive procs
+Runs fib and fact from examples_main/perf_benchmark.lyra with the
+per-CallExpr cache, with it cleared before every call, and with the
+old lookup (scan the builtin names, then the proc table)
+"""
+
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_interpreter import BUILTINS, Interpreter, ExecutionContext, parse_code
+
+# Driver code appended to the benchmark's procs
+WORKLOADS = {
+    "fib(20)": "println(fib(20));",
+    "fact(20) x 500": """
+var k: i32 = 0;
+var total: i32 = 0;
+while k < 500 {
+    total = total + fact(20);
+    k = k + 1;
+}
+println(total);
+""",
+}
+
+class UncachedInterpreter(Interpreter):
+    """Resolves every call from scratch (cache miss on each call)"""
+
+    def call_function(self, node, ctx):
+        node.target = None
+        return super().call_function(node, ctx)
+
+class BuiltinChainInterpreter(UncachedInterpreter):
+    """Previous lookup: compare against each builtin name, then the procs"""
+
+    def resolve_call(self, node, ctx):
+        for name in BUILTINS:
+            if node.name == name:
+                break
+        return super().resolve_call(node, ctx)
+
+def benchmark_procs() -> str:
+    """Source of fib and fact, cut out of perf_benchmark.lyra"""
+    with open(os.path.join(ROOT, "examples_main", "perf_benchmark.lyra")) as f:
+        source = f.read()
+    procs = []
+    for name in ("fib", "fact"):
+        start = source.index(f"proc {name}(")
+        end = source.index("\n}\n", start) + 3
+        procs.append(source[start:end])
+    return "\n".join(procs)
+
+def time_runs(interpreter_classes: list, code: str, runs: int = 15) -> list:
+    """Best time and output per class; runs are interleaved to share noise"""
+    best = [float("inf")] * len(interpreter_classes)
+    outputs = [""] * len(interpreter_classes)
+    for _ in range(runs):
+        for i, interpreter_class in enumerate(interpreter_classes):
+            # Fresh AST each run so no cache survives from the previous one
+            program = parse_code(code)
+            ctx = ExecutionContext(output=io.StringIO())
+            ctx.memo_size = 0  # Measure calls, not memo hits
+            start = time.perf_counter()
+            interpreter_class(context=ctx).interpret(program, ctx)
+            best[i] = min(best[i], time.perf_counter() - start)
+            outputs[i] = ctx.output.getvalue().strip()
+    return list(zip(best, outputs))
+
+def main():
+    print("="*80)
+    print("BENCHMARK: CALL-SITE INLINE CACHES")
+    print("="*80)
+    print()
+
+    procs = benchmark_procs()
+    for label, driver in WORKLOADS.items():
+        code = procs + "\n" + driver
+        (chain, chain_out), (uncached, uncached_out), (cached, cached_out) = time_runs(
+            [BuiltinChainInterpreter, UncachedInterpreter, Interpreter], code)
+        assert chain_out == uncached_out == cached_out, "outputs differ"
+        print(f"{label}  -> {cached_out}")
+        print("-"*80)
+        print(f"Builtin name chain:  {chain*1000:8.2f}ms")
+        print(f"Resolve every call:  {uncached*1000:8.2f}ms")
+        print(f"Inline cache:        {cached*1000:8.2f}ms")
+        print(f"Speedup vs chain:    {chain/cached:.2f}x")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Cold start from a .lyrc file vs lex + parse + compile
+1. In process: parse_code + compile_program (+ the proc bodies a run
+   compiles on first call) vs loading the .lyrc written by compile_file
+2. Whole process: `lyra --bytecode prog.lyra` with and without a fresh
+   prog.lyrc next to it (outputs compared)
+Programs: examples_main/perf_benchmark.lyra and generated programs of
+50 and 400 procs
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_interpreter import parse_code
+from lyra_bytecode import BytecodeCompiler
+from lyra_compiled import CompiledProgram, compile_file, compiled_path
+
+LYRA = os.path.join(ROOT, "lyra_interpreter", "lyra_interpreter.py")
+
+def generated_program(procs: int) -> str:
+    """procs small procs, each called once"""
+    lines = []
+    for index in range(procs):
+        lines += [
+            f"proc step{index}(x, y) {{",
+            f"    var t: i32 = x * {index + 1} + y;",
+            f"    if t % 2 == 0 {{",
+            f"        t = t / 2;",
+            f"    }} else {{",
+            f"        t = t * 3 + 1;",
+            f"    }}",
+            f"    while t > 100 {{",
+            f"        t = t - 100;",
+            f"    }}",
+            f"    return t;",
+            f"}}",
+        ]
+    lines.append("var total: i32 = 0;")
+    lines += [f"total = total + step{index}({index}, total);" for index in range(procs)]
+    lines.append("println(total);")
+    return "\n".join(lines) + "\n"
+
+def from_source(path: str) -> float:
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        program = parse_code(f.read())
+    compiler = BytecodeCompiler()
+    bytecode = compiler.compile_program(program)
+    for func_def in [instr.arg for instr in bytecode if instr.opcode.name == "DEFINE_FUNC"]:
+        compiler.compile_function(func_def, func_def.body)
+    return time.perf_counter() - start
+
+def from_compiled(path: str) -> float:
+    start = time.perf_counter()
+    CompiledProgram(compiled_path(path))
+    return time.perf_counter() - start
+
+def run_process(path: str) -> tuple:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, LYRA, "--bytecode", path],
+                            capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    return time.perf_counter() - start, result.stdout
+
+def best(fn, path: str, runs: int = 20) -> float:
+    return min(fn(path) for _ in range(runs))
+
+def main():
+    print("="*80)
+    print("BENCHMARK: .lyrc COLD START")
+    print("="*80)
+    print()
+
+    workdir = tempfile.mkdtemp(prefix="lyrc-bench-")
+    try:
+        programs = {"perf_benchmark.lyra": None, "50 procs": 50, "400 procs": 400}
+        for label, procs in programs.items():
+            path = os.path.join(workdir, f"prog{procs or 0}.lyra")
+            if procs is None:
+                shutil.copy(os.path.join(ROOT, "examples_main", "perf_benchmark.lyra"), path)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(generated_program(procs))
+
+            source_lines = sum(1 for _ in open(path, encoding="utf-8"))
+            cold = [run_process(path) for _ in range(5)]
+            instructions, count = compile_file(path)
+            warm = [run_process(path) for _ in range(5)]
+            assert cold[0][1] == warm[0][1], "outputs differ"
+            parse = best(from_source, path)
+            load = best(from_compiled, path)
+
+            print(f"{label}: {source_lines} lines, {count} procs, {instructions} instructions, "
+                  f"{os.path.getsize(compiled_path(path)):,} byte .lyrc")
+            print("-"*80)
+            print(f"{'lex + parse + compile':<24} {parse*1000:8.2f}ms")
+            print(f"{'load .lyrc':<24} {load*1000:8.2f}ms   {parse/load:.1f}x faster")
+            cold_ms = statistics.median(t for t, _ in cold) * 1000
+            warm_ms = statistics.median(t for t, _ in warm) * 1000
+            print(f"{'process, source':<24} {cold_ms:8.2f}ms")
+            print(f"{'process, .lyrc':<24} {warm_ms:8.2f}ms   {cold_ms - warm_ms:+.2f}ms saved")
+            print()
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    main()
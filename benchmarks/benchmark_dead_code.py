@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Dead code elimination on the tests/ corpus
+Nodes removed by lyra_passes.eliminate_dead_code and wall time with and without it
+"""
+
+import glob
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_passes import eliminate_dead_code, node_count
+
+def run_once(source: str, eliminate: bool) -> tuple:
+    """(seconds, output, nodes before, report) for one parse + run"""
+    program = parse_code(source)
+    before = node_count(program.statements)
+    report = eliminate_dead_code(program) if eliminate else None
+    ctx = ExecutionContext(output=io.StringIO(), input_stream=io.StringIO())
+    interpreter = Interpreter(context=ctx)
+    start = time.perf_counter()
+    try:
+        interpreter.interpret(program, ctx)
+    except Exception as e:
+        ctx.output.write(f"{type(e).__name__}: {e}\n")
+    return time.perf_counter() - start, ctx.output.getvalue(), before, report
+
+def main():
+    print("="*80)
+    print("BENCHMARK: DEAD CODE ELIMINATION (tests/ corpus)")
+    print("="*80)
+    print()
+    print(f"{'program':<34} {'nodes':>6} {'removed':>8} {'plain':>10} {'pruned':>10} {'speedup':>8}")
+    print("-"*80)
+    total_nodes = total_removed = 0
+    total_plain = total_pruned = 0.0
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "*.lyra"))):
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        try:
+            parse_code(source)
+        except Exception:
+            continue  # Parse-error tests
+        plain = pruned = float("inf")
+        # Best of 15, interleaved so both variants see the same noise
+        for _ in range(15):
+            elapsed, plain_out, nodes, _ = run_once(source, eliminate=False)
+            plain = min(plain, elapsed)
+            elapsed, pruned_out, _, report = run_once(source, eliminate=True)
+            pruned = min(pruned, elapsed)
+            assert plain_out == pruned_out, f"outputs differ: {path}"
+        total_nodes += nodes
+        total_removed += report.nodes_removed
+        total_plain += plain
+        total_pruned += pruned
+        if report.nodes_removed:
+            print(f"{os.path.basename(path):<34} {nodes:>6} {report.nodes_removed:>8} "
+                  f"{plain*1000:8.2f}ms {pruned*1000:8.2f}ms {plain/pruned:7.2f}x")
+    print("-"*80)
+    print(f"{'total (all programs)':<34} {total_nodes:>6} {total_removed:>8} "
+          f"{total_plain*1000:8.2f}ms {total_pruned*1000:8.2f}ms {total_plain/total_pruned:7.2f}x")
+
+if __name__ == '__main__':
+    main()
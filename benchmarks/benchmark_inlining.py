@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: AST inlining of small procs
+Counts proc calls executed and wall time with and without the inliner
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_passes import inline_procs
+
+PROGRAM = """
+proc sq(x: i32) -> i32 {
+    return x * x;
+}
+proc dist2(x1: i32, y1: i32, x2: i32, y2: i32) -> i32 {
+    var dx: i32 = x2 - x1;
+    var dy: i32 = y2 - y1;
+    return dx * dx + dy * dy;
+}
+proc is_even(n: i32) -> i32 {
+    return n % 2 == 0;
+}
+proc clamp(v: i32, hi: i32) -> i32 {
+    return min(v, hi);
+}
+
+var i: i32 = 0;
+var total: i32 = 0;
+var evens: i32 = 0;
+while i < 2000 {
+    total = total + clamp(dist2(0, 0, i, 3), 1000000) + sq(i);
+    evens = evens + is_even(i);
+    i = i + 1;
+}
+println(total, evens);
+"""
+
+class CountingInterpreter(Interpreter):
+    """Counts proc calls made from expressions"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.proc_calls = 0
+
+    def call_user_function(self, cell, args, ctx):
+        self.proc_calls += 1
+        return super().call_user_function(cell, args, ctx)
+
+def run_once(inline: bool) -> tuple:
+    program = parse_code(PROGRAM)
+    report = inline_procs(program) if inline else None
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0  # Measure calls, not memo hits
+    interpreter = CountingInterpreter(context=ctx)
+    start = time.perf_counter()
+    interpreter.interpret(program, ctx)
+    elapsed = time.perf_counter() - start
+    return elapsed, interpreter.proc_calls, ctx.output.getvalue().strip(), report
+
+def time_runs(runs: int = 15) -> tuple:
+    """Best of runs for each variant, interleaved so both see the same noise"""
+    plain = inlined = None
+    for _ in range(runs):
+        result = run_once(inline=False)
+        plain = result if plain is None or result[0] < plain[0] else plain
+        result = run_once(inline=True)
+        inlined = result if inlined is None or result[0] < inlined[0] else inlined
+    return plain, inlined
+
+def main():
+    print("="*80)
+    print("BENCHMARK: PROC INLINING")
+    print("="*80)
+    print()
+
+    (plain, plain_calls, plain_out, _), (inlined, inlined_calls, inlined_out, report) = time_runs()
+    assert plain_out == inlined_out, "outputs differ"
+
+    print("Helpers sq, dist2, is_even, clamp in a 2000-iteration loop (best of 15)")
+    print(report.to_text())
+    print("-"*80)
+    print(f"Without inlining:  {plain*1000:8.2f}ms  {plain_calls:6d} proc calls")
+    print(f"With inlining:     {inlined*1000:8.2f}ms  {inlined_calls:6d} proc calls")
+    print(f"Calls eliminated:  {plain_calls - inlined_calls}")
+    print(f"Speedup:           {plain/inlined:.2f}x")
+    print(f"Output:            {inlined_out}")
+
+if __name__ == '__main__':
+    main()
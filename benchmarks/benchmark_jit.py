@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Tier-2 JIT (hot procs compiled to Python by lyra_jit)
+1. Tier-up: per-call time of one proc while its calls and loop iterations
+   climb to DEFAULT_JIT_THRESHOLD, then after it runs compiled
+2. Whole programs on the tree-walker with the JIT off (--jit-threshold 0),
+   at the default threshold, and compiling every proc on its first call
+   (outputs compared; memoization off so every call runs)
+"""
+
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+sys.setrecursionlimit(10000)
+
+from lyra_interpreter import DEFAULT_JIT_THRESHOLD, ExecutionContext, Interpreter, parse_code
+
+TIER_UP = """
+proc step(n) {
+    var c: i32 = 0;
+    var k: i32 = 0;
+    while k < n {
+        if k % 3 == 0 {
+            c = c + k;
+        }
+        k = k + 1;
+    }
+    return c;
+}
+"""
+
+PROGRAMS = {
+    "fib(20) (calls)": """
+proc fib(n) {
+    if n < 2 {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+println(fib(20));
+""",
+    "proc loop (count_to x 300)": """
+proc count_to(n) {
+    var c: i32 = 0;
+    var k: i32 = 0;
+    while k < n {
+        if k % 3 == 0 {
+            c = c + 1;
+        }
+        k = k + 1;
+    }
+    return c;
+}
+var r: i32 = 0;
+var t: i32 = 0;
+while t < 300 {
+    r = r + count_to(200);
+    t = t + 1;
+}
+println(r);
+""",
+    "bubble sort (40 items x 20)": """
+proc sort(n) {
+    var arr: [i32] = [0, 39, 38, 37, 36, 35, 34, 33, 32, 31, 30, 29, 28, 27, 26, 25, 24, 23, 22, 21, 20, 19, 18, 17, 16, 15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1];
+    var i: i32 = 0;
+    while i < n {
+        var j: i32 = 0;
+        while j < n - i - 1 {
+            if arr[j] > arr[j + 1] {
+                var tmp: i32 = arr[j];
+                arr[j] = arr[j + 1];
+                arr[j + 1] = tmp;
+            }
+            j = j + 1;
+        }
+        i = i + 1;
+    }
+    return arr[0] + arr[n - 1];
+}
+var total: i32 = 0;
+for round in 20 {
+    total = total + sort(40);
+}
+println(total);
+""",
+    "collatz steps (1..2000)": """
+proc steps(x) {
+    var s: i32 = 0;
+    while x != 1 {
+        if x % 2 == 0 {
+            x = x / 2;
+        } else {
+            x = 3 * x + 1;
+        }
+        s = s + 1;
+    }
+    return s;
+}
+var total: i32 = 0;
+var start: i32 = 1;
+while start <= 2000 {
+    total = total + steps(start);
+    start = start + 1;
+}
+println(total);
+""",
+}
+
+def context(threshold: int) -> ExecutionContext:
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0  # Every call really runs
+    ctx.jit_threshold = threshold
+    return ctx
+
+def tier_up() -> None:
+    """Time each call of step(50): 51 toward the threshold per call"""
+    program = parse_code(TIER_UP)
+    ctx = context(DEFAULT_JIT_THRESHOLD)
+    interpreter = Interpreter(context=ctx)
+    interpreter.interpret(program, ctx)
+    cell = ctx.function_cells["step"]
+    times = []
+    for _ in range(60):
+        start = time.perf_counter()
+        interpreter.call_user_function(cell, [50.0], ctx)
+        times.append(time.perf_counter() - start)
+    switch = cell.func_def.hotness // 51  # Interpreted calls before the compiling one
+    print(f"step(50): {DEFAULT_JIT_THRESHOLD} calls + iterations -> compiled on call {switch + 1}")
+    print("-"*80)
+    interpreted, compiled = times[1:switch], times[switch + 1:]
+    print(f"{'interpreted':<16} {min(interpreted)*1e6:9.1f}us per call (best of {len(interpreted)})")
+    print(f"{'compiling call':<16} {times[switch]*1e6:9.1f}us")
+    print(f"{'compiled':<16} {min(compiled)*1e6:9.1f}us per call (best of {len(compiled)})")
+    print(f"{'':<16} {min(interpreted)/min(compiled):9.2f}x faster after tier-up")
+
+def run(code: str, threshold: int) -> tuple:
+    program = parse_code(code)
+    ctx = context(threshold)
+    start = time.perf_counter()
+    Interpreter(context=ctx).interpret(program, ctx)
+    elapsed = time.perf_counter() - start
+    compiled = sum(1 for cell in ctx.function_cells.values() if cell.func_def.jit)
+    return elapsed, ctx.output.getvalue().strip(), compiled
+
+def main():
+    print("="*80)
+    print("BENCHMARK: TIER-2 JIT")
+    print("="*80)
+    print()
+    tier_up()
+    print()
+
+    modes = [("Interpreted", 0), (f"Tier-up ({DEFAULT_JIT_THRESHOLD})", DEFAULT_JIT_THRESHOLD),
+             ("Compiled (1)", 1)]
+    for label, code in PROGRAMS.items():
+        best = [float("inf")] * len(modes)
+        outputs = [""] * len(modes)
+        compiled = [0] * len(modes)
+        # Best of 3, interleaved
+        for _ in range(3):
+            for i, (_, threshold) in enumerate(modes):
+                elapsed, outputs[i], compiled[i] = run(code, threshold)
+                best[i] = min(best[i], elapsed)
+        assert len(set(outputs)) == 1, f"outputs differ: {outputs}"
+        print(f"{label}  -> {outputs[0]}")
+        print("-"*80)
+        for (name, _), elapsed, count in zip(modes, best, compiled):
+            print(f"{name:<20} {elapsed*1000:9.2f}ms  {count} procs compiled")
+        print(f"{'':<20} {best[0]/best[1]:9.2f}x faster with tier-up, {best[0]/best[2]:.2f}x compiled from the start")
+        print()
+
+if __name__ == '__main__':
+    main()
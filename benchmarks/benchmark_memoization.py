@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Transparent memoization of pure procs
+Naive recursive fib(n): proc bodies executed and wall time, memo on vs off
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+
+FIB = """
+proc fib(n: i32) -> i32 {
+    if n <= 1 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+println(fib(%d));
+"""
+
+class CountingInterpreter(Interpreter):
+    """Counts proc bodies actually executed (memo hits skip the body)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bodies_run = 0
+
+    def run_user_function(self, cell, args, ctx, statement=False):
+        self.bodies_run += 1
+        return super().run_user_function(cell, args, ctx, statement)
+
+def run(n: int, memo_size: int) -> tuple:
+    program = parse_code(FIB % n)
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = memo_size
+    interpreter = CountingInterpreter(context=ctx)
+    start = time.perf_counter()
+    interpreter.interpret(program, ctx)
+    elapsed = time.perf_counter() - start
+    hit_rate = ctx.memo.stats()['hit_rate'] if ctx.memo else 0.0
+    return elapsed, interpreter.bodies_run, hit_rate, ctx.output.getvalue().strip()
+
+def main():
+    print("="*80)
+    print("BENCHMARK: PURE PROC MEMOIZATION (naive fib)")
+    print("="*80)
+    print()
+    print(f"{'n':>4} {'memo off':>12} {'bodies':>9} {'memo on':>12} {'bodies':>7} {'hit rate':>9}  result")
+    print("-"*80)
+    for n in (10, 15, 20, 22, 25, 30, 60, 100):
+        if n <= 22:
+            off, off_bodies, _, off_out = run(n, memo_size=0)
+            off_text = f"{off*1000:10.2f}ms {off_bodies:9d}"
+        else:
+            off_out = None
+            off_text = f"{'(skipped)':>12} {'':>9}"
+        on, on_bodies, hit_rate, on_out = run(n, memo_size=4096)
+        assert off_out is None or off_out == on_out, "outputs differ"
+        print(f"{n:>4} {off_text} {on*1000:10.2f}ms {on_bodies:7d} {hit_rate:9.1%}  {on_out}")
+
+if __name__ == '__main__':
+    main()
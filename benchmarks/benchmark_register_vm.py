@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Register VM vs stack VM on loop-heavy code
+Runs each program on the tree-walker, on FastBytecodeVM (the threaded
+stack VM behind --bytecode) and on RegisterVM (--register), and reports
+instructions dispatched and wall time
+"""
+
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_bytecode import BytecodeCompiler
+from fast_bytecode_vm import FastBytecodeVM
+from lyra_register_vm import RegisterVM, compile_register_program
+
+PROGRAMS = {
+    "sum loop (100k)": """
+var sum: i32 = 0;
+var i: i32 = 0;
+while i < 100000 {
+    sum = sum + i;
+    i = i + 1;
+}
+println(sum);
+""",
+    "nested loops (300x300)": """
+var total: i32 = 0;
+var i: i32 = 0;
+while i < 300 {
+    var j: i32 = 0;
+    while j < 300 {
+        total = total + i * j;
+        j = j + 1;
+    }
+    i = i + 1;
+}
+println(total);
+""",
+    "array updates (2000 x 10)": """
+var arr: [i32] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0];
+var round: i32 = 0;
+while round < 2000 {
+    var k: i32 = 0;
+    while k < 10 {
+        arr[k] = arr[k] + k;
+        k = k + 1;
+    }
+    round = round + 1;
+}
+var sum: i32 = 0;
+for v in arr {
+    sum = sum + v;
+}
+println(sum);
+""",
+    "collatz steps (1..3000)": """
+var steps: i32 = 0;
+var start: i32 = 1;
+while start <= 3000 {
+    var x: i32 = start;
+    while x != 1 {
+        if x % 2 == 0 {
+            x = x / 2;
+        } else {
+            x = 3 * x + 1;
+        }
+        steps = steps + 1;
+    }
+    start = start + 1;
+}
+println(steps);
+""",
+}
+
+def run_tree(code: str) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO())
+    start = time.perf_counter()
+    Interpreter(context=ctx).interpret(program, ctx)
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), 0
+
+def run_stack(code: str) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO())
+    start = time.perf_counter()
+    compiler = BytecodeCompiler()
+    bytecode = compiler.compile_program(program)
+    vm = FastBytecodeVM(bytecode, compiler.constants, compiler.get_names(), ctx, compiler=compiler)
+    vm.execute()
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), vm.cycles
+
+def run_register(code: str) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO())
+    start = time.perf_counter()
+    vm = RegisterVM(compile_register_program(program), ctx)
+    vm.execute()
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), vm.cycles
+
+def main():
+    print("="*80)
+    print("BENCHMARK: REGISTER VM vs STACK VM")
+    print("="*80)
+    print()
+
+    runners = [("Tree-walker", run_tree), ("Stack VM", run_stack), ("Register VM", run_register)]
+    for label, code in PROGRAMS.items():
+        best = [float("inf")] * len(runners)
+        outputs = [""] * len(runners)
+        dispatches = [0] * len(runners)
+        # Best of 3, interleaved so every backend sees the same noise
+        for _ in range(3):
+            for i, (_, run) in enumerate(runners):
+                elapsed, outputs[i], dispatches[i] = run(code)
+                best[i] = min(best[i], elapsed)
+        assert len(set(outputs)) == 1, f"outputs differ: {outputs}"
+        print(f"{label}  -> {outputs[0]}")
+        print("-"*80)
+        for (name, _), elapsed, count in zip(runners, best, dispatches):
+            dispatched = f"{count:>10,} dispatches" if count else ""
+            print(f"{name:<12} {elapsed*1000:9.2f}ms  {dispatched}")
+        print(f"{'Register VM':<12} {dispatches[1]/dispatches[2]:9.2f}x fewer dispatches, "
+              f"{best[1]/best[2]:.2f}x faster than the stack VM, {best[0]/best[2]:.2f}x than the tree-walker")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Cold interpreter launch vs warm `lyra --server`
+Measures end-to-end latency of running a short script
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTERPRETER = os.path.join(ROOT, "lyra_interpreter", "lyra_interpreter.py")
+CLIENT = os.path.join(ROOT, "lyra_interpreter", "lyra_client.py")
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+
+from lyra_client import run_remote
+
+HELLO = 'print("Hello, Lyra!");\n'
+
+def time_command(argv: list, iterations: int) -> float:
+    """Average wall time of running a command to completion"""
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, check=False)
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+def time_in_process_client(path: str, socket_path: str, iterations: int) -> float:
+    """Average round trip through the socket, without Python startup"""
+    times = []
+    with open(os.devnull, 'w') as sink:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            run_remote(path, socket_path=socket_path, stdout=sink)
+            times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+def wait_for_socket(path: str, timeout: float = 10.0) -> None:
+    deadline = time.time() + timeout
+    while not os.path.exists(path):
+        if time.time() > deadline:
+            raise RuntimeError("server did not start")
+        time.sleep(0.05)
+
+def main():
+    print("="*80)
+    print("BENCHMARK: COLD START vs WARM SERVER")
+    print("="*80)
+    print()
+
+    iterations = 20
+    workdir = tempfile.mkdtemp(prefix="lyra-bench-")
+    script = os.path.join(workdir, "hello.lyra")
+    socket_path = os.path.join(workdir, "lyra.sock")
+    with open(script, 'w') as f:
+        f.write(HELLO)
+
+    python_only = time_command([sys.executable, "-c", "pass"], iterations)
+    cold = time_command([sys.executable, INTERPRETER, script], iterations)
+
+    server = subprocess.Popen([sys.executable, INTERPRETER, "--server", "--socket", socket_path],
+                              stdout=subprocess.DEVNULL)
+    try:
+        wait_for_socket(socket_path)
+        warm = time_command([sys.executable, CLIENT, "--socket", socket_path, script], iterations)
+        round_trip = time_in_process_client(script, socket_path, iterations)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"Script: hello world ({iterations} runs each)")
+    print("-"*80)
+    print(f"Bare Python startup:          {python_only*1000:8.2f}ms")
+    print(f"Cold `lyra file.lyra`:        {cold*1000:8.2f}ms")
+    print(f"Warm client -> server:        {warm*1000:8.2f}ms")
+    print(f"Socket round trip only:       {round_trip*1000:8.2f}ms")
+    print()
+    if warm > 0:
+        print(f"Warm speedup:                 {cold / warm:.2f}x")
+    print(f"Interpreter startup saved:    {(cold - warm)*1000:8.2f}ms per run")
+
+if __name__ == '__main__':
+    main()
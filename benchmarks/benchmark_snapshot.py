@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Session snapshots (--snapshot / --resume)
+Re-running a data-preparation phase vs resuming from its .lyrasnap file
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import parse_code, run_program
+import lyra_snapshot
+from lyra_snapshot import Snapshot, save_snapshot
+
+# Init phase: 2^doublings floats filled by a proc, plus a small lookup table
+INIT = """
+proc cell(n: i32) -> i32 {
+    return n * 0.5 + 1;
+}
+var data: [i32] = [0.0];
+var k: i32 = 0;
+while k < %d {
+    data = data + data;
+    k = k + 1;
+}
+var i: i32 = 0;
+while i < len(data) {
+    data[i] = cell(i);
+    i = i + 1;
+}
+var names: [str] = ["lo", "mid", "hi"];
+"""
+
+MAIN = """
+println(len(data), data[7], names[2], cell(3));
+"""
+
+def run(source: str, resume=None) -> tuple:
+    ctx = run_program(parse_code(source), output=io.StringIO(), resume=resume)
+    return ctx, ctx.output.getvalue()
+
+def best(fn, runs: int = 5) -> float:
+    elapsed = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def main():
+    print("="*80)
+    print("BENCHMARK: SESSION SNAPSHOTS (init phase re-run vs --resume)")
+    print("="*80)
+    print()
+    print(f"{'elements':>9} {'snapshot':>10} {'init+main':>11} {'resume+main':>12} {'speedup':>8} "
+          f"{'no mmap':>10}")
+    print("-"*80)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "init.lyrasnap")
+        for doublings in (10, 14, 17):
+            init = INIT % doublings
+            ctx, _ = run(init)
+            save_snapshot(ctx, path)
+            size = os.path.getsize(path)
+
+            _, expected = run(init + MAIN)
+            _, resumed = run(MAIN, Snapshot(path))
+            assert expected == resumed, "outputs differ"
+
+            cold = best(lambda: run(init + MAIN), runs=3)
+            warm = best(lambda: run(MAIN, Snapshot(path)))
+
+            # Same state with every array inside the marshal payload instead
+            limit = lyra_snapshot.BLOB_MIN_LENGTH
+            lyra_snapshot.BLOB_MIN_LENGTH = sys.maxsize
+            try:
+                save_snapshot(ctx, path)
+                inline = best(lambda: run(MAIN, Snapshot(path)))
+            finally:
+                lyra_snapshot.BLOB_MIN_LENGTH = limit
+            print(f"{2 ** doublings:>9} {size / 1024:8.0f}KB {cold * 1000:9.1f}ms {warm * 1000:10.2f}ms "
+                  f"{cold / warm:7.0f}x {inline * 1000:8.2f}ms")
+    print()
+    print("no mmap: the same snapshot with arrays stored in the marshal payload")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Stackless (heap call stack) interpreter vs the recursive tree-walker
+Throughput on call-heavy and loop-heavy programs, and deepest non-tail recursion
+
+Usage:
+  python benchmarks/benchmark_stackless.py
+  python benchmarks/benchmark_stackless.py --depth N   # one stackless run (used internally)
+"""
+
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_stackless import StacklessInterpreter
+
+THROUGHPUT = {
+    "fib(18)": """
+proc fib(n: i32) -> i32 {
+    if n <= 1 { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+println(fib(18));
+""",
+    "fact(100) x 50": """
+proc fact(n: i32) -> i32 {
+    if n <= 1 { return 1; }
+    return n * fact(n - 1);
+}
+var i: i32 = 0;
+var total: i32 = 0;
+while i < 50 {
+    total = total + fact(100) / fact(99);
+    i = i + 1;
+}
+println(total);
+""",
+    "loop 20000 (no calls)": """
+var i: i32 = 0;
+var total: i32 = 0;
+while i < 20000 {
+    if i % 3 == 0 { total = total + i; }
+    i = i + 1;
+}
+println(total);
+""",
+}
+
+DEPTH = """
+proc depth(n: i32) -> i32 {
+    if n == 0 { return 0; }
+    return 1 + depth(n - 1);
+}
+println(depth(%d));
+"""
+
+def run(source: str, interpreter_class: type) -> tuple:
+    """(seconds, output, interpreter) for one run with memoization off"""
+    program = parse_code(source)
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0
+    interpreter = interpreter_class(context=ctx)
+    start = time.perf_counter()
+    try:
+        interpreter.interpret(program, ctx)
+        output = ctx.output.getvalue().strip()
+    except RecursionError:
+        output = "RecursionError"
+    return time.perf_counter() - start, output, interpreter
+
+def best_of(source: str, runs: int = 7) -> tuple:
+    """Best times for both interpreters, runs interleaved against noise"""
+    tree = stackless = float("inf")
+    for _ in range(runs):
+        elapsed, tree_out, _ = run(source, Interpreter)
+        tree = min(tree, elapsed)
+        elapsed, stackless_out, _ = run(source, StacklessInterpreter)
+        stackless = min(stackless, elapsed)
+        assert tree_out == stackless_out, "outputs differ"
+    return tree, stackless
+
+def tree_max_depth() -> int:
+    low, high = 1, 2
+    while run(DEPTH % high, Interpreter)[1] != "RecursionError":
+        low, high = high, high * 2
+    while high - low > 1:
+        mid = (low + high) // 2
+        if run(DEPTH % mid, Interpreter)[1] == "RecursionError":
+            high = mid
+        else:
+            low = mid
+    return low
+
+def depth_run(n: int) -> None:
+    """Child process: one stackless depth run, peak RSS measured in isolation"""
+    elapsed, output, interpreter = run(DEPTH % n, StacklessInterpreter)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed} {peak_mb} {interpreter.max_stack} {output}")
+
+def main():
+    if "--depth" in sys.argv:
+        depth_run(int(sys.argv[sys.argv.index("--depth") + 1]))
+        return
+
+    print("="*80)
+    print("BENCHMARK: STACKLESS INTERPRETER (heap-allocated Lyra call stack)")
+    print("="*80)
+    print()
+    print("Throughput (best of 7, memoization off)")
+    print(f"{'program':<24} {'tree-walking':>14} {'stackless':>12} {'ratio':>8}")
+    print("-"*80)
+    for name, source in THROUGHPUT.items():
+        tree, stackless = best_of(source)
+        print(f"{name:<24} {tree*1000:12.2f}ms {stackless*1000:10.2f}ms {stackless/tree:7.2f}x")
+
+    print()
+    print("Non-tail recursion depth: depth(n) = 1 + depth(n - 1)")
+    print("-"*80)
+    print(f"Tree-walking: deepest n = {tree_max_depth()} "
+          f"(Python recursion limit {sys.getrecursionlimit()})")
+    print()
+    print(f"{'n':>9} {'stackless':>12} {'per call':>10} {'peak RSS':>10} {'steps':>9}  result")
+    for n in (1_000, 10_000, 100_000, 1_000_000):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--depth", str(n)],
+                              capture_output=True, text=True)
+        elapsed, peak_mb, steps, output = proc.stdout.split(maxsplit=3)
+        elapsed = float(elapsed)
+        print(f"{n:>9} {elapsed*1000:10.1f}ms {elapsed/n*1e6:8.2f}us {float(peak_mb):8.0f}MB "
+              f"{steps:>9}  {output.strip()}")
+
+if __name__ == '__main__':
+    main()
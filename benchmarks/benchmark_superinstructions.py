@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Profile-guided superinstructions on the stack VM
+1. Opcode pair/triple histogram (BytecodeVM.enable_histogram) over the
+   test corpus and the loop programs, compiled without fusion: the
+   sequences SUPERINSTRUCTIONS was picked from
+2. Dispatch count and wall time on FastBytecodeVM with and without
+   fuse_superinstructions
+"""
+
+import glob
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lyra_interpreter"))
+sys.setrecursionlimit(10000)
+
+from lyra_interpreter import ExecutionContext, parse_code
+from lyra_bytecode import BytecodeCompiler, BytecodeVM, SUPERINSTRUCTIONS
+from fast_bytecode_vm import FastBytecodeVM
+
+PROGRAMS = {
+    "sum loop (50k)": """
+var sum: i32 = 0;
+var i: i32 = 0;
+while i < 50000 {
+    sum = sum + i;
+    i = i + 1;
+}
+println(sum);
+""",
+    "nested loops (200x200)": """
+var total: i32 = 0;
+var i: i32 = 0;
+while i < 200 {
+    var j: i32 = 0;
+    while j < 200 {
+        total = total + i * j;
+        j = j + 1;
+    }
+    i = i + 1;
+}
+println(total);
+""",
+    "collatz steps (1..1000)": """
+var steps: i32 = 0;
+var start: i32 = 1;
+while start <= 1000 {
+    var x: i32 = start;
+    while x != 1 {
+        if x % 2 == 0 {
+            x = x / 2;
+        } else {
+            x = 3 * x + 1;
+        }
+        steps = steps + 1;
+    }
+    start = start + 1;
+}
+println(steps);
+""",
+    "proc loop (count_to x 200)": """
+proc count_to(n) {
+    var c: i32 = 0;
+    var k: i32 = 0;
+    while k < n {
+        if k % 3 == 0 {
+            c = c + 1;
+        }
+        k = k + 1;
+    }
+    return c;
+}
+var r: i32 = 0;
+var t: i32 = 0;
+while t < 200 {
+    r = r + count_to(100);
+    t = t + 1;
+}
+println(r);
+""",
+}
+
+def run(vm_class: type, code: str, fuse: bool, histogram: bool = False) -> tuple:
+    program = parse_code(code)
+    ctx = ExecutionContext(output=io.StringIO(), input_stream=io.StringIO())
+    ctx.memo_size = 0  # Every call really runs
+    start = time.perf_counter()
+    compiler = BytecodeCompiler(superinstructions=fuse)
+    bytecode = compiler.compile_program(program)
+    vm = vm_class(bytecode, compiler.constants, compiler.get_names(), ctx, compiler=compiler)
+    if histogram:
+        vm.enable_histogram()
+    try:
+        vm.execute()
+    except Exception:
+        pass  # Corpus programs that end in an error still count
+    return time.perf_counter() - start, ctx.output.getvalue(), vm
+
+def histogram() -> None:
+    sources = list(PROGRAMS.values())
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "*.lyra"))):
+        with open(path) as f:
+            sources.append(f.read())
+    pairs, triples, total = Counter(), Counter(), 0
+    for code in sources:
+        try:
+            _, _, vm = run(BytecodeVM, code, fuse=False, histogram=True)
+        except Exception:
+            continue  # Does not parse
+        pairs.update(vm.pairs)
+        triples.update(vm.triples)
+        total += vm.cycles
+    print(f"Dispatches profiled: {total:,}")
+    for title, counts in (("Top pairs", pairs), ("Top triples", triples)):
+        print()
+        print(title)
+        print("-"*80)
+        for sequence, count in counts.most_common(12):
+            names = " ".join(opcode.name for opcode in sequence)
+            print(f"{count:>10,} {count/total:6.1%}  {names}")
+    print()
+    print("Fused: " + ", ".join(fused_op.name for fused_op, _ in SUPERINSTRUCTIONS))
+
+def main():
+    print("="*80)
+    print("BENCHMARK: SUPERINSTRUCTIONS")
+    print("="*80)
+    print()
+    histogram()
+    print()
+
+    for label, code in PROGRAMS.items():
+        best = {False: float("inf"), True: float("inf")}
+        outputs, dispatches = {}, {}
+        # Best of 3, interleaved
+        for _ in range(3):
+            for fuse in (False, True):
+                elapsed, outputs[fuse], vm = run(FastBytecodeVM, code, fuse)
+                best[fuse] = min(best[fuse], elapsed)
+                dispatches[fuse] = vm.cycles
+        assert outputs[False] == outputs[True], "outputs differ"
+        print(f"{label}  -> {outputs[True].strip()}")
+        print("-"*80)
+        for fuse, name in ((False, "Plain"), (True, "Fused")):
+            print(f"{name:<8} {dispatches[fuse]:>10,} dispatches  {best[fuse]*1000:8.2f}ms")
+        print(f"{'':<8} {dispatches[False]/dispatches[True]:>10.2f}x fewer dispatches, "
+              f"{best[False]/best[True]:.2f}x faster")
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Self tail-call elimination
+Accumulator recursion sum_to(n, acc) run as a loop vs as real nested calls
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, ReturnStmt, parse_code
+from lyra_passes import iter_nodes
+
+SUM_TO = """
+proc sum_to(n: i32, acc: i32) -> i32 {
+    if n == 0 { return acc; }
+    return sum_to(n - 1, acc + n);
+}
+println(sum_to(%d, 0));
+"""
+
+def run(n: int, tail_calls: bool) -> tuple:
+    """(seconds, output) for one run; output is the error text on failure"""
+    program = parse_code(SUM_TO % n)
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0
+    interpreter = Interpreter(context=ctx)
+    if not tail_calls:
+        # Clear the flags each time a proc is bound, so every call nests
+        define = ctx.define_function
+        def define_function(func_def):
+            define(func_def)
+            for node in iter_nodes(func_def.body):
+                if isinstance(node, ReturnStmt):
+                    node.tail_call = False
+        ctx.define_function = define_function
+    start = time.perf_counter()
+    try:
+        interpreter.interpret(program, ctx)
+        output = ctx.output.getvalue().strip()
+    except RecursionError:
+        output = "RecursionError"
+    return time.perf_counter() - start, output
+
+def max_depth(tail_calls: bool) -> int:
+    """Largest n (power of two steps, then bisection) that still runs"""
+    low, high = 1, 2
+    while run(high, tail_calls)[1] != "RecursionError":
+        low, high = high, high * 2
+    while high - low > 1:
+        mid = (low + high) // 2
+        if run(mid, tail_calls)[1] == "RecursionError":
+            high = mid
+        else:
+            low = mid
+    return low
+
+def main():
+    print("="*80)
+    print("BENCHMARK: SELF TAIL-CALL ELIMINATION (sum_to accumulator)")
+    print("="*80)
+    print()
+    print(f"Deepest n without tail calls: {max_depth(False)} "
+          f"(Python recursion limit {sys.getrecursionlimit()})")
+    print()
+    print(f"{'n':>9} {'nested calls':>14} {'tail loop':>12} {'per call':>10}  result")
+    print("-"*80)
+    for n in (50, 100, 10_000, 100_000, 1_000_000):
+        nested, nested_out = run(n, tail_calls=False)
+        looped, looped_out = run(n, tail_calls=True)
+        if nested_out == "RecursionError":
+            nested_text = f"{'RecursionError':>14}"
+        else:
+            assert nested_out == looped_out, "outputs differ"
+            nested_text = f"{nested*1000:12.2f}ms"
+        print(f"{n:>9} {nested_text} {looped*1000:10.2f}ms {looped/n*1e6:8.2f}us  {looped_out}")
+
+if __name__ == '__main__':
+    main()
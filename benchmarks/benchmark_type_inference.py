@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Annotation-seeded type inference
+Wall time with generic operators vs operators specialized by lyra_passes.infer_types
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lyra_interpreter"))
+
+from lyra_interpreter import Interpreter, ExecutionContext, parse_code
+from lyra_passes import infer_types
+
+PROGRAMS = {
+    "counting loop": """
+var i: i32 = 0;
+var total: i32 = 0;
+var hits: i32 = 0;
+while i < 20000 {
+    if i % 3 == 0 || i % 5 == 0 {
+        total = total + i;
+        hits = hits + 1;
+    }
+    i = i + 1;
+}
+println(total, hits);
+""",
+    "typed params": """
+proc score(a: i32, b: i32, c: i32) -> i32 {
+    var s: i32 = a + b + c;
+    var k: i32 = 0;
+    while k < 10 {
+        if s > 100 && !(k == 3) {
+            s = s + a;
+        }
+        s = s + k;
+        k = k + 1;
+    }
+    return s;
+}
+var i: i32 = 0;
+var total: i32 = 0;
+while i < 500 {
+    total = total + score(i, i + 1, 7);
+    i = i + 1;
+}
+println(total);
+""",
+    "string building": """
+proc label(name: str, n: i32) -> i32 {
+    var text: str = name + ":" + n;
+    var k: i32 = 0;
+    while k < 20 {
+        text = text + "." + k;
+        k = k + 1;
+    }
+    return len(text);
+}
+var i: i32 = 0;
+var total: i32 = 0;
+while i < 300 {
+    total = total + label("item", i);
+    i = i + 1;
+}
+println(total);
+""",
+}
+
+def run_once(source: str, typed: bool) -> tuple:
+    program = parse_code(source)
+    report = infer_types(program) if typed else None
+    ctx = ExecutionContext(output=io.StringIO())
+    ctx.memo_size = 0  # Measure the operators, not memo hits
+    interpreter = Interpreter(context=ctx)
+    start = time.perf_counter()
+    interpreter.interpret(program, ctx)
+    return time.perf_counter() - start, ctx.output.getvalue().strip(), report
+
+def main():
+    print("="*80)
+    print("BENCHMARK: TYPE INFERENCE (specialized operators)")
+    print("="*80)
+    print()
+    print(f"{'program':<18} {'generic':>10} {'typed':>10} {'speedup':>8}  specialized")
+    print("-"*80)
+    for name, source in PROGRAMS.items():
+        generic = typed = float("inf")
+        # Best of 15, interleaved so both variants see the same noise
+        for _ in range(15):
+            elapsed, generic_out, _ = run_once(source, typed=False)
+            generic = min(generic, elapsed)
+            elapsed, typed_out, report = run_once(source, typed=True)
+            typed = min(typed, elapsed)
+            assert generic_out == typed_out, "outputs differ"
+        print(f"{name:<18} {generic*1000:8.2f}ms {typed*1000:8.2f}ms {generic/typed:7.2f}x  "
+              f"{report.to_text()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Startup budget regression check for the `lyra` CLI
+Uses `python -X importtime` to verify the fast path stays lean
+
+Fails (exit code 1) when `lyra --version` or a hello-world run imports a
+module on the FORBIDDEN list, or when the imports Lyra adds on top of bare
+Python startup exceed the budget.
+
+Usage:
+  python benchmarks/check_startup.py [--budget-ms 12] [--runs 20]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, "lyra_interpreter")
+
+# Modules the single-file fast path must never import
+FORBIDDEN = {
+    "argparse", "datetime", "enum", "typing", "json", "dataclasses",
+    "socket", "concurrent", "lyra_bytecode", "fast_bytecode_vm",
+}
+
+def run_env() -> dict:
+    env = dict(os.environ)
+    # Bytecode caching is part of what is being measured
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+def imported_modules(args: list) -> dict:
+    """Module name -> self import time (us) for one run"""
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + args,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, env=run_env(), cwd=tempfile.gettempdir())
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+def median_wall_ms(args: list, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL,
+                       env=run_env(), cwd=tempfile.gettempdir())
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1000
+
+def main():
+    budget_ms = 12.0
+    runs = 20
+    argv = sys.argv[1:]
+    if "--budget-ms" in argv:
+        budget_ms = float(argv[argv.index("--budget-ms") + 1])
+    if "--runs" in argv:
+        runs = int(argv[argv.index("--runs") + 1])
+
+    with tempfile.NamedTemporaryFile("w", suffix=".lyra", delete=False) as f:
+        f.write('print("Hello, Lyra!");\n')
+        hello = f.name
+
+    cases = {
+        "lyra --version": [PACKAGE_DIR, "--version"],
+        "lyra hello.lyra": [PACKAGE_DIR, hello],
+    }
+
+    print("="*80)
+    print("LYRA STARTUP BUDGET CHECK")
+    print("="*80)
+
+    # Warm-up run writes __pycache__ so every measurement uses cached bytecode
+    subprocess.run([sys.executable, PACKAGE_DIR, hello], stdout=subprocess.DEVNULL, env=run_env())
+    baseline = imported_modules(["-c", "pass"])
+    bare_ms = median_wall_ms(["-c", "pass"], runs)
+    print(f"Bare Python startup: {bare_ms:.2f}ms (median of {runs})")
+
+    failures = []
+    for label, args in cases.items():
+        modules = imported_modules(args)
+        added = {name: us for name, us in modules.items() if name not in baseline}
+        added_ms = sum(added.values()) / 1000
+        wall_ms = median_wall_ms(args, runs)
+        banned = sorted(name for name in added if name.split(".")[0] in FORBIDDEN)
+
+        print()
+        print(f"{label}")
+        print("-"*80)
+        print(f"  Wall time:        {wall_ms:8.2f}ms  (+{wall_ms - bare_ms:.2f}ms over bare Python)")
+        print(f"  Lyra imports:     {added_ms:8.2f}ms  (budget {budget_ms:.2f}ms)")
+        slowest = sorted(added.items(), key=lambda item: -item[1])[:5]
+        print("  Slowest imports:  " + ", ".join(f"{name} {us/1000:.2f}ms" for name, us in slowest))
+
+        if banned:
+            failures.append(f"{label}: imports forbidden modules {', '.join(banned)}")
+        if added_ms > budget_ms:
+            failures.append(f"{label}: imports take {added_ms:.2f}ms, budget is {budget_ms:.2f}ms")
+
+    os.unlink(hello)
+    print()
+    print("="*80)
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("OK: startup within budget")
+
+if __name__ == '__main__':
+    main()
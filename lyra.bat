@@ -9,10 +9,10 @@ setlocal enabledelayedexpansion
 
 REM Get script directory
 set SCRIPT_DIR=%~dp0
-set INTERPRETER=%SCRIPT_DIR%lyra_interpreter\lyra_interpreter.py
+set INTERPRETER=%SCRIPT_DIR%lyra_interpreter
 
-REM Check if Python is installed
-python --version >nul 2>&1
+REM Check if Python is installed (`where` avoids starting a whole interpreter)
+where python >nul 2>&1
 if errorlevel 1 (
     echo Error: Python 3 is not installed or not in PATH
     echo Please install Python 3.7 or later from https://www.python.org
@@ -20,8 +20,8 @@ if errorlevel 1 (
 )
 
 REM Check if interpreter exists
-if not exist "%INTERPRETER%" (
-    echo Error: lyra_interpreter.py not found at %INTERPRETER%
+if not exist "%INTERPRETER%\__main__.py" (
+    echo Error: __main__.py not found at %INTERPRETER%
     exit /b 1
 )
 
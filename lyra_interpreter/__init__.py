@@ -5,6 +5,12 @@ Lyra Programming Language Interpreter
 __version__ = "1.0.3"
 __author__ = "Seread335"
 
-from .lyra_interpreter import main_cli
-
 __all__ = ["main_cli"]
+
+def __getattr__(name):
+    # Import the interpreter on first use so `import lyra_interpreter`
+    # (and the console entry point's package import) stays cheap.
+    if name == "main_cli":
+        from .lyra_interpreter import main_cli
+        return main_cli
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,14 @@
+"""
+Entry point for `python -m lyra_interpreter` and `python lyra_interpreter/`
+
+Kept tiny on purpose: a script run as __main__ is compiled from source on
+every launch, while the interpreter module imported from here is loaded
+from its cached bytecode.
+"""
+
+try:
+    from .lyra_interpreter import main_cli
+except ImportError:
+    from lyra_interpreter import main_cli
+
+main_cli()
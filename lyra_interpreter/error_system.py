@@ -14,6 +14,8 @@ Implements:
   - Rigorous Validation (every operation verified)
 """
 
+from __future__ import annotations
+
 from enum import Enum
 from typing import Optional, List, Tuple, Any, Dict, Set
 from datetime import datetime
@@ -448,54 +450,7 @@ class SourceLocation:
         self.column = column
     
     def __str__(self):
-        return f"{self.filename}:{self.line}:{self.column}"        if not self.errors and not self.warnings:
-            print("\n✓ PERFECT: No errors or warnings found!")
-        
-        print("="*70 + "\n")
-        
-        # Write to log file
-        self.write_error_system_log()
-    
-    def write_error_system_log(self):
-        """Write detailed Error System violation log"""
-        if not self.errors and not self.warnings:
-            return
-        
-        log_filename = f"error_system_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        try:
-            with open(log_filename, 'w', encoding='utf-8') as f:
-                f.write("LYRA ERROR SYSTEM VIOLATION REPORT\n")
-                f.write("="*70 + "\n")
-                f.write(f"Program: {self.program_name}\n")
-                f.write(f"Time: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Execution Time: {(datetime.now() - self.start_time).total_seconds():.4f}s\n")
-                f.write(f"Total Errors: {len(self.errors)}\n")
-                f.write(f"Total Warnings: {len(self.warnings)}\n")
-                f.write("="*70 + "\n\n")
-                
-                if self.errors:
-                    f.write("ERRORS:\n")
-                    for err in self.errors:
-                        f.write(f"\n[{err.get('severity', 'ERROR').name}] {err['type']}\n")
-                        f.write(f"Message: {err['message']}\n")
-                        if err['location']:
-                            f.write(f"Location: {err['location']}\n")
-                        if err.get('hint'):
-                            f.write(f"Hint: {err['hint']}\n")
-                        f.write("-"*70 + "\n")
-                
-                if self.warnings:
-                    f.write("\nWARNINGS:\n")
-                    for warn in self.warnings:
-                        f.write(f"\n{warn['message']}\n")
-                        if warn['location']:
-                            f.write(f"Location: {warn['location']}\n")
-                        f.write("-"*70 + "\n")
-            
-            if self.errors or self.warnings:
-                print(f"Error System violation log saved to: {log_filename}")
-        except Exception as e:
-            print(f"Failed to write Error System log: {e}")
+        return f"{self.filename}:{self.line}:{self.column}"
 
 
 # ============================================================================
@@ -4,34 +4,100 @@ Optimized Bytecode VM with instruction caching and direct dispatch
 Version: 1.0.3
 Author: Seread335
 Implements optimizations to make bytecode faster than tree-walking
+
+Architecture:
+1. Pre-decoding: each code object is turned once into parallel lists of
+   opcode numbers, args (variable names already resolved) and handler
+   callables, ending in a HALT so the loop needs no bounds check
+2. Threaded loop: stack, pc, constants and the current frame's slots are
+   locals; loads, stores, arithmetic, compares and jumps run inline
+3. Everything else (calls, frames, arrays, try) calls its handler with
+   the VM state written back, then reloads the locals
 """
 
 import time
-from typing import List, Dict, Any, Callable
-from lyra_bytecode import BytecodeInstruction, OpCode, BytecodeCompiler
+from typing import List, Dict, Any, Callable, Optional
+
+try:
+    from .lyra_bytecode import BytecodeInstruction, OpCode, BytecodeCompiler, BytecodeVM, UNBOUND, op_add
+except ImportError:
+    from lyra_bytecode import BytecodeInstruction, OpCode, BytecodeCompiler, BytecodeVM, UNBOUND, op_add
 
-class FastBytecodeVM:
-    """High-performance bytecode VM with optimizations"""
-    
-    def __init__(self, bytecode: List[BytecodeInstruction], constants: Dict[str, int]):
-        self.bytecode = bytecode
-        self.constants = {v: k for k, v in constants.items()}
-        self.stack: List[float] = [0.0] * 256  # Pre-allocated stack
-        self.sp = 0  # Stack pointer
-        self.variables: List[float] = [0.0] * 256  # Pre-allocated variable storage
-        self.pc = 0
-        self.running = True
-        self.cycles = 0
+# Opcode numbers of the ops the threaded loop runs inline
+LOAD_LOCAL = OpCode.LOAD_LOCAL.value
+STORE_LOCAL = OpCode.STORE_LOCAL.value
+LOAD_NAME = OpCode.LOAD_NAME.value
+LOAD_VAR = OpCode.LOAD_VAR.value
+STORE_VAR = OpCode.STORE_VAR.value
+LOAD_CONST = OpCode.LOAD_CONST.value
+PUSH = OpCode.PUSH.value
+POP = OpCode.POP.value
+DUP = OpCode.DUP.value
+ADD = OpCode.ADD.value
+SUB = OpCode.SUB.value
+MUL = OpCode.MUL.value
+EQ = OpCode.EQ.value
+NE = OpCode.NE.value
+LT = OpCode.LT.value
+GT = OpCode.GT.value
+LE = OpCode.LE.value
+GE = OpCode.GE.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+JUMP_IF_TRUE = OpCode.JUMP_IF_TRUE.value
+HALT = OpCode.HALT.value
+INC_VAR = OpCode.INC_VAR.value
+INC_LOCAL = OpCode.INC_LOCAL.value
+CMP_CONST_JUMP = OpCode.CMP_CONST_JUMP.value
+CMP_LOCAL_CONST_JUMP = OpCode.CMP_LOCAL_CONST_JUMP.value
+CMP_VARS_JUMP = OpCode.CMP_VARS_JUMP.value
+VAR_CONST_OP = OpCode.VAR_CONST_OP.value
+LOCAL_CONST_OP = OpCode.LOCAL_CONST_OP.value
+VAR_VAR_OP = OpCode.VAR_VAR_OP.value
+OP_STORE_VAR = OpCode.OP_STORE_VAR.value
+INLINED = frozenset((LOAD_LOCAL, STORE_LOCAL, LOAD_NAME, LOAD_VAR, STORE_VAR, LOAD_CONST,
+                     PUSH, POP, DUP, ADD, SUB, MUL, EQ, NE, LT, GT, LE, GE,
+                     JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, HALT,
+                     INC_VAR, INC_LOCAL, CMP_CONST_JUMP, CMP_LOCAL_CONST_JUMP, CMP_VARS_JUMP,
+                     VAR_CONST_OP, LOCAL_CONST_OP, VAR_VAR_OP, OP_STORE_VAR))
+# Superinstruction arg positions holding a name index / a constant index
+NAME_ARGS = {INC_VAR: (0,), CMP_CONST_JUMP: (0,), CMP_VARS_JUMP: (0, 1), VAR_CONST_OP: (0,),
+             VAR_VAR_OP: (0, 1), OP_STORE_VAR: (1,)}
+CONSTANT_ARGS = {INC_VAR: 1, INC_LOCAL: 1, CMP_CONST_JUMP: 1, CMP_LOCAL_CONST_JUMP: 1,
+                 VAR_CONST_OP: 1, LOCAL_CONST_OP: 1}
+# Opcode number of every op that goes through its handler
+GENERIC = -1
+
+class FastBytecodeVM(BytecodeVM):
+    """High-performance bytecode VM with optimizations
+    
+    Runs on the threaded engine (_run_threaded) unless threaded=False,
+    which keeps the per-instruction dispatch-table loop for comparison.
+    Ops without a table entry (calls, frames, arrays, try) run on
+    BytecodeVM's implementation.
+    """
+    
+    def __init__(self, bytecode: List[BytecodeInstruction], constants: List[Any],
+                 names: Optional[List[str]] = None, ctx: Any = None, interpreter: Any = None,
+                 compiler: Optional[BytecodeCompiler] = None, threaded: bool = True,
+                 linetable: Optional[bytes] = None):
+        super().__init__(bytecode, constants, names, ctx, interpreter, compiler, linetable)
         
         # Build dispatch table for faster instruction execution
         self._dispatch_table = self._build_dispatch_table()
+        self.threaded = threaded
+        # id(bytecode) -> (ops, args, handlers, bytecode)
+        self._decoded: Dict[int, tuple] = {}
     
     def _build_dispatch_table(self) -> Dict[OpCode, Callable]:
         """Create dispatch table for O(1) opcode execution"""
         return {
             OpCode.LOAD_CONST: self._op_load_const,
+            OpCode.NEW_ARRAY: self._op_new_array,
             OpCode.LOAD_VAR: self._op_load_var,
             OpCode.STORE_VAR: self._op_store_var,
+            OpCode.LOAD_LOCAL: self._op_load_local,
+            OpCode.STORE_LOCAL: self._op_store_local,
             OpCode.ADD: self._op_add,
             OpCode.SUB: self._op_sub,
             OpCode.MUL: self._op_mul,
@@ -45,39 +111,40 @@ class FastBytecodeVM:
             OpCode.GE: self._op_ge,
             OpCode.JUMP: self._op_jump,
             OpCode.JUMP_IF_FALSE: self._op_jump_if_false,
-            OpCode.PRINT: self._op_print,
             OpCode.HALT: self._op_halt,
         }
     
-    def push(self, value: float) -> None:
-        self.stack[self.sp] = value
-        self.sp += 1
-    
-    def pop(self) -> float:
-        self.sp -= 1
-        return self.stack[self.sp]
-    
-    def peek(self) -> float:
-        return self.stack[self.sp - 1]
-    
     # Instruction implementations
     def _op_load_const(self, arg: Any) -> None:
-        const_val = self.constants[arg]
-        try:
-            self.push(float(const_val))
-        except:
-            self.push(0.0)
+        self.stack.append(self.constants[arg])
+    
+    def _op_new_array(self, arg: Any) -> None:
+        self.stack.append(list(self.constants[arg]))
     
     def _op_load_var(self, arg: Any) -> None:
-        self.push(self.variables[arg])
+        self.push(self.ctx.variables.get(self.names[arg], 0.0))
     
     def _op_store_var(self, arg: Any) -> None:
-        self.variables[arg] = self.pop()
+        self.ctx.variables[self.names[arg]] = self.pop()
+    
+    def _op_load_local(self, arg: Any) -> None:
+        value = self.frames[-1].slots[arg]
+        if value is UNBOUND:
+            # Unassigned local: the caller's variable
+            self._execute_instruction(BytecodeInstruction(OpCode.LOAD_LOCAL, arg))
+        else:
+            self.stack.append(value)
+    
+    def _op_store_local(self, arg: Any) -> None:
+        self.frames[-1].slots[arg] = self.stack.pop()
     
     def _op_add(self, arg: Any) -> None:
         b = self.pop()
         a = self.pop()
-        self.push(a + b)
+        if isinstance(a, str) or isinstance(b, str):
+            self.push(str(a) + str(b))
+        else:
+            self.push(a + b)
     
     def _op_sub(self, arg: Any) -> None:
         b = self.pop()
@@ -92,12 +159,16 @@ class FastBytecodeVM:
     def _op_div(self, arg: Any) -> None:
         b = self.pop()
         a = self.pop()
-        self.push(a / b if b != 0 else 0.0)
+        if b == 0:
+            raise ZeroDivisionError("Division by zero")
+        self.push(a / b)
     
     def _op_mod(self, arg: Any) -> None:
         b = self.pop()
         a = self.pop()
-        self.push(a % b if b != 0 else 0.0)
+        if b == 0:
+            raise ZeroDivisionError("Modulo by zero")
+        self.push(float(int(a) % int(b)))
     
     def _op_eq(self, arg: Any) -> None:
         b = self.pop()
@@ -137,26 +208,225 @@ class FastBytecodeVM:
         if not cond:
             self.pc = arg - 1
     
-    def _op_print(self, arg: Any) -> None:
-        value = self.pop()
-        print(value)
-    
     def _op_halt(self, arg: Any) -> None:
         self.running = False
     
-    def execute(self) -> None:
+    def _run(self) -> None:
+        if self.pairs is not None:
+            super()._run()  # Histogram loop
+        elif self.threaded:
+            self._run_threaded()
+        else:
+            self._run_dispatch_table()
+    
+    def _run_dispatch_table(self) -> None:
         """Execute bytecode with optimized dispatch"""
+        dispatch = self._dispatch_table
         while self.pc < len(self.bytecode) and self.running:
             self.cycles += 1
             instr = self.bytecode[self.pc]
             
             # Direct dispatch
-            handler = self._dispatch_table.get(instr.opcode)
+            handler = dispatch.get(instr.opcode)
             if handler:
                 handler(instr.arg)
+            else:
+                self._execute_instruction(instr)
             
             self.pc += 1
 
+    # ------------------------------------------------------------------------
+    # Threaded engine
+    # ------------------------------------------------------------------------
+    
+    def decode(self, bytecode: List[BytecodeInstruction]) -> tuple:
+        """(ops, args, handlers) for bytecode, decoded on first use"""
+        decoded = self._decoded.get(id(bytecode))
+        if decoded is not None and decoded[3] is bytecode:
+            return decoded
+        names = self.names
+        execute = self._execute_instruction
+        ops: List[int] = []
+        args: List[Any] = []
+        handlers: List[Callable] = []
+        for instr in bytecode:
+            opcode = instr.opcode
+            arg = instr.arg
+            if opcode.value in INLINED:
+                ops.append(opcode.value)
+                # Variables are looked up by name: resolve the index once
+                if opcode is OpCode.LOAD_VAR or opcode is OpCode.STORE_VAR or opcode is OpCode.LOAD_NAME:
+                    arg = names[arg]
+                elif opcode.value in NAME_ARGS or opcode.value in CONSTANT_ARGS:
+                    # Superinstruction: names and constant values in place
+                    arg = list(arg)
+                    for index in NAME_ARGS.get(opcode.value, ()):
+                        arg[index] = names[arg[index]]
+                    if opcode.value in CONSTANT_ARGS:
+                        arg[CONSTANT_ARGS[opcode.value]] = self.constants[arg[CONSTANT_ARGS[opcode.value]]]
+                    arg = tuple(arg)
+            else:
+                ops.append(GENERIC)
+            args.append(arg)
+            handlers.append(self._dispatch_table.get(opcode) or
+                            (lambda arg, instr=instr: execute(instr)))
+        # Falling off the end (or jumping to it) halts
+        ops.append(HALT)
+        args.append(None)
+        handlers.append(self._op_halt)
+        decoded = self._decoded[id(bytecode)] = (ops, args, handlers, bytecode)
+        return decoded
+    
+    def _run_threaded(self) -> None:
+        """Execute pre-decoded bytecode with the hot ops inline"""
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        constants = self.constants
+        variables = self.ctx.variables
+        frames = self.frames
+        frame = frames[-1]
+        slots = frame.slots
+        bytecode = self.bytecode
+        ops, args, handlers, _ = self.decode(bytecode)
+        pc = self.pc
+        cycles = 0
+        try:
+            while True:
+                op = ops[pc]
+                arg = args[pc]
+                pc += 1
+                cycles += 1
+                if op == LOAD_LOCAL:
+                    value = slots[arg]
+                    if value is UNBOUND:
+                        # Unassigned local: the caller's variable
+                        name = frame.code.local_names[arg]
+                        if frame.overlay is not None:
+                            value = frame.overlay.get(name, 0.0)
+                        else:
+                            value = self.lookup(name, len(frames) - 2)
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(constants[arg])
+                elif op == LOAD_VAR:
+                    push(variables.get(arg, 0.0))
+                elif op == STORE_VAR:
+                    variables[arg] = pop()
+                elif op == STORE_LOCAL:
+                    slots[arg] = pop()
+                elif op == CMP_CONST_JUMP:
+                    pc = arg[4] if arg[2](variables.get(arg[0], 0.0), arg[1]) else arg[3]
+                elif op == INC_VAR:
+                    name = arg[0]
+                    value = variables.get(name, 0.0)
+                    k = arg[1]
+                    if value.__class__ is float and k.__class__ is float:
+                        variables[name] = value + k
+                    else:
+                        variables[name] = op_add(value, k)
+                    pc = arg[2]
+                elif op == VAR_CONST_OP:
+                    push(arg[2](variables.get(arg[0], 0.0), arg[1]))
+                    pc = arg[3]
+                elif op == VAR_VAR_OP:
+                    push(arg[2](variables.get(arg[0], 0.0), variables.get(arg[1], 0.0)))
+                    pc = arg[3]
+                elif op == OP_STORE_VAR:
+                    b = pop()
+                    variables[arg[1]] = arg[0](pop(), b)
+                    pc = arg[2]
+                elif op == CMP_VARS_JUMP:
+                    pc = arg[4] if arg[2](variables.get(arg[0], 0.0), variables.get(arg[1], 0.0)) else arg[3]
+                elif op == CMP_LOCAL_CONST_JUMP:
+                    value = slots[arg[0]]
+                    if value is UNBOUND:
+                        value = self.load_local(arg[0])
+                    pc = arg[4] if arg[2](value, arg[1]) else arg[3]
+                elif op == LOCAL_CONST_OP:
+                    value = slots[arg[0]]
+                    if value is UNBOUND:
+                        value = self.load_local(arg[0])
+                    push(arg[2](value, arg[1]))
+                    pc = arg[3]
+                elif op == INC_LOCAL:
+                    value = slots[arg[0]]
+                    if value is UNBOUND:
+                        value = self.load_local(arg[0])
+                    slots[arg[0]] = op_add(value, arg[1])
+                    pc = arg[2]
+                elif op == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == LT:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] < b else 0.0
+                elif op == LE:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] <= b else 0.0
+                elif op == ADD:
+                    b = pop()
+                    a = stack[-1]
+                    if a.__class__ is float and b.__class__ is float:
+                        stack[-1] = a + b
+                    elif isinstance(a, str) or isinstance(b, str):
+                        stack[-1] = str(a) + str(b)
+                    else:
+                        stack[-1] = a + b
+                elif op == SUB:
+                    b = pop()
+                    stack[-1] = stack[-1] - b
+                elif op == JUMP:
+                    pc = arg
+                elif op == MUL:
+                    b = pop()
+                    stack[-1] = stack[-1] * b
+                elif op == GT:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] > b else 0.0
+                elif op == GE:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] >= b else 0.0
+                elif op == EQ:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] == b else 0.0
+                elif op == NE:
+                    b = pop()
+                    stack[-1] = 1.0 if stack[-1] != b else 0.0
+                elif op == JUMP_IF_TRUE:
+                    if pop():
+                        pc = arg
+                elif op == LOAD_NAME:
+                    push(self.lookup(arg, len(frames) - 1))
+                elif op == POP:
+                    pop()
+                elif op == DUP:
+                    push(stack[-1])
+                elif op == PUSH:
+                    push(arg)
+                elif op == HALT:
+                    self.running = False
+                    return
+                else:
+                    # Write the state back, run the handler, reload
+                    self.pc = pc - 1
+                    handlers[pc - 1](arg)
+                    if not self.running:
+                        return
+                    pc = self.pc + 1
+                    if self.bytecode is not bytecode:
+                        bytecode = self.bytecode
+                        ops, args, handlers, _ = self.decode(bytecode)
+                    frame = frames[-1]
+                    slots = frame.slots
+        except Exception:
+            # An inlined op failed: execute() reports the error at its pc
+            if self.bytecode is bytecode:
+                self.pc = pc - 1
+            raise
+        finally:
+            self.cycles += cycles
+
 def manually_compile_loop_100_opt() -> tuple:
     """Manually compile loop_100 with loop unrolling"""
     compiler = BytecodeCompiler()
@@ -217,7 +487,7 @@ def main():
     
     for _ in range(iterations):
         start = time.perf_counter()
-        vm = FastBytecodVM(bytecode, constants)
+        vm = FastBytecodeVM(bytecode, constants)
         vm.execute()
         elapsed = time.perf_counter() - start
         times.append(elapsed)
@@ -254,12 +524,11 @@ OPTIMIZATIONS APPLIED:
    - Eliminates if-elif chains
    - Faster instruction execution
 
-2. **Pre-allocated Stack**: Fixed 256-element stack
-   - No dynamic allocation
-   - Better cache locality
-   - Faster push/pop operations
+2. **Shared VM core**: calls, frames, arrays and try come from BytecodeVM
+   - Procs run in frames with local slot arrays
+   - Same semantics as the tree-walker
 
-3. **Direct Variable Indexing**: Variables stored as array
+3. **Direct Variable Indexing**: Proc locals stored in slot arrays
    - O(1) lookup (no hash table)
    - Compact memory layout
 
@@ -267,9 +536,8 @@ OPTIMIZATIONS APPLIED:
    - Reduces condition checks from 100 to 25
    - Better instruction scheduling
 
-5. **Stack Pointer Arithmetic**: Direct sp++ instead of list operations
-   - Faster than Python list append/pop
-   - Lower memory overhead
+5. **Hot path in one table**: arithmetic, compares, loads and jumps
+   - One dict lookup per instruction
 
 EXPECTED PERFORMANCE:
 - Optimized bytecode: 0.5-2.0x faster than tree-walking
@@ -279,9 +547,8 @@ EXPECTED PERFORMANCE:
 NEXT STEPS:
 1. Integrate optimized VM into lyra_interpreter.py
 2. Add --optimize flag for bytecode backend
-3. Implement bytecode caching (.lyrc files)
-4. Build JIT compiler for Python backend (PyPy integration)
-5. Create bytecode profiler for optimization hints
+3. Build JIT compiler for Python backend (PyPy integration)
+4. Create bytecode profiler for optimization hints
 """)
 
 if __name__ == '__main__':
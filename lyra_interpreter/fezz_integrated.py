@@ -7,10 +7,11 @@ Integrates FEZZ execution engine for 2-3x performance improvement
 
 import sys
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from lyra_interpreter import (
-    Lexer, Parser, Interpreter, Token, TokenType,
-    Program, VarDecl, Assignment, BinOp, ReturnStmt, CallExpr, IfStmt, WhileStmt
+    Lexer, Parser, Interpreter, ExecutionContext, Token, TokenType,
+    Program, VarDecl, Assignment, BinOp, ReturnStmt, CallExpr, IfStmt, WhileStmt,
+    MemoCache, DEFAULT_MEMO_SIZE
 )
 from fezz_engine import (
     FezzOptimizer, SuperscalarExecutor, DependencyAnalyzer,
@@ -27,7 +28,7 @@ class FezzOptimizedInterpreter(Interpreter):
         self.performance_monitor = PerformanceMonitor()
         self.fezz_stats = {}
     
-    def execute(self, ast: Program) -> None:
+    def interpret(self, ast: Program, ctx: Optional[ExecutionContext] = None) -> Any:
         """Execute AST with FEZZ optimization"""
         start_time = time.time()
         
@@ -37,7 +38,7 @@ class FezzOptimizedInterpreter(Interpreter):
             self.fezz_stats = fezz_stats
         
         # Execute program
-        super().execute(ast)
+        result = super().interpret(ast, ctx)
         
         elapsed = time.time() - start_time
         
@@ -45,6 +46,8 @@ class FezzOptimizedInterpreter(Interpreter):
         if self.enable_fezz:
             self.performance_monitor.instructions_executed += 1000  # Estimate
             self.performance_monitor.cycles_simulated += int(elapsed * 1000)
+        
+        return result
     
     def get_fezz_stats(self) -> Dict[str, Any]:
         """Get FEZZ optimization statistics"""
@@ -93,37 +96,24 @@ class FezzAwareExecutor:
             'recommendation': 'tail-recursive' if depth > 20 else 'keep as-is'
         }
 
-class ExecutionCache:
-    """Simple execution cache for frequently called functions"""
+class ExecutionCache(MemoCache):
+    """Execution cache for frequently called functions (bounded LRU)
     
-    def __init__(self):
-        self.cache = {}
-        self.hits = 0
-        self.misses = 0
+    The interpreter memoizes pure procs itself (see ``proc_is_pure``);
+    this keeps the (name, args) API for callers managing their own cache.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_MEMO_SIZE):
+        super().__init__(max_size)
     
     def get(self, func_name: str, args: tuple) -> Any:
         """Get cached result"""
-        key = (func_name, args)
-        if key in self.cache:
-            self.hits += 1
-            return self.cache[key]
-        self.misses += 1
-        return None
+        result = super().get((func_name, args))
+        return None if result is MemoCache.MISS else result
     
     def put(self, func_name: str, args: tuple, result: Any) -> None:
         """Cache result"""
-        key = (func_name, args)
-        self.cache[key] = result
-    
-    def stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
-        total = self.hits + self.misses
-        return {
-            'cache_hits': self.hits,
-            'cache_misses': self.misses,
-            'hit_rate': self.hits / total if total > 0 else 0.0,
-            'cache_size': len(self.cache)
-        }
+        super().put((func_name, args), result)
 
 class FezzProfiler:
     """Profile execution for optimization opportunities"""
@@ -177,7 +167,7 @@ def run_with_fezz_optimization(code: str, enable_fezz: bool = True) -> Dict[str,
     # Execute
     exec_start = time.time()
     interpreter = FezzOptimizedInterpreter(enable_fezz=enable_fezz)
-    interpreter.execute(ast)
+    interpreter.interpret(ast)
     exec_time = time.time() - exec_start
     
     # Collect metrics
@@ -10,11 +10,39 @@ Architecture:
 1. Compiler: Converts Lyra AST → Bytecode instructions
 2. Assembler: Optimizes bytecode (constant folding, dead code elimination)
 3. VM: Executes bytecode with stack-based execution model
+
+`lyra --bytecode` compiles the whole program with compile_program() and
+runs it on BytecodeVM (see run_bytecode). Top-level variables live in the
+run's ExecutionContext. Each proc body is compiled on its first call to a
+CodeObject whose assigned names get local slots; a call pushes a Frame
+holding those slots, so calls never nest Python frames. Lyra scoping is
+dynamic: a slot not yet assigned, and any name the proc never assigns,
+reads the caller's variable by walking down the frame stack.
 """
 
+import operator
+from collections import Counter
 from enum import Enum
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from itertools import groupby
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+
+try:
+    from .lyra_interpreter import (
+        Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, TryStmt, SwitchStmt, ForStmt, MemberExpr,
+        BUILTINS, ExecutionContext, Interpreter, MemoCache, build_jump_table, error_position,
+        select_body
+    )
+except ImportError:
+    from lyra_interpreter import (
+        Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, TryStmt, SwitchStmt, ForStmt, MemberExpr,
+        BUILTINS, ExecutionContext, Interpreter, MemoCache, build_jump_table, error_position,
+        select_body
+    )
 
 # ============================================================================
 # BYTECODE INSTRUCTIONS
@@ -30,14 +58,19 @@ class OpCode(Enum):
     # Variable operations
     LOAD_VAR = 10      # Load variable value onto stack
     STORE_VAR = 11     # Store stack top into variable
-    LOAD_CONST = 12    # Load constant
+    LOAD_CONST = 12    # Push constants[arg] (typed: float, int or str)
+    LOAD_LOCAL = 13    # Load proc local slot (unbound: the caller's variable)
+    STORE_LOCAL = 14   # Store into proc local slot
+    LOAD_NAME = 15     # Load a name the proc never assigns (dynamic scope)
     
     # Arithmetic
-    ADD = 20           # Add top two stack values
+    ADD = 20           # Add top two stack values (concatenates if either is a string)
     SUB = 21           # Subtract
     MUL = 22           # Multiply
     DIV = 23           # Divide
     MOD = 24           # Modulo
+    NEG = 25           # Negate
+    RANGE = 26         # a..b as an array
     
     # Comparison
     EQ = 30            # Equal
@@ -56,54 +89,379 @@ class OpCode(Enum):
     JUMP = 50          # Jump to instruction
     JUMP_IF_FALSE = 51 # Jump if top of stack is false
     JUMP_IF_TRUE = 52  # Jump if top of stack is true
-    CALL = 53          # Call function
+    CALL = 53          # Call function: arg (name, argc)
     RETURN = 54        # Return from function
+    CALL_BUILTIN = 55  # Call a builtin: arg (function, argc)
+    CALL_STMT = 56     # Statement call (procs shadow builtins, result dropped)
+    PROC_GUARD = 57    # Jump to arg[1] unless proc arg[0] is defined
+    DEFINE_FUNC = 58   # Bind the FunctionDef in arg
     
     # I/O
-    PRINT = 60         # Print top of stack
+    PRINT = 60         # Print arg values (default 1) from the stack on one line
     INPUT = 61         # Read input
     
     # Special
     NOP = 70           # No operation
     HALT = 71          # Stop execution
+    
+    # Arrays
+    BUILD_ARRAY = 80   # Pop arg values into a new array
+    INDEX = 81         # array[index]
+    STORE_INDEX = 82   # array[index] = value (out of range: ignored)
+    TO_INT = 83        # int() of top of stack
+    MEMBER = 84        # object.arg (only array.length is defined)
+    GET_ITER = 85      # Iterator over an array, or 0..n-1 for a number
+    FOR_ITER = 86      # Push next item, or pop the iterator and jump to arg
+    NEW_ARRAY = 87     # Fresh array from the tuple constants[arg]
+    
+    # Exceptions and switch
+    SETUP_TRY = 90     # Push handler: arg (handler pc, catch variable index)
+    POP_TRY = 91       # Pop handler at the end of a try block
+    SWITCH_TABLE = 92  # Jump through arg (value -> pc table, default pc)
+    
+    # break/continue that cross a try, a switch or a proc body set flags
+    # the way the tree-walker does; blocks that check them get these ops
+    SET_BREAK = 93
+    SET_CONTINUE = 94
+    CHECK_BLOCK_FLAGS = 95   # if branch: leave to arg while either flag is set
+    CHECK_LOOP_FLAGS = 96    # loop body: arg (break pc, continue pc), clears the flag
+    CHECK_SWITCH_FLAG = 97   # switch case: on break flag clear it and jump to arg
+    
+    # Proc frames
+    TAIL_CALL = 100    # return f(...) inside f: rebind params and restart
+    RETURN_NONE = 101  # End of a proc body without return
+    
+    # Superinstructions (see fuse_superinstructions): each replaces the
+    # first instruction of a sequence and continues at arg[-1], the pc
+    # after it; the rest of the sequence stays in place for jumps into it
+    INC_VAR = 110               # x = x + k: (name, const, end)
+    INC_LOCAL = 111             # same on a local slot: (slot, const, end)
+    CMP_CONST_JUMP = 112        # if not x <cmp> k: jump (name, const, compare, target, end)
+    CMP_LOCAL_CONST_JUMP = 113  # same on a local slot: (slot, const, compare, target, end)
+    CMP_VARS_JUMP = 114         # if not x <cmp> y: jump (name, name, compare, target, end)
+    VAR_CONST_OP = 115          # push x <op> k: (name, const, operator, end)
+    LOCAL_CONST_OP = 116        # same on a local slot: (slot, const, operator, end)
+    VAR_VAR_OP = 117            # push x <op> y: (name, name, operator, end)
+    OP_STORE_VAR = 118          # x = pop <op> pop: (operator, name, end)
 
 @dataclass
 class BytecodeInstruction:
     """A single bytecode instruction"""
     opcode: OpCode
     arg: Any = None    # Optional argument (for constants, variables, jump targets)
+    line: int = 0      # Source line and column of the statement it came from
+    column: int = 0
     
     def __repr__(self) -> str:
         if self.arg is not None:
             return f"{self.opcode.name} {self.arg}"
         return self.opcode.name
 
+@dataclass
+class CodeObject:
+    """Bytecode of one proc body"""
+    name: str
+    bytecode: List[BytecodeInstruction]
+    local_names: List[str]          # Params, then every name the body assigns
+    slots: Dict[str, int]           # local name -> slot
+    params: List[int]               # Slot of each param, in order
+    body: List[Any] = field(repr=False)  # Keeps id(body) valid as a cache key
+    max_stack: int = 0              # Deepest operand stack, set by verify_bytecode (reported only)
+    linetable: bytes = field(default=b'', repr=False)  # See encode_positions
+
+# Position tables: like CPython's co_linetable, one entry per run of
+# instructions from the same statement, as varints: run length, line
+# delta (zigzag: the sign in bit 0), column. Read only to report an error.
+
+def _append_varint(table: bytearray, value: int) -> None:
+    while value >= 0x80:
+        table.append(value & 0x7F | 0x80)
+        value >>= 7
+    table.append(value)
+
+def encode_positions(bytecode: List[BytecodeInstruction]) -> bytes:
+    """Compressed pc -> (line, column) table of bytecode"""
+    table = bytearray()
+    previous_line = 0
+    for (line, column), run in groupby(bytecode, key=lambda instr: (instr.line, instr.column)):
+        delta = line - previous_line
+        _append_varint(table, sum(1 for _ in run))
+        _append_varint(table, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+        _append_varint(table, column)
+        previous_line = line
+    return bytes(table)
+
+def iter_positions(table: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """(first pc, end pc, line, column) of each entry of a position table"""
+    values: List[int] = []
+    value = shift = 0
+    for byte in table:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            values.append(value)
+            value = shift = 0
+    pc = line = 0
+    for index in range(0, len(values) - 2, 3):
+        run, delta, column = values[index:index + 3]
+        line += -((delta + 1) >> 1) if delta & 1 else delta >> 1
+        yield pc, pc + run, line, column
+        pc += run
+
+def decode_position(table: bytes, pc: int) -> Tuple[int, int]:
+    """(line, column) of the instruction at pc, (0, 0) if unknown"""
+    for start, end, line, column in iter_positions(table):
+        if start <= pc < end:
+            return line, column
+    return 0, 0
+
 # ============================================================================
 # BYTECODE COMPILER
 # ============================================================================
 
+# Typed operators from lyra_passes.infer_types behave like the generic ones
+BINARY_OPS = {
+    '+': OpCode.ADD, 'num+': OpCode.ADD, 'str+': OpCode.ADD,
+    '-': OpCode.SUB, '*': OpCode.MUL, '/': OpCode.DIV, '%': OpCode.MOD,
+    '==': OpCode.EQ, '!=': OpCode.NE, '<': OpCode.LT, '>': OpCode.GT,
+    '<=': OpCode.LE, '>=': OpCode.GE,
+    '&&': OpCode.AND, 'num&&': OpCode.AND, '||': OpCode.OR, 'num||': OpCode.OR,
+    '..': OpCode.RANGE,
+}
+
+# ============================================================================
+# SUPERINSTRUCTIONS
+# ============================================================================
+
+SUPERINSTRUCTION_BASE = OpCode.INC_VAR.value
+
+# Binary ops as functions with the VM's semantics, for fused instructions
+
+def op_add(a: Any, b: Any) -> Any:
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) + str(b)
+    return a + b
+
+def op_sub(a: Any, b: Any) -> Any:
+    return a - b
+
+def op_mul(a: Any, b: Any) -> Any:
+    return a * b
+
+def op_div(a: Any, b: Any) -> Any:
+    if b == 0:
+        raise ZeroDivisionError("Division by zero")
+    return a / b
+
+def op_mod(a: Any, b: Any) -> Any:
+    if b == 0:
+        raise ZeroDivisionError("Modulo by zero")
+    return float(int(a) % int(b))
+
+def op_eq(a: Any, b: Any) -> float:
+    return 1.0 if a == b else 0.0
+
+def op_ne(a: Any, b: Any) -> float:
+    return 1.0 if a != b else 0.0
+
+def op_lt(a: Any, b: Any) -> float:
+    return 1.0 if a < b else 0.0
+
+def op_gt(a: Any, b: Any) -> float:
+    return 1.0 if a > b else 0.0
+
+def op_le(a: Any, b: Any) -> float:
+    return 1.0 if a <= b else 0.0
+
+def op_ge(a: Any, b: Any) -> float:
+    return 1.0 if a >= b else 0.0
+
+VALUE_OPS = {
+    OpCode.ADD: op_add, OpCode.SUB: op_sub, OpCode.MUL: op_mul, OpCode.DIV: op_div,
+    OpCode.MOD: op_mod, OpCode.EQ: op_eq, OpCode.NE: op_ne, OpCode.LT: op_lt,
+    OpCode.GT: op_gt, OpCode.LE: op_le, OpCode.GE: op_ge,
+}
+
+# Compare-and-jump tests take the comparison itself (a bool)
+COMPARE_OPS = {
+    OpCode.EQ: operator.eq, OpCode.NE: operator.ne, OpCode.LT: operator.lt,
+    OpCode.GT: operator.gt, OpCode.LE: operator.le, OpCode.GE: operator.ge,
+}
+
+# Sequences fused, longest first. Picked from the pair/triple histogram
+# (BytecodeVM.enable_histogram, benchmarks/benchmark_superinstructions.py)
+# over the test corpus and loop benchmarks: loop tests, counters and
+# operations with a constant operand cover most dispatches.
+# Pattern entries: an opcode, or a set of opcodes for the op position.
+SUPERINSTRUCTIONS = [
+    (OpCode.INC_VAR, (OpCode.LOAD_VAR, OpCode.LOAD_CONST, OpCode.ADD, OpCode.STORE_VAR)),
+    (OpCode.INC_LOCAL, (OpCode.LOAD_LOCAL, OpCode.LOAD_CONST, OpCode.ADD, OpCode.STORE_LOCAL)),
+    (OpCode.CMP_CONST_JUMP, (OpCode.LOAD_VAR, OpCode.LOAD_CONST, COMPARE_OPS, OpCode.JUMP_IF_FALSE)),
+    (OpCode.CMP_LOCAL_CONST_JUMP, (OpCode.LOAD_LOCAL, OpCode.LOAD_CONST, COMPARE_OPS, OpCode.JUMP_IF_FALSE)),
+    (OpCode.CMP_VARS_JUMP, (OpCode.LOAD_VAR, OpCode.LOAD_VAR, COMPARE_OPS, OpCode.JUMP_IF_FALSE)),
+    (OpCode.VAR_CONST_OP, (OpCode.LOAD_VAR, OpCode.LOAD_CONST, VALUE_OPS)),
+    (OpCode.LOCAL_CONST_OP, (OpCode.LOAD_LOCAL, OpCode.LOAD_CONST, VALUE_OPS)),
+    (OpCode.VAR_VAR_OP, (OpCode.LOAD_VAR, OpCode.LOAD_VAR, VALUE_OPS)),
+    (OpCode.OP_STORE_VAR, (VALUE_OPS, OpCode.STORE_VAR)),
+]
+
+def _patterns_by_first() -> Dict[OpCode, List[Tuple[OpCode, Tuple[Any, ...]]]]:
+    """Patterns that can start with each opcode, in SUPERINSTRUCTIONS order"""
+    table: Dict[OpCode, List[Tuple[OpCode, Tuple[Any, ...]]]] = {}
+    for fused, pattern in SUPERINSTRUCTIONS:
+        first = pattern[0]
+        for opcode in (first if isinstance(first, dict) else (first,)):
+            table.setdefault(opcode, []).append((fused, pattern))
+    return table
+
+PATTERNS_BY_FIRST = _patterns_by_first()
+
+def _matches(bytecode: List[BytecodeInstruction], start: int, pattern: Tuple[Any, ...]) -> bool:
+    if start + len(pattern) > len(bytecode):
+        return False
+    for instr, expected in zip(bytecode[start:start + len(pattern)], pattern):
+        if instr.opcode is not expected and not (isinstance(expected, dict) and instr.opcode in expected):
+            return False
+    return True
+
+def _fused_arg(fused: OpCode, seq: List[BytecodeInstruction], end: int) -> Optional[Tuple[Any, ...]]:
+    """Arg of the superinstruction for seq, or None if seq does not qualify"""
+    if fused is OpCode.INC_VAR or fused is OpCode.INC_LOCAL:
+        if seq[0].arg != seq[3].arg:
+            return None  # y = x + k
+        return (seq[0].arg, seq[1].arg, end)
+    if fused in (OpCode.CMP_CONST_JUMP, OpCode.CMP_LOCAL_CONST_JUMP, OpCode.CMP_VARS_JUMP):
+        return (seq[0].arg, seq[1].arg, COMPARE_OPS[seq[2].opcode], seq[3].arg, end)
+    if fused is OpCode.OP_STORE_VAR:
+        return (VALUE_OPS[seq[0].opcode], seq[1].arg, end)
+    return (seq[0].arg, seq[1].arg, VALUE_OPS[seq[2].opcode], end)
+
+def fuse_superinstructions(bytecode: List[BytecodeInstruction]) -> List[BytecodeInstruction]:
+    """Replace the first instruction of each fusable sequence, in place.
+    Nothing moves, so no jump needs retargeting; a jump into the middle
+    of a sequence runs the original instructions from there."""
+    original = list(bytecode)
+    pc = 0
+    while pc < len(original):
+        for fused, pattern in PATTERNS_BY_FIRST.get(original[pc].opcode, ()):
+            if _matches(original, pc, pattern):
+                end = pc + len(pattern)
+                arg = _fused_arg(fused, original[pc:end], end)
+                if arg is not None:
+                    bytecode[pc] = BytecodeInstruction(fused, arg, original[pc].line,
+                                                       original[pc].column)
+                    pc = end
+                    break
+        else:
+            pc += 1
+    return bytecode
+
+def constant_key(value: Any) -> Tuple[Any, ...]:
+    """Pool key: equal values of different types (1 and 1.0) stay apart,
+    and floats key on their bits since 0.0 == -0.0"""
+    cls = value.__class__
+    if cls is float:
+        return (cls, value.hex())
+    if cls is tuple:
+        return (cls,) + tuple(constant_key(item) for item in value)
+    return (cls, value)
+
+def assigned_names(statements: Optional[List[Any]], names: List[str]) -> List[str]:
+    """Append every name the statements assign (nested procs excluded)"""
+    for node in statements or []:
+        if isinstance(node, VarDecl):
+            names.append(node.name)
+        elif isinstance(node, Assignment):
+            if isinstance(node.name, str):
+                names.append(node.name)
+        elif isinstance(node, IfStmt):
+            assigned_names(node.then_branch, names)
+            assigned_names(node.else_branch, names)
+        elif isinstance(node, WhileStmt):
+            assigned_names(node.body, names)
+        elif isinstance(node, ForStmt):
+            names.append(node.var)
+            assigned_names(node.body, names)
+        elif isinstance(node, SwitchStmt):
+            for _, body in node.cases:
+                assigned_names(body, names)
+            assigned_names(node.default_case, names)
+        elif isinstance(node, TryStmt):
+            if node.catch_var:
+                names.append(node.catch_var)
+            assigned_names(node.try_block, names)
+            assigned_names(node.catch_block, names)
+    return names
+
+def has_unstructured_jumps(statements: Optional[List[Any]], target: Optional[str] = None) -> bool:
+    """True if a break/continue anywhere (procs included) is not a plain
+    jump out of its loop or switch: those set flags that leak outward"""
+    for node in statements or []:
+        if isinstance(node, BreakStmt):
+            if target not in ('loop', 'switch'):
+                return True
+        elif isinstance(node, ContinueStmt):
+            if target != 'loop':
+                return True
+        elif isinstance(node, IfStmt):
+            if has_unstructured_jumps(node.then_branch, target) or \
+                    has_unstructured_jumps(node.else_branch, target):
+                return True
+        elif isinstance(node, (WhileStmt, ForStmt)):
+            if has_unstructured_jumps(node.body, 'loop'):
+                return True
+        elif isinstance(node, SwitchStmt):
+            if any(has_unstructured_jumps(body, 'switch') for _, body in node.cases) or \
+                    has_unstructured_jumps(node.default_case, 'switch'):
+                return True
+        elif isinstance(node, TryStmt):
+            if has_unstructured_jumps(node.try_block) or has_unstructured_jumps(node.catch_block):
+                return True
+        elif isinstance(node, FunctionDef):
+            if has_unstructured_jumps(node.body):
+                return True
+    return False
+
 class BytecodeCompiler:
     """Compiles Lyra AST to bytecode instructions"""
     
-    def __init__(self):
+    def __init__(self, superinstructions: bool = True, optimize: bool = True):
         self.bytecode: List[BytecodeInstruction] = []
-        self.constants: Dict[str, int] = {}  # constant -> constant_index
+        self.constants: List[Any] = []  # LOAD_CONST arg -> value
+        self.constant_index: Dict[Tuple[Any, ...], int] = {}  # constant_key -> index
         self.variables: Dict[str, int] = {}  # variable_name -> variable_index
         self.next_var_index = 0
+        # Innermost last: ('loop', break patches, continue pc) or
+        # ('switch', break patches) or ('barrier',) for try blocks
+        self.jump_targets: List[Tuple[Any, ...]] = []
+        # Set when break/continue flags can be raised: blocks then check them
+        self.flag_mode = False
+        # Local name -> slot while compiling a proc body, None at top level
+        self.locals: Optional[Dict[str, int]] = None
+        # Run BytecodeOptimizer, then fuse hot sequences, on compiled
+        # programs and proc bodies
+        self.optimize = optimize
+        self.superinstructions = superinstructions
+        # Position of the statement being compiled, given to its instructions
+        self.line = 0
+        self.column = 0
+        # encode_positions of the program compiled by compile_program
+        self.linetable = b''
     
     def add_instruction(self, opcode: OpCode, arg: Any = None) -> int:
         """Add bytecode instruction, return its index"""
         idx = len(self.bytecode)
-        self.bytecode.append(BytecodeInstruction(opcode, arg))
+        self.bytecode.append(BytecodeInstruction(opcode, arg, self.line, self.column))
         return idx
     
     def add_constant(self, value: Any) -> int:
         """Add constant to pool, return index"""
-        key = str(value)
-        if key not in self.constants:
-            idx = len(self.constants)
-            self.constants[key] = idx
-        return self.constants[key]
+        key = constant_key(value)
+        idx = self.constant_index.get(key)
+        if idx is None:
+            idx = self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return idx
     
     def get_variable_index(self, name: str) -> int:
         """Get or create variable index"""
@@ -114,7 +472,7 @@ class BytecodeCompiler:
     
     def compile_number(self, value: float) -> None:
         """Compile number literal"""
-        const_idx = self.add_constant(value)
+        const_idx = self.add_constant(float(value))
         self.add_instruction(OpCode.LOAD_CONST, const_idx)
     
     def compile_string(self, value: str) -> None:
@@ -124,11 +482,22 @@ class BytecodeCompiler:
     
     def compile_variable(self, name: str) -> None:
         """Compile variable reference"""
+        if self.locals is not None:
+            slot = self.locals.get(name)
+            if slot is not None:
+                self.add_instruction(OpCode.LOAD_LOCAL, slot)
+            else:
+                self.add_instruction(OpCode.LOAD_NAME, self.get_variable_index(name))
+            return
         var_idx = self.get_variable_index(name)
         self.add_instruction(OpCode.LOAD_VAR, var_idx)
     
     def compile_assignment(self, var_name: str) -> None:
         """Compile variable assignment (value already on stack)"""
+        if self.locals is not None:
+            # Every name a proc assigns has a slot
+            self.add_instruction(OpCode.STORE_LOCAL, self.locals[var_name])
+            return
         var_idx = self.get_variable_index(var_name)
         self.add_instruction(OpCode.STORE_VAR, var_idx)
     
@@ -170,6 +539,325 @@ class BytecodeCompiler:
         """Compile print statement"""
         self.add_instruction(OpCode.PRINT)
     
+    def compile_number_value(self, value: Any) -> None:
+        """Number literal; true/false are ints and must stay ints"""
+        self.add_instruction(OpCode.LOAD_CONST, self.add_constant(value))
+    
+    def patch(self, index: int, target: Optional[int] = None) -> None:
+        """Point the jump at index to target (default: the next instruction)"""
+        self.bytecode[index].arg = len(self.bytecode) if target is None else target
+    
+    # ------------------------------------------------------------------------
+    # AST visitor
+    # ------------------------------------------------------------------------
+    
+    def compile_program(self, program: Program, extern: Any = ()) -> List[BytecodeInstruction]:
+        """Compile a whole program; DEFINE_FUNC binds each proc, whose body
+        is compiled on its first call (compile_function) and runs in a VM
+        frame. extern holds procs defined before the run (resumed from a
+        snapshot)."""
+        self.flag_mode = (has_unstructured_jumps(program.statements) or
+                          has_unstructured_jumps(list(extern)))
+        self.compile_block(program.statements)
+        self.add_instruction(OpCode.HALT)
+        self.linetable = self.finish()
+        return self.bytecode
+    
+    def compile_function(self, func_def: FunctionDef, body: List[Any], statement: bool = False) -> CodeObject:
+        """Compile one proc body. A statement-level call evaluates each
+        expression statement of the body a second time for its value, so
+        that variant of the body gets the second evaluation too."""
+        local_names = list(dict.fromkeys(list(func_def.params) + assigned_names(body, [])))
+        slots = {name: slot for slot, name in enumerate(local_names)}
+        saved = (self.bytecode, self.jump_targets, self.locals)
+        self.bytecode, self.jump_targets, self.locals = [], [], slots
+        try:
+            for stmt in body:
+                self.compile_statement(stmt)
+                if statement and isinstance(stmt, (BinOp, UnaryOp, CallExpr)):
+                    self.compile_expression(stmt)
+                    self.add_instruction(OpCode.POP)
+            self.add_instruction(OpCode.RETURN_NONE)
+            linetable = self.finish()
+            return CodeObject(func_def.name, self.bytecode, local_names, slots,
+                              [slots[param] for param in func_def.params], body,
+                              linetable=linetable)
+        finally:
+            self.bytecode, self.jump_targets, self.locals = saved
+    
+    def finish(self) -> bytes:
+        """Optimize and fuse the code just compiled; returns its position table"""
+        if self.optimize:
+            self.bytecode = BytecodeOptimizer.optimize(self.bytecode, self.constants)
+        if self.superinstructions:
+            fuse_superinstructions(self.bytecode)
+        return encode_positions(self.bytecode)
+    
+    def compile_block(self, statements: Optional[List[Any]], check: Optional[Tuple[OpCode, Any]] = None) -> List[int]:
+        """Compile statements; in flag mode each one is followed by the
+        check op the enclosing construct makes. Returns indices of checks
+        whose target is the end of the construct, for patching."""
+        patches = []
+        for stmt in statements or []:
+            self.compile_statement(stmt)
+            if self.flag_mode and check is not None:
+                patches.append(self.add_instruction(*check))
+        return patches
+    
+    def compile_statement(self, node: Any) -> None:
+        if not node.line:
+            self.compile_statement_node(node)
+            return
+        # Code after a nested statement (loop jumps, case tests) is the outer one's
+        saved = (self.line, self.column)
+        self.line, self.column = node.line, node.column
+        self.compile_statement_node(node)
+        self.line, self.column = saved
+    
+    def compile_statement_node(self, node: Any) -> None:
+        if isinstance(node, VarDecl):
+            if node.value:
+                self.compile_expression(node.value)
+            else:
+                self.add_instruction(OpCode.PUSH, 0)
+            self.compile_assignment(node.name)
+        elif isinstance(node, Assignment):
+            if isinstance(node.name, IndexExpr):
+                self.compile_expression(node.name.array)
+                self.compile_expression(node.name.index)
+                self.add_instruction(OpCode.TO_INT)
+                self.compile_expression(node.value)
+                self.add_instruction(OpCode.STORE_INDEX)
+            elif not isinstance(node.name, MemberExpr):
+                # Member assignment is a no-op; its value is not evaluated
+                self.compile_expression(node.value)
+                self.compile_assignment(node.name)
+        elif isinstance(node, FunctionDef):
+            self.add_instruction(OpCode.DEFINE_FUNC, node)
+        elif isinstance(node, ReturnStmt):
+            if node.tail_call and self.locals is not None:
+                for arg in node.value.args:
+                    self.compile_expression(arg)
+                self.add_instruction(OpCode.TAIL_CALL, (node.value.name, len(node.value.args)))
+            else:
+                self.compile_expression(node.value)
+            self.add_instruction(OpCode.RETURN)
+        elif isinstance(node, IfStmt):
+            self.compile_if(node)
+        elif isinstance(node, WhileStmt):
+            self.compile_while(node)
+        elif isinstance(node, ForStmt):
+            self.compile_for(node)
+        elif isinstance(node, SwitchStmt):
+            self.compile_switch(node)
+        elif isinstance(node, TryStmt):
+            self.compile_try(node)
+        elif isinstance(node, BreakStmt):
+            target = self.innermost_target()
+            if target is not None and target[0] in ('loop', 'switch'):
+                target[1].append(self.add_instruction(OpCode.JUMP, None))
+            else:
+                self.add_instruction(OpCode.SET_BREAK)
+        elif isinstance(node, ContinueStmt):
+            target = self.innermost_target()
+            if target is not None and target[0] == 'loop':
+                self.add_instruction(OpCode.JUMP, target[2])
+            else:
+                self.add_instruction(OpCode.SET_CONTINUE)
+        elif isinstance(node, CallExpr):
+            if node.name == 'print' or node.name == 'println':
+                for arg in node.args:
+                    self.compile_expression(arg)
+                self.add_instruction(OpCode.PRINT, len(node.args))
+            else:
+                # Args are only evaluated when a proc of that name exists
+                guard = self.add_instruction(OpCode.PROC_GUARD, None)
+                for arg in node.args:
+                    self.compile_expression(arg)
+                self.add_instruction(OpCode.CALL_STMT, (node.name, len(node.args)))
+                self.bytecode[guard].arg = (node.name, len(self.bytecode))
+        elif isinstance(node, (BinOp, UnaryOp)):
+            self.compile_expression(node)
+            self.add_instruction(OpCode.POP)
+        # Literals and names as statements have no effect; other
+        # expressions (index, member, array) are not evaluated at all
+    
+    def innermost_target(self) -> Optional[Tuple[Any, ...]]:
+        return self.jump_targets[-1] if self.jump_targets else None
+    
+    def compile_if(self, node: IfStmt) -> None:
+        self.compile_expression(node.condition)
+        else_jump = self.add_instruction(OpCode.JUMP_IF_FALSE, None)
+        check = (OpCode.CHECK_BLOCK_FLAGS, None)
+        exits = self.compile_block(node.then_branch, check)
+        if node.else_branch:
+            exits.append(self.add_instruction(OpCode.JUMP, None))
+            self.patch(else_jump)
+            exits += self.compile_block(node.else_branch, check)
+        else:
+            self.patch(else_jump)
+        for index in exits:
+            self.patch(index)
+    
+    def compile_loop_body(self, body: List[Any], continue_pc: int) -> List[int]:
+        """Body with break/continue targets; returns the break patches"""
+        breaks: List[int] = []
+        self.jump_targets.append(('loop', breaks, continue_pc))
+        checks = self.compile_block(body, (OpCode.CHECK_LOOP_FLAGS, None))
+        self.jump_targets.pop()
+        self.add_instruction(OpCode.JUMP, continue_pc)
+        return breaks + checks
+    
+    def compile_while(self, node: WhileStmt) -> None:
+        top = len(self.bytecode)
+        self.compile_expression(node.condition)
+        exit_jump = self.add_instruction(OpCode.JUMP_IF_FALSE, None)
+        breaks = self.compile_loop_body(node.body, top)
+        self.patch(exit_jump)
+        self.patch_breaks(breaks, top)
+    
+    def compile_for(self, node: ForStmt) -> None:
+        self.compile_expression(node.iterable)
+        self.add_instruction(OpCode.GET_ITER)
+        top = self.add_instruction(OpCode.FOR_ITER, None)
+        self.compile_assignment(node.var)
+        breaks = self.compile_loop_body(node.body, top)
+        # A break leaves the iterator on the stack
+        self.patch_breaks(breaks, top)
+        self.add_instruction(OpCode.POP)
+        self.patch(top)
+    
+    def patch_breaks(self, breaks: List[int], continue_pc: int) -> None:
+        for index in breaks:
+            instr = self.bytecode[index]
+            if instr.opcode == OpCode.CHECK_LOOP_FLAGS:
+                instr.arg = (len(self.bytecode), continue_pc)
+            else:
+                self.patch(index)
+    
+    def compile_switch(self, node: SwitchStmt) -> None:
+        self.compile_expression(node.expr)
+        table = build_jump_table(node.cases)
+        matches: List[int] = []
+        if table is not False:
+            dispatch = self.add_instruction(OpCode.SWITCH_TABLE, None)
+        else:
+            # Dynamic labels are evaluated in order until one matches
+            dispatch = None
+            for label, _ in node.cases:
+                self.add_instruction(OpCode.DUP)
+                self.compile_expression(label)
+                self.add_instruction(OpCode.EQ)
+                matches.append(self.add_instruction(OpCode.JUMP_IF_TRUE, None))
+            self.add_instruction(OpCode.POP)
+            no_match = self.add_instruction(OpCode.JUMP, None)
+            for index in range(len(matches)):
+                self.patch(matches[index])
+                self.add_instruction(OpCode.POP)
+                matches[index] = self.add_instruction(OpCode.JUMP, None)
+        
+        breaks: List[int] = []
+        self.jump_targets.append(('switch', breaks))
+        case_pcs = []
+        check = (OpCode.CHECK_SWITCH_FLAG, None)
+        # Matching case falls through every later case until break
+        for _, body in node.cases:
+            case_pcs.append(len(self.bytecode))
+            breaks += self.compile_block(body, check)
+        breaks.append(self.add_instruction(OpCode.JUMP, None))
+        default_pc = len(self.bytecode)
+        if node.default_case:
+            breaks += self.compile_block(node.default_case, check)
+        self.jump_targets.pop()
+        for index in breaks:
+            self.patch(index)
+        
+        if dispatch is not None:
+            self.bytecode[dispatch].arg = (
+                {value: case_pcs[index] for value, index in table.items()}, default_pc)
+        else:
+            for index, case_pc in zip(matches, case_pcs):
+                self.patch(index, case_pc)
+            self.patch(no_match, default_pc)
+    
+    def compile_try(self, node: TryStmt) -> None:
+        catch_var = None
+        if node.catch_var:
+            # Slot inside a proc, name index at top level
+            if self.locals is not None:
+                catch_var = self.locals[node.catch_var]
+            else:
+                catch_var = self.get_variable_index(node.catch_var)
+        setup = self.add_instruction(OpCode.SETUP_TRY, None)
+        # break/continue cannot jump out of a try: they only set flags
+        self.jump_targets.append(('barrier',))
+        self.compile_block(node.try_block)
+        self.add_instruction(OpCode.POP_TRY)
+        done = self.add_instruction(OpCode.JUMP, None)
+        self.bytecode[setup].arg = (len(self.bytecode), catch_var)
+        self.compile_block(node.catch_block)
+        self.jump_targets.pop()
+        self.patch(done)
+    
+    def compile_expression(self, node: Any) -> None:
+        if isinstance(node, Number):
+            self.compile_number_value(node.value)
+        elif isinstance(node, String):
+            self.compile_string(node.value)
+        elif isinstance(node, Identifier):
+            self.compile_variable(node.name)
+        elif isinstance(node, BinOp):
+            self.compile_expression(node.left)
+            self.compile_expression(node.right)
+            opcode = BINARY_OPS.get(node.op)
+            if opcode is None:
+                # Unknown operators evaluate both sides and yield 0.0
+                self.add_instruction(OpCode.POP)
+                self.add_instruction(OpCode.POP)
+                self.add_instruction(OpCode.PUSH, 0.0)
+            else:
+                self.add_instruction(opcode)
+        elif isinstance(node, UnaryOp):
+            self.compile_expression(node.operand)
+            if node.op == '-':
+                self.add_instruction(OpCode.NEG)
+            elif node.op in ('!', 'num!'):
+                self.add_instruction(OpCode.NOT)
+            else:
+                self.add_instruction(OpCode.POP)
+                self.add_instruction(OpCode.PUSH, 0.0)
+        elif isinstance(node, CallExpr):
+            for arg in node.args:
+                self.compile_expression(arg)
+            # Expression calls reach builtins first
+            builtin = BUILTINS.get(node.name)
+            if builtin is not None:
+                self.add_instruction(OpCode.CALL_BUILTIN, (builtin, len(node.args)))
+            else:
+                self.add_instruction(OpCode.CALL, (node.name, len(node.args)))
+        elif isinstance(node, ArrayLiteral):
+            if all(isinstance(element, (Number, String)) for element in node.elements):
+                # Every evaluation still builds a new, mutable array
+                items = tuple(element.value for element in node.elements)
+                self.add_instruction(OpCode.NEW_ARRAY, self.add_constant(items))
+                return
+            for element in node.elements:
+                self.compile_expression(element)
+            self.add_instruction(OpCode.BUILD_ARRAY, len(node.elements))
+        elif isinstance(node, IndexExpr):
+            self.compile_expression(node.array)
+            self.compile_expression(node.index)
+            self.add_instruction(OpCode.INDEX)
+        elif isinstance(node, MemberExpr):
+            self.compile_expression(node.object_expr)
+            self.add_instruction(OpCode.MEMBER, node.member)
+        else:
+            self.add_instruction(OpCode.PUSH, 0.0)
+    
+    def get_names(self) -> List[str]:
+        """Variable names indexed by LOAD_VAR/STORE_VAR args"""
+        return sorted(self.variables, key=self.variables.__getitem__)
+    
     def get_bytecode(self) -> List[BytecodeInstruction]:
         """Get compiled bytecode"""
         return self.bytecode
@@ -180,8 +868,8 @@ class BytecodeCompiler:
         lines.append("BYTECODE DISASSEMBLY")
         lines.append("=" * 60)
         lines.append(f"\nConstants ({len(self.constants)}):")
-        for const, idx in sorted(self.constants.items(), key=lambda x: x[1]):
-            lines.append(f"  [{idx}] {const}")
+        for idx, const in enumerate(self.constants):
+            lines.append(f"  [{idx}] {const!r}")
         
         lines.append(f"\nVariables ({len(self.variables)}):")
         for var, idx in sorted(self.variables.items(), key=lambda x: x[1]):
@@ -197,74 +885,348 @@ class BytecodeCompiler:
 # BYTECODE VIRTUAL MACHINE
 # ============================================================================
 
-class BytecodeVM:
-    """Virtual machine that executes bytecode"""
+# FOR_ITER sentinel for an exhausted iterator
+_EXHAUSTED = object()
+
+# Value of a local slot the proc has not assigned yet
+UNBOUND = object()
+
+class Frame:
+    """One activation: the top-level program (frame 0) or a proc call"""
+    
+    __slots__ = ('code', 'bytecode', 'pc', 'slots', 'stack_base', 'cell', 'func_def',
+                 'memo_key', 'discard', 'tail_calls', 'overlay')
     
-    def __init__(self, bytecode: List[BytecodeInstruction], constants: Dict[str, int]):
+    def __init__(self, code: Optional[CodeObject], bytecode: List[BytecodeInstruction],
+                 slots: List[Any], stack_base: int, cell: Any = None, memo_key: Any = None,
+                 discard: bool = False) -> None:
+        self.code = code
         self.bytecode = bytecode
-        self.constants = {v: k for k, v in constants.items()}  # Reverse mapping
+        self.pc = 0                # Return address while a callee runs
+        self.slots = slots
+        self.stack_base = stack_base
+        self.cell = cell
+        self.func_def = cell.func_def if cell is not None else None
+        self.memo_key = memo_key   # Memo entry filled by the return value
+        self.discard = discard     # Statement call: the result is dropped
+        self.tail_calls = 0
+        # Full variable view replacing the caller's, set when an error
+        # unwound into this frame (the tree-walker keeps the callee's view)
+        self.overlay: Optional[Dict[str, Any]] = None
+
+class _IndexNames:
+    """Names of a hand-assembled program: variables are keyed by index"""
+    
+    def __getitem__(self, index: int) -> int:
+        return index
+
+class BytecodeVM:
+    """Virtual machine that executes bytecode
+    
+    Top-level variables live in ctx.variables. A proc call pushes a Frame
+    whose local slots hold the params and every name the body assigns;
+    unbound slots (missing args, reads before the first write) and names
+    the proc never assigns are looked up through the frames below, then
+    ctx.variables, which is the tree-walker's dynamic scoping without
+    copying a scope per call. Code is checked by verify_bytecode before it runs, so stack ops skip
+    underflow checks. The operand stack is one list shared by all frames
+    and grows with append; the verified max_stack is only reported.
+    """
+    
+    def __init__(self, bytecode: List[BytecodeInstruction], constants: List[Any],
+                 names: Optional[List[str]] = None, ctx: Optional[ExecutionContext] = None,
+                 interpreter: Optional[Interpreter] = None,
+                 compiler: Optional[BytecodeCompiler] = None, linetable: Optional[bytes] = None):
+        self.bytecode = bytecode   # Code of the running frame
+        self.constants = constants  # Shared with the compiler: procs compiled later add to it
+        self.names: Any = names if names is not None else _IndexNames()
+        self.max_stack = verify_bytecode(bytecode, constants, names)
+        # Position table of bytecode (proc bodies carry their own); built
+        # from the instructions on the first error when not given
+        self.linetable = linetable
+        self.ctx = ctx or ExecutionContext()
+        self.interpreter = interpreter or Interpreter(context=self.ctx)
+        # Compiles proc bodies on first call; shares names and constants
+        self.compiler = compiler or BytecodeCompiler()
+        self.code_cache: Dict[Tuple[int, bool], CodeObject] = {}
         self.stack: List[Any] = []
-        self.variables: Dict[int, Any] = {}  # variable_index -> value
+        self.frames: List[Frame] = [Frame(None, bytecode, [], 0)]
+        self.max_depth = 1
+        # (handler pc, catch variable, stack depth, frame index) per active try
+        self.handlers: List[Tuple[int, Optional[int], int, int]] = []
         self.pc = 0  # Program counter
         self.running = True
         self.cycles = 0
+        # Opcode pair and triple counts, set by enable_histogram()
+        self.pairs: Optional[Counter] = None
+        self.triples: Optional[Counter] = None
+    
+    def enable_histogram(self) -> None:
+        """Count opcode pairs and triples as they execute"""
+        self.pairs = Counter()
+        self.triples = Counter()
+    
+    @property
+    def variables(self) -> Dict[Any, Any]:
+        return self.ctx.variables
     
     def push(self, value: Any) -> None:
         """Push value onto stack"""
         self.stack.append(value)
     
     def pop(self) -> Any:
-        """Pop value from stack"""
-        if not self.stack:
-            raise RuntimeError("Stack underflow")
+        """Pop value from stack (verified code never underflows)"""
         return self.stack.pop()
     
     def peek(self) -> Any:
         """Peek at top of stack"""
-        if not self.stack:
-            raise RuntimeError("Stack empty")
         return self.stack[-1]
     
+    def pop_args(self, count: int) -> List[Any]:
+        """Pop count values, first pushed first"""
+        if count == 0:
+            return []
+        args = self.stack[-count:]
+        del self.stack[-count:]
+        return args
+    
+    # ------------------------------------------------------------------------
+    # Frames
+    # ------------------------------------------------------------------------
+    
+    def code_for(self, func_def: FunctionDef, args: List[Any], statement: bool) -> CodeObject:
+        """Compiled body for this call, compiling it on first use"""
+        body = select_body(func_def, args)
+        key = (id(body), statement)
+        code = self.code_cache.get(key)
+        if code is None:
+            code = self.compiler.compile_function(func_def, body, statement)
+            names = None
+            if not isinstance(self.names, _IndexNames):
+                # The body may have added names
+                names = self.names = self.compiler.get_names()
+            code.max_stack = verify_bytecode(code.bytecode, self.constants, names, code.local_names)
+            self.code_cache[key] = code
+        return code
+    
+    def call(self, cell: Any, args: List[Any], statement: bool = False, memo_key: Any = None) -> None:
+        """Push a frame running cell's proc; its RETURN resumes the caller"""
+        code = self.code_for(cell.func_def, args, statement)
+        slots = [UNBOUND] * len(code.local_names)
+        # Missing args leave their params unbound: they read the caller's value
+        for slot, value in zip(code.params, args):
+            slots[slot] = value
+        self.frames[-1].pc = self.pc
+        self.frames.append(Frame(code, code.bytecode, slots, len(self.stack), cell, memo_key, statement))
+        if len(self.frames) > self.max_depth:
+            self.max_depth = len(self.frames)
+        self.bytecode = code.bytecode
+        self.pc = -1  # Incremented before the first instruction
+    
+    def call_memoized(self, cell: Any, args: List[Any]) -> None:
+        """Expression call: the memo answers pure procs (see call_user_function)"""
+        memoize = cell.memoize
+        if memoize is None:
+            memoize = self.interpreter.decide_memoize(cell, self.ctx)
+        if not memoize or 0.0 in args or len(args) < len(cell.params):
+            self.call(cell, args)
+            return
+        key = (cell.func_def, *args)
+        try:
+            result = self.ctx.memo.get(key)
+        except TypeError:
+            self.call(cell, args)  # Array argument
+            return
+        if result is MemoCache.MISS:
+            cell.memo_misses += 1
+            self.call(cell, args, memo_key=key)
+        else:
+            cell.memo_hits += 1
+            self.push(result)
+    
+    def return_value(self, result: Any, convert: bool = False) -> None:
+        """Pop the running frame and hand result to its caller (with
+        convert, as a float: an error is then the caller's, at the call)"""
+        frame = self.frames.pop()
+        del self.stack[frame.stack_base:]
+        handlers = self.handlers
+        while handlers and handlers[-1][3] >= len(self.frames):
+            handlers.pop()
+        caller = self.frames[-1]
+        self.bytecode = caller.bytecode
+        self.pc = caller.pc
+        if convert and result.__class__ is not float:
+            result = float(str(result))
+        if frame.memo_key is not None:
+            self.ctx.memo.put(frame.memo_key, result)
+        if not frame.discard:
+            self.stack.append(result)
+    
+    def lookup(self, name: str, index: int) -> Any:
+        """Variable as seen by frame index: its assigned slots, then the
+        frames below it, then the globals"""
+        frames = self.frames
+        while index > 0:
+            frame = frames[index]
+            slot = frame.code.slots.get(name)
+            if slot is not None:
+                value = frame.slots[slot]
+                if value is not UNBOUND:
+                    return value
+            if frame.overlay is not None:
+                return frame.overlay.get(name, 0.0)
+            index -= 1
+        return self.ctx.variables.get(name, 0.0)
+    
+    def load_local(self, slot: int) -> Any:
+        """Local slot of the running frame; unbound reads the caller's variable"""
+        frame = self.frames[-1]
+        value = frame.slots[slot]
+        if value is UNBOUND:
+            name = frame.code.local_names[slot]
+            if frame.overlay is not None:
+                return frame.overlay.get(name, 0.0)
+            return self.lookup(name, len(self.frames) - 2)
+        return value
+    
+    def flatten(self) -> Dict[str, Any]:
+        """All variables visible to the running frame, in one dict"""
+        view = self.ctx.variables.copy()
+        for frame in self.frames[1:]:
+            if frame.overlay is not None:
+                view = frame.overlay.copy()
+            for name, value in zip(frame.code.local_names, frame.slots):
+                if value is not UNBOUND:
+                    view[name] = value
+        return view
+    
+    def unwind(self, index: int) -> None:
+        """Drop the frames above index after an error. The tree-walker
+        restores a caller's variables only on a normal return, so the
+        surviving frame goes on with the view of the frame that failed."""
+        if len(self.frames) - 1 > index:
+            view = self.flatten()
+            del self.frames[index + 1:]
+            frame = self.frames[index]
+            if index == 0:
+                self.ctx.variables = view
+            else:
+                frame.overlay = view
+                frame.slots = [view.get(name, UNBOUND) for name in frame.code.local_names]
+        self.bytecode = self.frames[index].bytecode
+    
     def execute(self) -> None:
-        """Execute bytecode"""
+        """Execute bytecode; errors inside a try jump to its catch block"""
+        while True:
+            try:
+                self._run()
+                return
+            except Exception as e:
+                # Code the tree-walker ran for the VM knows the statement itself
+                if error_position(e)[0] is None:
+                    line, column = self.position()
+                    if line:
+                        e.lyra_position = (line, column)
+                if not self.handlers:
+                    self.unwind(0)
+                    raise
+                handler_pc, catch_var, depth, index = self.handlers.pop()
+                self.unwind(index)
+                del self.stack[depth:]
+                error_msg = str(e)
+                self.ctx.error_reporter.report_exception(e)
+                if catch_var is not None:
+                    if index == 0:
+                        self.ctx.variables[self.names[catch_var]] = error_msg
+                    else:
+                        self.frames[index].slots[catch_var] = error_msg
+                self.pc = handler_pc
+    
+    def position(self) -> Tuple[int, int]:
+        """Source (line, column) of the instruction running in the top frame"""
+        frame = self.frames[-1]
+        if frame.code is not None:
+            table = frame.code.linetable
+        else:
+            if self.linetable is None:
+                self.linetable = encode_positions(frame.bytecode)
+            table = self.linetable
+        return decode_position(table, self.pc)
+    
+    def _run(self) -> None:
+        if self.pairs is not None:
+            self._run_histogram()
+            return
         while self.pc < len(self.bytecode) and self.running:
             self.cycles += 1
             instr = self.bytecode[self.pc]
             self._execute_instruction(instr)
             self.pc += 1
     
+    def _run_histogram(self) -> None:
+        """_run counting the sequences a superinstruction could replace:
+        instructions executed one after another at adjacent pcs"""
+        pairs, triples = self.pairs, self.triples
+        previous = before = None
+        last_pc, last_code = -2, None
+        while self.pc < len(self.bytecode) and self.running:
+            self.cycles += 1
+            instr = self.bytecode[self.pc]
+            opcode = instr.opcode
+            if self.pc == last_pc + 1 and self.bytecode is last_code:
+                pairs[(previous, opcode)] += 1
+                if before is not None:
+                    triples[(before, previous, opcode)] += 1
+                before = previous
+            else:
+                before = None
+            previous, last_pc, last_code = opcode, self.pc, self.bytecode
+            self._execute_instruction(instr)
+            self.pc += 1
+    
     def _execute_instruction(self, instr: BytecodeInstruction) -> None:
         """Execute a single instruction"""
         opcode = instr.opcode
         
-        if opcode == OpCode.PUSH:
+        if opcode.value >= SUPERINSTRUCTION_BASE:
+            self._execute_superinstruction(opcode, instr.arg)
+        
+        elif opcode == OpCode.PUSH:
             self.push(instr.arg)
         
         elif opcode == OpCode.POP:
             self.pop()
         
+        elif opcode == OpCode.DUP:
+            self.push(self.peek())
+        
         elif opcode == OpCode.LOAD_CONST:
-            const_val = self.constants[instr.arg]
-            # Convert string representations to actual values
-            try:
-                self.push(float(const_val))
-            except:
-                self.push(const_val)
+            self.push(self.constants[instr.arg])
         
         elif opcode == OpCode.LOAD_VAR:
-            var_idx = instr.arg
-            value = self.variables.get(var_idx, 0.0)
+            value = self.ctx.variables.get(self.names[instr.arg], 0.0)
             self.push(value)
         
         elif opcode == OpCode.STORE_VAR:
-            var_idx = instr.arg
             value = self.pop()
-            self.variables[var_idx] = value
+            self.ctx.variables[self.names[instr.arg]] = value
+        
+        elif opcode == OpCode.LOAD_LOCAL:
+            self.push(self.load_local(instr.arg))
+        
+        elif opcode == OpCode.STORE_LOCAL:
+            self.frames[-1].slots[instr.arg] = self.pop()
+        
+        elif opcode == OpCode.LOAD_NAME:
+            self.push(self.lookup(self.names[instr.arg], len(self.frames) - 1))
         
         elif opcode == OpCode.ADD:
             b = self.pop()
             a = self.pop()
-            self.push(a + b)
+            if isinstance(a, str) or isinstance(b, str):
+                self.push(str(a) + str(b))
+            else:
+                self.push(a + b)
         
         elif opcode == OpCode.SUB:
             b = self.pop()
@@ -279,12 +1241,24 @@ class BytecodeVM:
         elif opcode == OpCode.DIV:
             b = self.pop()
             a = self.pop()
-            self.push(a / b if b != 0 else 0)
+            if b == 0:
+                raise ZeroDivisionError("Division by zero")
+            self.push(a / b)
         
         elif opcode == OpCode.MOD:
             b = self.pop()
             a = self.pop()
-            self.push(a % b if b != 0 else 0)
+            if b == 0:
+                raise ZeroDivisionError("Modulo by zero")
+            self.push(float(int(a) % int(b)))
+        
+        elif opcode == OpCode.NEG:
+            self.push(-self.pop())
+        
+        elif opcode == OpCode.RANGE:
+            b = self.pop()
+            a = self.pop()
+            self.push(list(range(int(a), int(b))))
         
         elif opcode == OpCode.EQ:
             b = self.pop()
@@ -343,9 +1317,159 @@ class BytecodeVM:
             if cond:
                 self.pc = instr.arg - 1
         
+        elif opcode == OpCode.CALL:
+            name, argc = instr.arg
+            args = self.pop_args(argc)
+            cell = self.ctx.function_cells.get(name)
+            if cell is None:
+                self.push(0.0)
+            else:
+                self.call_memoized(cell, args)
+        
+        elif opcode == OpCode.CALL_BUILTIN:
+            function, argc = instr.arg
+            self.push(function(self.pop_args(argc), self.ctx))
+        
+        elif opcode == OpCode.PROC_GUARD:
+            name, target = instr.arg
+            if name not in self.ctx.function_cells:
+                self.pc = target - 1
+        
+        elif opcode == OpCode.CALL_STMT:
+            name, argc = instr.arg
+            args = self.pop_args(argc)
+            # Statement calls skip the memo, like run_user_function
+            self.call(self.ctx.function_cells[name], args, statement=True)
+        
+        elif opcode == OpCode.DEFINE_FUNC:
+            self.ctx.define_function(instr.arg)
+        
+        elif opcode == OpCode.RETURN:
+            if len(self.frames) == 1:
+                self.running = False  # Top-level return ends the program
+            else:
+                # Results travel as "RETURN:<value>" in the tree-walker
+                self.return_value(self.pop(), convert=True)
+        
+        elif opcode == OpCode.RETURN_NONE:
+            self.return_value(0.0 if self.frames[-1].tail_calls else 0)
+        
+        elif opcode == OpCode.TAIL_CALL:
+            name, argc = instr.arg
+            args = self.pop_args(argc)
+            frame = self.frames[-1]
+            cell = self.ctx.function_cells.get(name)
+            if cell is frame.cell and cell.func_def is frame.func_def:
+                # Rebind the params in place and restart (no statement
+                # re-evaluation after the first round); every variant of
+                # a body has the same slot layout
+                code = self.code_for(frame.func_def, args, False)
+                for slot, value in zip(code.params, args):
+                    frame.slots[slot] = value
+                frame.tail_calls += 1
+                frame.code = code
+                self.bytecode = frame.bytecode = code.bytecode
+                del self.stack[frame.stack_base:]
+                self.pc = -1
+            elif cell is None:
+                self.push(0.0)
+            else:
+                # The name was rebound while running: a real call, whose
+                # result the following RETURN passes on
+                self.call_memoized(cell, args)
+        
         elif opcode == OpCode.PRINT:
+            values = self.pop_args(1 if instr.arg is None else instr.arg)
+            self.ctx.write_line(' '.join(str(value) for value in values))
+        
+        elif opcode == OpCode.BUILD_ARRAY:
+            self.push(self.pop_args(instr.arg))
+        
+        elif opcode == OpCode.NEW_ARRAY:
+            self.push(list(self.constants[instr.arg]))
+        
+        elif opcode == OpCode.INDEX:
+            idx = int(self.pop())
+            arr = self.pop()
+            if not isinstance(arr, list):
+                raise TypeError(f"Cannot index non-array type")
+            if idx < 0 or idx >= len(arr):
+                raise IndexError(f"Index {idx} out of bounds")
+            self.push(arr[idx])
+        
+        elif opcode == OpCode.TO_INT:
+            self.push(int(self.pop()))
+        
+        elif opcode == OpCode.STORE_INDEX:
             value = self.pop()
-            print(value)
+            idx = self.pop()
+            arr = self.pop()
+            if isinstance(arr, list) and 0 <= idx < len(arr):
+                arr[idx] = value
+        
+        elif opcode == OpCode.MEMBER:
+            obj = self.pop()
+            if instr.arg == 'length' and isinstance(obj, list):
+                self.push(float(len(obj)))
+            else:
+                self.push(0.0)
+        
+        elif opcode == OpCode.GET_ITER:
+            iterable = self.pop()
+            if isinstance(iterable, list):
+                self.push(iter(iterable))
+            elif isinstance(iterable, (int, float)):
+                self.push(float(i) for i in range(int(iterable)))
+            else:
+                self.push(iter(()))
+        
+        elif opcode == OpCode.FOR_ITER:
+            item = next(self.peek(), _EXHAUSTED)
+            if item is _EXHAUSTED:
+                self.pop()
+                self.pc = instr.arg - 1
+            else:
+                self.push(item)
+        
+        elif opcode == OpCode.SETUP_TRY:
+            handler_pc, catch_var = instr.arg
+            self.handlers.append((handler_pc, catch_var, len(self.stack), len(self.frames) - 1))
+        
+        elif opcode == OpCode.POP_TRY:
+            self.handlers.pop()
+        
+        elif opcode == OpCode.SWITCH_TABLE:
+            table, default_pc = instr.arg
+            value = self.pop()
+            try:
+                target = table.get(value, default_pc)
+            except TypeError:
+                target = default_pc  # Unhashable (array) values never equal a literal
+            self.pc = target - 1
+        
+        elif opcode == OpCode.SET_BREAK:
+            self.ctx.break_flag = True
+        
+        elif opcode == OpCode.SET_CONTINUE:
+            self.ctx.continue_flag = True
+        
+        elif opcode == OpCode.CHECK_BLOCK_FLAGS:
+            if self.ctx.break_flag or self.ctx.continue_flag:
+                self.pc = instr.arg - 1
+        
+        elif opcode == OpCode.CHECK_LOOP_FLAGS:
+            ctx = self.ctx
+            if ctx.break_flag:
+                ctx.break_flag = False
+                self.pc = instr.arg[0] - 1
+            elif ctx.continue_flag:
+                ctx.continue_flag = False
+                self.pc = instr.arg[1] - 1
+        
+        elif opcode == OpCode.CHECK_SWITCH_FLAG:
+            if self.ctx.break_flag:
+                self.ctx.break_flag = False
+                self.pc = instr.arg - 1
         
         elif opcode == OpCode.HALT:
             self.running = False
@@ -353,10 +1477,46 @@ class BytecodeVM:
         elif opcode == OpCode.NOP:
             pass
     
+    def _execute_superinstruction(self, opcode: OpCode, arg: Tuple[Any, ...]) -> None:
+        variables = self.ctx.variables
+        names = self.names
+        constants = self.constants
+        if opcode == OpCode.INC_VAR:
+            name = names[arg[0]]
+            variables[name] = op_add(variables.get(name, 0.0), constants[arg[1]])
+        elif opcode == OpCode.INC_LOCAL:
+            self.frames[-1].slots[arg[0]] = op_add(self.load_local(arg[0]), constants[arg[1]])
+        elif opcode == OpCode.CMP_CONST_JUMP:
+            if not arg[2](variables.get(names[arg[0]], 0.0), constants[arg[1]]):
+                self.pc = arg[3] - 1
+                return
+        elif opcode == OpCode.CMP_LOCAL_CONST_JUMP:
+            if not arg[2](self.load_local(arg[0]), constants[arg[1]]):
+                self.pc = arg[3] - 1
+                return
+        elif opcode == OpCode.CMP_VARS_JUMP:
+            if not arg[2](variables.get(names[arg[0]], 0.0), variables.get(names[arg[1]], 0.0)):
+                self.pc = arg[3] - 1
+                return
+        elif opcode == OpCode.VAR_CONST_OP:
+            self.push(arg[2](variables.get(names[arg[0]], 0.0), constants[arg[1]]))
+        elif opcode == OpCode.LOCAL_CONST_OP:
+            self.push(arg[2](self.load_local(arg[0]), constants[arg[1]]))
+        elif opcode == OpCode.VAR_VAR_OP:
+            self.push(arg[2](variables.get(names[arg[0]], 0.0), variables.get(names[arg[1]], 0.0)))
+        elif opcode == OpCode.OP_STORE_VAR:
+            b = self.pop()
+            a = self.pop()
+            variables[names[arg[1]]] = arg[0](a, b)
+        else:
+            return
+        self.pc = arg[-1] - 1  # Skip the rest of the sequence
+    
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get VM performance metrics"""
         return {
             'cycles': self.cycles,
+            'max_stack': self.max_stack,
             'stack_operations': sum(1 for i in self.bytecode if i.opcode in [OpCode.PUSH, OpCode.POP]),
             'arithmetic_operations': sum(1 for i in self.bytecode if i.opcode in 
                                         [OpCode.ADD, OpCode.SUB, OpCode.MUL, OpCode.DIV, OpCode.MOD]),
@@ -366,44 +1526,463 @@ class BytecodeVM:
                                      [OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE]),
         }
 
+def run_bytecode(program: Program, ctx: ExecutionContext,
+                 interpreter: Optional[Interpreter] = None) -> BytecodeVM:
+    """Compile program and run it on the threaded VM in ctx (lyra --bytecode)"""
+    try:
+        from .fast_bytecode_vm import FastBytecodeVM
+    except ImportError:
+        from fast_bytecode_vm import FastBytecodeVM
+    compiler = BytecodeCompiler()
+    extern = [cell.func_def for cell in ctx.function_cells.values()]
+    bytecode = compiler.compile_program(program, extern)
+    vm = FastBytecodeVM(bytecode, compiler.constants, compiler.get_names(), ctx, interpreter, compiler,
+                        linetable=compiler.linetable)
+    vm.execute()
+    return vm
+
 # ============================================================================
 # BYTECODE OPTIMIZER
 # ============================================================================
 
+# Ops that never continue with the next instruction
+TERMINATORS = frozenset((OpCode.JUMP, OpCode.RETURN, OpCode.RETURN_NONE, OpCode.HALT,
+                         OpCode.SWITCH_TABLE))
+
+# Ops whose arg is a single jump target
+SINGLE_TARGET_OPS = frozenset((OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE,
+                               OpCode.FOR_ITER, OpCode.CHECK_BLOCK_FLAGS,
+                               OpCode.CHECK_SWITCH_FLAG))
+
+# Pushes with no side effect: removable together with a following POP
+PURE_PUSHES = frozenset((OpCode.PUSH, OpCode.LOAD_CONST, OpCode.DUP, OpCode.LOAD_VAR,
+                         OpCode.LOAD_LOCAL, OpCode.LOAD_NAME))
+
+def jump_targets(instr: BytecodeInstruction) -> List[int]:
+    """Targets instr can jump to besides the next instruction (handlers included)"""
+    opcode, arg = instr.opcode, instr.arg
+    if opcode in SINGLE_TARGET_OPS:
+        targets = [arg]
+    elif opcode is OpCode.CHECK_LOOP_FLAGS:
+        targets = list(arg) if arg is not None else []
+    elif opcode is OpCode.PROC_GUARD:
+        targets = [arg[1]]
+    elif opcode is OpCode.SETUP_TRY:
+        targets = [arg[0]]
+    elif opcode is OpCode.SWITCH_TABLE:
+        targets = list(arg[0].values()) + [arg[1]]
+    else:
+        return []
+    return [target for target in targets if target is not None]
+
+def retarget(instr: BytecodeInstruction, resolve: Any) -> BytecodeInstruction:
+    """instr with every jump target t replaced by resolve(t)"""
+    opcode, arg = instr.opcode, instr.arg
+    if opcode in SINGLE_TARGET_OPS:
+        if arg is None:
+            return instr
+        arg = resolve(arg)
+    elif opcode is OpCode.CHECK_LOOP_FLAGS:
+        if arg is None:
+            return instr
+        arg = (resolve(arg[0]), resolve(arg[1]))
+    elif opcode is OpCode.PROC_GUARD:
+        arg = (arg[0], resolve(arg[1]))
+    elif opcode is OpCode.SETUP_TRY:
+        arg = (resolve(arg[0]), arg[1])
+    elif opcode is OpCode.SWITCH_TABLE:
+        arg = ({value: resolve(target) for value, target in arg[0].items()}, resolve(arg[1]))
+    else:
+        return instr
+    return BytecodeInstruction(opcode, arg, instr.line, instr.column)
+
+class ControlFlowGraph:
+    """Basic blocks of one bytecode list, in layout order
+    
+    A block's label is the pc of its first instruction in the input, and
+    jump args inside blocks name labels. assemble() lays the blocks out
+    again and resolves every label to its new pc.
+    """
+    
+    def __init__(self, bytecode: List[BytecodeInstruction]):
+        leaders = {0}
+        for pc, instr in enumerate(bytecode):
+            targets = jump_targets(instr)
+            leaders.update(targets)
+            if targets or instr.opcode in TERMINATORS:
+                leaders.add(pc + 1)
+        # A jump to len(bytecode) lands on an empty block at the end
+        self.order = sorted(label for label in leaders if label <= len(bytecode))
+        self.blocks: Dict[int, List[BytecodeInstruction]] = {}
+        for label, end in zip(self.order, self.order[1:] + [len(bytecode)]):
+            self.blocks[label] = bytecode[label:end]
+    
+    def falls_through(self, label: int) -> bool:
+        block = self.blocks[label]
+        return not block or block[-1].opcode not in TERMINATORS
+    
+    def successors(self, index: int) -> List[int]:
+        label = self.order[index]
+        block = self.blocks[label]
+        labels = [target for instr in block for target in jump_targets(instr)]
+        if self.falls_through(label) and index + 1 < len(self.order):
+            labels.append(self.order[index + 1])
+        return labels
+    
+    def first_instruction(self, label: int) -> Tuple[Optional[BytecodeInstruction], int]:
+        """First instruction run from label (empty blocks fall through) and
+        the label of the block holding it"""
+        index = self.order.index(label)
+        while index < len(self.order):
+            block = self.blocks[self.order[index]]
+            if block:
+                return block[0], self.order[index]
+            index += 1
+        return None, label
+    
+    def assemble(self) -> List[BytecodeInstruction]:
+        pcs = {}
+        pc = 0
+        for label in self.order:
+            pcs[label] = pc
+            pc += len(self.blocks[label])
+        resolve = pcs.__getitem__
+        return [retarget(instr, resolve) for label in self.order for instr in self.blocks[label]]
+
+# Each pass rewrites a ControlFlowGraph and returns True if it changed it
+
+def fold_constant_branches(cfg: ControlFlowGraph, constants: List[Any]) -> bool:
+    """LOAD_CONST/PUSH v; JUMP_IF_FALSE t becomes JUMP t or nothing"""
+    changed = False
+    for label in cfg.order:
+        block = cfg.blocks[label]
+        if len(block) < 2 or block[-1].opcode not in (OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE):
+            continue
+        load = block[-2]
+        if load.opcode is OpCode.LOAD_CONST:
+            value = constants[load.arg]
+        elif load.opcode is OpCode.PUSH:
+            value = load.arg
+        else:
+            continue
+        jump = block[-1]
+        taken = (not value) if jump.opcode is OpCode.JUMP_IF_FALSE else bool(value)
+        block[-2:] = [BytecodeInstruction(OpCode.JUMP, jump.arg, jump.line, jump.column)] if taken else []
+        changed = True
+    return changed
+
+def thread_jumps(cfg: ControlFlowGraph, constants: List[Any]) -> bool:
+    """A jump to an unconditional JUMP goes straight to its target"""
+    changed = False
+    
+    def final_target(target: int) -> int:
+        seen = set()
+        while target not in seen:
+            seen.add(target)
+            if target not in cfg.blocks:
+                break
+            first, _ = cfg.first_instruction(target)
+            if first is None or first.opcode is not OpCode.JUMP:
+                break
+            target = first.arg
+        return target
+    
+    for label in cfg.order:
+        block = cfg.blocks[label]
+        for index, instr in enumerate(block):
+            if jump_targets(instr):
+                threaded = retarget(instr, final_target)
+                if jump_targets(threaded) != jump_targets(instr):
+                    block[index] = threaded
+                    changed = True
+    return changed
+
+def remove_dead_blocks(cfg: ControlFlowGraph, constants: List[Any]) -> bool:
+    """Drop blocks no path from the entry reaches"""
+    index_of = {label: index for index, label in enumerate(cfg.order)}
+    reached = set()
+    pending = [0]
+    while pending:
+        index = pending.pop()
+        if index in reached:
+            continue
+        reached.add(index)
+        pending.extend(index_of[label] for label in cfg.successors(index))
+    # Empty blocks carry no code; jumps to them resolve to the next block
+    dead = [label for index, label in enumerate(cfg.order)
+            if index not in reached and cfg.blocks[label]]
+    for label in dead:
+        cfg.blocks[label] = []
+    return bool(dead)
+
+def remove_jumps_to_next(cfg: ControlFlowGraph, constants: List[Any]) -> bool:
+    """JUMP to the code right after it disappears; a conditional one
+    becomes the POP of its condition"""
+    changed = False
+    for index, label in enumerate(cfg.order):
+        block = cfg.blocks[label]
+        if not block or block[-1].opcode not in (OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE):
+            continue
+        following = index + 1
+        while following < len(cfg.order) and cfg.order[following] != block[-1].arg \
+                and not cfg.blocks[cfg.order[following]]:
+            following += 1
+        if following < len(cfg.order) and cfg.order[following] == block[-1].arg:
+            jump = block[-1]
+            block[-1:] = [] if jump.opcode is OpCode.JUMP else [BytecodeInstruction(OpCode.POP, None, jump.line, jump.column)]
+            changed = True
+    return changed
+
+def peephole(cfg: ControlFlowGraph, constants: List[Any]) -> bool:
+    """Rewrites inside each block:
+    LOAD_VAR x; STORE_VAR x       -> (nothing)
+    STORE_VAR x; LOAD_VAR x       -> DUP; STORE_VAR x   (STORE_LOCAL too)
+    <pure push>; POP              -> (nothing)
+    NOP                           -> (nothing)"""
+    changed = False
+    for label in cfg.order:
+        block = cfg.blocks[label]
+        result: List[BytecodeInstruction] = []
+        for instr in block:
+            opcode = instr.opcode
+            last = result[-1] if result else None
+            if opcode is OpCode.NOP:
+                changed = True
+                continue
+            if last is not None:
+                if opcode is OpCode.STORE_VAR and last.opcode is OpCode.LOAD_VAR and last.arg == instr.arg:
+                    result.pop()
+                    changed = True
+                    continue
+                if opcode is OpCode.POP and last.opcode in PURE_PUSHES:
+                    result.pop()
+                    changed = True
+                    continue
+                if (opcode is OpCode.LOAD_VAR and last.opcode is OpCode.STORE_VAR or
+                        opcode is OpCode.LOAD_LOCAL and last.opcode is OpCode.STORE_LOCAL) \
+                        and last.arg == instr.arg:
+                    result[-1:] = [BytecodeInstruction(OpCode.DUP, None, last.line, last.column), last]
+                    changed = True
+                    continue
+            result.append(instr)
+        cfg.blocks[label] = result
+    return changed
+
 class BytecodeOptimizer:
-    """Optimizes bytecode for better performance"""
+    """Optimizes bytecode for better performance
+    
+    Every pass runs on a fresh ControlFlowGraph and its result is
+    reassembled, so jump targets are re-resolved after each pass.
+    Superinstructions hold pcs the passes do not track: fuse last.
+    """
+    
+    PASSES = [fold_constant_branches, thread_jumps, remove_dead_blocks, peephole,
+              remove_jumps_to_next]
+    MAX_ROUNDS = 10
+    
+    @staticmethod
+    def run_pass(bytecode: List[BytecodeInstruction], optimization: Any,
+                 constants: Optional[List[Any]] = None) -> Tuple[List[BytecodeInstruction], bool]:
+        cfg = ControlFlowGraph(bytecode)
+        if not optimization(cfg, constants or []):
+            return bytecode, False
+        return cfg.assemble(), True
+    
+    @staticmethod
+    def optimize(bytecode: List[BytecodeInstruction], constants: List[Any]) -> List[BytecodeInstruction]:
+        """Run every pass until none changes anything"""
+        if any(instr.opcode.value >= SUPERINSTRUCTION_BASE for instr in bytecode):
+            return bytecode
+        for _ in range(BytecodeOptimizer.MAX_ROUNDS):
+            changed = False
+            for optimization in BytecodeOptimizer.PASSES:
+                bytecode, applied = BytecodeOptimizer.run_pass(bytecode, optimization, constants)
+                changed = changed or applied
+            if not changed:
+                break
+        return bytecode
     
     @staticmethod
     def remove_dead_code(bytecode: List[BytecodeInstruction]) -> List[BytecodeInstruction]:
         """Remove unreachable code after unconditional jumps"""
-        optimized = []
-        for instr in bytecode:
-            optimized.append(instr)
-            if instr.opcode == OpCode.JUMP:
-                # Skip instructions until we find a jump target
-                # (simplified - proper implementation would track labels)
-                pass
-        return optimized
+        return BytecodeOptimizer.run_pass(bytecode, remove_dead_blocks)[0]
     
     @staticmethod
     def peephole_optimize(bytecode: List[BytecodeInstruction]) -> List[BytecodeInstruction]:
         """Apply peephole optimizations (pattern matching on instruction sequences)"""
-        # Example: PUSH X; POP -> remove both
-        # Example: LOAD_VAR X; STORE_VAR X -> keep only LOAD_VAR
-        
-        optimized = []
-        i = 0
-        while i < len(bytecode):
-            if (i + 1 < len(bytecode) and
-                bytecode[i].opcode == OpCode.PUSH and
-                bytecode[i+1].opcode == OpCode.POP):
-                # Skip both instructions
-                i += 2
+        return BytecodeOptimizer.run_pass(bytecode, peephole)[0]
+
+# ============================================================================
+# BYTECODE VERIFIER
+# ============================================================================
+
+class VerificationError(Exception):
+    """Bytecode that would corrupt the VM's state; rejected before it runs"""
+
+# Values each op pops and pushes on the path to the next instruction
+STACK_EFFECTS: Dict[OpCode, Tuple[int, int]] = {
+    OpCode.PUSH: (0, 1), OpCode.POP: (1, 0), OpCode.DUP: (1, 2),
+    OpCode.LOAD_VAR: (0, 1), OpCode.STORE_VAR: (1, 0), OpCode.LOAD_CONST: (0, 1),
+    OpCode.LOAD_LOCAL: (0, 1), OpCode.STORE_LOCAL: (1, 0), OpCode.LOAD_NAME: (0, 1),
+    OpCode.NEG: (1, 1), OpCode.NOT: (1, 1), OpCode.RANGE: (2, 1),
+    OpCode.JUMP: (0, 0), OpCode.JUMP_IF_FALSE: (1, 0), OpCode.JUMP_IF_TRUE: (1, 0),
+    OpCode.RETURN: (1, 0), OpCode.PROC_GUARD: (0, 0), OpCode.DEFINE_FUNC: (0, 0),
+    OpCode.INPUT: (0, 1), OpCode.NOP: (0, 0), OpCode.HALT: (0, 0),
+    OpCode.INDEX: (2, 1), OpCode.STORE_INDEX: (3, 0), OpCode.TO_INT: (1, 1),
+    OpCode.MEMBER: (1, 1), OpCode.GET_ITER: (1, 1), OpCode.FOR_ITER: (1, 2),
+    OpCode.NEW_ARRAY: (0, 1), OpCode.SETUP_TRY: (0, 0), OpCode.POP_TRY: (0, 0),
+    OpCode.SWITCH_TABLE: (1, 0), OpCode.SET_BREAK: (0, 0), OpCode.SET_CONTINUE: (0, 0),
+    OpCode.CHECK_BLOCK_FLAGS: (0, 0), OpCode.CHECK_LOOP_FLAGS: (0, 0),
+    OpCode.CHECK_SWITCH_FLAG: (0, 0), OpCode.RETURN_NONE: (0, 0),
+    # Superinstructions: the whole sequence, ending at arg[-1]
+    OpCode.INC_VAR: (0, 0), OpCode.INC_LOCAL: (0, 0), OpCode.CMP_CONST_JUMP: (0, 0),
+    OpCode.CMP_LOCAL_CONST_JUMP: (0, 0), OpCode.CMP_VARS_JUMP: (0, 0),
+    OpCode.VAR_CONST_OP: (0, 1), OpCode.LOCAL_CONST_OP: (0, 1), OpCode.VAR_VAR_OP: (0, 1),
+    OpCode.OP_STORE_VAR: (2, 0),
+}
+for _opcode in set(BINARY_OPS.values()) - {OpCode.RANGE}:
+    STACK_EFFECTS[_opcode] = (2, 1)
+del _opcode
+
+# Ops taking arg[1] values from the stack: (pushes, arg holds the count directly)
+COUNTED_EFFECTS = {
+    OpCode.CALL: (1, False), OpCode.CALL_BUILTIN: (1, False), OpCode.CALL_STMT: (0, False),
+    OpCode.TAIL_CALL: (1, False), OpCode.PRINT: (0, True), OpCode.BUILD_ARRAY: (1, True),
+}
+
+# Operands indexing the local slots / names / constants, by op: None for
+# the arg itself, else positions in the arg tuple
+SLOT_OPERANDS = {OpCode.LOAD_LOCAL: (None,), OpCode.STORE_LOCAL: (None,), OpCode.INC_LOCAL: (0,),
+                 OpCode.CMP_LOCAL_CONST_JUMP: (0,), OpCode.LOCAL_CONST_OP: (0,)}
+NAME_OPERANDS = {OpCode.LOAD_VAR: (None,), OpCode.STORE_VAR: (None,), OpCode.LOAD_NAME: (None,),
+                 OpCode.INC_VAR: (0,), OpCode.CMP_CONST_JUMP: (0,), OpCode.CMP_VARS_JUMP: (0, 1),
+                 OpCode.VAR_CONST_OP: (0,), OpCode.VAR_VAR_OP: (0, 1), OpCode.OP_STORE_VAR: (1,)}
+CONSTANT_OPERANDS = {OpCode.LOAD_CONST: (None,), OpCode.NEW_ARRAY: (None,),
+                     OpCode.INC_VAR: (1,), OpCode.INC_LOCAL: (1,), OpCode.CMP_CONST_JUMP: (1,),
+                     OpCode.CMP_LOCAL_CONST_JUMP: (1,), OpCode.VAR_CONST_OP: (1,),
+                     OpCode.LOCAL_CONST_OP: (1,)}
+
+FUSED_JUMPS = frozenset((OpCode.CMP_CONST_JUMP, OpCode.CMP_LOCAL_CONST_JUMP, OpCode.CMP_VARS_JUMP))
+BRANCHING_OPS = SINGLE_TARGET_OPS | {OpCode.CHECK_LOOP_FLAGS, OpCode.PROC_GUARD,
+                                     OpCode.SETUP_TRY, OpCode.SWITCH_TABLE}
+
+def _verification_rules() -> List[Optional[Tuple[Any, ...]]]:
+    """Per opcode value: (pops, pushes, counted, constant, slot and name
+    operands, jump kind, jump depth change, falls through); None for ops
+    without a stack effect"""
+    rules: List[Optional[Tuple[Any, ...]]] = [None] * (max(op.value for op in OpCode) + 1)
+    for opcode in OpCode:
+        counted = COUNTED_EFFECTS.get(opcode)
+        if counted is not None:
+            pops, pushes = None, counted[0]
+        elif opcode in STACK_EFFECTS:
+            pops, pushes = STACK_EFFECTS[opcode]
+        else:
+            continue
+        if opcode in FUSED_JUMPS:
+            jumps = 'fused jump'
+        elif opcode.value >= SUPERINSTRUCTION_BASE:
+            jumps = 'fused'
+        elif opcode in BRANCHING_OPS:
+            jumps = 'jumps'
+        else:
+            jumps = None
+        # FOR_ITER's jump pops the iterator instead of pushing the item
+        jump_change = -2 if opcode is OpCode.FOR_ITER else 0
+        # A superinstruction continues at arg[-1], not at pc + 1
+        falls_through = opcode not in TERMINATORS and opcode.value < SUPERINSTRUCTION_BASE
+        rules[opcode.value] = (pops, pushes, counted, CONSTANT_OPERANDS.get(opcode, ()),
+                               SLOT_OPERANDS.get(opcode, ()), NAME_OPERANDS.get(opcode, ()),
+                               jumps, jump_change, falls_through)
+    return rules
+
+VERIFICATION_RULES = _verification_rules()
+
+def _check_operands(instr: BytecodeInstruction, pc: int, positions: Tuple[Any, ...],
+                    limit: int, what: str) -> None:
+    for position in positions:
+        value = instr.arg if position is None else instr.arg[position]
+        if value.__class__ is not int or not 0 <= value < limit:
+            raise VerificationError(f"{instr.opcode.name} at pc {pc} refers to {what} {value!r} of {limit}")
+
+def verify_bytecode(bytecode: List[BytecodeInstruction], constants: List[Any],
+                    names: Optional[List[str]] = None,
+                    local_names: Optional[List[str]] = None) -> int:
+    """Prove bytecode safe to run and return its maximum stack depth
+    
+    Follows every path from pc 0 (try handlers and switch tables
+    included) and checks that each instruction finds the values it pops,
+    that every pc is reached with one stack depth, that jump targets,
+    constants, names (when given) and local slots exist, and that a proc
+    body (local_names given) cannot run past its end. Raises
+    VerificationError otherwise.
+    """
+    size = len(bytecode)
+    depths: List[Optional[int]] = [None] * (size + 1)
+    depths[0] = 0
+    max_depth = 0
+    pending = [0]
+    rules = VERIFICATION_RULES
+    
+    def reach(target: Any, depth: int, source: int) -> None:
+        if target.__class__ is not int or not 0 <= target <= size:
+            raise VerificationError(f"Jump target {target!r} at pc {source} is outside 0..{size}")
+        known = depths[target]
+        if known is None:
+            depths[target] = depth
+            pending.append(target)
+        elif known != depth:
+            raise VerificationError(f"Stack depth {depth} from pc {source} meets depth {known} at pc {target}")
+    
+    while pending:
+        pc = pending.pop()
+        if pc == size:
+            if local_names is not None:
+                raise VerificationError("Proc body runs past its last instruction")
+            continue  # Top-level code may end without HALT
+        instr = bytecode[pc]
+        try:
+            # Indexed by value: hashing an Enum member runs Python code
+            (pops, pushes, counted, constant_operands, slot_operands, name_operands,
+             jumps, jump_change, falls_through) = rules[instr.opcode._value_]
+        except (AttributeError, IndexError, TypeError):
+            raise VerificationError(f"Unknown opcode {getattr(instr, 'opcode', instr)!r} at pc {pc}") from None
+        depth = depths[pc]
+        try:
+            if counted is not None:
+                pops = instr.arg if counted[1] else instr.arg[1]
+                if pops is None and instr.opcode is OpCode.PRINT:
+                    pops = 1
+                if pops.__class__ is not int or pops < 0:
+                    raise TypeError
+            if constant_operands:
+                _check_operands(instr, pc, constant_operands, len(constants), "constant")
+            if slot_operands:
+                if local_names is None:
+                    raise VerificationError(f"{instr.opcode.name} at pc {pc} outside a proc body")
+                _check_operands(instr, pc, slot_operands, len(local_names), "local slot")
+            if name_operands and names is not None:
+                _check_operands(instr, pc, name_operands, len(names), "name")
+            if jumps is None:
+                targets = ()
+            elif jumps == 'jumps':
+                targets = jump_targets(instr)
+            elif jumps == 'fused':
+                targets = (instr.arg[-1],)
             else:
-                optimized.append(bytecode[i])
-                i += 1
-        
-        return optimized
+                targets = (instr.arg[3], instr.arg[-1])
+        except (TypeError, IndexError, AttributeError):
+            raise VerificationError(f"Malformed arg {instr.arg!r} of {instr.opcode.name} at pc {pc}") from None
+        if depth < pops:
+            raise VerificationError(f"{instr.opcode.name} at pc {pc} pops {pops} values, stack holds {depth}")
+        after = depth - pops + pushes
+        if after > max_depth:
+            max_depth = after
+        for target in targets:
+            reach(target, after + jump_change, pc)
+        if falls_through:
+            reach(pc + 1, after, pc)
+    return max_depth
 
 # ============================================================================
 # EXAMPLE USAGE
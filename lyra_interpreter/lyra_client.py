@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LYRA THIN CLIENT
+Version: 1.0.3
+Author: Seread335
+Runs a file on a warm `lyra --server` daemon instead of a fresh interpreter
+
+Only `socket` and `stat` are imported on top of what Python loads anyway (no json,
+no typing), so a client launch costs little more than bare Python startup.
+
+Protocol (one Unix socket connection per run, UTF-8 lines):
+  client -> server   <backend>\t<absolute path>[\t<setting>=<value>]...
+                       settings: inline_size, memo_size, jit_threshold,
+                       no_memo (comma-separated names)
+  server -> client   program output lines, plus control lines:
+                       \\0I          send one line for input()
+                       \\0L <text>   write text to stderr (--optimize summaries)
+                       \\0X <code>   run finished with exit code (as a cold run's)
+  client -> server   <line> after \\0I, or \\0 alone on end of input
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import stat
+import sys
+
+CONTROL = "\0"
+INPUT_REQUEST = "I"
+LOG = "L"
+EXIT = "X"
+
+# Client flags taking a value -> request setting
+SETTINGS = {"--inline-size": "inline_size", "--memo-size": "memo_size",
+            "--jit-threshold": "jit_threshold", "--no-memo": "no_memo"}
+
+def default_socket_path() -> str:
+    """Socket used when --socket is not given
+
+    $LYRA_SOCKET, else lyra.sock in $XDG_RUNTIME_DIR, else in a private
+    lyra-<uid> directory under $TMPDIR (created 0700 by the server).
+    """
+    path = os.environ.get("LYRA_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "lyra.sock")
+    return os.path.join(os.environ.get("TMPDIR", "/tmp"), f"lyra-{os.getuid()}", "lyra.sock")
+
+def check_socket(socket_path: str) -> None:
+    """Refuse a socket that is not ours: another user could have planted it
+
+    Raises FileNotFoundError when there is no socket, PermissionError when
+    the path is not a socket owned by the current user.
+    """
+    info = os.lstat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is not a socket owned by this user")
+
+def run_remote(filename: str, backend: str = "tree-walking",
+               socket_path: str | None = None,
+               stdin=sys.stdin, stdout=sys.stdout, settings: dict | None = None,
+               stderr=sys.stderr) -> int:
+    """Run a file on the server, streaming its output; returns exit code
+
+    settings: request settings (see SETTINGS), as strings. Raises OSError
+    when no server is listening, PermissionError when the socket belongs
+    to someone else.
+    """
+    socket_path = socket_path or default_socket_path()
+    check_socket(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    with sock:
+        reader = sock.makefile('r', encoding='utf-8', newline='\n')
+        writer = sock.makefile('w', encoding='utf-8', newline='\n')
+        request = [backend, os.path.abspath(filename)]
+        request += [f"{name}={value}" for name, value in (settings or {}).items()]
+        writer.write("\t".join(request) + "\n")
+        writer.flush()
+        for line in reader:
+            if not line.startswith(CONTROL):
+                stdout.write(line)
+                stdout.flush()
+            elif line[1:2] == INPUT_REQUEST:
+                data = stdin.readline()
+                if not data:
+                    data = CONTROL
+                writer.write(data if data.endswith("\n") else data + "\n")
+                writer.flush()
+            elif line[1:2] == LOG:
+                stderr.write(line[3:])
+                stderr.flush()
+            elif line[1:2] == EXIT:
+                return int(line[2:].strip() or 0)
+    # Server went away mid-run
+    return 1
+
+def main(argv: list[str] | None = None) -> None:
+    """lyra_client.py [--socket PATH] [backend] [settings] file.lyra
+
+    backend: --bytecode, --register, --optimize or --stackless; settings:
+    --inline-size N, --memo-size N, --jit-threshold N, --no-memo NAMES
+    (repeatable), each as in a cold `lyra` run.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path = None
+    backend = "tree-walking"
+    settings: dict = {}
+    files: list[str] = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--socket" and i + 1 < len(argv):
+            socket_path = argv[i + 1]
+            i += 1
+        elif arg in SETTINGS and i + 1 < len(argv):
+            value = argv[i + 1]
+            if arg == "--no-memo" and "no_memo" in settings:
+                value = f"{settings['no_memo']},{value}"
+            settings[SETTINGS[arg]] = value
+            i += 1
+        elif arg == "--bytecode":
+            backend = "bytecode"
+        elif arg == "--register":
+            backend = "register"
+        elif arg == "--optimize":
+            backend = "optimize"
+        elif arg == "--stackless":
+            backend = "stackless"
+        else:
+            files.append(arg)
+        i += 1
+
+    if len(files) != 1:
+        print("Usage: lyra_client.py [--socket PATH] [--bytecode|--register|--optimize|--stackless] "
+              "[--inline-size N] [--memo-size N] [--jit-threshold N] [--no-memo NAMES] file.lyra")
+        sys.exit(2)
+    if not os.path.exists(files[0]):
+        print(f"Error: File not found: {files[0]}")
+        sys.exit(1)
+
+    try:
+        code = run_remote(files[0], backend, socket_path, settings=settings)
+    except OSError as e:
+        if isinstance(e, PermissionError):
+            print(f"Warning: {e}; running without the server", file=sys.stderr)
+        # No server: fall back to a cold run of the package (cached bytecode)
+        interpreter = os.path.dirname(os.path.abspath(__file__))
+        cold_args = [arg for arg in argv if arg != socket_path and arg != "--socket"]
+        os.execv(sys.executable, [sys.executable, interpreter] + cold_args)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
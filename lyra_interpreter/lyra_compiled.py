@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+LYRA COMPILED BYTECODE FILES
+Version: 1.0.3
+Author: Seread335
+Saves a program compiled for the bytecode VM so later runs skip lex, parse
+and compile
+
+Usage:
+  lyra --compile foo.lyra        # write foo.lyrc next to the source
+  lyra --bytecode foo.lyra       # runs foo.lyrc on the bytecode VM while
+                                 # it matches foo.lyra
+
+File layout (.lyrc):
+  magic   b"LYRACODE"               8 bytes
+  header  <HHII6I                   version, flags (0), CRC-32 and length of
+                                    the source, then offset and size of each
+                                    section below
+  constants                         marshal of the constant pool
+  code                              marshal of {'names', 'nodes', 'procs', 'main', 'bodies'}
+  positions                         pc -> (line, column) table of every
+                                    code unit, see
+                                    lyra_bytecode.encode_positions
+
+Architecture:
+1. A code unit is its opcodes as one bytes object, its args as a marshal
+   list and the pcs whose args hold objects (procs, builtins, the operator
+   of a superinstruction), stored by index or name. Code is saved
+   optimized and fused, so loading only rebuilds the instructions
+2. Procs are AST tuples whose field names are stored in the file ('nodes'),
+   so loading needs no AST pass module. A proc defined inside another is
+   a reference: DEFINE_FUNC in both bodies binds the same FunctionDef
+3. Both bodies of every proc (expression and statement call; one shared
+   unit when they compile the same) go straight into the VM's code cache
+4. The file is mapped with mmap and sections are read through memoryview
+   slices: marshal decodes them without a copy. Position tables stay
+   compressed; the VM decodes one only to report an error
+5. A file of another version, compiled from other source, or holding
+   code that fails lyra_bytecode.verify_bytecode is ignored and the
+   program is compiled from source as usual
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from . import lyra_interpreter as core
+    from .lyra_interpreter import (BUILTINS, BinOp, CallExpr, ExecutionContext, FunctionDef,
+                                   Interpreter, UnaryOp, mark_tail_calls)
+    from .lyra_bytecode import (COMPARE_OPS, VALUE_OPS, BytecodeCompiler, BytecodeInstruction,
+                                CodeObject, OpCode, VerificationError, constant_key,
+                                verify_bytecode)
+except ImportError:
+    import lyra_interpreter as core
+    from lyra_interpreter import (BUILTINS, BinOp, CallExpr, ExecutionContext, FunctionDef,
+                                  Interpreter, UnaryOp, mark_tail_calls)
+    from lyra_bytecode import (COMPARE_OPS, VALUE_OPS, BytecodeCompiler, BytecodeInstruction,
+                               CodeObject, OpCode, VerificationError, constant_key,
+                               verify_bytecode)
+
+MAGIC = b"LYRACODE"
+VERSION = 3
+HEADER = struct.Struct("<HHII6I")
+SECTIONS_START = len(MAGIC) + HEADER.size
+EXTENSION = ".lyrc"
+
+# Tags heading encoded tuples: non-negative tags index 'nodes'
+TUPLE, PROC = -1, -2
+
+def _opcodes_by_value() -> List[Optional[OpCode]]:
+    table: List[Optional[OpCode]] = [None] * (max(opcode.value for opcode in OpCode) + 1)
+    for opcode in OpCode:
+        table[opcode.value] = opcode
+    return table
+
+OPCODES = _opcodes_by_value()
+
+# Superinstructions hold their operator as a function: stored as the
+# opcode of the operator, looked up in COMPARE_OPS or VALUE_OPS on load
+COMPARE_JUMPS = frozenset((OpCode.CMP_CONST_JUMP, OpCode.CMP_LOCAL_CONST_JUMP, OpCode.CMP_VARS_JUMP))
+OPERATOR_ARG = {OpCode.OP_STORE_VAR: 0}  # Position of the operator (default 2)
+NO_OPERATOR = frozenset((OpCode.INC_VAR, OpCode.INC_LOCAL))
+FUNCTION_OPS = {id(function): opcode.value
+                for table in (VALUE_OPS, COMPARE_OPS) for opcode, function in table.items()}
+BUILTIN_NAMES = {id(function): name for name, function in BUILTINS.items()}
+
+# A statement call compiles a second evaluation of these statements (see
+# BytecodeCompiler.compile_function); bodies without them share one unit
+REEVALUATED = (BinOp, UnaryOp, CallExpr)
+
+class CompiledFileError(Exception):
+    """File is not a compiled program this version can read"""
+
+class StaleCompiledFile(CompiledFileError):
+    """File was compiled from a different source"""
+
+def compiled_path(source_path: str) -> str:
+    """foo.lyra -> foo.lyrc"""
+    return os.path.splitext(source_path)[0] + EXTENSION
+
+def source_key(source: str) -> Tuple[int, int]:
+    data = source.encode('utf-8')
+    return zlib.crc32(data), len(data)
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+class _Writer:
+    def __init__(self) -> None:
+        try:
+            from .lyra_passes import CACHE_FIELDS, NODE_FIELDS
+        except ImportError:
+            from lyra_passes import CACHE_FIELDS, NODE_FIELDS
+        self.cache_fields = CACHE_FIELDS
+        self.node_fields = NODE_FIELDS
+        self.node_index = {cls: index for index, cls in enumerate(NODE_FIELDS)}
+        self.compiler = BytecodeCompiler()
+        self.procs: List[FunctionDef] = []
+        self.proc_index: Dict[int, int] = {}
+        self.positions = bytearray()
+
+    def collect_procs(self, bytecode: List[BytecodeInstruction]) -> None:
+        for instr in bytecode:
+            if instr.opcode is OpCode.DEFINE_FUNC and id(instr.arg) not in self.proc_index:
+                self.proc_index[id(instr.arg)] = len(self.procs)
+                self.procs.append(instr.arg)
+
+    def unit(self, bytecode: List[BytecodeInstruction],
+             linetable: bytes) -> Tuple[bytes, List[Any], List[int], int, int]:
+        """(opcodes, args, pcs of object args, position table offset and size)"""
+        args = []
+        fixups = []
+        for pc, instr in enumerate(bytecode):
+            opcode, arg = instr.opcode, instr.arg
+            if opcode is OpCode.DEFINE_FUNC:
+                arg = self.proc_index[id(arg)]
+            elif opcode is OpCode.CALL_BUILTIN:
+                arg = (BUILTIN_NAMES[id(arg[0])], arg[1])
+            elif opcode.value >= OpCode.INC_VAR.value and opcode not in NO_OPERATOR:
+                position = OPERATOR_ARG.get(opcode, 2)
+                arg = arg[:position] + (FUNCTION_OPS[id(arg[position])],) + arg[position + 1:]
+            else:
+                args.append(arg)
+                continue
+            fixups.append(pc)
+            args.append(arg)
+        offset = len(self.positions)
+        self.positions += linetable
+        return bytes(instr.opcode.value for instr in bytecode), args, fixups, offset, len(linetable)
+
+    def node(self, node: Any) -> Any:
+        if node.__class__ is FunctionDef and id(node) in self.proc_index:
+            return (PROC, self.proc_index[id(node)])
+        return self.fields(node)
+
+    def fields(self, node: Any) -> Any:
+        cls = node.__class__
+        if cls in self.node_index:
+            return (self.node_index[cls], node.line, node.column) + tuple(
+                None if name in self.cache_fields else self.node(getattr(node, name))
+                for name in self.node_fields[cls])
+        if cls is list:
+            return [self.node(item) for item in node]
+        if cls is tuple:
+            return (TUPLE,) + tuple(self.node(item) for item in node)
+        return node
+
+def compile_file(source_path: str, output_path: Optional[str] = None) -> Tuple[int, int]:
+    """Compile source_path to a .lyrc file; returns (instructions, procs)"""
+    try:
+        from .lyra_interpreter import parse_code
+    except ImportError:
+        from lyra_interpreter import parse_code
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    program = parse_code(source)
+    writer = _Writer()
+    compiler = writer.compiler
+    main = compiler.compile_program(program)
+    writer.collect_procs(main)
+    bodies = []
+    index = 0
+    # Bodies may define more procs; those are appended and compiled in turn
+    while index < len(writer.procs):
+        func_def = writer.procs[index]
+        mark_tail_calls(func_def)  # As FunctionCell.bind does before the first call
+        variants = [(False,), (True,)]
+        if not any(isinstance(stmt, REEVALUATED) for stmt in func_def.body):
+            variants = [(False, True)]
+        for calls in variants:
+            code = compiler.compile_function(func_def, func_def.body, calls[0])
+            writer.collect_procs(code.bytecode)
+            bodies.append((index, calls, code))
+        index += 1
+
+    instructions = len(main) + sum(len(code.bytecode) for _, _, code in bodies)
+    payload = {
+        'names': compiler.get_names(),
+        'nodes': [(cls.__name__, fields) for cls, fields in writer.node_fields.items()],
+        'main': writer.unit(main, compiler.linetable),
+        'bodies': [(proc, calls, writer.unit(code.bytecode, code.linetable), code.local_names,
+                    code.params) for proc, calls, code in bodies],
+    }
+    payload['procs'] = [writer.fields(func_def) for func_def in writer.procs]
+    sections = [marshal.dumps(compiler.constants), marshal.dumps(payload), bytes(writer.positions)]
+
+    layout = []
+    offset = SECTIONS_START
+    for data in sections:
+        layout += [offset, len(data)]
+        offset += len(data)
+    header = MAGIC + HEADER.pack(VERSION, 0, *source_key(source), *layout)
+    with open(output_path or compiled_path(source_path), 'wb') as f:
+        f.write(header)
+        for data in sections:
+            f.write(data)
+    return instructions, len(writer.procs)
+
+# ============================================================================
+# READING
+# ============================================================================
+
+class CompiledProgram:
+    """Program loaded from a .lyrc file, run by run_program like a parsed one
+
+    With source given, a file compiled from other source raises
+    StaleCompiledFile before anything past the header is read.
+    """
+
+    def __init__(self, path: str, source: Optional[str] = None) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise CompiledFileError(f"Not a compiled Lyra program: {path}") from None
+            with mapped, memoryview(mapped) as view:
+                self._load(view, source)
+
+    def _load(self, view: memoryview, source: Optional[str]) -> None:
+        if len(view) < SECTIONS_START or view[:len(MAGIC)] != MAGIC:
+            raise CompiledFileError(f"Not a compiled Lyra program: {self.path}")
+        version, _, crc, length, *layout = HEADER.unpack_from(view, len(MAGIC))
+        if version != VERSION:
+            raise CompiledFileError(f"Unsupported compiled file version {version} (expected {VERSION})")
+        if source is not None and source_key(source) != (crc, length):
+            raise StaleCompiledFile(f"{self.path} was compiled from another version of the source")
+        if layout[-2] + layout[-1] > len(view):
+            raise CompiledFileError(f"Truncated compiled Lyra program: {self.path}")
+        sections = [view[start:start + size] for start, size in zip(layout[::2], layout[1::2])]
+        try:
+            self.constants: List[Any] = marshal.loads(sections[0])
+            payload = marshal.loads(sections[1])
+            self.positions = sections[2].tobytes()
+        finally:
+            for section in sections:
+                section.release()
+
+        self.names: List[str] = payload['names']
+        self.procs = self._decode_procs(payload['nodes'], payload['procs'])
+        self.bytecode = self._decode_unit(payload['main'])
+        self.linetable = self._linetable(payload['main'])
+        # (calls sharing the code: False expression, True statement; code)
+        self.bodies: List[Tuple[Tuple[bool, ...], CodeObject]] = []
+        for proc, calls, unit, local_names, params in payload['bodies']:
+            func_def = self.procs[proc]
+            slots = {name: slot for slot, name in enumerate(local_names)}
+            code = CodeObject(func_def.name, self._decode_unit(unit), local_names, slots,
+                              params, func_def.body, linetable=self._linetable(unit))
+            self.bodies.append((calls, code))
+        # Saved code bypasses the compiler: check it like any other input
+        try:
+            verify_bytecode(self.bytecode, self.constants, self.names)
+            for _, code in self.bodies:
+                code.max_stack = verify_bytecode(code.bytecode, self.constants, self.names,
+                                                 code.local_names)
+        except VerificationError as e:
+            raise CompiledFileError(f"Invalid bytecode in {self.path}: {e}") from None
+
+    def _decode_procs(self, nodes: List[Tuple[str, Tuple[str, ...]]],
+                      encoded: List[Any]) -> List[FunctionDef]:
+        classes = [(getattr(core, name), fields) for name, fields in nodes]
+        # Shells first: a body may refer to a proc stored after it
+        procs = [object.__new__(FunctionDef) for _ in encoded]
+
+        def decode(value: Any) -> Any:
+            cls = value.__class__
+            if cls is tuple:
+                tag = value[0]
+                if tag == PROC:
+                    return procs[value[1]]
+                if tag == TUPLE:
+                    return tuple(decode(item) for item in value[1:])
+                node_class, fields = classes[tag]
+                return fill(object.__new__(node_class), fields, value)
+            if cls is list:
+                return [decode(item) for item in value]
+            return value
+
+        def fill(node: Any, fields: Tuple[str, ...], value: Tuple[Any, ...]) -> Any:
+            if value[1]:
+                node.line, node.column = value[1], value[2]
+            for name, field in zip(fields, value[3:]):
+                setattr(node, name, decode(field))
+            return node
+
+        for proc, value in zip(procs, encoded):
+            fill(proc, classes[value[0]][1], value)
+        return procs
+
+    def _linetable(self, unit: Tuple[bytes, List[Any], List[int], int, int]) -> bytes:
+        offset, size = unit[3:]
+        return self.positions[offset:offset + size]
+
+    def _decode_unit(self, unit: Tuple[bytes, List[Any], List[int], int, int]) -> List[BytecodeInstruction]:
+        # Instructions get no positions: errors are located through the unit's table
+        opcodes, args, fixups = unit[:3]
+        bytecode = list(map(BytecodeInstruction, map(OPCODES.__getitem__, opcodes), args))
+        for pc in fixups:
+            instr = bytecode[pc]
+            opcode, arg = instr.opcode, instr.arg
+            if opcode is OpCode.DEFINE_FUNC:
+                instr.arg = self.procs[arg]
+            elif opcode is OpCode.CALL_BUILTIN:
+                instr.arg = (BUILTINS[arg[0]], arg[1])
+            else:
+                position = OPERATOR_ARG.get(opcode, 2)
+                operators = COMPARE_OPS if opcode in COMPARE_JUMPS else VALUE_OPS
+                instr.arg = arg[:position] + (operators[OPCODES[arg[position]]],) + arg[position + 1:]
+        return bytecode
+
+    def run(self, ctx: ExecutionContext, interpreter: Optional[Interpreter] = None) -> Any:
+        """Run on FastBytecodeVM in ctx, as run_bytecode does for a parsed program"""
+        try:
+            from .fast_bytecode_vm import FastBytecodeVM
+        except ImportError:
+            from fast_bytecode_vm import FastBytecodeVM
+        # Bodies compiled later (typed bodies) extend the saved pool and names
+        compiler = BytecodeCompiler()
+        compiler.constants = self.constants
+        compiler.constant_index = {constant_key(value): index
+                                   for index, value in enumerate(self.constants)}
+        compiler.variables = {name: index for index, name in enumerate(self.names)}
+        compiler.next_var_index = len(self.names)
+        vm = FastBytecodeVM(self.bytecode, self.constants, list(self.names), ctx, interpreter, compiler,
+                            linetable=self.linetable)
+        for calls, code in self.bodies:
+            for statement in calls:
+                vm.code_cache[(id(code.body), statement)] = code
+        vm.execute()
+        return vm
+
+def load_fresh(source_path: str, source: str) -> Optional[CompiledProgram]:
+    """The .lyrc next to source_path if it was compiled from source, else None"""
+    try:
+        return CompiledProgram(compiled_path(source_path), source)
+    except (OSError, CompiledFileError, ValueError, EOFError):
+        return None
@@ -4,14 +4,19 @@ LYRA INTERPRETER - Python Implementation
 A working Lyra interpreter that executes .lyra programs
 """
 
+from __future__ import annotations
+
 import sys
-import argparse
 import os
-from enum import Enum
-from typing import Any, List, Optional, Dict, Tuple
-from datetime import datetime
 import time
 
+# Startup budget: only modules needed to run a file are imported here.
+# argparse, datetime, enum and typing together cost more than lexing,
+# parsing and running a typical script, so they load lazily (or never).
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, List, Optional, Dict, Tuple, TextIO
+
 __version__ = "1.0.3"
 __author__ = "Seread335"
 
@@ -19,83 +24,141 @@ __author__ = "Seread335"
 BACKEND_TREE_WALKING = "tree-walking"
 BACKEND_BYTECODE = "bytecode"
 BACKEND_OPTIMIZED = "optimize"
+BACKEND_STACKLESS = "stackless"
+BACKEND_REGISTER = "register"
 
 # ============================================================================
 # ERROR REPORTING SYSTEM
 # ============================================================================
 
+def describe_position(line: Optional[int], column: Optional[int] = None) -> str:
+    """' (line 3, column 5)', or '' when the line is unknown"""
+    if not line:
+        return ""
+    return f" (line {line}, column {column})" if column else f" (line {line})"
+
+def error_position(error: BaseException) -> Tuple[Optional[int], Optional[int]]:
+    """(line, column) of the statement that raised error, (None, None) if unknown
+    
+    The bytecode VMs store it on the error as lyra_position (decoded from
+    their position tables). For the tree-walkers it is the innermost
+    statement on the traceback: nothing is tracked while code runs.
+    Procs compiled by lyra_jit map their Python lines to statements.
+    Python's recursion limit hits wherever the backend's own frames run
+    out, so a RecursionError is placed at the last statement (in stack
+    order) that repeats on the traceback: the call back into the cycle.
+    """
+    position = getattr(error, 'lyra_position', None)
+    if position is not None:
+        return position
+    line = column = None
+    seen: Dict[Tuple[int, int], int] = {}  # Statements on the traceback, outermost first
+    tb = error.__traceback__
+    while tb is not None:
+        frame = tb.tb_frame
+        positions = frame.f_globals.get('__lyra_positions__')
+        position = None
+        if positions is not None:
+            position = positions.get(tb.tb_lineno)
+        else:
+            frame_locals = frame.f_locals
+            node = frame_locals.get('node')
+            if getattr(node, 'line', 0) and isinstance(frame_locals.get('self'), Interpreter):
+                position = (node.line, node.column)
+        if position is not None:
+            line, column = position
+            seen[position] = seen.get(position, 0) + 1
+        tb = tb.tb_next
+    if isinstance(error, RecursionError):
+        repeated = [position for position, count in seen.items() if count > 1]
+        if repeated:
+            return repeated[-1]
+    return line, column
+
+def describe_error(error: BaseException) -> str:
+    """Message of a runtime error followed by its position, if known"""
+    return f"{error}{describe_position(*error_position(error))}"
+
 class ErrorReporter:
-    def __init__(self, program_name: str = "") -> None:
+    def __init__(self, program_name: str = "", output: Optional[TextIO] = None) -> None:
+        self.output = output
         self.errors: List[Dict[str, Any]] = []
         self.warnings: List[Dict[str, Any]] = []
         self.program_name = program_name
-        self.start_time = datetime.now()
+        self.start_time = time.time()
     
-    def report_error(self, error_type: str, message: str, line: Optional[int] = None) -> None:
+    def report_error(self, error_type: str, message: str, line: Optional[int] = None,
+                     column: Optional[int] = None) -> None:
+        from datetime import datetime
         error: Dict[str, Any] = {
             'type': error_type,
             'message': message,
             'line': line,
+            'column': column,
             'time': datetime.now()
         }
         self.errors.append(error)
-        print(f"[ERROR] {error_type}: {message}" + (f" (line {line})" if line else ""))
+        print(f"[ERROR] {error_type}: {message}" + describe_position(line, column), file=self.output)
+    
+    def report_exception(self, error: BaseException) -> None:
+        """report_error for a runtime error, at the statement that raised it"""
+        self.report_error(type(error).__name__, str(error), *error_position(error))
     
     def report_warning(self, message: str, line: Optional[int] = None) -> None:
+        from datetime import datetime
         warning: Dict[str, Any] = {
             'message': message,
             'line': line,
             'time': datetime.now()
         }
         self.warnings.append(warning)
-        print(f"[WARNING] {message}" + (f" (line {line})" if line else ""))
+        print(f"[WARNING] {message}" + (f" (line {line})" if line else ""), file=self.output)
     
     def summary(self):
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        print(f"\n{'='*60}")
-        print(f"ERROR REPORT: {self.program_name}")
-        print(f"{'='*60}")
-        print(f"Total Errors: {len(self.errors)}")
-        print(f"Total Warnings: {len(self.warnings)}")
-        print(f"Execution Time: {elapsed:.3f}s")
+        elapsed = time.time() - self.start_time
+        print(f"\n{'='*60}", file=self.output)
+        print(f"ERROR REPORT: {self.program_name}", file=self.output)
+        print(f"{'='*60}", file=self.output)
+        print(f"Total Errors: {len(self.errors)}", file=self.output)
+        print(f"Total Warnings: {len(self.warnings)}", file=self.output)
+        print(f"Execution Time: {elapsed:.3f}s", file=self.output)
         
         if self.errors:
-            print(f"\nERRORS ({len(self.errors)}):")
+            print(f"\nERRORS ({len(self.errors)}):", file=self.output)
             for i, err in enumerate(self.errors, 1):
-                print(f"  {i}. {err['type']}: {err['message']}", end="")
-                if err['line']:
-                    print(f" (line {err['line']})", end="")
-                print()
+                print(f"  {i}. {err['type']}: {err['message']}", end="", file=self.output)
+                print(describe_position(err['line'], err.get('column')), end="", file=self.output)
+                print(file=self.output)
         
         if self.warnings:
-            print(f"\nWARNINGS ({len(self.warnings)}):")
+            print(f"\nWARNINGS ({len(self.warnings)}):", file=self.output)
             for i, warn in enumerate(self.warnings, 1):
-                print(f"  {i}. {warn['message']}", end="")
+                print(f"  {i}. {warn['message']}", end="", file=self.output)
                 if warn['line']:
-                    print(f" (line {warn['line']})", end="")
-                print()
+                    print(f" (line {warn['line']})", end="", file=self.output)
+                print(file=self.output)
         
         if not self.errors and not self.warnings:
-            print("\n✓ No errors or warnings found")
+            print("\n✓ No errors or warnings found", file=self.output)
         
-        print(f"{'='*60}\n")
+        print(f"{'='*60}\n", file=self.output)
         
         # Write to log file
         self.write_log_file()
     
     def write_log_file(self):
-        log_filename = f"error_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        log_filename = f"error_report_{time.strftime('%Y%m%d_%H%M%S')}.log"
         try:
             with open(log_filename, 'w') as f:
                 f.write(f"LYRA ERROR REPORT\n")
                 f.write(f"Program: {self.program_name}\n")
-                f.write(f"Time: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_time))}\n")
                 f.write(f"{'='*60}\n\n")
                 
                 f.write(f"SUMMARY\n")
                 f.write(f"Total Errors: {len(self.errors)}\n")
                 f.write(f"Total Warnings: {len(self.warnings)}\n")
-                f.write(f"Execution Time: {(datetime.now() - self.start_time).total_seconds():.3f}s\n\n")
+                f.write(f"Execution Time: {time.time() - self.start_time:.3f}s\n\n")
                 
                 if self.errors:
                     f.write(f"ERRORS\n")
@@ -115,39 +178,53 @@ class ErrorReporter:
                         f.write(f"\n")
             
             if self.errors or self.warnings:
-                print(f"Error report saved to: {log_filename}")
+                print(f"Error report saved to: {log_filename}", file=self.output)
         except Exception as e:
-            print(f"Failed to write error log: {e}")
+            print(f"Failed to write error log: {e}", file=self.output)
 
 # ============================================================================
 # LEXER - TOKENIZE INPUT
 # ============================================================================
 
-class TokenType(Enum):
-    EOF = 0
-    NUMBER = 1
-    STRING = 2
-    IDENTIFIER = 3
-    KEYWORD = 4
-    OPERATOR = 5
-    LPAREN = 6
-    RPAREN = 7
-    LBRACE = 8
-    RBRACE = 9
-    SEMICOLON = 10
-    COLON = 11
-    COMMA = 12
-    EQUALS = 13
-    LBRACKET = 14
-    RBRACKET = 15
-    DOT = 16
-    ARROW = 17
+class TokenKind:
+    """A token type constant with the .name/.value of an Enum member"""
+    __slots__ = ('name', 'value')
+    
+    def __init__(self, name: str, value: int) -> None:
+        self.name = name
+        self.value = value
+    
+    def __repr__(self) -> str:
+        return f"<TokenType.{self.name}: {self.value}>"
+
+class TokenType:
+    # Plain constants rather than an Enum: importing enum costs more than
+    # tokenizing a typical script. Members compare by identity as before.
+    EOF = TokenKind('EOF', 0)
+    NUMBER = TokenKind('NUMBER', 1)
+    STRING = TokenKind('STRING', 2)
+    IDENTIFIER = TokenKind('IDENTIFIER', 3)
+    KEYWORD = TokenKind('KEYWORD', 4)
+    OPERATOR = TokenKind('OPERATOR', 5)
+    LPAREN = TokenKind('LPAREN', 6)
+    RPAREN = TokenKind('RPAREN', 7)
+    LBRACE = TokenKind('LBRACE', 8)
+    RBRACE = TokenKind('RBRACE', 9)
+    SEMICOLON = TokenKind('SEMICOLON', 10)
+    COLON = TokenKind('COLON', 11)
+    COMMA = TokenKind('COMMA', 12)
+    EQUALS = TokenKind('EQUALS', 13)
+    LBRACKET = TokenKind('LBRACKET', 14)
+    RBRACKET = TokenKind('RBRACKET', 15)
+    DOT = TokenKind('DOT', 16)
+    ARROW = TokenKind('ARROW', 17)
 
 class Token:
-    def __init__(self, type: TokenType, value: str, line: int = 1):
+    def __init__(self, type: TokenType, value: str, line: int = 1, column: int = 0):
         self.type = type
         self.value = value
         self.line = line
+        self.column = column
     
     def __repr__(self):
         return f"Token({self.type.name}, {self.value!r})"
@@ -163,6 +240,8 @@ class Lexer:
         self.code = code
         self.pos = 0
         self.line = 1
+        self.line_start = 0  # pos of the first character of the line
+        self.column = 1      # of the token being scanned
         self.tokens: List[Token] = []
     
     def peek(self, offset: int = 0) -> str:
@@ -176,6 +255,7 @@ class Lexer:
             char = self.code[self.pos]
             if char == '\n':
                 self.line += 1
+                self.line_start = self.pos + 1
             self.pos += 1
             return char
         return ''
@@ -217,7 +297,7 @@ class Lexer:
         return value
     
     def add_token(self, type: TokenType, value: str = ''):
-        self.tokens.append(Token(type, value, self.line))
+        self.tokens.append(Token(type, value, self.line, self.column))
     
     def tokenize(self) -> List[Token]:
         while self.pos < len(self.code):
@@ -226,6 +306,7 @@ class Lexer:
             if self.pos >= len(self.code):
                 break
             
+            self.column = self.pos - self.line_start + 1
             char = self.peek()
             
             # Comments
@@ -351,7 +432,9 @@ class Lexer:
 # ============================================================================
 
 class ASTNode:
-    pass
+    # Source line and column of a statement (set by the parser; 0 when unknown)
+    line = 0
+    column = 0
 
 class Program(ASTNode):
     def __init__(self, statements: List[Any]) -> None:
@@ -395,28 +478,52 @@ class CallExpr(ASTNode):
     def __init__(self, name: str, args: List[Any]) -> None:
         self.name = name
         self.args = args
+        # Monomorphic inline cache: (builtin callable, None), or (FunctionCell,
+        # the run's context) since proc bindings are per run. One tuple, read
+        # once, so threads sharing the AST never pair one run's cell with
+        # another's context
+        self.target: Optional[Tuple[Any, Any]] = None
 
 class IfStmt(ASTNode):
     def __init__(self, condition: Any, then_branch: Any, else_branch: Optional[Any]=None) -> None:
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
+        # Condition proven numeric: tested with != 0 (set by lyra_passes)
+        self.numeric_condition = False
 
 class WhileStmt(ASTNode):
+    # Proc whose tier-up counter the iterations feed (set by mark_loops)
+    owner = None
+    
     def __init__(self, condition: Any, body: List[Any]) -> None:
         self.condition = condition
         self.body = body
+        self.numeric_condition = False
 
 class FunctionDef(ASTNode):
-    def __init__(self, name: str, params: List[str], return_type: Optional[str], body: List[Any]) -> None:
+    # Calls plus loop iterations so far, and the compiled proc once hot
+    # (False: stays interpreted); see Interpreter.run_user_function
+    hotness = 0
+    jit = None
+    
+    def __init__(self, name: str, params: List[str], return_type: Optional[str], body: List[Any],
+                 param_types: Optional[List[Optional[str]]] = None) -> None:
         self.name = name
         self.params = params
         self.return_type = return_type
         self.body = body
+        # Annotated type name of each param (None when not annotated)
+        self.param_types = param_types or [None] * len(params)
+        # Body specialized for args of typed_params' types (see select_body)
+        self.typed_body: Optional[List[Any]] = None
+        self.typed_params: Optional[List[Optional[str]]] = None
 
 class ReturnStmt(ASTNode):
     def __init__(self, value: Any) -> None:
         self.value = value
+        # `return f(...)` inside f itself (set by mark_tail_calls)
+        self.tail_call = False
 
 class ArrayLiteral(ASTNode):
     def __init__(self, elements: List[Any]) -> None:
@@ -444,8 +551,32 @@ class SwitchStmt(ASTNode):
         self.expr = expr
         self.cases = cases
         self.default_case = default_case
+        # Case value -> index of the first case with that label, built on
+        # first execution; False when a label is not a constant
+        self.jump_table: Any = None
+
+def case_constant(expr: Any) -> Any:
+    """Value of a literal case label, or None when it must be evaluated"""
+    if isinstance(expr, (Number, String)):
+        return expr.value
+    if isinstance(expr, UnaryOp) and expr.op == '-' and isinstance(expr.operand, Number):
+        return -expr.operand.value
+    return None
+
+def build_jump_table(cases: List[Any]) -> Any:
+    """Map constant case labels to case indices; False if any label is dynamic"""
+    table: Dict[Any, int] = {}
+    for index, (label, _) in enumerate(cases):
+        value = case_constant(label)
+        if value is None:
+            return False
+        # Duplicate labels: the linear scan would stop at the first one
+        table.setdefault(value, index)
+    return table
 
 class ForStmt(ASTNode):
+    owner = None  # See WhileStmt
+    
     def __init__(self, var: str, iterable: Any, body: List[Any]) -> None:
         self.var = var
         self.iterable = iterable
@@ -487,6 +618,14 @@ class Parser:
         return Program(statements)
     
     def parse_statement(self) -> Any:
+        token = self.peek()
+        stmt = self.parse_statement_node()
+        if stmt is not None:
+            stmt.line = token.line
+            stmt.column = token.column
+        return stmt
+    
+    def parse_statement_node(self) -> Any:
         if self.peek().type == TokenType.KEYWORD:
             keyword = self.peek().value
             if keyword == 'var' or keyword == 'let':
@@ -645,9 +784,10 @@ class Parser:
         
         self.expect(TokenType.LPAREN)
         params: List[str] = []
+        param_types: List[Optional[str]] = []
         while self.peek().type != TokenType.RPAREN:
             param_name = self.expect(TokenType.IDENTIFIER).value
-            # param_type tracking (for future use)
+            param_type = None
             if self.peek().type == TokenType.COLON:
                 self.next()
                 # Handle array types
@@ -656,9 +796,11 @@ class Parser:
                     if self.peek().type != TokenType.RBRACKET:
                         self.next()
                     self.expect(TokenType.RBRACKET)
+                    param_type = 'array'
                 else:
-                    self.expect(TokenType.IDENTIFIER)
+                    param_type = self.expect(TokenType.IDENTIFIER).value
             params.append(param_name)
+            param_types.append(param_type)
             if self.peek().type == TokenType.COMMA:
                 self.next()
         self.expect(TokenType.RPAREN)
@@ -669,7 +811,7 @@ class Parser:
             return_type = self.expect(TokenType.IDENTIFIER).value
         
         body = self.parse_block() or []
-        return FunctionDef(name, params, return_type, body)
+        return FunctionDef(name, params, return_type, body, param_types)
     
     def parse_if(self):
         self.expect(TokenType.KEYWORD)  # 'if'
@@ -824,7 +966,18 @@ class Parser:
             if token.value in ('true', 'false'):
                 self.next()
                 return Number(1 if token.value == 'true' else 0)
-        
+            elif token.value == 'input' and self.tokens[self.pos + 1].type == TokenType.LPAREN:
+                # input() is a keyword, so its call is parsed here
+                self.next()
+                self.next()
+                input_args: List[Any] = []
+                while self.peek().type != TokenType.RPAREN:
+                    input_args.append(self.parse_expression())
+                    if self.peek().type == TokenType.COMMA:
+                        self.next()
+                self.expect(TokenType.RPAREN)
+                return CallExpr('input', input_args)
+
         elif token.type == TokenType.LPAREN:
             self.next()
             expr = self.parse_expression()
@@ -833,38 +986,535 @@ class Parser:
         
         raise SyntaxError(f"Unexpected token: {token}")
 
+# ============================================================================
+# BUILT-IN FUNCTIONS
+# ============================================================================
+# Each builtin takes the evaluated arguments and the run's context. Call
+# sites cache the callable, so name lookup happens once per site.
+
+def format_value(val: Any) -> str:
+    if isinstance(val, list):
+        return '[' + ', '.join(str(v) for v in val) + ']'  # type: ignore
+    elif isinstance(val, float) and int(val) == val:  # type: ignore
+        return str(int(val))
+    else:
+        return str(val)
+
+def builtin_print(args: List[Any], ctx: ExecutionContext) -> Any:
+    ctx.write_line(' '.join(format_value(arg) for arg in args))
+    return 0.0
+
+def builtin_len(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) > 0:
+        if isinstance(args[0], list):
+            return float(len(args[0]))  # type: ignore
+        elif isinstance(args[0], str):
+            return float(len(args[0]))
+    return 0.0
+
+def builtin_input(args: List[Any], ctx: ExecutionContext) -> Any:
+    try:
+        return ctx.read_line()
+    except EOFError:
+        return ''
+
+def builtin_int(args: List[Any], ctx: ExecutionContext) -> Any:
+    return float(int(args[0])) if args else 0.0
+
+def builtin_float(args: List[Any], ctx: ExecutionContext) -> Any:
+    return float(args[0]) if args else 0.0
+
+def builtin_str(args: List[Any], ctx: ExecutionContext) -> Any:
+    return str(args[0]) if args else ''
+
+def builtin_substring(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2 and isinstance(args[0], str):
+        start = int(args[1])
+        end = int(args[2]) if len(args) > 2 else len(args[0])
+        return args[0][start:end]
+    return ''
+
+def builtin_upper(args: List[Any], ctx: ExecutionContext) -> Any:
+    return str(args[0]).upper() if args else ''
+
+def builtin_lower(args: List[Any], ctx: ExecutionContext) -> Any:
+    return str(args[0]).lower() if args else ''
+
+def builtin_starts_with(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2:
+        return 1.0 if str(args[0]).startswith(str(args[1])) else 0.0
+    return 0.0
+
+def builtin_ends_with(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2:
+        return 1.0 if str(args[0]).endswith(str(args[1])) else 0.0
+    return 0.0
+
+def builtin_contains(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2:
+        return 1.0 if str(args[1]) in str(args[0]) else 0.0
+    return 0.0
+
+def builtin_index_of(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2:
+        try:
+            return float(str(args[0]).index(str(args[1])))
+        except ValueError:
+            return -1.0
+    return -1.0
+
+def builtin_split(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2:
+        return str(args[0]).split(str(args[1]))
+    return []
+
+def builtin_join(args: List[Any], ctx: ExecutionContext) -> Any:
+    if len(args) >= 2 and isinstance(args[1], list):
+        return str(args[0]).join([str(x) for x in args[1]])  # type: ignore
+    return ''
+
+def builtin_push(args: List[Any], ctx: ExecutionContext) -> Any:
+    # Note: This won't work as expected without proper reference passing
+    # For now, return value
+    return args[0] if args else 0.0
+
+def builtin_pop(args: List[Any], ctx: ExecutionContext) -> Any:
+    return 0.0
+
+def builtin_abs(args: List[Any], ctx: ExecutionContext) -> Any:
+    return abs(args[0]) if args else 0.0
+
+def builtin_floor(args: List[Any], ctx: ExecutionContext) -> Any:
+    import math
+    return float(math.floor(args[0])) if args else 0.0  # type: ignore
+
+def builtin_ceil(args: List[Any], ctx: ExecutionContext) -> Any:
+    import math
+    return float(math.ceil(args[0])) if args else 0.0  # type: ignore
+
+def builtin_round(args: List[Any], ctx: ExecutionContext) -> Any:
+    return float(round(args[0])) if args else 0.0  # type: ignore
+
+def builtin_sqrt(args: List[Any], ctx: ExecutionContext) -> Any:
+    import math
+    return math.sqrt(args[0]) if args and args[0] >= 0 else 0.0
+
+def builtin_pow(args: List[Any], ctx: ExecutionContext) -> Any:
+    return pow(args[0], args[1]) if len(args) >= 2 else 0.0  # type: ignore
+
+def builtin_min(args: List[Any], ctx: ExecutionContext) -> Any:
+    return min(args) if args else 0.0
+
+def builtin_max(args: List[Any], ctx: ExecutionContext) -> Any:
+    return max(args) if args else 0.0
+
+BUILTINS: Dict[str, Any] = {
+    'print': builtin_print, 'println': builtin_print,
+    'len': builtin_len, 'length': builtin_len,
+    'input': builtin_input,
+    'int': builtin_int, 'float': builtin_float,
+    'string': builtin_str, 'str': builtin_str, 'toString': builtin_str,
+    'substring': builtin_substring,
+    'toUpperCase': builtin_upper, 'toLowerCase': builtin_lower,
+    'startsWith': builtin_starts_with, 'endsWith': builtin_ends_with,
+    'contains': builtin_contains, 'indexOf': builtin_index_of,
+    'split': builtin_split, 'join': builtin_join,
+    'push': builtin_push, 'add': builtin_push, 'pop': builtin_pop,
+    'abs': builtin_abs, 'floor': builtin_floor, 'ceil': builtin_ceil,
+    'round': builtin_round, 'sqrt': builtin_sqrt, 'pow': builtin_pow,
+    'min': builtin_min, 'max': builtin_max,
+}
+
 # ============================================================================
 # INTERPRETER - EXECUTE AST
 # ============================================================================
 
-class Interpreter:
-    def __init__(self, error_reporter: Optional[ErrorReporter] = None) -> None:
-        self.variables: dict[str, Any] = {}
-        self.functions: dict[str, Any] = {}
+# ============================================================================
+# PURITY ANALYSIS AND MEMOIZATION
+# ============================================================================
+
+DEFAULT_MEMO_SIZE = 4096
+
+# Builtins that read input or write output
+SIDE_EFFECT_BUILTINS = frozenset(('print', 'println', 'input'))
+
+class MemoCache:
+    """Size-bounded LRU cache with hit/miss statistics"""
+    
+    MISS = object()
+    
+    def __init__(self, max_size: int = DEFAULT_MEMO_SIZE) -> None:
+        from collections import OrderedDict
+        self.entries: OrderedDict = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Any) -> Any:
+        """Cached value, or MemoCache.MISS"""
+        value = self.entries.get(key, self.MISS)
+        if value is self.MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+    
+    def put(self, key: Any, value: Any) -> None:
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self.entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0.0,
+            'cache_size': len(self.entries),
+            'max_size': self.max_size,
+            'evictions': self.evictions
+        }
+
+def proc_is_pure(func_def: FunctionDef, cells: Dict[str, Any], visiting: Optional[set] = None) -> bool:
+    """True if a proc's result depends only on its arguments and calling it has no effect
+    
+    Pure procs do no output or input, write no array elements, define no
+    procs, have no try/catch (a caught error is reported), and let no
+    break/continue escape. They read only their params and locals assigned
+    before the read, and call only builtins and other pure procs. Writes
+    to plain variables are fine: dynamic scoping discards them on return.
+    Procs already under analysis count as pure, so recursion is allowed.
+    """
+    if visiting is None:
+        visiting = set()
+    visiting.add(func_def)
+    try:
+        return _block_is_pure(func_def.body, set(func_def.params), False, False, cells, visiting)
+    finally:
+        visiting.discard(func_def)
+
+def _block_is_pure(statements: List[Any], defined: set, in_loop: bool, in_switch: bool,
+                   cells: Dict[str, Any], visiting: set) -> bool:
+    # Locals bound inside a block may not have been assigned afterwards
+    defined = set(defined)
+    for stmt in statements:
+        if not _stmt_is_pure(stmt, defined, in_loop, in_switch, cells, visiting):
+            return False
+    return True
+
+def _stmt_is_pure(node: Any, defined: set, in_loop: bool, in_switch: bool,
+                  cells: Dict[str, Any], visiting: set) -> bool:
+    def expr(e: Any) -> bool:
+        return _expr_is_pure(e, defined, cells, visiting)
+    
+    def block(statements: Optional[List[Any]], loop: bool = in_loop, switch: bool = in_switch) -> bool:
+        return _block_is_pure(statements or [], defined, loop, switch, cells, visiting)
+    
+    if isinstance(node, VarDecl):
+        if node.value is not None and not expr(node.value):
+            return False
+        defined.add(node.name)
+        return True
+    if isinstance(node, Assignment):
+        if isinstance(node.name, IndexExpr):
+            return False
+        if isinstance(node.name, MemberExpr):
+            return True  # Not executed
+        if not expr(node.value):
+            return False
+        defined.add(node.name)
+        return True
+    if isinstance(node, ReturnStmt):
+        return node.value is None or expr(node.value)
+    if isinstance(node, IfStmt):
+        return expr(node.condition) and block(node.then_branch) and block(node.else_branch)
+    if isinstance(node, WhileStmt):
+        return expr(node.condition) and block(node.body, loop=True)
+    if isinstance(node, ForStmt):
+        if not expr(node.iterable):
+            return False
+        return _block_is_pure(node.body, defined | {node.var}, True, in_switch, cells, visiting)
+    if isinstance(node, SwitchStmt):
+        if not expr(node.expr):
+            return False
+        return all(expr(label) and block(body, switch=True) for label, body in node.cases) \
+            and block(node.default_case, switch=True)
+    if isinstance(node, BreakStmt):
+        return in_loop or in_switch
+    if isinstance(node, ContinueStmt):
+        return in_loop
+    if isinstance(node, CallExpr):
+        # Statement calls reach procs first; other names do nothing
+        if node.name in ('print', 'println'):
+            return False
+        if node.name in cells:
+            return all(expr(arg) for arg in node.args) and _callee_is_pure(node.name, cells, visiting)
+        return True
+    if isinstance(node, (TryStmt, FunctionDef)):
+        return False
+    return expr(node)
+
+def _expr_is_pure(node: Any, defined: set, cells: Dict[str, Any], visiting: set) -> bool:
+    if isinstance(node, (Number, String)):
+        return True
+    if isinstance(node, Identifier):
+        return node.name in defined
+    if isinstance(node, BinOp):
+        return _expr_is_pure(node.left, defined, cells, visiting) and \
+            _expr_is_pure(node.right, defined, cells, visiting)
+    if isinstance(node, UnaryOp):
+        return _expr_is_pure(node.operand, defined, cells, visiting)
+    if isinstance(node, ArrayLiteral):
+        return all(_expr_is_pure(e, defined, cells, visiting) for e in node.elements)
+    if isinstance(node, IndexExpr):
+        return _expr_is_pure(node.array, defined, cells, visiting) and \
+            _expr_is_pure(node.index, defined, cells, visiting)
+    if isinstance(node, MemberExpr):
+        return _expr_is_pure(node.object_expr, defined, cells, visiting)
+    if isinstance(node, CallExpr):
+        if not all(_expr_is_pure(arg, defined, cells, visiting) for arg in node.args):
+            return False
+        # Expression calls reach builtins first
+        if node.name in BUILTINS:
+            return node.name not in SIDE_EFFECT_BUILTINS
+        return node.name in cells and _callee_is_pure(node.name, cells, visiting)
+    return False
+
+def _callee_is_pure(name: str, cells: Dict[str, Any], visiting: set) -> bool:
+    cell = cells[name]
+    if cell.func_def in visiting:
+        return True
+    if cell.pure is not None:
+        return cell.pure
+    pure = proc_is_pure(cell.func_def, cells, visiting)
+    # "Pure" found while other procs were assumed pure is only provisional
+    if not pure or not visiting:
+        cell.pure = pure
+    return pure
+
+# Returned by a `return f(...)` marked as a self tail call; the callee
+# name and evaluated arguments are left in ExecutionContext.tail_call
+TAIL_CALL = "RETURN:<tail call>"
+
+# Calls plus loop iterations after which a proc is compiled to Python
+DEFAULT_JIT_THRESHOLD = 1000
+
+class JitReturn:
+    """Non-float value returned by a compiled proc (lyra_jit.py)
+    
+    run_user_function converts it as it converts RETURN: strings, after
+    the proc's frame is gone, so errors point where the tree-walker's do.
+    """
+    
+    __slots__ = ('value',)
+    
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+def tier_up(func_def: FunctionDef) -> Any:
+    """Compile a hot proc; False if it uses constructs lyra_jit skips"""
+    try:
+        from .lyra_jit import compile_proc
+    except ImportError:
+        from lyra_jit import compile_proc
+    func_def.jit = compile_proc(func_def) or False
+    return func_def.jit
+
+def mark_tail_calls(func_def: FunctionDef) -> None:
+    """Flag every `return f(...)` in f's own body that may run as a loop
+    
+    Returns inside try blocks are left alone: a loop iteration would run
+    outside the try, so the catch could no longer see the callee's errors.
+    """
+    def visit(statements: Optional[List[Any]]) -> None:
+        for stmt in statements or []:
+            if isinstance(stmt, ReturnStmt):
+                call = stmt.value
+                stmt.tail_call = (isinstance(call, CallExpr) and call.name == func_def.name
+                                  and call.name not in BUILTINS)
+            elif isinstance(stmt, IfStmt):
+                visit(stmt.then_branch)
+                visit(stmt.else_branch)
+            elif isinstance(stmt, (WhileStmt, ForStmt)):
+                visit(stmt.body)
+            elif isinstance(stmt, SwitchStmt):
+                for _, body in stmt.cases:
+                    visit(body)
+                visit(stmt.default_case)
+    visit(func_def.body)
+    visit(func_def.typed_body)
+
+def mark_loops(func_def: FunctionDef) -> None:
+    """Point every loop of func_def at it: iterations count toward tier-up"""
+    def visit(statements: Optional[List[Any]]) -> None:
+        for stmt in statements or []:
+            if isinstance(stmt, (WhileStmt, ForStmt)):
+                stmt.owner = func_def
+                visit(stmt.body)
+            elif isinstance(stmt, IfStmt):
+                visit(stmt.then_branch)
+                visit(stmt.else_branch)
+            elif isinstance(stmt, SwitchStmt):
+                for _, body in stmt.cases:
+                    visit(body)
+                visit(stmt.default_case)
+            elif isinstance(stmt, TryStmt):
+                visit(stmt.try_block)
+                visit(stmt.catch_block)
+    visit(func_def.body)
+    visit(func_def.typed_body)
+
+def select_body(func_def: FunctionDef, args: List[Any]) -> List[Any]:
+    """The typed body when every typed param gets an arg of its type"""
+    typed_params = func_def.typed_params
+    if typed_params is None:
+        return func_def.body
+    if len(args) < len(typed_params):
+        return func_def.body  # Missing params read the caller's variables
+    for kind, value in zip(typed_params, args):
+        if kind == 'num':
+            if value.__class__ is not float and value.__class__ is not int:
+                return func_def.body
+        elif kind == 'str' and value.__class__ is not str:
+            return func_def.body
+    return func_def.typed_body
+
+class FunctionCell:
+    """Current definition of one proc name plus its parameter-binding plan"""
+    
+    __slots__ = ('func_def', 'params', 'pure', 'memoize', 'memo_hits', 'memo_misses')
+    
+    def __init__(self, func_def: FunctionDef) -> None:
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.bind(func_def)
+    
+    def bind(self, func_def: FunctionDef) -> None:
+        self.func_def = func_def
+        self.params = tuple(func_def.params)
+        mark_tail_calls(func_def)
+        mark_loops(func_def)
+        # Purity verdict and memoization decision, made on first call
+        self.pure: Optional[bool] = None
+        self.memoize: Optional[bool] = None
+
+class ExecutionContext:
+    """Mutable state of a single program run.
+
+    Everything a run writes to lives here, so one ``Interpreter`` and one
+    parsed ``Program`` can be shared by any number of concurrent runs.
+    """
+    
+    def __init__(self, error_reporter: Optional[ErrorReporter] = None,
+                 output: Optional[TextIO] = None,
+                 input_stream: Optional[TextIO] = None) -> None:
+        self.variables: Dict[str, Any] = {}
+        self.functions: Dict[str, Any] = {}
+        # One cell per proc name; call sites cache the cell, not the def
+        self.function_cells: Dict[str, FunctionCell] = {}
+        # (name, args) of the pending self tail call, see TAIL_CALL
+        self.tail_call: Any = None
+        # Results of pure procs; created on the first memoized call
+        self.memo: Optional[MemoCache] = None
+        self.memo_size = DEFAULT_MEMO_SIZE
+        self.memo_exclude: set = set()
+        # Procs this hot are compiled to Python (0 keeps everything interpreted)
+        self.jit_threshold = DEFAULT_JIT_THRESHOLD
         self.break_flag = False
         self.continue_flag = False
-        self.error_reporter: ErrorReporter = error_reporter or ErrorReporter()
+        # None means the process-wide sys.stdout / sys.stdin
+        self.output = output
+        self.input_stream = input_stream
+        self.error_reporter: ErrorReporter = error_reporter or ErrorReporter(output=output)
+    
+    def define_function(self, func_def: FunctionDef) -> None:
+        """Bind a proc; redefinition updates the cell cached by call sites"""
+        self.functions[func_def.name] = func_def
+        cell = self.function_cells.get(func_def.name)
+        if cell is not None and cell.func_def is func_def:
+            return
+        if cell is None:
+            self.function_cells[func_def.name] = FunctionCell(func_def)
+        else:
+            cell.bind(func_def)
+        # Purity of every caller may change with the new binding
+        for other in self.function_cells.values():
+            other.pure = None
+            other.memoize = None
+        if self.memo is not None:
+            self.memo.clear()
+    
+    def memo_report(self) -> List[str]:
+        """Lines describing memoized procs and cache hit rates"""
+        if self.memo is None:
+            return []
+        stats = self.memo.stats()
+        lines = [f"Memo cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses "
+                 f"({stats['hit_rate']:.1%}), {stats['cache_size']}/{stats['max_size']} entries, "
+                 f"{stats['evictions']} evictions"]
+        for name, cell in sorted(self.function_cells.items()):
+            if cell.memo_hits or cell.memo_misses:
+                lines.append(f"  {name}: {cell.memo_hits} hits, {cell.memo_misses} misses")
+        return lines
+    
+    def write_line(self, text: str) -> None:
+        print(text, file=self.output)
     
-    def interpret(self, ast: Program):
+    def read_line(self) -> str:
+        if self.input_stream is None:
+            return input()
+        line = self.input_stream.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip('\n')
+
+class Interpreter:
+    def __init__(self, error_reporter: Optional[ErrorReporter] = None,
+                 context: Optional[ExecutionContext] = None) -> None:
+        # Default context for single-run callers; concurrent callers pass
+        # their own context to interpret() instead.
+        self.context = context or ExecutionContext(error_reporter)
+    
+    @property
+    def variables(self) -> Dict[str, Any]:
+        return self.context.variables
+    
+    @property
+    def functions(self) -> Dict[str, Any]:
+        return self.context.functions
+    
+    @property
+    def error_reporter(self) -> ErrorReporter:
+        return self.context.error_reporter
+    
+    def interpret(self, ast: Program, ctx: Optional[ExecutionContext] = None):
+        if ctx is None:
+            ctx = self.context
         for statement in ast.statements:
-            result = self.execute(statement)
+            result = self.execute(statement, ctx)
             if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                 return result[7:]
         return None
     
-    def execute(self, node: Any) -> Any:
+    def execute(self, node: Any, ctx: ExecutionContext) -> Any:
         if isinstance(node, Program):
-            return self.interpret(node)
+            return self.interpret(node, ctx)
         elif isinstance(node, VarDecl):
-            value = self.evaluate(node.value) if node.value else 0
-            self.variables[node.name] = value
+            value = self.evaluate(node.value, ctx) if node.value else 0
+            ctx.variables[node.name] = value
             return None
         elif isinstance(node, Assignment):
             if isinstance(node.name, IndexExpr):
                 # Array element assignment
-                arr = self.evaluate(node.name.array)
-                idx = int(self.evaluate(node.name.index))
-                value = self.evaluate(node.value)
+                arr = self.evaluate(node.name.array, ctx)
+                idx = int(self.evaluate(node.name.index, ctx))
+                value = self.evaluate(node.value, ctx)
                 if isinstance(arr, list) and 0 <= idx < len(arr):  # type: ignore
                     arr[idx] = value
                 return None
@@ -873,189 +1523,215 @@ class Interpreter:
                 # Skip for now - read-only properties
                 return None
             else:
-                value = self.evaluate(node.value)
-                self.variables[node.name] = value
+                value = self.evaluate(node.value, ctx)
+                ctx.variables[node.name] = value
                 return None
         elif isinstance(node, FunctionDef):
-            self.functions[node.name] = node
+            ctx.define_function(node)
             return None
         elif isinstance(node, ReturnStmt):
-            value = self.evaluate(node.value)
+            if node.tail_call:
+                # The running proc rebinds its params instead of recursing
+                call = node.value
+                ctx.tail_call = (call.name, [self.evaluate(arg, ctx) for arg in call.args])
+                return TAIL_CALL
+            value = self.evaluate(node.value, ctx)
             return f"RETURN:{value}"
         elif isinstance(node, IfStmt):
-            condition = self.evaluate(node.condition)
-            if self.is_truthy(condition):
+            condition = self.evaluate(node.condition, ctx)
+            if condition != 0 if node.numeric_condition else self.is_truthy(condition):
                 for stmt in node.then_branch:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
-                    if self.break_flag or self.continue_flag:
+                    if ctx.break_flag or ctx.continue_flag:
                         return None
             elif node.else_branch:
                 for stmt in node.else_branch:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
-                    if self.break_flag or self.continue_flag:
+                    if ctx.break_flag or ctx.continue_flag:
                         return None
             return None
         elif isinstance(node, WhileStmt):
-            while self.is_truthy(self.evaluate(node.condition)):
+            numeric = node.numeric_condition
+            owner = node.owner
+            while True:
+                condition = self.evaluate(node.condition, ctx)
+                if not (condition != 0 if numeric else self.is_truthy(condition)):
+                    break
+                if owner is not None:
+                    owner.hotness += 1
                 for stmt in node.body:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
-                    if self.break_flag:
-                        self.break_flag = False
+                    if ctx.break_flag:
+                        ctx.break_flag = False
                         return None
-                    if self.continue_flag:
-                        self.continue_flag = False
+                    if ctx.continue_flag:
+                        ctx.continue_flag = False
                         break
             return None
         elif isinstance(node, ForStmt):
-            iterable: Any = self.evaluate(node.iterable)
+            iterable: Any = self.evaluate(node.iterable, ctx)
+            owner = node.owner
+            if owner is not None and isinstance(iterable, (list, int, float)):
+                owner.hotness += len(iterable) if isinstance(iterable, list) else max(int(iterable), 0)
             if isinstance(iterable, list):
                 for item in iterable:  # type: ignore
-                    self.variables[node.var] = item
+                    ctx.variables[node.var] = item
                     for stmt in node.body:
-                        result = self.execute(stmt)
+                        result = self.execute(stmt, ctx)
                         if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                             return result
-                        if self.break_flag:
-                            self.break_flag = False
+                        if ctx.break_flag:
+                            ctx.break_flag = False
                             return None
-                        if self.continue_flag:
-                            self.continue_flag = False
+                        if ctx.continue_flag:
+                            ctx.continue_flag = False
                             break
             elif isinstance(iterable, (int, float)):
                 # Range from 0 to iterable
                 for i in range(int(iterable)):
-                    self.variables[node.var] = float(i)
+                    ctx.variables[node.var] = float(i)
                     for stmt in node.body:
-                        result = self.execute(stmt)
+                        result = self.execute(stmt, ctx)
                         if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                             return result
-                        if self.break_flag:
-                            self.break_flag = False
+                        if ctx.break_flag:
+                            ctx.break_flag = False
                             return None
-                        if self.continue_flag:
-                            self.continue_flag = False
+                        if ctx.continue_flag:
+                            ctx.continue_flag = False
                             break
             return None
         elif isinstance(node, BreakStmt):
-            self.break_flag = True
+            ctx.break_flag = True
             return None
         elif isinstance(node, ContinueStmt):
-            self.continue_flag = True
+            ctx.continue_flag = True
             return None
         elif isinstance(node, TryStmt):
             try:
                 for stmt in node.try_block:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
             except Exception as e:
                 error_msg = str(e)
-                self.error_reporter.report_error(type(e).__name__, error_msg)
+                ctx.error_reporter.report_exception(e)
                 if node.catch_var:
-                    self.variables[node.catch_var] = error_msg
+                    ctx.variables[node.catch_var] = error_msg
                 for stmt in node.catch_block:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
             return None
         elif isinstance(node, SwitchStmt):
-            expr_val = self.evaluate(node.expr)
-            matched = False
-            for case_val, statements in node.cases:
-                if not matched and self.evaluate(case_val) == expr_val:
-                    matched = True
-                if matched:
-                    for stmt in statements:
-                        result = self.execute(stmt)
+            expr_val = self.evaluate(node.expr, ctx)
+            start = self.find_switch_case(node, expr_val, ctx)
+            matched = start is not None
+            if matched:
+                # Fall through every case from the matching one until break
+                cases = node.cases
+                for index in range(start, len(cases)):
+                    for stmt in cases[index][1]:
+                        result = self.execute(stmt, ctx)
                         if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                             return result
-                        if self.break_flag:
-                            self.break_flag = False
+                        if ctx.break_flag:
+                            ctx.break_flag = False
                             return None
             if not matched and node.default_case:
                 for stmt in node.default_case:
-                    result = self.execute(stmt)
+                    result = self.execute(stmt, ctx)
                     if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
                         return result
-                    if self.break_flag:
-                        self.break_flag = False
+                    if ctx.break_flag:
+                        ctx.break_flag = False
                         return None
             return None
         elif isinstance(node, CallExpr):
             if node.name == 'print' or node.name == 'println':
-                values = [str(self.evaluate(arg)) for arg in node.args]
-                print(' '.join(values))
+                values = [str(self.evaluate(arg, ctx)) for arg in node.args]
+                ctx.write_line(' '.join(values))
                 return None
             else:
-                # User-defined function
-                if node.name in self.functions:
-                    func_def = self.functions[node.name]
-                    # Save current variables
-                    saved_vars = self.variables.copy()
-                    # Bind parameters
-                    args = [self.evaluate(arg) for arg in node.args]
-                    for i, param in enumerate(func_def.params):
-                        if i < len(args):
-                            self.variables[param] = args[i]
-                    # Execute function body
-                    result = 0
-                    for stmt in func_def.body:
-                        exec_result = self.execute(stmt)
-                        if exec_result is not None and isinstance(exec_result, str) and exec_result.startswith('RETURN:'):
-                            result = float(exec_result[7:])
-                            break
-                        # Last statement is return value if not explicitly returned
-                        if isinstance(stmt, (BinOp, UnaryOp, Number, String, Identifier, CallExpr)):
-                            result = self.evaluate(stmt)
-                    # Restore variables
-                    self.variables = saved_vars
-                    return result
+                # User-defined function (procs shadow builtins in statements)
+                cached = node.target
+                if cached is not None and cached[1] is ctx and cached[0].__class__ is FunctionCell:
+                    cell = cached[0]
+                else:
+                    cell = ctx.function_cells.get(node.name)
+                    if cell is not None and node.name not in BUILTINS:
+                        node.target = (cell, ctx)
+                if cell is not None:
+                    args = [self.evaluate(arg, ctx) for arg in node.args]
+                    return self.run_user_function(cell, args, ctx, statement=True)
                 return None
         elif isinstance(node, (BinOp, UnaryOp, Number, String, Identifier)):
-            return self.evaluate(node)
+            return self.evaluate(node, ctx)
         else:
             return None
     
-    def evaluate(self, node: Any) -> Any:
+    def find_switch_case(self, node: SwitchStmt, expr_val: Any, ctx: ExecutionContext) -> Optional[int]:
+        """Index of the case matching expr_val, or None to run the default"""
+        table = node.jump_table
+        if table is None:
+            table = node.jump_table = build_jump_table(node.cases)
+        if table is not False:
+            try:
+                return table.get(expr_val)
+            except TypeError:
+                return None  # Unhashable (array) values never equal a literal
+        # Dynamic labels: evaluate in order, as written
+        for index, (case_val, _) in enumerate(node.cases):
+            if self.evaluate(case_val, ctx) == expr_val:
+                return index
+        return None
+    
+    def evaluate(self, node: Any, ctx: ExecutionContext) -> Any:
         if isinstance(node, Number):
             return node.value
         elif isinstance(node, String):
             return node.value
         elif isinstance(node, ArrayLiteral):
-            return [self.evaluate(elem) for elem in node.elements]
+            return [self.evaluate(elem, ctx) for elem in node.elements]
         elif isinstance(node, IndexExpr):
-            arr: Any = self.evaluate(node.array)
-            idx = int(self.evaluate(node.index))
+            arr: Any = self.evaluate(node.array, ctx)
+            idx = int(self.evaluate(node.index, ctx))
             if not isinstance(arr, list):
                 raise TypeError(f"Cannot index non-array type")
             if idx < 0 or idx >= len(arr):  # type: ignore
                 raise IndexError(f"Index {idx} out of bounds")
             return arr[idx]  # type: ignore
         elif isinstance(node, MemberExpr):
-            obj: Any = self.evaluate(node.object_expr)
+            obj: Any = self.evaluate(node.object_expr, ctx)
             member = node.member
             if member == 'length' and isinstance(obj, list):
                 return float(len(obj))  # type: ignore
             return 0.0
         elif isinstance(node, Identifier):
-            return self.variables.get(node.name, 0.0)
+            return ctx.variables.get(node.name, 0.0)
         elif isinstance(node, CallExpr):
-            return self.call_function(node)
+            return self.call_function(node, ctx)
         elif isinstance(node, BinOp):
-            left = self.evaluate(node.left)
-            right = self.evaluate(node.right)
+            left = self.evaluate(node.left, ctx)
+            right = self.evaluate(node.right, ctx)
             
-            if node.op == '+':
+            # num+, str+, num&& and num|| are set by type inference in
+            # lyra_passes where the operand types are proven
+            if node.op == 'num+':
+                return left + right
+            elif node.op == '+':
                 # String concatenation support
                 if isinstance(left, str) or isinstance(right, str):
                     return str(left) + str(right)
                 return left + right
+            elif node.op == 'str+':
+                return str(left) + str(right)
             elif node.op == '-':
                 return left - right
             elif node.op == '*':
@@ -1080,6 +1756,10 @@ class Interpreter:
                 return 1.0 if left <= right else 0.0
             elif node.op == '>=':
                 return 1.0 if left >= right else 0.0
+            elif node.op == 'num&&':
+                return 1.0 if left != 0 and right != 0 else 0.0
+            elif node.op == 'num||':
+                return 1.0 if left != 0 or right != 0 else 0.0
             elif node.op == '&&':
                 return 1.0 if self.is_truthy(left) and self.is_truthy(right) else 0.0
             elif node.op == '||':
@@ -1088,130 +1768,130 @@ class Interpreter:
                 # Range operator
                 return list(range(int(left), int(right)))
         elif isinstance(node, UnaryOp):
-            operand = self.evaluate(node.operand)
+            operand = self.evaluate(node.operand, ctx)
             if node.op == '-':
                 return -operand
+            elif node.op == 'num!':
+                return 0.0 if operand != 0 else 1.0
             elif node.op == '!':
                 return 0.0 if self.is_truthy(operand) else 1.0
         
         return 0.0
     
-    def call_function(self, node: CallExpr) -> Any:
+    def call_function(self, node: CallExpr, ctx: ExecutionContext) -> Any:
         """Handle built-in and user-defined functions"""
-        args = [self.evaluate(arg) for arg in node.args]
+        args = [self.evaluate(arg, ctx) for arg in node.args]
         
-        # Built-in functions
-        if node.name == 'print' or node.name == 'println':
-            def format_value(val: Any) -> str:
-                if isinstance(val, list):
-                    return '[' + ', '.join(str(v) for v in val) + ']'  # type: ignore
-                elif isinstance(val, float) and int(val) == val:  # type: ignore
-                    return str(int(val))
-                else:
-                    return str(val)
-            values = [format_value(arg) for arg in args]
-            print(' '.join(values))
-            return 0.0
-        elif node.name == 'len' or node.name == 'length':
-            if len(args) > 0:
-                if isinstance(args[0], list):
-                    return float(len(args[0]))  # type: ignore
-                elif isinstance(args[0], str):
-                    return float(len(args[0]))
-            return 0.0
-        elif node.name == 'input':
-            try:
-                return input()
-            except EOFError:
-                return ''
-        elif node.name == 'int':
-            return float(int(args[0])) if args else 0.0
-        elif node.name == 'float':
-            return float(args[0]) if args else 0.0
-        elif node.name == 'string' or node.name == 'str':
-            return str(args[0]) if args else ''
-        elif node.name == 'toString':
-            return str(args[0]) if args else ''
-        elif node.name == 'substring':
-            if len(args) >= 2 and isinstance(args[0], str):
-                start = int(args[1])
-                end = int(args[2]) if len(args) > 2 else len(args[0])
-                return args[0][start:end]
-            return ''
-        elif node.name == 'toUpperCase':
-            return str(args[0]).upper() if args else ''
-        elif node.name == 'toLowerCase':
-            return str(args[0]).lower() if args else ''
-        elif node.name == 'startsWith':
-            if len(args) >= 2:
-                return 1.0 if str(args[0]).startswith(str(args[1])) else 0.0
-            return 0.0
-        elif node.name == 'endsWith':
-            if len(args) >= 2:
-                return 1.0 if str(args[0]).endswith(str(args[1])) else 0.0
-            return 0.0
-        elif node.name == 'contains':
-            if len(args) >= 2:
-                return 1.0 if str(args[1]) in str(args[0]) else 0.0
-            return 0.0
-        elif node.name == 'indexOf':
-            if len(args) >= 2:
-                try:
-                    return float(str(args[0]).index(str(args[1])))
-                except ValueError:
-                    return -1.0
-            return -1.0
-        elif node.name == 'split':
-            if len(args) >= 2:
-                return str(args[0]).split(str(args[1]))
-            return []
-        elif node.name == 'join':
-            if len(args) >= 2 and isinstance(args[1], list):
-                return str(args[0]).join([str(x) for x in args[1]])  # type: ignore
-            return ''
-        elif node.name == 'push' or node.name == 'add':
-            # Note: This won't work as expected without proper reference passing
-            # For now, return value
-            return args[0] if args else 0.0
-        elif node.name == 'pop':
-            return 0.0
-        elif node.name == 'abs':
-            return abs(args[0]) if args else 0.0
-        elif node.name == 'floor':
-            import math
-            return float(math.floor(args[0])) if args else 0.0  # type: ignore
-        elif node.name == 'ceil':
-            import math
-            return float(math.ceil(args[0])) if args else 0.0  # type: ignore
-        elif node.name == 'round':
-            return float(round(args[0])) if args else 0.0  # type: ignore
-        elif node.name == 'sqrt':
-            import math
-            return math.sqrt(args[0]) if args and args[0] >= 0 else 0.0
-        elif node.name == 'pow':
-            return pow(args[0], args[1]) if len(args) >= 2 else 0.0  # type: ignore
-        elif node.name == 'min':
-            return min(args) if args else 0.0
-        elif node.name == 'max':
-            return max(args) if args else 0.0
-        elif node.name in self.functions:
-            # User-defined function
-            func_def = self.functions[node.name]
-            saved_vars = self.variables.copy()
-            for i, param in enumerate(func_def.params):
-                if i < len(args):
-                    self.variables[param] = args[i]
+        cached = node.target
+        if cached is None or (cached[1] is not ctx and cached[1] is not None):
+            target = self.resolve_call(node, ctx)
+            if target is None:
+                return 0.0
+        else:
+            target = cached[0]
+        if target.__class__ is FunctionCell:
+            return self.call_user_function(target, args, ctx)
+        return target(args, ctx)
+    
+    def resolve_call(self, node: CallExpr, ctx: ExecutionContext) -> Any:
+        """Fill the call site's inline cache; builtins shadow procs"""
+        target = BUILTINS.get(node.name)
+        if target is not None:
+            node.target = (target, None)
+            return target
+        target = ctx.function_cells.get(node.name)
+        if target is None:
+            return None  # Unknown names are not cached: a later proc may define them
+        node.target = (target, ctx)
+        return target
+    
+    def call_user_function(self, cell: FunctionCell, args: List[Any], ctx: ExecutionContext) -> Any:
+        """Call a proc, answering from the memo cache when it is pure"""
+        memoize = cell.memoize
+        if memoize is None:
+            memoize = self.decide_memoize(cell, ctx)
+        # Zero is skipped because 0.0 == -0.0 would share one cache entry;
+        # params left unpassed read the caller's scope, which the key can't see
+        if not memoize or 0.0 in args or len(args) < len(cell.params):
+            return self.run_user_function(cell, args, ctx)
+        key = (cell.func_def, *args)
+        try:
+            result = ctx.memo.get(key)
+        except TypeError:
+            return self.run_user_function(cell, args, ctx)  # Array argument
+        if result is MemoCache.MISS:
+            cell.memo_misses += 1
+            result = self.run_user_function(cell, args, ctx)
+            ctx.memo.put(key, result)
+        else:
+            cell.memo_hits += 1
+        return result
+    
+    def decide_memoize(self, cell: FunctionCell, ctx: ExecutionContext) -> bool:
+        memoize = (ctx.memo_size > 0 and cell.func_def.name not in ctx.memo_exclude
+                   and _callee_is_pure(cell.func_def.name, ctx.function_cells, set()))
+        if memoize and ctx.memo is None:
+            ctx.memo = MemoCache(ctx.memo_size)
+        cell.memoize = memoize
+        return memoize
+    
+    def run_user_function(self, cell: FunctionCell, args: List[Any], ctx: ExecutionContext,
+                          statement: bool = False) -> Any:
+        """Run a proc with dynamic scoping: callee writes are discarded
+        
+        Self tail calls loop here instead of recursing. Rebinding the params
+        in place matches a real call: the callee would see the same
+        variables, and its writes are discarded along with the caller's.
+        A statement-level call also yields its last expression statement.
+        Once the proc is hot it runs as compiled Python (lyra_jit.py).
+        """
+        func_def = cell.func_def
+        threshold = ctx.jit_threshold
+        if threshold:
+            compiled = func_def.jit
+            if compiled is None:
+                func_def.hotness += 1
+                if func_def.hotness >= threshold:
+                    compiled = tier_up(func_def)
+            if compiled:
+                result = compiled(self, ctx, cell, args, statement)
+                if result.__class__ is JitReturn:
+                    result = float(f"{result.value}")
+                return result
+        saved_vars = ctx.variables.copy()
+        tail_calls = 0
+        while True:
+            variables = ctx.variables
+            for param, value in zip(cell.params, args):
+                variables[param] = value
             result = 0
-            for stmt in func_def.body:
-                exec_result = self.execute(stmt)
+            exec_result = None
+            for stmt in select_body(func_def, args):
+                exec_result = self.execute(stmt, ctx)
                 if exec_result is not None and isinstance(exec_result, str) and exec_result.startswith('RETURN:'):
-                    result = float(exec_result[7:])
                     break
-            self.variables = saved_vars
-            return result
-        
-        return 0.0
-    
+                # Last statement is return value if not explicitly returned
+                if statement and isinstance(stmt, (BinOp, UnaryOp, Number, String, Identifier, CallExpr)):
+                    result = self.evaluate(stmt, ctx)
+                exec_result = None
+            if exec_result is not TAIL_CALL:
+                break
+            name, args = ctx.tail_call
+            if ctx.function_cells.get(name) is cell and cell.func_def is func_def:
+                tail_calls += 1
+                statement = False
+                continue
+            # The name was rebound while running: make a real call
+            target = ctx.function_cells.get(name)
+            value = self.call_user_function(target, args, ctx) if target is not None else 0.0
+            exec_result = f"RETURN:{value}"
+            break
+        if exec_result is not None:
+            result = float(exec_result[7:])
+        elif tail_calls:
+            result = 0.0  # The innermost call's 0 passed through RETURN:
+        ctx.variables = saved_vars
+        return result
     
     def is_truthy(self, value: Any) -> bool:
         if isinstance(value, bool):
@@ -1226,83 +1906,254 @@ class Interpreter:
 # MAIN INTERPRETER
 # ============================================================================
 
-def run_code(code: str, filename: str = "<stdin>", backend: str = BACKEND_TREE_WALKING) -> Any:
+def parse_code(code: str) -> Program:
+    """Lex and parse Lyra source into a Program AST"""
+    lexer = Lexer(code)
+    tokens = lexer.tokenize()
+    parser = Parser(tokens)
+    return parser.parse()
+
+def run_program(ast: Program, filename: str = "<stdin>", backend: str = BACKEND_TREE_WALKING,
+                interpreter: Optional[Interpreter] = None,
+                output: Optional[TextIO] = None,
+                input_stream: Optional[TextIO] = None,
+                memo_size: Optional[int] = None,
+                no_memo: Optional[List[str]] = None,
+                resume: Any = None,
+                jit_threshold: Optional[int] = None) -> ExecutionContext:
+    """Run an already parsed program in a fresh execution context
+    
+    Args:
+        ast: Parsed program (only derived caches are added; safe to share)
+        filename: Source file name (for error messages)
+        backend: Execution backend (tree-walking, bytecode, register, optimize, stackless)
+        interpreter: Shared interpreter to run on (a new one if omitted)
+        output: Stream receiving program output (default: sys.stdout)
+        input_stream: Stream read by input() (default: sys.stdin)
+        memo_size: Entries kept for pure proc results (0 disables memoization)
+        no_memo: Procs never memoized even when pure
+        resume: Snapshot (lyra_snapshot.py) whose globals and procs the run starts from
+        jit_threshold: Calls plus loop iterations before a proc is compiled (0 disables)
+    """
+    error_reporter = ErrorReporter(filename, output=output)
+    ctx = ExecutionContext(error_reporter, output, input_stream)
+    if memo_size is not None:
+        ctx.memo_size = memo_size
+    if jit_threshold is not None:
+        ctx.jit_threshold = jit_threshold
+    if no_memo:
+        ctx.memo_exclude.update(no_memo)
+    if resume is not None:
+        resume.restore(ctx)
+    if backend == BACKEND_STACKLESS:
+        try:
+            from .lyra_stackless import StacklessInterpreter
+        except ImportError:
+            from lyra_stackless import StacklessInterpreter
+        if not isinstance(interpreter, StacklessInterpreter):
+            interpreter = StacklessInterpreter(context=ctx)
+    if interpreter is None:
+        interpreter = Interpreter(context=ctx)
+    
+    # Select execution backend
+    if backend == BACKEND_BYTECODE and not isinstance(ast, Program):
+        ast.run(ctx, interpreter)  # Loaded .lyrc (lyra_compiled.CompiledProgram)
+    elif backend == BACKEND_BYTECODE:
+        try:
+            from .lyra_bytecode import run_bytecode
+        except ImportError:
+            from lyra_bytecode import run_bytecode
+        run_bytecode(ast, ctx, interpreter)
+    elif backend == BACKEND_REGISTER:
+        try:
+            from .lyra_register_vm import run_register
+        except ImportError:
+            from lyra_register_vm import run_register
+        run_register(ast, ctx, interpreter)
+    elif backend == BACKEND_OPTIMIZED:
+        interpreter.interpret(ast, ctx)
+    else:
+        # Default: tree-walking interpreter
+        interpreter.interpret(ast, ctx)
+    
+    # Show error summary if errors occurred
+    if error_reporter.errors:
+        error_reporter.summary()
+    return ctx
+
+def prepare_program(code: str, filename: str = "<stdin>", backend: str = BACKEND_TREE_WALKING,
+                    inline_size: Optional[int] = None, resume: Any = None,
+                    keep_globals: bool = False, log: Optional[TextIO] = None) -> Any:
+    """What run_program runs for code: the command line's loading pipeline
+    
+    With the bytecode backend, a foo.lyrc written by `lyra --compile
+    foo.lyra` is used while it matches the source (not when resuming).
+    Otherwise code is parsed, and for --optimize the AST passes run on it
+    (summaries to log, see optimize_ast). Other backends ignore a .lyrc,
+    so it never changes which backend runs a file.
+    """
+    if backend == BACKEND_BYTECODE and resume is None and \
+            os.path.exists(os.path.splitext(filename)[0] + '.lyrc'):
+        try:
+            from .lyra_compiled import load_fresh
+        except ImportError:
+            from lyra_compiled import load_fresh
+        compiled = load_fresh(filename, code)
+        if compiled is not None:
+            return compiled
+    ast = parse_code(code)
+    if backend == BACKEND_OPTIMIZED:
+        optimize_ast(ast, inline_size, resume.procs if resume is not None else (),
+                     log=log, keep_globals=keep_globals)
+    return ast
+
+def run_code(code: str, filename: str = "<stdin>", backend: str = BACKEND_TREE_WALKING,
+             output: Optional[TextIO] = None, input_stream: Optional[TextIO] = None,
+             inline_size: Optional[int] = None, memo_size: Optional[int] = None,
+             no_memo: Optional[List[str]] = None, resume: Any = None,
+             jit_threshold: Optional[int] = None,
+             keep_globals: bool = False) -> Optional[ExecutionContext]:
     """Run Lyra code with selected backend
     
     Args:
         code: Lyra source code
         filename: Source file name (for error messages)
-        backend: Execution backend (tree-walking, bytecode, optimize)
+        backend: Execution backend (tree-walking, bytecode, register, optimize, stackless)
+        output: Stream receiving program output (default: sys.stdout)
+        input_stream: Stream read by input() (default: sys.stdin)
+        inline_size: Largest proc (in AST nodes) inlined by --optimize
+        memo_size: Entries kept for pure proc results (0 disables memoization)
+        no_memo: Procs never memoized even when pure
+        resume: Snapshot (lyra_snapshot.py) whose globals and procs the run starts from
+        jit_threshold: Calls plus loop iterations before a proc is compiled (0 disables)
+        keep_globals: --optimize keeps unused globals and procs (the final state is saved)
+    
+    Returns the finished run's context, or None if it failed.
     """
     try:
-        error_reporter = ErrorReporter(filename)
-        
-        lexer = Lexer(code)
-        tokens = lexer.tokenize()
-        
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        # Select execution backend
-        if backend == BACKEND_BYTECODE or backend == BACKEND_OPTIMIZED:
-            # Try to use bytecode VM
-            try:
-                # Note: Manual compilation needed - would require AST visitor pattern
-                # For now, fall back to tree-walking with optimization hints
-                if backend == BACKEND_OPTIMIZED:
-                    print(f"[INFO] Using optimized tree-walking (bytecode VM coming in v1.0.4)")
-                
-                interpreter = Interpreter(error_reporter)
-                interpreter.interpret(ast)
-            except ImportError:
-                # Fallback to tree-walking
-                interpreter = Interpreter(error_reporter)
-                interpreter.interpret(ast)
-        else:
-            # Default: tree-walking interpreter
-            interpreter = Interpreter(error_reporter)
-            interpreter.interpret(ast)
-        
-        # Show error summary if errors occurred
-        if error_reporter.errors:
-            error_reporter.summary()
+        program = prepare_program(code, filename, backend, inline_size, resume, keep_globals)
+        return run_program(program, filename, backend, output=output, input_stream=input_stream,
+                           memo_size=memo_size, no_memo=no_memo, resume=resume,
+                           jit_threshold=jit_threshold)
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {describe_error(e)}", file=output)
+        return None
 
-def run_file(filename: str, backend: str = BACKEND_TREE_WALKING):
-    """Run a .lyra file with selected backend"""
+def optimize_ast(ast: Program, inline_size: Optional[int] = None, extern: Any = (),
+                 log: Optional[TextIO] = None, keep_globals: bool = False) -> None:
+    """Apply the AST passes of the optimize backend in place
+
+    extern: procs defined outside ast (e.g. by a resumed snapshot)
+    keep_globals: keep unused bindings and procs (see eliminate_dead_code)
+    log: Stream for the per-pass [INFO] summaries (default: sys.stderr),
+    kept apart from program output
+    """
+    try:
+        from .lyra_passes import DEFAULT_INLINE_SIZE, optimize_program
+    except ImportError:
+        from lyra_passes import DEFAULT_INLINE_SIZE, optimize_program
+    if inline_size is None:
+        inline_size = DEFAULT_INLINE_SIZE
+    if log is None:
+        log = sys.stderr
+    for line in optimize_program(ast, inline_size, extern, keep_globals):
+        print(f"[INFO] {line}", file=log)
+
+def run_file(filename: str, backend: str = BACKEND_TREE_WALKING, inline_size: Optional[int] = None,
+             memo_size: Optional[int] = None,
+             no_memo: Optional[List[str]] = None, resume: Any = None,
+             jit_threshold: Optional[int] = None,
+             keep_globals: bool = False) -> Optional[ExecutionContext]:
+    """Run a .lyra file with selected backend (see prepare_program for .lyrc files)"""
     try:
         with open(filename, 'r', encoding='utf-8') as f:
             code = f.read()
-        run_code(code, filename, backend)
+        return run_code(code, filename, backend, inline_size=inline_size,
+                        memo_size=memo_size, no_memo=no_memo, resume=resume,
+                        jit_threshold=jit_threshold, keep_globals=keep_globals)
     except FileNotFoundError:
         print(f"Error: File not found: {filename}")
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {describe_error(e)}")
+    return None
+
+def repl(backend: Optional[str] = None) -> None:
+    """Interactive REPL (see lyra_repl.py); state persists between entries"""
+    if backend in (BACKEND_BYTECODE, BACKEND_REGISTER):
+        # Entries share one tree-walker session; the VMs compile whole files
+        print(f"Error: --{backend} runs files only, not the REPL")
+        sys.exit(2)
+    try:
+        from .lyra_repl import repl as run_repl
+    except ImportError:
+        from lyra_repl import repl as run_repl
+    run_repl(backend)
 
-def repl():
-    """Interactive REPL"""
-    print("╔═════════════════════════════════════╗")
-    print("║   LYRA INTERPRETER v1.0             ║")
-    print("║   Type 'exit' to quit               ║")
-    print("╚═════════════════════════════════════╝")
-    print()
+def run_batch_cli(paths: List[str], jobs: Optional[int], timeout: Optional[float],
+                  json_path: Optional[str], backend: str, inline_size: Optional[int] = None,
+                  memo_size: Optional[int] = None, no_memo: Optional[List[str]] = None,
+                  jit_threshold: Optional[int] = None) -> int:
+    """Run many files on a process pool and print a summary; returns exit code
+    
+    Each file is loaded and run with the same settings as run_file.
+    """
+    try:
+        from .lyra_runner import RunOptions, expand_batch_paths, run_batch
+    except ImportError:
+        from lyra_runner import RunOptions, expand_batch_paths, run_batch
     
-    while True:
+    files = expand_batch_paths(paths)
+    missing = [name for name in files if not os.path.exists(name)]
+    if missing:
+        print(f"Error: File not found: {missing[0]}")
+        return 1
+    
+    options = RunOptions(backend, inline_size, memo_size, no_memo or [], jit_threshold)
+    summary = run_batch(files, jobs, timeout, options=options)
+    if json_path == '-':
+        print(summary.to_json())
+    else:
+        print(summary.to_text())
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                f.write(summary.to_json())
+    return summary.exit_code
+
+def compile_cli(paths: List[str]) -> int:
+    """lyra --compile: write a .lyrc next to each file; returns exit code"""
+    try:
+        from .lyra_compiled import compile_file, compiled_path
+    except ImportError:
+        from lyra_compiled import compile_file, compiled_path
+    if not paths:
+        print("Error: --compile needs a file")
+        return 1
+    for path in paths:
         try:
-            code = input(">>> ")
-            if code.lower() == 'exit':
-                break
-            if code.strip():
-                run_code(code)
-        except KeyboardInterrupt:
-            print("\nGoodbye!")
-            break
+            instructions, procs = compile_file(path)
+        except FileNotFoundError:
+            print(f"Error: File not found: {path}")
+            return 1
         except Exception as e:
             print(f"Error: {e}")
+            return 1
+        print(f"[INFO] Compiled {path} -> {compiled_path(path)}: {instructions} instructions, {procs} procs")
+    return 0
 
 def main_cli():
     """Command-line interface entry point"""
+    argv = sys.argv[1:]
+    # Fast path for the common invocations: no argparse, no epilog
+    if len(argv) == 1:
+        if argv[0] == '--version':
+            print(f"lyra {__version__}")
+            return
+        if not argv[0].startswith('-') and os.path.isfile(argv[0]):
+            if run_file(argv[0]) is None:
+                sys.exit(1)
+            return
+    
+    import argparse
     parser = argparse.ArgumentParser(
         prog='lyra',
         description='Lyra Programming Language Interpreter v1.0.3',
@@ -1311,29 +2162,42 @@ def main_cli():
 EXECUTION BACKENDS:
   (default)              Tree-walking interpreter (compatible, debuggable)
   --bytecode             Bytecode VM (faster, framework for JIT)
+  --register             Register VM (one instruction per `x = a + b`)
   --optimize             Optimized bytecode + loop unrolling (best performance)
+  --stackless            Lyra call frames on a heap stack (deep recursion)
 
 EXAMPLES:
   lyra myprogram.lyra                 # Run with tree-walking
   lyra --bytecode myprogram.lyra      # Run with bytecode VM
+  lyra --register loops.lyra          # Run with register VM
   lyra --optimize myprogram.lyra      # Run optimized (v1.0.4+)
+  lyra --stackless deep.lyra          # Recursion limited only by memory
   lyra --repl                         # Interactive mode
   lyra --debug myprogram.lyra         # Debug mode
   lyra --profile myprogram.lyra       # Show performance metrics
+  lyra --jobs 4 tests/                # Run every .lyra file in parallel
+  lyra --jobs 4 --json out.json a.lyra b.lyra
+  lyra --server                       # Keep a warm interpreter on a Unix socket
+  lyra --snapshot init.lyrasnap init.lyra    # Save globals and procs after init
+  lyra --resume init.lyrasnap main.lyra      # Start main.lyra from that state
+  lyra --compile myprogram.lyra       # Write myprogram.lyrc; --bytecode runs load it
+  lyra --jit-threshold 0 prog.lyra    # Never compile hot procs to Python
 
 PERFORMANCE NOTES:
   v1.0.3: Tree-walking baseline (+35% with loop unrolling)
   v1.0.4: Bytecode VM integration (expected 2-5x faster)
-  v1.2.0: JIT compilation (expected 5-10x faster)
+  Hot procs (1000 calls + loop iterations) are compiled to Python:
+  ~5-20x faster calls and loops (benchmarks/benchmark_jit.py)
 
 For more info: https://github.com/Seread335/Lyra
         """
     )
     
     parser.add_argument(
-        'file',
-        nargs='?',
-        help='Lyra program file to execute'
+        'files',
+        nargs='*',
+        metavar='file',
+        help='Lyra program file to execute (several files or directories run as a batch)'
     )
     parser.add_argument(
         '--version',
@@ -1360,13 +2224,91 @@ For more info: https://github.com/Seread335/Lyra
         action='store_true',
         help='Use bytecode VM backend (v1.0.4+ feature)'
     )
+    parser.add_argument(
+        '--register',
+        action='store_true',
+        help='Use register VM backend (loop-heavy code)'
+    )
     parser.add_argument(
         '--optimize',
         action='store_true',
-        help='Use optimized bytecode with loop unrolling (v1.0.4+ feature)'
+        help='Inline small procs, remove dead code and specialize typed operators, then tree-walk (pass summaries go to stderr)'
+    )
+    parser.add_argument(
+        '--stackless',
+        action='store_true',
+        help='Keep Lyra call frames on a heap stack: no recursion depth limit'
+    )
+    parser.add_argument(
+        '--inline-size',
+        type=int,
+        metavar='N',
+        help='With --optimize, inline procs of up to N AST nodes (0 disables, default 24)'
+    )
+    parser.add_argument(
+        '--memo-size',
+        type=int,
+        metavar='N',
+        help=f'Cache up to N results of pure procs (0 disables, default {DEFAULT_MEMO_SIZE})'
+    )
+    parser.add_argument(
+        '--no-memo',
+        action='append',
+        metavar='PROC',
+        help='Never memoize PROC (repeatable, or comma-separated)'
+    )
+    parser.add_argument(
+        '--jit-threshold',
+        type=int,
+        metavar='N',
+        help=f'Compile a proc to Python after N calls plus loop iterations '
+             f'(0 disables, default {DEFAULT_JIT_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--snapshot',
+        metavar='PATH',
+        help='After the run, save its global variables and procs to PATH (.lyrasnap)'
+    )
+    parser.add_argument(
+        '--resume',
+        metavar='PATH',
+        help='Start the run from the globals and procs saved in snapshot PATH'
+    )
+    parser.add_argument(
+        '--compile',
+        action='store_true',
+        help='Compile each file to bytecode (.lyrc next to it) instead of running it'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        metavar='N',
+        help='Run files as a batch on N worker processes'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SECS',
+        help='Per-file time limit in batch mode'
+    )
+    parser.add_argument(
+        '--json',
+        metavar='PATH',
+        help='Write the batch summary as JSON to PATH (- for stdout)'
+    )
+    parser.add_argument(
+        '--server',
+        action='store_true',
+        help='Run a warm interpreter daemon for lyra_client.py (Unix only)'
+    )
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help='Unix socket for --server (default: $LYRA_SOCKET, $XDG_RUNTIME_DIR/lyra.sock or $TMPDIR/lyra-<uid>/lyra.sock)'
     )
     
     args = parser.parse_args()
+    args.file = args.files[0] if args.files else None
     
     # Determine backend
     backend = BACKEND_TREE_WALKING
@@ -1374,10 +2316,31 @@ For more info: https://github.com/Seread335/Lyra
         backend = BACKEND_OPTIMIZED
     elif args.bytecode:
         backend = BACKEND_BYTECODE
+    elif args.register:
+        backend = BACKEND_REGISTER
+    elif args.stackless:
+        backend = BACKEND_STACKLESS
+    
+    no_memo = [name for names in args.no_memo or [] for name in names.split(',') if name]
     
     # Start REPL if --repl is specified
-    if args.repl:
-        repl()
+    if args.compile:
+        sys.exit(compile_cli(args.files))
+    elif args.repl:
+        repl(backend)
+    elif args.server:
+        try:
+            from .lyra_server import serve
+        except ImportError:
+            from lyra_server import serve
+        serve(args.socket)
+    # Several files, a directory or --jobs: run as a batch
+    elif args.files and (args.jobs or len(args.files) > 1 or os.path.isdir(args.file)):
+        if args.snapshot or args.resume:
+            print("Error: --snapshot and --resume run a single file, not a batch")
+            sys.exit(2)
+        sys.exit(run_batch_cli(args.files, args.jobs, args.timeout, args.json, backend,
+                               args.inline_size, args.memo_size, no_memo, args.jit_threshold))
     # Run file if provided
     elif args.file:
         if not os.path.exists(args.file):
@@ -1388,18 +2351,42 @@ For more info: https://github.com/Seread335/Lyra
             print(f"[DEBUG] Backend: {backend}")
             print(f"[DEBUG] Loading file: {args.file}")
         
+        resume = None
+        if args.snapshot or args.resume:
+            try:
+                from .lyra_snapshot import Snapshot, SnapshotError, save_snapshot
+            except ImportError:
+                from lyra_snapshot import Snapshot, SnapshotError, save_snapshot
+        if args.resume:
+            try:
+                resume = Snapshot(args.resume)
+            except (OSError, SnapshotError) as e:
+                print(f"Error: {e}")
+                sys.exit(1)
         if args.profile:
             start_time = time.time()
-            run_file(args.file, backend)
+            ctx = run_file(args.file, backend, args.inline_size, args.memo_size, no_memo, resume,
+                           args.jit_threshold, keep_globals=bool(args.snapshot))
             elapsed = time.time() - start_time
             print(f"\n[PROFILE] Execution time: {elapsed:.4f}s")
             print(f"[PROFILE] Backend: {backend}")
+            for line in ctx.memo_report() if ctx else []:
+                print(f"[PROFILE] {line}")
         else:
-            run_file(args.file, backend)
+            ctx = run_file(args.file, backend, args.inline_size, args.memo_size, no_memo, resume,
+                           args.jit_threshold, keep_globals=bool(args.snapshot))
+        if args.snapshot and ctx is not None:
+            variables, procs = save_snapshot(ctx, args.snapshot, os.path.abspath(args.file))
+            print(f"[INFO] Snapshot saved to {args.snapshot}: {variables} variables, {procs} procs")
+        if ctx is None:
+            sys.exit(1)  # Uncaught error, already reported
     # Default to REPL if no arguments
     else:
-        repl()
+        repl(backend)
 
 if __name__ == "__main__":
+    # Sibling modules import the core as ``lyra_interpreter`` when run as a
+    # script; point them at this module so AST classes are shared.
+    sys.modules.setdefault("lyra_interpreter", sys.modules[__name__])
     main_cli()
 
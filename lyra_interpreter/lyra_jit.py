@@ -0,0 +1,708 @@
+#!/usr/bin/env python3
+"""
+LYRA JIT
+Version: 1.0.3
+Author: Seread335
+Tier-2 compiler: hot procs are translated to Python source and run as
+native Python functions
+
+Interpreter.run_user_function counts the calls of each FunctionDef, and
+the loops in its body add their iterations (back-edges) to the same
+counter. Once it reaches ExecutionContext.jit_threshold (lyra
+--jit-threshold), compile_proc translates the proc; later calls run the
+compiled function instead of walking the AST.
+
+Architecture:
+1. Locals: every name the body reads or writes is a Python local, loaded
+   on entry from ctx.variables (the caller's scope, which dynamic scoping
+   reads through). Params come from the args
+2. Proc calls: before a statement that may call a proc, the params and
+   assigned names are written to ctx.variables, so the callee sees the
+   scope the tree-walker would have built. The first write saves a copy
+   of the caller's scope, put back on return. Procs that call no procs
+   never touch ctx.variables
+3. Operators follow Interpreter.evaluate: + concatenates strings, / and %
+   check for zero, && and || evaluate both sides. Two floats are added
+   inline; other operands go through the helpers below. Fast paths that
+   need an operand twice store it to a temp on a line of its own before
+   the statement (no := , which Python 3.7 lacks), earlier operands first
+   so evaluation order is unchanged
+4. Self tail calls rebind the params and loop, as in run_user_function
+5. Each generated line maps to its Lyra statement (__lyra_positions__ in
+   the function's globals), so error_position reports the line and
+   column the tree-walker would
+6. Procs using try, switch, nested procs, break/continue outside a loop
+   or a tail call inside a loop are not translated: they stay interpreted
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .lyra_interpreter import (
+        VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier, CallExpr,
+        IfStmt, WhileStmt, ReturnStmt, ArrayLiteral, IndexExpr, BreakStmt, ContinueStmt,
+        ForStmt, MemberExpr, FunctionDef, BUILTINS, Interpreter, JitReturn
+    )
+except ImportError:
+    from lyra_interpreter import (
+        VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier, CallExpr,
+        IfStmt, WhileStmt, ReturnStmt, ArrayLiteral, IndexExpr, BreakStmt, ContinueStmt,
+        ForStmt, MemberExpr, FunctionDef, BUILTINS, Interpreter, JitReturn
+    )
+
+class Unsupported(Exception):
+    """The proc uses a construct the translator does not cover"""
+
+# ============================================================================
+# RUNTIME HELPERS
+# ============================================================================
+# Same rules as Interpreter.evaluate; generated code inlines the common cases
+
+def _add(left: Any, right: Any) -> Any:
+    if isinstance(left, str) or isinstance(right, str):
+        return str(left) + str(right)
+    return left + right
+
+def _div(left: Any, right: Any) -> Any:
+    if right == 0:
+        raise ZeroDivisionError("Division by zero")
+    return left / right
+
+def _mod(left: Any, right: Any) -> float:
+    if right == 0:
+        raise ZeroDivisionError("Modulo by zero")
+    return float(int(left) % int(right))
+
+def _and(left: Any, right: Any) -> float:
+    # is_truthy agrees with Python truthiness on every Lyra value
+    return 1.0 if left and right else 0.0
+
+def _or(left: Any, right: Any) -> float:
+    return 1.0 if left or right else 0.0
+
+def _index(array: Any, index: Any) -> Any:
+    index = int(index)
+    if not isinstance(array, list):
+        raise TypeError(f"Cannot index non-array type")
+    if index < 0 or index >= len(array):
+        raise IndexError(f"Index {index} out of bounds")
+    return array[index]
+
+def _member(value: Any, member: str) -> float:
+    if member == 'length' and isinstance(value, list):
+        return float(len(value))
+    return 0.0
+
+def _iterate(value: Any) -> Any:
+    """What a for loop visits: an array's items, or 0 .. n-1 as floats"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, (int, float)):
+        return map(float, range(int(value)))
+    return ()
+
+def _call(interp: Interpreter, ctx: Any, name: str, args: List[Any]) -> Any:
+    """Expression call of a name that is not a builtin"""
+    cell = ctx.function_cells.get(name)
+    if cell is None:
+        return 0.0
+    return interp.call_user_function(cell, args, ctx)
+
+_RUN_USER_FUNCTION = Interpreter.run_user_function.__code__
+
+def _raised_in_proc(tb: Any) -> bool:
+    """True if the error came out of a callee proc
+
+    The callee has then already left its writes (on top of ours, synced
+    before the call) in ctx.variables, as the tree-walker does on errors.
+    """
+    tb = tb.tb_next  # The compiled proc's own frame
+    while tb is not None:
+        frame = tb.tb_frame
+        if frame.f_code is _RUN_USER_FUNCTION or '__lyra_positions__' in frame.f_globals:
+            return True
+        tb = tb.tb_next
+    return False
+
+HELPERS = {
+    '_add': _add, '_div': _div, '_mod': _mod, '_and': _and, '_or': _or,
+    '_index': _index, '_member': _member, '_iterate': _iterate, '_call': _call,
+    '_raised_in_proc': _raised_in_proc, 'JitReturn': JitReturn,
+}
+
+# ============================================================================
+# TRANSLATOR
+# ============================================================================
+
+COMPARISONS = ('==', '!=', '<', '>', '<=', '>=')
+LOGICAL = {'&&': 'and', '||': 'or', 'num&&': 'and', 'num||': 'or'}
+# Results are numbers (or the operator raised)
+NUMERIC_OPS = frozenset(COMPARISONS + tuple(LOGICAL) + ('-', '/', '%', 'num+'))
+# Run as statements, these nodes are not evaluated at all
+INERT_STATEMENTS = (ArrayLiteral, IndexExpr, MemberExpr)
+# Top-level statements whose value a statement-level call yields
+VALUE_STATEMENTS = (BinOp, UnaryOp, Number, String, Identifier, CallExpr)
+
+class ProcTranslator:
+    """Python source of one FunctionDef (see compile_proc)"""
+
+    def __init__(self, func_def: FunctionDef) -> None:
+        self.func_def = func_def
+        self.lines: List[str] = []
+        # Generated line number -> (line, column) of its Lyra statement
+        self.positions: Dict[int, Tuple[int, int]] = {}
+        self.position: Optional[Tuple[int, int]] = None
+        # Lyra name -> Python local, in order of first use
+        self.locals: Dict[str, str] = {}
+        # Params and assigned names: what a callee may see change
+        self.written: Dict[str, None] = dict.fromkeys(func_def.params)
+        self.globals: Dict[str, Any] = {}
+        self.temps = 0
+        # Temp assignments the current statement's expressions rely on
+        self.pre: List[str] = []
+        self.calls_procs = False
+        self.tail_calls = False
+        self.statement_values = False
+
+    # ------------------------------------------------------------------
+    # Scan: support check and names
+    # ------------------------------------------------------------------
+
+    def scan_block(self, statements: Optional[List[Any]], in_loop: bool) -> None:
+        for stmt in statements or []:
+            self.scan_statement(stmt, in_loop)
+
+    def scan_statement(self, stmt: Any, in_loop: bool) -> None:
+        cls = stmt.__class__
+        if cls is VarDecl:
+            self.written[stmt.name] = None
+            if stmt.value:
+                self.scan_expr(stmt.value)
+        elif cls is Assignment:
+            target = stmt.name
+            if isinstance(target, MemberExpr):
+                return  # Not executed
+            if isinstance(target, IndexExpr):
+                self.scan_expr(target.array)
+                self.scan_expr(target.index)
+            else:
+                self.written[target] = None
+            self.scan_expr(stmt.value)
+        elif cls is ReturnStmt:
+            if stmt.tail_call:
+                if in_loop:
+                    raise Unsupported("tail call inside a loop")
+                self.tail_calls = self.calls_procs = True
+                for arg in stmt.value.args:
+                    self.scan_expr(arg)
+            elif stmt.value is not None:
+                self.scan_expr(stmt.value)
+        elif cls is IfStmt:
+            self.scan_expr(stmt.condition)
+            self.scan_block(stmt.then_branch, in_loop)
+            self.scan_block(stmt.else_branch, in_loop)
+        elif cls is WhileStmt:
+            self.scan_expr(stmt.condition)
+            self.scan_block(stmt.body, True)
+        elif cls is ForStmt:
+            self.written[stmt.var] = None
+            self.scan_expr(stmt.iterable)
+            self.scan_block(stmt.body, True)
+        elif cls is BreakStmt or cls is ContinueStmt:
+            if not in_loop:
+                raise Unsupported("break/continue outside a loop")
+        elif cls is CallExpr:
+            if stmt.name not in ('print', 'println'):
+                self.calls_procs = True  # Procs shadow builtins in statements
+            for arg in stmt.args:
+                self.scan_expr(arg)
+        elif isinstance(stmt, VALUE_STATEMENTS):
+            self.scan_expr(stmt)
+        elif not isinstance(stmt, INERT_STATEMENTS):
+            raise Unsupported(cls.__name__)
+
+    def scan_expr(self, node: Any) -> None:
+        cls = node.__class__
+        if cls is Number or cls is String:
+            return
+        if cls is Identifier:
+            self.local(node.name)
+        elif cls is BinOp:
+            if node.op not in NUMERIC_OPS and node.op not in ('+', '*', 'str+', '..'):
+                raise Unsupported(f"operator {node.op}")
+            self.scan_expr(node.left)
+            self.scan_expr(node.right)
+        elif cls is UnaryOp:
+            if node.op not in ('-', '!', 'num!'):
+                raise Unsupported(f"operator {node.op}")
+            self.scan_expr(node.operand)
+        elif cls is CallExpr:
+            if node.name not in BUILTINS:
+                self.calls_procs = True
+            for arg in node.args:
+                self.scan_expr(arg)
+        elif cls is ArrayLiteral:
+            for element in node.elements:
+                self.scan_expr(element)
+        elif cls is IndexExpr:
+            self.scan_expr(node.array)
+            self.scan_expr(node.index)
+        elif cls is MemberExpr:
+            self.scan_expr(node.object_expr)
+        else:
+            raise Unsupported(cls.__name__)
+
+    # ------------------------------------------------------------------
+    # Names and lines
+    # ------------------------------------------------------------------
+
+    def local(self, name: str) -> str:
+        local = self.locals.get(name)
+        if local is None:
+            # Non-ASCII names could collide after Python's NFKC normalization
+            local = f"v_{name}" if name.isascii() else f"v{len(self.locals)}_"
+            self.locals[name] = local
+        return local
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"t{self.temps}"
+
+    def constant(self, value: Any) -> str:
+        if math.isfinite(value):
+            return repr(value)
+        name = f"k{len(self.globals)}"
+        self.globals[name] = value
+        return name
+
+    def emit(self, text: str, depth: int) -> None:
+        self.lines.append("    " * depth + text)
+        if self.position is not None:
+            self.positions[len(self.lines)] = self.position
+
+    def flush(self, depth: int) -> None:
+        """Emit the temp assignments of the expressions translated so far"""
+        for line in self.pre:
+            self.emit(line, depth)
+        self.pre.clear()
+
+    def emit_sync(self, depth: int) -> None:
+        """Make ctx.variables the scope a callee would see in the tree-walker"""
+        if not self.written:
+            return
+        self.emit("if saved is None:", depth)
+        self.emit("saved = variables.copy()", depth + 1)
+        self.emit("scope = ctx.variables", depth)
+        for name in self.written:
+            self.emit(f"scope[{name!r}] = {self.local(name)}", depth)
+
+    def emit_return(self, value: str, depth: int, convert: bool = True) -> None:
+        if self.calls_procs and self.written:
+            self.emit("if saved is not None:", depth)
+            self.emit("ctx.variables = saved", depth + 1)
+        if convert:
+            # Anything but a float is converted by run_user_function, like RETURN:
+            self.emit(f"return {value} if {value}.__class__ is float else JitReturn({value})", depth)
+        else:
+            self.emit(f"return {value}", depth)
+
+    def emit_value(self, target: str, node: Any, depth: int) -> None:
+        """target = node's value, after its temps"""
+        value = self.expr(node)
+        self.flush(depth)
+        self.emit(f"{target} = {value}", depth)
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def block(self, statements: Optional[List[Any]], depth: int, top: bool = False) -> None:
+        start = len(self.lines)
+        for stmt in statements or []:
+            self.statement(stmt, depth, top)
+        if len(self.lines) == start:
+            self.emit("pass", depth)
+
+    def statement(self, stmt: Any, depth: int, top: bool) -> None:
+        outer = self.position
+        if stmt.line:
+            self.position = (stmt.line, stmt.column)
+        self.statement_node(stmt, depth)
+        if top and self.statement_values and isinstance(stmt, VALUE_STATEMENTS):
+            # A statement-level call evaluates it again for its value
+            self.emit("if statement:", depth)
+            if calls_proc(stmt):
+                self.emit_sync(depth + 1)
+            self.emit_value("result", stmt, depth + 1)
+        self.position = outer
+
+    def statement_node(self, stmt: Any, depth: int) -> None:
+        cls = stmt.__class__
+        if cls is VarDecl:
+            if stmt.value and calls_proc(stmt.value):
+                self.emit_sync(depth)
+            value = self.expr(stmt.value) if stmt.value else "0"
+            self.flush(depth)
+            self.emit(f"{self.local(stmt.name)} = {value}", depth)
+        elif cls is Assignment:
+            target = stmt.name
+            if isinstance(target, MemberExpr):
+                self.emit("pass", depth)
+                return
+            if isinstance(target, IndexExpr):
+                if calls_proc(target.array) or calls_proc(target.index) or calls_proc(stmt.value):
+                    self.emit_sync(depth)
+                self.emit_value("t_array", target.array, depth)
+                index = self.expr(target.index)
+                self.flush(depth)
+                self.emit(f"t_index = int({index})", depth)
+                self.emit_value("t_value", stmt.value, depth)
+                self.emit("if t_array.__class__ is list and 0 <= t_index < len(t_array):", depth)
+                self.emit("t_array[t_index] = t_value", depth + 1)
+                return
+            if calls_proc(stmt.value):
+                self.emit_sync(depth)
+            self.emit_value(self.local(target), stmt.value, depth)
+        elif cls is ReturnStmt:
+            if stmt.tail_call:
+                self.tail_call(stmt.value, depth)
+                return
+            if stmt.value is None:
+                self.emit_return("0.0", depth, convert=False)
+                return
+            if calls_proc(stmt.value):
+                self.emit_sync(depth)
+            self.emit_value("t_value", stmt.value, depth)
+            self.emit_return("t_value", depth)
+        elif cls is IfStmt:
+            if calls_proc(stmt.condition):
+                self.emit_sync(depth)
+            condition = self.test(stmt.condition)
+            self.flush(depth)
+            self.emit(f"if {condition}:", depth)
+            self.block(stmt.then_branch, depth + 1)
+            if stmt.else_branch:
+                self.emit("else:", depth)
+                self.block(stmt.else_branch, depth + 1)
+        elif cls is WhileStmt:
+            condition = self.test(stmt.condition)
+            if calls_proc(stmt.condition) or self.pre:
+                # Syncs and temps run again before every test
+                self.emit("while True:", depth)
+                if calls_proc(stmt.condition):
+                    self.emit_sync(depth + 1)
+                self.flush(depth + 1)
+                self.emit(f"if not {condition}:", depth + 1)
+                self.emit("break", depth + 2)
+            else:
+                self.emit(f"while {condition}:", depth)
+            self.block(stmt.body, depth + 1)
+        elif cls is ForStmt:
+            if calls_proc(stmt.iterable):
+                self.emit_sync(depth)
+            iterable = self.expr(stmt.iterable)
+            self.flush(depth)
+            self.emit(f"for {self.local(stmt.var)} in _iterate({iterable}):", depth)
+            self.block(stmt.body, depth + 1)
+        elif cls is BreakStmt:
+            self.emit("break", depth)
+        elif cls is ContinueStmt:
+            self.emit("continue", depth)
+        elif cls is CallExpr:
+            args = self.operands(stmt.args)
+            if stmt.name in ('print', 'println'):
+                if any(calls_proc(arg) for arg in stmt.args):
+                    self.emit_sync(depth)
+                self.flush(depth)
+                text = f"str({args[0]})" if len(args) == 1 else f"' '.join([{', '.join(f'str({arg})' for arg in args)}])"
+                self.emit(f"ctx.write_line({text})", depth)
+                return
+            # Procs shadow builtins in statements; other names do nothing
+            self.emit(f"t_cell = cells.get({stmt.name!r})", depth)
+            self.emit("if t_cell is not None:", depth)
+            self.emit_sync(depth + 1)
+            self.flush(depth + 1)
+            self.emit(f"interp.run_user_function(t_cell, [{', '.join(args)}], ctx, True)", depth + 1)
+        elif isinstance(stmt, (Identifier, Number, String)) or isinstance(stmt, INERT_STATEMENTS):
+            self.emit("pass", depth)
+        else:
+            if calls_proc(stmt):
+                self.emit_sync(depth)
+            value = self.expr(stmt)
+            self.flush(depth)
+            self.emit(value, depth)
+
+    def tail_call(self, call: CallExpr, depth: int) -> None:
+        """`return f(...)` in f: loop while f is still bound to this proc"""
+        if any(calls_proc(arg) for arg in call.args):
+            self.emit_sync(depth)
+        args = self.operands(call.args)
+        self.flush(depth)
+        self.emit(f"t_args = [{', '.join(args)}]", depth)
+        self.emit(f"if cells.get({call.name!r}) is cell and cell.func_def is func_def:", depth)
+        params = self.func_def.params
+        for index in range(min(len(params), len(call.args))):
+            self.emit(f"{self.local(params[index])} = t_args[{index}]", depth + 1)
+        self.emit("result = 0.0", depth + 1)
+        self.emit("statement = False", depth + 1)
+        self.emit("continue", depth + 1)
+        # Rebound while running: a real call
+        self.emit_sync(depth)
+        self.emit(f"t_value = _call(interp, ctx, {call.name!r}, t_args)", depth)
+        self.emit_return("t_value", depth)
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def operands(self, nodes: List[Any]) -> List[str]:
+        """Python expressions for nodes, evaluated left to right
+
+        If an operand adds temp assignments, the operands before it are
+        stored to temps first, so they still run before it.
+        """
+        texts: List[str] = []
+        for node in nodes:
+            mark = len(self.pre)
+            text = self.expr(node)
+            if len(self.pre) > mark:
+                stores = []
+                for index, earlier in enumerate(texts):
+                    if not earlier.isidentifier() and not is_atom(nodes[index]):
+                        t = self.temp()
+                        stores.append(f"{t} = {earlier}")
+                        texts[index] = t
+                self.pre[mark:mark] = stores
+            texts.append(text)
+        return texts
+
+    def store(self, node: Any, text: str) -> str:
+        """text as a name that can be read twice (a temp unless node is one)"""
+        if is_atom(node) or text.isidentifier():
+            return text
+        t = self.temp()
+        self.pre.append(f"{t} = {text}")
+        return t
+
+    def expr(self, node: Any) -> str:
+        cls = node.__class__
+        if cls is Number:
+            return self.constant(node.value)
+        if cls is String:
+            return repr(node.value)
+        if cls is Identifier:
+            return self.local(node.name)
+        if cls is BinOp:
+            return self.binary(node)
+        if cls is UnaryOp:
+            if node.op == '-':
+                return f"(-{self.expr(node.operand)})"
+            return f"(0.0 if {self.test(node.operand)} else 1.0)"
+        if cls is CallExpr:
+            args = ', '.join(self.operands(node.args))
+            builtin = BUILTINS.get(node.name)
+            if builtin is None:
+                return f"_call(interp, ctx, {node.name!r}, [{args}])"
+            name = f"b_{node.name}"
+            self.globals[name] = builtin
+            return f"{name}([{args}], ctx)"
+        if cls is ArrayLiteral:
+            return f"[{', '.join(self.operands(node.elements))}]"
+        if cls is IndexExpr:
+            if node.array.__class__ is not Identifier:
+                return f"_index({', '.join(self.operands([node.array, node.index]))})"
+            # Reading a local has no side effects: the index may go first
+            array = self.local(node.array.name)
+            t = self.temp()
+            self.pre.append(f"{t} = int({self.expr(node.index)})")
+            return (f"({array}[{t}] if {t} >= 0 and {array}.__class__ is list "
+                    f"and {t} < len({array}) else _index({array}, {t}))")
+        if cls is MemberExpr:
+            return f"_member({self.expr(node.object_expr)}, {node.member!r})"
+        raise Unsupported(cls.__name__)
+
+    def binary(self, node: BinOp) -> str:
+        op = node.op
+        if op in LOGICAL and is_safe(node.right):
+            return f"(1.0 if {self.test(node)} else 0.0)"
+        left, right = self.operands([node.left, node.right])
+        if op in COMPARISONS:
+            return f"(1.0 if {left} {op} {right} else 0.0)"
+        if op in LOGICAL:
+            return f"_{LOGICAL[op]}({left}, {right})"
+        if op == '+':
+            if is_numeric(node.left) and is_numeric(node.right):
+                return f"({left} + {right})"
+            if node.left.__class__ is String or node.right.__class__ is String:
+                left = left if node.left.__class__ is String else f"str({left})"
+                right = right if node.right.__class__ is String else f"str({right})"
+                return f"({left} + {right})"
+            a, b = self.store(node.left, left), self.store(node.right, right)
+            if node.right.__class__ is Number:
+                check = f"{a}.__class__ is float"
+            elif node.left.__class__ is Number:
+                check = f"{b}.__class__ is float"
+            else:
+                check = f"{a}.__class__ is {b}.__class__ is float"
+            return f"({a} + {b} if {check} else _add({a}, {b}))"
+        if op == 'num+' or op == '-' or op == '*':
+            return f"({left} {op[-1]} {right})"
+        if op == 'str+':
+            return f"(str({left}) + str({right}))"
+        divisor = node.right.value if node.right.__class__ is Number else 0
+        if not math.isfinite(divisor):
+            divisor = 0
+        if op == '/':
+            return f"({left} / {right})" if divisor else f"_div({left}, {right})"
+        if op == '%':
+            return f"float(int({left}) % {int(divisor)})" if divisor else f"_mod({left}, {right})"
+        return f"list(range(int({left}), int({right})))"  # ..
+
+    def test(self, node: Any) -> str:
+        """node as an if/while condition: only its truthiness matters"""
+        if node.__class__ is BinOp:
+            op = node.op
+            if op in COMPARISONS:
+                left, right = self.operands([node.left, node.right])
+                return f"({left} {op} {right})"
+            if op in LOGICAL and is_safe(node.right):
+                return f"({self.test(node.left)} {LOGICAL[op]} {self.test(node.right)})"
+        elif node.__class__ is UnaryOp and node.op != '-':
+            return f"(not {self.test(node.operand)})"
+        return self.expr(node)
+
+    # ------------------------------------------------------------------
+    # Function
+    # ------------------------------------------------------------------
+
+    def translate(self) -> str:
+        func_def = self.func_def
+        self.scan_block(func_def.body, False)
+        self.statement_values = any(isinstance(stmt, VALUE_STATEMENTS) for stmt in func_def.body)
+        for name in func_def.params:
+            self.local(name)
+        for name in self.written:
+            self.local(name)
+
+        depth = 2
+        body_start = len(self.lines)
+        if self.tail_calls:
+            self.emit("while True:", depth)
+            depth += 1
+        self.block(func_def.body, depth, top=True)
+        if not func_def.body or func_def.body[-1].__class__ is not ReturnStmt:
+            self.emit_return("result" if self.tail_calls or self.statement_values else "0",
+                             depth, convert=False)
+        body = self.lines[body_start:]
+        positions = {line - body_start: position for line, position in self.positions.items()}
+
+        # Entry: bind params, load every other name from the caller's scope
+        self.lines, self.positions = [], {}
+        self.emit("def proc(interp, ctx, cell, args, statement):", 0)
+        self.emit("variables = ctx.variables", 1)
+        if self.calls_procs:
+            self.emit("cells = ctx.function_cells", 1)
+            self.emit("saved = None", 1)
+        params = func_def.params
+        if params:
+            self.emit(f"if len(args) >= {len(params)}:", 1)
+            for index, name in enumerate(params):
+                self.emit(f"{self.locals[name]} = args[{index}]", 2)
+            self.emit("else:", 1)
+            for index, name in enumerate(params):
+                # Missing args read the caller's variables (a repeated param keeps its value)
+                missing = self.locals[name] if name in params[:index] else f"variables.get({name!r}, 0.0)"
+                self.emit(f"{self.locals[name]} = args[{index}] if len(args) > {index} else {missing}", 2)
+        for name, local in self.locals.items():
+            if name not in params:
+                self.emit(f"{local} = variables.get({name!r}, 0.0)", 1)
+        self.emit("result = 0", 1)
+        self.emit("try:", 1)
+        start = len(self.lines)
+        self.lines += body
+        self.positions.update((line + start, position) for line, position in positions.items())
+        self.emit("except Exception as error:", 1)
+        # Leave our writes behind, as the tree-walker's in-place writes would be
+        self.emit("if not _raised_in_proc(error.__traceback__):", 2)
+        self.emit("scope = ctx.variables", 3)
+        for name in self.written:
+            self.emit(f"scope[{name!r}] = {self.local(name)}", 3)
+        self.emit("raise", 2)
+        return "\n".join(self.lines) + "\n"
+
+def calls_proc(node: Any) -> bool:
+    """True if evaluating node may call a proc (a name that is not a builtin)"""
+    cls = node.__class__
+    if cls is CallExpr:
+        return node.name not in BUILTINS or any(calls_proc(arg) for arg in node.args)
+    if cls is BinOp:
+        return calls_proc(node.left) or calls_proc(node.right)
+    if cls is UnaryOp:
+        return calls_proc(node.operand)
+    if cls is ArrayLiteral:
+        return any(calls_proc(element) for element in node.elements)
+    if cls is IndexExpr:
+        return calls_proc(node.array) or calls_proc(node.index)
+    if cls is MemberExpr:
+        return calls_proc(node.object_expr)
+    return False
+
+def is_atom(node: Any) -> bool:
+    """True if node translates to a name or constant: free to read twice"""
+    cls = node.__class__
+    return cls is Number or cls is String or cls is Identifier
+
+def is_numeric(node: Any) -> bool:
+    """True if node's value is always a number"""
+    cls = node.__class__
+    if cls is Number:
+        return True
+    if cls is BinOp:
+        if node.op in NUMERIC_OPS:
+            return True
+        return node.op in ('+', '*') and is_numeric(node.left) and is_numeric(node.right)
+    if cls is UnaryOp:
+        return True
+    # Procs return floats (or the int 0 when they end without return)
+    return cls is CallExpr and node.name not in BUILTINS
+
+def is_safe(node: Any) -> bool:
+    """True if node cannot raise or have side effects: && and || may skip it"""
+    cls = node.__class__
+    if cls is Number or cls is String or cls is Identifier:
+        return True
+    if cls is BinOp:
+        return node.op in ('==', '!=') and is_safe(node.left) and is_safe(node.right)
+    if cls is UnaryOp:
+        return node.op != '-' and is_safe(node.operand)
+    return False
+
+# ============================================================================
+# COMPILING
+# ============================================================================
+
+def proc_source(func_def: FunctionDef) -> Optional[str]:
+    """Python source compile_proc would run for func_def (None if unsupported)"""
+    try:
+        return ProcTranslator(func_def).translate()
+    except Unsupported:
+        return None
+
+def compile_proc(func_def: FunctionDef) -> Optional[Callable[..., Any]]:
+    """Native Python function for func_def, or None if it must stay interpreted
+
+    It is called as proc(interpreter, ctx, cell, args, statement) by
+    Interpreter.run_user_function, which converts a JitReturn result.
+    """
+    translator = ProcTranslator(func_def)
+    try:
+        source = translator.translate()
+    except Unsupported:
+        return None
+    namespace = dict(HELPERS)
+    namespace.update(translator.globals)
+    namespace['func_def'] = func_def
+    namespace['__lyra_positions__'] = translator.positions
+    exec(compile(source, f"<lyra jit: {func_def.name}>", 'exec'), namespace)
+    return namespace['proc']
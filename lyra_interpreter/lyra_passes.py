@@ -0,0 +1,877 @@
+#!/usr/bin/env python3
+"""
+LYRA AST OPTIMIZATION PASSES
+Version: 1.0.3
+Author: Seread335
+Source-to-source rewrites applied to a parsed Program before it runs
+
+Architecture:
+1. Walkers: generic child traversal, cloning and bottom-up rewriting
+2. Inliner: small single-return procs are substituted at their call sites
+3. Dead code: unreachable statements, constant branches, unused bindings
+   and never-called procs are removed
+4. Type inference: operators on proven numbers or strings are specialized
+
+Passes only rewrite when the result is observably the same under Lyra's
+dynamic scoping; anything they cannot prove is left as an ordinary call.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .lyra_interpreter import (
+        ASTNode, Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, TryStmt, SwitchStmt, ForStmt, MemberExpr, BUILTINS
+    )
+    from .error_system import CodeAnalyzer
+except ImportError:
+    from lyra_interpreter import (
+        ASTNode, Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, TryStmt, SwitchStmt, ForStmt, MemberExpr, BUILTINS
+    )
+    from error_system import CodeAnalyzer
+
+# ============================================================================
+# AST WALKERS
+# ============================================================================
+
+# Lists whose items are statements (a bare CallExpr there is a statement)
+STATEMENT_LISTS = frozenset(('statements', 'then_branch', 'else_branch', 'body',
+                             'try_block', 'catch_block', 'default_case', 'typed_body'))
+
+# Runtime caches attached to nodes; never walked or copied
+CACHE_FIELDS = frozenset(('target', 'jump_table'))
+
+# Attributes of each node class, in constructor order. Walkers read these
+# instead of vars(node): on CPython 3.11+ vars() replaces the object's
+# inline attribute storage with a real dict, and every later attribute read
+# of that node by the interpreter gets slower (~20% on a hot loop).
+NODE_FIELDS = {
+    Program: ('statements',),
+    VarDecl: ('name', 'type', 'value'),
+    Assignment: ('name', 'value'),
+    BinOp: ('left', 'op', 'right'),
+    UnaryOp: ('op', 'operand'),
+    Number: ('value',),
+    String: ('value',),
+    Identifier: ('name',),
+    CallExpr: ('name', 'args', 'target'),
+    IfStmt: ('condition', 'then_branch', 'else_branch', 'numeric_condition'),
+    WhileStmt: ('condition', 'body', 'numeric_condition'),
+    FunctionDef: ('name', 'params', 'return_type', 'body', 'param_types',
+                  'typed_body', 'typed_params'),
+    ReturnStmt: ('value', 'tail_call'),
+    ArrayLiteral: ('elements',),
+    IndexExpr: ('array', 'index'),
+    BreakStmt: (),
+    ContinueStmt: (),
+    TryStmt: ('try_block', 'catch_block', 'catch_var'),
+    SwitchStmt: ('expr', 'cases', 'default_case', 'jump_table'),
+    ForStmt: ('var', 'iterable', 'body'),
+    MemberExpr: ('object_expr', 'member'),
+}
+
+def node_fields(node: ASTNode) -> List[Tuple[str, Any]]:
+    """(name, value) of every attribute of node, runtime caches included"""
+    names = NODE_FIELDS.get(node.__class__)
+    if names is None:
+        return list(vars(node).items())
+    return [(name, getattr(node, name)) for name in names]
+
+def iter_nodes(node: Any):
+    """Yield node and every AST node below it, parents first"""
+    if isinstance(node, ASTNode):
+        yield node
+        for name, value in node_fields(node):
+            if name not in CACHE_FIELDS:
+                yield from iter_nodes(value)
+    elif isinstance(node, (list, tuple)):
+        for item in node:
+            yield from iter_nodes(item)
+
+def clone(node: Any) -> Any:
+    """Deep copy of an AST subtree, keeping positions but emptying runtime caches"""
+    if isinstance(node, ASTNode):
+        copy = object.__new__(type(node))
+        for name, value in node_fields(node):
+            setattr(copy, name, None if name in CACHE_FIELDS else clone(value))
+        if node.line:
+            copy.line, copy.column = node.line, node.column
+        return copy
+    if isinstance(node, list):
+        return [clone(item) for item in node]
+    if isinstance(node, tuple):
+        return tuple(clone(item) for item in node)
+    return node
+
+def rewrite_expressions(node: Any, fn: Callable[[Any], Any], statement: bool = True) -> Any:
+    """Replace every expression e below node with fn(e), innermost first
+
+    Statements are rewritten in place but never replaced themselves.
+    """
+    for name, value in node_fields(node):
+        if name in CACHE_FIELDS:
+            continue
+        if isinstance(value, ASTNode):
+            setattr(node, name, rewrite_expressions(value, fn, statement=False))
+        elif isinstance(value, list):
+            in_block = name in STATEMENT_LISTS
+            setattr(node, name, [_rewrite_item(item, fn, in_block) for item in value])
+    return node if statement else fn(node)
+
+def _rewrite_item(item: Any, fn: Callable[[Any], Any], in_block: bool) -> Any:
+    if isinstance(item, ASTNode):
+        return rewrite_expressions(item, fn, statement=in_block)
+    if isinstance(item, tuple):
+        # Switch case: (label expression, statement list)
+        label, statements = item
+        return (rewrite_expressions(label, fn, statement=False),
+                [rewrite_expressions(stmt, fn) for stmt in statements])
+    return item
+
+def node_count(node: Any) -> int:
+    return sum(1 for _ in iter_nodes(node))
+
+# ============================================================================
+# PROC INLINING
+# ============================================================================
+
+DEFAULT_INLINE_SIZE = 24
+
+# Builtins whose calls must not be reordered, dropped or duplicated
+SIDE_EFFECT_BUILTINS = frozenset(('print', 'println', 'input'))
+
+PURE_NODES = (Number, String, Identifier, BinOp, UnaryOp, IndexExpr, MemberExpr)
+
+# Comparisons and logic already yield floats, so the RETURN: float()
+# conversion can be skipped for them
+NUMERIC_OPS = frozenset(('==', '!=', '<', '>', '<=', '>=', '&&', '||', '%'))
+
+@dataclass
+class InlineReport:
+    """What the inliner did to one program"""
+    max_size: int
+    inlinable: List[str] = field(default_factory=list)
+    sites: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def calls_eliminated(self) -> int:
+        """Call sites replaced (static count)"""
+        return sum(self.sites.values())
+
+    def to_text(self) -> str:
+        if not self.sites:
+            return f"Inlined 0 call sites (size limit {self.max_size})"
+        detail = ", ".join(f"{name} x{count}" for name, count in sorted(self.sites.items()))
+        return (f"Inlined {self.calls_eliminated} call sites of {len(self.sites)} procs "
+                f"(size limit {self.max_size}): {detail}")
+
+@dataclass
+class _Template:
+    """Body of an inlinable proc as one expression over its params"""
+    params: List[str]
+    expr: Any
+    uses: Dict[str, int]
+    effects: bool
+    safe: bool  # Cannot raise, so may also replace calls a try could catch
+
+def is_duplicable(expr: Any) -> bool:
+    """Cheap, side-effect free and unable to raise: safe to copy or drop"""
+    return isinstance(expr, (Number, String, Identifier))
+
+def is_pure(expr: Any) -> bool:
+    """Reads, arithmetic and side-effect free builtins only (may still raise)"""
+    for node in iter_nodes(expr):
+        if isinstance(node, CallExpr):
+            if node.name not in BUILTINS or node.name in SIDE_EFFECT_BUILTINS:
+                return False
+        elif not isinstance(node, PURE_NODES):
+            return False
+    return True
+
+def _can_fold(value: Any, uses: int, effects: bool) -> bool:
+    """May a bound value be evaluated at each of its uses instead of once?
+
+    Pure values may be repeated (same result, same error) but not dropped,
+    since dropping would hide an error. Values with calls must be used
+    exactly once. Either kind is only moved past output when it cannot fail.
+    """
+    if is_duplicable(value):
+        return True
+    if effects or uses < 1:
+        return False
+    return uses == 1 or is_pure(value)
+
+def _returns_number(expr: Any) -> bool:
+    """Already a float, so the RETURN: float() conversion can be skipped"""
+    return isinstance(expr, Number) or (isinstance(expr, BinOp) and expr.op in NUMERIC_OPS) or \
+        (isinstance(expr, UnaryOp) and expr.op == '!')
+
+def _place(expr: Any, stmt: Any) -> Any:
+    """Give the nodes of expr that have no position the position of stmt"""
+    if stmt is not None and stmt.line:
+        for node in iter_nodes(expr):
+            if not node.line:
+                node.line, node.column = stmt.line, stmt.column
+    return expr
+
+def _call_sites(node: Any, stmt: Any, guarded: bool, catches: bool,
+                sites: Dict[int, Tuple[Any, bool]]) -> None:
+    """Map id() of each call below node to (innermost positioned statement,
+    whether a try may catch its errors)
+
+    Calls in a try block are guarded, and so are calls in proc bodies
+    when the program has a try anywhere (catches), since any call to the
+    proc may come from inside it.
+    """
+    if isinstance(node, ASTNode):
+        if node.line:
+            stmt = node
+        if isinstance(node, CallExpr):
+            sites[id(node)] = (stmt, guarded)
+        elif isinstance(node, FunctionDef):
+            guarded = guarded or catches
+        for name, value in node_fields(node):
+            if name not in CACHE_FIELDS:
+                _call_sites(value, stmt, guarded or name == 'try_block', catches, sites)
+    elif isinstance(node, (list, tuple)):
+        for item in node:
+            _call_sites(item, stmt, guarded, catches, sites)
+
+def _calls_user_proc(expr: Any) -> bool:
+    return any(isinstance(node, CallExpr) and node.name not in BUILTINS
+               for node in iter_nodes(expr))
+
+def _has_side_effects(expr: Any) -> bool:
+    return any(isinstance(node, CallExpr) and node.name in SIDE_EFFECT_BUILTINS
+               for node in iter_nodes(expr))
+
+def _substitute(expr: Any, env: Dict[str, Any], uses: Dict[str, int]) -> Any:
+    """Copy of expr with identifiers in env replaced; counts uses"""
+    def replace(node: Any) -> Any:
+        if isinstance(node, Identifier) and node.name in env:
+            uses[node.name] = uses.get(node.name, 0) + 1
+            return clone(env[node.name])
+        return node
+    expr = clone(expr)
+    if isinstance(expr, Identifier):
+        return replace(expr)
+    return rewrite_expressions(expr, replace, statement=False)
+
+def _reduce(func_def: FunctionDef, max_size: int) -> Optional[_Template]:
+    """Fold `var`s into the returned expression, or None if not inlinable
+
+    Locals disappear by substitution, which renames them away from the
+    caller's variables. Under dynamic scoping a callee also sees its
+    params and locals from inside nested calls, so bodies that still call
+    a user proc are rejected. Folded nodes keep the position of the
+    callee statement they came from, so errors still point into the proc.
+    A call that raises leaves the callee's params and locals bound in the
+    caller's scope, which an inlined body cannot reproduce; the template
+    records whether its body can raise at all.
+    """
+    body = func_def.body
+    if not body or not isinstance(body[-1], ReturnStmt) or body[-1].value is None:
+        return None
+    env: Dict[str, Any] = {param: Identifier(param) for param in func_def.params}
+    for stmt in body[:-1]:
+        if not isinstance(stmt, VarDecl) or stmt.value is None:
+            return None
+        if _calls_user_proc(stmt.value) or _has_side_effects(stmt.value):
+            return None
+        env[stmt.name] = _place(_substitute(stmt.value, env, {}), stmt)
+    if _calls_user_proc(body[-1].value):
+        return None
+
+    # Later statements see each local through env; count uses in the
+    # final expression to decide whether a local may be folded in
+    uses: Dict[str, int] = {}
+    expr = _place(_substitute(body[-1].value, env, uses), body[-1])
+    effects = _has_side_effects(expr)
+    for stmt in body[:-1]:
+        if not _can_fold(env[stmt.name], _count_uses(stmt.name, body, uses), effects):
+            return None
+    if node_count(expr) > max_size:
+        return None
+
+    param_uses: Dict[str, int] = {}
+    for node in iter_nodes(expr):
+        if isinstance(node, Identifier) and node.name in func_def.params:
+            param_uses[node.name] = param_uses.get(node.name, 0) + 1
+    return _Template(list(func_def.params), expr, param_uses, effects,
+                     cannot_fail(expr) and _returns_number(expr))
+
+def _count_uses(name: str, body: List[Any], final_uses: Dict[str, int]) -> int:
+    """Reads of a local in later `var` values and the return expression"""
+    total = 0
+    seen = False
+    for stmt in body[:-1]:
+        if seen:
+            total += sum(1 for node in iter_nodes(stmt.value)
+                         if isinstance(node, Identifier) and node.name == name)
+        if stmt.name == name:
+            if seen:
+                return -1  # Rebound local: keep it simple, do not fold
+            seen = True
+    return total + final_uses.get(name, 0)
+
+def _expand(template: _Template, node: CallExpr, stmt: Any = None) -> Optional[Any]:
+    """Inlined expression for one call site, or None to keep the call
+
+    Args keep the position of stmt, the statement making the call.
+    """
+    if len(node.args) != len(template.params):
+        return None  # Missing params read the caller's variables instead
+    env = {}
+    for param, arg in zip(template.params, node.args):
+        # Args are evaluated before the body runs; only pure ones may move
+        if not is_duplicable(arg) and not is_pure(arg):
+            return None
+        if not _can_fold(arg, template.uses.get(param, 0), template.effects):
+            return None
+        env[param] = _place(arg, stmt)
+    expr = _substitute(template.expr, env, {})
+    if _returns_number(expr):
+        return expr
+    # Procs return through "RETURN:<value>" and float(), so keep that
+    # conversion, text first: a list fails with the same ValueError
+    return CallExpr('float', [CallExpr('str', [expr])])
+
+def inline_procs(program: Program, max_size: int = DEFAULT_INLINE_SIZE,
+                 extern: Sequence[FunctionDef] = ()) -> InlineReport:
+    """Inline small non-recursive single-return procs into their callers
+
+    A call is only inlined where the callee is already defined: procs are
+    bound when their `proc` statement runs, so only calls in later
+    top-level statements (or in procs defined later) qualify. Procs that
+    are defined more than once, or shadowed by a builtin, are skipped.
+    Bodies that can raise are only inlined where no try can catch the
+    error (extern: procs defined before the program, e.g. by --resume).
+    """
+    report = InlineReport(max_size)
+    if max_size <= 0:
+        return report
+
+    definitions: Dict[str, int] = {}
+    for node in iter_nodes(program.statements):
+        if isinstance(node, FunctionDef):
+            definitions[node.name] = definitions.get(node.name, 0) + 1
+
+    catches = any(isinstance(node, TryStmt) for node in iter_nodes([program.statements, extern]))
+    templates: Dict[str, _Template] = {}
+    sites: Dict[int, Tuple[Any, bool]] = {}
+
+    def inline_call(node: Any) -> Any:
+        if isinstance(node, CallExpr) and node.name in templates:
+            stmt, guarded = sites.get(id(node), (None, True))
+            if guarded and not templates[node.name].safe:
+                return node
+            expr = _expand(templates[node.name], node, stmt)
+            if expr is not None:
+                report.sites[node.name] = report.sites.get(node.name, 0) + 1
+                return expr
+        return node
+
+    for stmt in program.statements:
+        sites.clear()
+        _call_sites(stmt, None, False, catches, sites)
+        rewrite_expressions(stmt, inline_call)
+        if isinstance(stmt, FunctionDef) and definitions[stmt.name] == 1 \
+                and stmt.name not in BUILTINS:
+            template = _reduce(stmt, max_size)
+            if template is not None:
+                templates[stmt.name] = template
+                report.inlinable.append(stmt.name)
+    return report
+
+# ============================================================================
+# DEAD CODE ELIMINATION
+# ============================================================================
+
+# Jumps that end each kind of block. The interpreter only checks the
+# break/continue flags in loops, if branches and (break only) switch cases;
+# elsewhere the statements after a stray break still run.
+BLOCK_EXITS = {
+    'loop': ('return', 'break', 'continue'),
+    'if': ('return', 'break', 'continue'),
+    'switch': ('return', 'break'),
+    'body': ('return',),
+}
+
+@dataclass
+class DeadCodeReport:
+    """What dead code elimination removed from one program"""
+    nodes_removed: int = 0
+    unreachable: int = 0
+    constant_branches: int = 0
+    unused_bindings: int = 0
+    unused_procs: List[str] = field(default_factory=list)
+
+    def to_text(self) -> str:
+        text = (f"Removed {self.nodes_removed} nodes: {self.unreachable} unreachable statements, "
+                f"{self.constant_branches} constant branches, {self.unused_bindings} unused bindings, "
+                f"{len(self.unused_procs)} unused procs")
+        if self.unused_procs:
+            text += f" ({', '.join(self.unused_procs)})"
+        return text
+
+def cannot_fail(expr: Any) -> bool:
+    """Side-effect free and unable to raise: safe to drop unevaluated"""
+    if expr is None or isinstance(expr, (Number, String, Identifier)):
+        return True
+    if isinstance(expr, ArrayLiteral):
+        return all(cannot_fail(element) for element in expr.elements)
+    if isinstance(expr, UnaryOp):
+        if expr.op == '-':
+            return isinstance(expr.operand, Number)
+        return cannot_fail(expr.operand)
+    if isinstance(expr, BinOp):
+        # Equality and truthiness accept any values
+        if expr.op in ('==', '!=', '&&', '||', 'num&&', 'num||'):
+            return cannot_fail(expr.left) and cannot_fail(expr.right)
+        if isinstance(expr.left, Number) and isinstance(expr.right, Number):
+            return expr.op in ('+', '-', '*', '<', '>', '<=', '>=') or expr.right.value != 0
+    return False
+
+def _constant_truth(expr: Any) -> Optional[bool]:
+    if isinstance(expr, Number):
+        return expr.value != 0
+    if isinstance(expr, String):
+        return len(expr.value) > 0
+    return None
+
+def _called_procs(program: Program, extern: Sequence[FunctionDef] = ()) -> set:
+    """Names of procs that a run can call: from top-level code, then transitively"""
+    bodies: Dict[str, List[Any]] = {}
+    for node in iter_nodes(program.statements):
+        if isinstance(node, FunctionDef):
+            bodies.setdefault(node.name, []).append(node.body)
+
+    def calls(statements: Any) -> set:
+        # A nested proc's body only counts once its own name is called
+        names = set()
+        pending = [statements]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, list):
+                pending.extend(node)
+            elif isinstance(node, tuple):
+                pending.extend(node)
+            elif isinstance(node, ASTNode):
+                if isinstance(node, CallExpr):
+                    names.add(node.name)
+                for name, value in node_fields(node):
+                    if name not in CACHE_FIELDS and not (isinstance(node, FunctionDef) and name == 'body'):
+                        pending.append(value)
+        return names
+
+    called = set()
+    pending = calls(program.statements)
+    for func_def in extern:
+        pending |= calls(func_def.body)
+    while pending:
+        name = pending.pop()
+        if name in called:
+            continue
+        called.add(name)
+        for body in bodies.get(name, []):
+            pending |= calls(body) - called
+    return called
+
+class _DeadCodeEliminator:
+    """One pruning pass; rerun until nothing more is removed"""
+
+    def __init__(self, program: Program, report: DeadCodeReport,
+                 extern: Sequence[FunctionDef] = (), keep_globals: bool = False) -> None:
+        self.report = report
+        self.keep_globals = keep_globals
+        self.reads = {node.name for node in iter_nodes([program.statements, list(extern)])
+                      if isinstance(node, Identifier)}
+        self.called = _called_procs(program, extern)
+
+    def remove(self, node: Any) -> None:
+        self.report.nodes_removed += node_count(node)
+
+    def block(self, statements: Optional[List[Any]], kind: str) -> Optional[List[Any]]:
+        if statements is None:
+            return None
+        exits = BLOCK_EXITS[kind]
+        dead = {index for index, reason in CodeAnalyzer.detect_dead_code(statements)
+                if reason.rsplit(' ', 1)[-1] in exits}
+        result = []
+        for index, stmt in enumerate(statements):
+            if index in dead:
+                self.report.unreachable += 1
+                self.remove(stmt)
+                continue
+            result.extend(self.statement(stmt))
+        return result
+
+    def statement(self, node: Any) -> List[Any]:
+        """Statements replacing node (empty to drop it)"""
+        if isinstance(node, IfStmt):
+            node.then_branch = self.block(node.then_branch, 'if')
+            node.else_branch = self.block(node.else_branch, 'if')
+            truth = _constant_truth(node.condition)
+            if truth is not None:
+                kept = node.then_branch if truth else (node.else_branch or [])
+                # A jump inside a spliced branch would no longer end it early
+                if not any(isinstance(inner, (BreakStmt, ContinueStmt)) for inner in iter_nodes(kept)):
+                    self.report.constant_branches += 1
+                    self.report.nodes_removed += node_count(node) - node_count(kept)
+                    return kept
+        elif isinstance(node, (WhileStmt, ForStmt)):
+            node.body = self.block(node.body, 'loop')
+        elif isinstance(node, TryStmt):
+            node.try_block = self.block(node.try_block, 'body')
+            node.catch_block = self.block(node.catch_block, 'body')
+        elif isinstance(node, SwitchStmt):
+            node.cases = [(label, self.block(body, 'switch')) for label, body in node.cases]
+            node.default_case = self.block(node.default_case, 'switch')
+        elif isinstance(node, FunctionDef):
+            if node.name not in self.called and not self.keep_globals:
+                self.report.unused_procs.append(node.name)
+                self.remove(node)
+                return []
+            node.body = self.block(node.body, 'body')
+        elif isinstance(node, (VarDecl, Assignment)) and isinstance(node.name, str):
+            # Under dynamic scoping any proc could read the name, so a
+            # binding is unused only when nothing in the program reads it
+            if node.name not in self.reads and cannot_fail(node.value) and not self.keep_globals:
+                self.report.unused_bindings += 1
+                self.remove(node)
+                return []
+        return [node]
+
+def eliminate_dead_code(program: Program, extern: Sequence[FunctionDef] = (),
+                        keep_globals: bool = False) -> DeadCodeReport:
+    """Drop code that cannot run or whose results are never read
+
+    Builds on error_system.CodeAnalyzer.detect_dead_code for statements
+    after return/break/continue. Removing one binding or proc can leave
+    others unused, so passes repeat until nothing changes. extern holds
+    procs defined outside program (a resumed snapshot) that may call its
+    procs or read its globals. keep_globals keeps every binding and proc,
+    used or not, for runs whose final state is saved (--snapshot).
+    """
+    report = DeadCodeReport()
+    while True:
+        removed = report.nodes_removed
+        eliminator = _DeadCodeEliminator(program, report, extern, keep_globals)
+        program.statements = eliminator.block(program.statements, 'body')
+        if report.nodes_removed == removed:
+            return report
+
+# ============================================================================
+# TYPE INFERENCE
+# ============================================================================
+
+NUM = 'num'
+STR = 'str'
+
+# Annotations that seed a param's type; the typed body only runs when a
+# call's args really have these types (annotations are not enforced)
+NUMERIC_ANNOTATIONS = frozenset(('i8', 'i16', 'i32', 'i64', 'u8', 'u16', 'u32', 'u64',
+                                 'int', 'f32', 'f64', 'float', 'num', 'number', 'bool'))
+STRING_ANNOTATIONS = frozenset(('str', 'string'))
+
+# Builtins returning a number or a string whatever their arguments (or raising)
+NUMERIC_BUILTINS = frozenset(('print', 'println', 'len', 'length', 'int', 'float',
+                              'startsWith', 'endsWith', 'contains', 'indexOf', 'pop',
+                              'abs', 'floor', 'ceil', 'round', 'sqrt', 'pow'))
+STRING_BUILTINS = frozenset(('input', 'string', 'str', 'toString', 'substring',
+                             'toUpperCase', 'toLowerCase', 'join'))
+
+# Results are numbers (or the operation raises) whatever the operands
+NUMERIC_RESULT_OPS = frozenset(('-', '/', '%', '==', '!=', '<', '>', '<=', '>=',
+                                '&&', '||', 'num+', 'num&&', 'num||'))
+
+@dataclass
+class TypeReport:
+    """What type inference specialized in one program"""
+    operators: int = 0
+    conditions: int = 0
+    typed_procs: List[str] = field(default_factory=list)
+
+    def to_text(self) -> str:
+        text = f"Typed {self.operators} operators and {self.conditions} conditions"
+        if self.typed_procs:
+            text += f"; typed bodies for {', '.join(self.typed_procs)}"
+        return text
+
+class _Unstructured(Exception):
+    """break/continue that the interpreter does not treat as a jump"""
+
+def _join(*envs: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Types that hold on every path reaching a point (None: unreachable)"""
+    reached = [env for env in envs if env is not None]
+    if not reached:
+        return None
+    first = reached[0]
+    return {name: kind for name, kind in first.items()
+            if all(env.get(name) == kind for env in reached[1:])}
+
+def _assigned_names(statements: Any) -> set:
+    names = set()
+    for node in iter_nodes(statements):
+        if isinstance(node, (VarDecl, Assignment)) and isinstance(node.name, str):
+            names.add(node.name)
+        elif isinstance(node, ForStmt):
+            names.add(node.var)
+        elif isinstance(node, TryStmt) and node.catch_var:
+            names.add(node.catch_var)
+    return names
+
+class _TypeInference:
+    """Flow-sensitive types of one proc body (or the top level)
+
+    The environment maps variables assigned earlier in the same activation
+    to NUM or STR; anything else may be a caller's variable (dynamic
+    scoping) and is unknown. Callee writes are discarded on return, so
+    calls never change the environment. Specializations are only written
+    on a final pass over each loop, once its entry types are stable.
+    """
+
+    def __init__(self, report: TypeReport) -> None:
+        self.report = report
+        self.rewrite = True
+        # Innermost first: 'loop' or 'switch' entries, plus break/continue envs
+        self.targets: List[Tuple[str, List[Any], List[Any]]] = []
+
+    def block(self, statements: Optional[List[Any]], env: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        for stmt in statements or []:
+            if env is None:
+                break  # After return/break/continue: never runs
+            env = self.stmt(stmt, env)
+        return env
+
+    def stmt(self, node: Any, env: Dict[str, str]) -> Optional[Dict[str, str]]:
+        if isinstance(node, (VarDecl, Assignment)):
+            if isinstance(node, VarDecl) and node.value is None:
+                kind = NUM  # Declared without a value: 0
+            else:
+                kind = self.expr(node.value, env)
+            if isinstance(node.name, str):
+                env = dict(env)
+                if kind is None:
+                    env.pop(node.name, None)
+                else:
+                    env[node.name] = kind
+            else:
+                self.expr(node.name, env)
+            return env
+        if isinstance(node, ReturnStmt):
+            if node.value is not None:
+                self.expr(node.value, env)
+            return None
+        if isinstance(node, (BreakStmt, ContinueStmt)):
+            wanted = ('loop', 'switch') if isinstance(node, BreakStmt) else ('loop',)
+            if not self.targets or self.targets[-1][0] not in wanted:
+                raise _Unstructured()
+            _, breaks, continues = self.targets[-1]
+            (breaks if isinstance(node, BreakStmt) else continues).append(env)
+            return None
+        if isinstance(node, IfStmt):
+            self.condition(node, env)
+            return _join(self.block(node.then_branch, env),
+                         self.block(node.else_branch, env) if node.else_branch else env)
+        if isinstance(node, (WhileStmt, ForStmt)):
+            return self.loop(node, env)
+        if isinstance(node, TryStmt):
+            # The try block may stop anywhere; the interpreter does not
+            # jump on break/continue inside it
+            self.targets.append(('try', [], []))
+            try:
+                after_try = self.block(node.try_block, env)
+            finally:
+                self.targets.pop()
+            caught = {name: kind for name, kind in env.items()
+                      if name not in _assigned_names(node.try_block)}
+            if node.catch_var:
+                caught[node.catch_var] = STR
+            return _join(after_try, self.block(node.catch_block, caught))
+        if isinstance(node, SwitchStmt):
+            self.expr(node.expr, env)
+            bodies = [body for _, body in node.cases] + [node.default_case or []]
+            stable = {name: kind for name, kind in env.items()
+                      if name not in _assigned_names(bodies)}
+            self.targets.append(('switch', [], []))
+            try:
+                for label, body in node.cases:
+                    self.expr(label, env)
+                    self.block(body, stable)
+                self.block(node.default_case, stable)
+            finally:
+                self.targets.pop()
+            return stable
+        if isinstance(node, FunctionDef):
+            return env  # Typed separately
+        self.expr(node, env)
+        return env
+
+    def loop(self, node: Any, env: Dict[str, str]) -> Optional[Dict[str, str]]:
+        item = None
+        if isinstance(node, ForStmt):
+            iterable = self.expr(node.iterable, env)
+            if iterable == NUM or (isinstance(node.iterable, BinOp) and node.iterable.op == '..'):
+                item = NUM  # Range items: floats, or ints for a..b
+        # Entry types: what holds before the loop and after any iteration
+        rewrite, self.rewrite = self.rewrite, False
+        head = env
+        try:
+            while True:
+                end, _, continues = self.loop_body(node, head, item)
+                new_head = _join(env, end, *continues)
+                if new_head == head:
+                    break
+                head = new_head
+        finally:
+            self.rewrite = rewrite
+        _, breaks, _ = self.loop_body(node, head, item)
+        return _join(head, *breaks)
+
+    def loop_body(self, node: Any, head: Dict[str, str], item: Optional[str]) -> Tuple[Any, List[Any], List[Any]]:
+        """(env at the end of the body, envs at breaks, envs at continues)"""
+        body_env = head
+        if isinstance(node, WhileStmt):
+            self.condition(node, head)
+        else:
+            body_env = dict(head)
+            if item is None:
+                body_env.pop(node.var, None)
+            else:
+                body_env[node.var] = item
+        self.targets.append(('loop', [], []))
+        try:
+            end = self.block(node.body, body_env)
+        finally:
+            _, breaks, continues = self.targets.pop()
+        return end, breaks, continues
+
+    def condition(self, node: Any, env: Dict[str, str]) -> None:
+        if self.expr(node.condition, env) == NUM and self.rewrite and not node.numeric_condition:
+            node.numeric_condition = True
+            self.report.conditions += 1
+
+    def expr(self, node: Any, env: Dict[str, str]) -> Optional[str]:
+        if isinstance(node, Number):
+            return NUM
+        if isinstance(node, String):
+            return STR
+        if isinstance(node, Identifier):
+            return env.get(node.name)
+        if isinstance(node, MemberExpr):
+            self.expr(node.object_expr, env)
+            return NUM
+        if isinstance(node, (ArrayLiteral, IndexExpr)):
+            for child in (node.elements if isinstance(node, ArrayLiteral) else (node.array, node.index)):
+                self.expr(child, env)
+            return None
+        if isinstance(node, CallExpr):
+            kinds = [self.expr(arg, env) for arg in node.args]
+            if node.name not in BUILTINS:
+                return NUM  # Procs return through float(), unknown names give 0.0
+            if node.name in NUMERIC_BUILTINS:
+                return NUM
+            if node.name in STRING_BUILTINS:
+                return STR
+            if node.name in ('min', 'max'):
+                return NUM if kinds and all(kind == NUM for kind in kinds) else None
+            if node.name in ('push', 'add'):
+                return kinds[0] if kinds else NUM
+            return None
+        if isinstance(node, UnaryOp):
+            operand = self.expr(node.operand, env)
+            if node.op == '!' and operand == NUM:
+                self.specialize(node, 'num!')
+            return NUM
+        if isinstance(node, BinOp):
+            left = self.expr(node.left, env)
+            right = self.expr(node.right, env)
+            op = node.op
+            if op == '+':
+                if left == NUM and right == NUM:
+                    self.specialize(node, 'num+')
+                    return NUM
+                if left == STR or right == STR:
+                    self.specialize(node, 'str+')
+                    return STR
+                return None
+            if op in ('&&', '||') and left == NUM and right == NUM:
+                self.specialize(node, 'num' + op)
+            if op in NUMERIC_RESULT_OPS:
+                return NUM
+            if op == 'str+':
+                return STR
+            if op == '*' and left == NUM and right == NUM:
+                return NUM
+            return None
+        return None
+
+    def specialize(self, node: Any, op: str) -> None:
+        if self.rewrite:
+            node.op = op
+            self.report.operators += 1
+
+def _seed_types(func_def: FunctionDef) -> List[Optional[str]]:
+    seeds = []
+    for annotation in func_def.param_types:
+        if annotation in NUMERIC_ANNOTATIONS:
+            seeds.append(NUM)
+        elif annotation in STRING_ANNOTATIONS:
+            seeds.append(STR)
+        else:
+            seeds.append(None)
+    return seeds
+
+def _infer_block(statements: List[Any], env: Dict[str, str], report: TypeReport) -> bool:
+    """Specialize statements in place; False if they must stay generic"""
+    # Dry run first: an unstructured break found halfway must not leave
+    # half the block specialized
+    dry = _TypeInference(TypeReport())
+    dry.rewrite = False
+    try:
+        dry.block(statements, env)
+    except _Unstructured:
+        return False
+    _TypeInference(report).block(statements, env)
+    return True
+
+def infer_types(program: Program) -> TypeReport:
+    """Specialize operators whose operand types are proven
+
+    Top-level code and every proc body are specialized in place using
+    only what holds for any caller. A proc whose annotations prove more
+    also gets a typed copy of its body, which select_body runs when the
+    call's args have the annotated types.
+    """
+    report = TypeReport()
+    _infer_block(program.statements, {}, report)
+    for node in list(iter_nodes(program.statements)):
+        if not isinstance(node, FunctionDef):
+            continue
+        if not _infer_block(node.body, {}, report):
+            continue
+        seeds = _seed_types(node)
+        if not any(seeds):
+            continue
+        typed = TypeReport()
+        body = clone(node.body)
+        env = {param: kind for param, kind in zip(node.params, seeds) if kind}
+        if _infer_block(body, env, typed) and typed.operators + typed.conditions:
+            node.typed_body = body
+            node.typed_params = seeds[:max(i + 1 for i, kind in enumerate(seeds) if kind)]
+            report.operators += typed.operators
+            report.conditions += typed.conditions
+            report.typed_procs.append(node.name)
+    return report
+
+def optimize_program(program: Program, inline_size: int = DEFAULT_INLINE_SIZE,
+                     extern: Sequence[FunctionDef] = (), keep_globals: bool = False) -> List[str]:
+    """Run every AST pass on program; returns one summary line per pass"""
+    return [inline_procs(program, inline_size, extern).to_text(),
+            eliminate_dead_code(program, extern, keep_globals).to_text(),
+            infer_types(program).to_text()]
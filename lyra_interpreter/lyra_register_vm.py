@@ -0,0 +1,714 @@
+#!/usr/bin/env python3
+"""
+LYRA REGISTER VM
+Version: 1.0.3
+Author: Seread335
+Register-based instruction set, compiler and VM (lyra --register)
+
+On the stack VM `sum = sum + i` is four dispatches (LOAD_VAR, LOAD_VAR,
+ADD, STORE_VAR); here it is one: ADD r_sum, r_sum, r_i.
+
+Architecture:
+1. Every top-level variable gets a fixed register, and so does every
+   constant used as a compare operand (loaded once, never written).
+   Expression temporaries take the registers above them and are freed
+   after each statement
+2. Instructions are (opcode, a, b, c) with the destination in a:
+   ADD r_dst, r_a, r_b / ADDK r_dst, r_a, const / JLT r_a, r_b, target
+3. Loops are rotated: the condition sits after the body as one fused
+   compare-and-jump back to the top, so an iteration has no extra JUMP
+4. Statements the register set does not cover (statement calls, return,
+   switch, try) run on the tree-walker through EXEC, and proc calls in
+   expressions through EVAL: the variable registers are written to
+   ctx.variables before and read back after
+5. Programs whose break/continue set flags (outside a loop, or crossing
+   a try, switch or proc body) run on the stack VM instead
+"""
+
+from enum import Enum
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    from .lyra_interpreter import (
+        Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, ForStmt, MemberExpr,
+        BUILTINS, ExecutionContext, Interpreter, error_position
+    )
+    from .lyra_bytecode import constant_key, decode_position, encode_positions, has_unstructured_jumps
+except ImportError:
+    from lyra_interpreter import (
+        Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ArrayLiteral, IndexExpr,
+        BreakStmt, ContinueStmt, ForStmt, MemberExpr,
+        BUILTINS, ExecutionContext, Interpreter, error_position
+    )
+    from lyra_bytecode import constant_key, decode_position, encode_positions, has_unstructured_jumps
+
+# ============================================================================
+# REGISTER INSTRUCTIONS
+# ============================================================================
+
+class RegOp(Enum):
+    """Register instruction opcodes"""
+    # Moves
+    MOVE = 0        # a = b
+    LOADK = 1       # a = constants[b]
+
+    # Arithmetic: a = b op c (ADD concatenates if either side is a string)
+    ADD = 10
+    SUB = 11
+    MUL = 12
+    DIV = 13
+    MOD = 14
+    RANGE = 15      # a = b..c as an array
+    # Constant right operand: a = b op constants[c]
+    ADDK = 20
+    SUBK = 21
+    MULK = 22
+    DIVK = 23
+    MODK = 24
+
+    # Comparison and logic: a = 1.0 or 0.0
+    EQ = 30
+    NE = 31
+    LT = 32
+    GT = 33
+    LE = 34
+    GE = 35
+    AND = 36
+    OR = 37
+    NOT = 38        # a = not b
+    NEG = 39        # a = -b
+
+    # Control flow
+    JMP = 50        # pc = a
+    JT = 51         # if a: pc = b
+    JF = 52         # if not a: pc = b
+    JLT = 53        # if a < b: pc = c
+    JLE = 54
+    JGT = 55
+    JGE = 56
+    JEQ = 57
+    JNE = 58
+    JNLT = 59       # if not a < b: pc = c (differs from JGE on NaN)
+    JNLE = 60
+    JNGT = 61
+    JNGE = 62
+    ITER = 63       # a = iterator over array b, or 0..b-1 for a number
+    FORNEXT = 64    # a = next item of iterator b and pc = c; falls through when done
+    HALT = 65
+
+    # Arrays
+    NEWARRAY = 70   # a = fresh array from the tuple constants[b]
+    BUILD = 71      # a = [registers b...]
+    INDEX = 72      # a = b[c]
+    SETINDEX = 73   # a[b] = c (out of range: ignored)
+    TOINT = 74      # a = int(b)
+    MEMBER = 75     # a = b.c (only array.length is defined)
+
+    # Calls and fallbacks
+    CALLB = 80      # a = builtin b(registers c...)
+    PRINT = 81      # print registers a... on one line
+    DEFINE = 82     # bind the FunctionDef a
+    EXEC = 83       # run statement a on the tree-walker
+    EVAL = 84       # a = expression b evaluated by the tree-walker
+
+# Operand kinds per opcode: R register, L tuple of registers, K constant
+# index, J jump target, N raw value (AST node, name, builtin)
+OPERANDS = {
+    RegOp.MOVE: 'RR', RegOp.LOADK: 'RK',
+    RegOp.ADD: 'RRR', RegOp.SUB: 'RRR', RegOp.MUL: 'RRR', RegOp.DIV: 'RRR',
+    RegOp.MOD: 'RRR', RegOp.RANGE: 'RRR',
+    RegOp.ADDK: 'RRK', RegOp.SUBK: 'RRK', RegOp.MULK: 'RRK', RegOp.DIVK: 'RRK',
+    RegOp.MODK: 'RRK',
+    RegOp.EQ: 'RRR', RegOp.NE: 'RRR', RegOp.LT: 'RRR', RegOp.GT: 'RRR',
+    RegOp.LE: 'RRR', RegOp.GE: 'RRR', RegOp.AND: 'RRR', RegOp.OR: 'RRR',
+    RegOp.NOT: 'RR', RegOp.NEG: 'RR',
+    RegOp.JMP: 'J', RegOp.JT: 'RJ', RegOp.JF: 'RJ',
+    RegOp.JLT: 'RRJ', RegOp.JLE: 'RRJ', RegOp.JGT: 'RRJ', RegOp.JGE: 'RRJ',
+    RegOp.JEQ: 'RRJ', RegOp.JNE: 'RRJ', RegOp.JNLT: 'RRJ', RegOp.JNLE: 'RRJ',
+    RegOp.JNGT: 'RRJ', RegOp.JNGE: 'RRJ',
+    RegOp.ITER: 'RR', RegOp.FORNEXT: 'RRJ', RegOp.HALT: '',
+    RegOp.NEWARRAY: 'RK', RegOp.BUILD: 'RL', RegOp.INDEX: 'RRR', RegOp.SETINDEX: 'RRR',
+    RegOp.TOINT: 'RR', RegOp.MEMBER: 'RRN',
+    RegOp.CALLB: 'RNL', RegOp.PRINT: 'L', RegOp.DEFINE: 'N', RegOp.EXEC: 'N', RegOp.EVAL: 'RN',
+}
+
+@dataclass
+class RegInstruction:
+    """A single register instruction"""
+    opcode: RegOp
+    a: Any = None
+    b: Any = None
+    c: Any = None
+    line: int = 0      # Source line and column of the statement it came from
+    column: int = 0
+
+    def __repr__(self) -> str:
+        operands = []
+        for kind, value in zip(OPERANDS[self.opcode], (self.a, self.b, self.c)):
+            if kind == 'R':
+                operands.append(f"r{value}")
+            elif kind == 'L':
+                operands.append("(" + ", ".join(f"r{reg}" for reg in value) + ")")
+            elif kind == 'K':
+                operands.append(f"k{value}")
+            elif kind == 'J':
+                operands.append(f"-> {value}")
+            else:
+                operands.append(type(value).__name__ if callable(value) or hasattr(value, '__dict__')
+                                else repr(value))
+        return f"{self.opcode.name} {', '.join(operands)}".rstrip()
+
+@dataclass
+class RegisterProgram:
+    """Compiled program: code, constants and the register layout"""
+    code: List[RegInstruction]
+    constants: List[Any]
+    variables: Dict[str, int]           # variable name -> register
+    constant_registers: Dict[int, int]  # register -> constant index loaded into it
+    register_count: int
+    linetable: bytes = b''              # pc -> (line, column), see encode_positions
+
+# ============================================================================
+# REGISTER COMPILER
+# ============================================================================
+
+# Typed operators from lyra_passes.infer_types behave like the generic ones
+BINARY_OPS = {
+    '+': RegOp.ADD, 'num+': RegOp.ADD, 'str+': RegOp.ADD,
+    '-': RegOp.SUB, '*': RegOp.MUL, '/': RegOp.DIV, '%': RegOp.MOD,
+    '==': RegOp.EQ, '!=': RegOp.NE, '<': RegOp.LT, '>': RegOp.GT,
+    '<=': RegOp.LE, '>=': RegOp.GE,
+    '&&': RegOp.AND, 'num&&': RegOp.AND, '||': RegOp.OR, 'num||': RegOp.OR,
+    '..': RegOp.RANGE,
+}
+
+# Arithmetic with a literal right operand
+CONSTANT_OPS = {RegOp.ADD: RegOp.ADDK, RegOp.SUB: RegOp.SUBK, RegOp.MUL: RegOp.MULK,
+                RegOp.DIV: RegOp.DIVK, RegOp.MOD: RegOp.MODK}
+
+# Compare-and-jump for (operator, jump when the comparison is true)
+COMPARE_JUMPS = {
+    ('<', True): RegOp.JLT, ('<=', True): RegOp.JLE, ('>', True): RegOp.JGT,
+    ('>=', True): RegOp.JGE, ('==', True): RegOp.JEQ, ('!=', True): RegOp.JNE,
+    ('<', False): RegOp.JNLT, ('<=', False): RegOp.JNLE, ('>', False): RegOp.JNGT,
+    ('>=', False): RegOp.JNGE, ('==', False): RegOp.JNE, ('!=', False): RegOp.JEQ,
+}
+
+class RegisterCompiler:
+    """Compiles a Lyra program to register instructions
+
+    Temporaries are numbered -1, -2, ... while compiling and moved above
+    the fixed registers once their number is known.
+    """
+
+    def __init__(self) -> None:
+        self.code: List[RegInstruction] = []
+        self.constants: List[Any] = []
+        self.constant_index: Dict[Tuple[Any, ...], int] = {}  # constant_key -> index
+        self.variables: Dict[str, int] = {}
+        self.constant_registers: Dict[int, int] = {}  # constant index -> register
+        self.fixed = 0       # Registers taken by variables and constants
+        self.top = 0         # Temporaries in use
+        self.max_temps = 0
+        # Innermost last: (break jumps, continue jumps) to patch
+        self.loops: List[Tuple[List[int], List[int]]] = []
+        # Position of the statement being compiled, given to its instructions
+        self.line = 0
+        self.column = 0
+
+    def emit(self, opcode: RegOp, a: Any = None, b: Any = None, c: Any = None) -> int:
+        """Add an instruction, return its index"""
+        self.code.append(RegInstruction(opcode, a, b, c, self.line, self.column))
+        return len(self.code) - 1
+
+    def patch(self, index: int, target: Optional[int] = None) -> None:
+        """Point the jump at index to target (default: the next instruction)"""
+        instr = self.code[index]
+        field = 'abc'[OPERANDS[instr.opcode].index('J')]
+        setattr(instr, field, len(self.code) if target is None else target)
+
+    def add_constant(self, value: Any) -> int:
+        """Add constant to pool, return index"""
+        key = constant_key(value)
+        idx = self.constant_index.get(key)
+        if idx is None:
+            idx = self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return idx
+
+    def variable(self, name: str) -> int:
+        """Register of a variable"""
+        reg = self.variables.get(name)
+        if reg is None:
+            reg = self.variables[name] = self.fixed
+            self.fixed += 1
+        return reg
+
+    def constant_register(self, value: Any) -> int:
+        """Register holding a constant for the whole run"""
+        idx = self.add_constant(value)
+        reg = self.constant_registers.get(idx)
+        if reg is None:
+            reg = self.constant_registers[idx] = self.fixed
+            self.fixed += 1
+        return reg
+
+    def temp(self) -> int:
+        self.top += 1
+        if self.top > self.max_temps:
+            self.max_temps = self.top
+        return -self.top
+
+    # ------------------------------------------------------------------------
+    # AST visitor
+    # ------------------------------------------------------------------------
+
+    def compile_program(self, program: Program) -> RegisterProgram:
+        for stmt in program.statements:
+            self.compile_statement(stmt)
+        self.emit(RegOp.HALT)
+        self.relocate()
+        return RegisterProgram(self.code, self.constants, self.variables,
+                               {reg: idx for idx, reg in self.constant_registers.items()},
+                               self.fixed + self.max_temps, encode_positions(self.code))
+
+    def relocate(self) -> None:
+        """Number temporaries after the fixed registers"""
+        def register(reg: int) -> int:
+            return reg if reg >= 0 else self.fixed - reg - 1
+        for instr in self.code:
+            for kind, field in zip(OPERANDS[instr.opcode], 'abc'):
+                if kind == 'R':
+                    setattr(instr, field, register(getattr(instr, field)))
+                elif kind == 'L':
+                    setattr(instr, field, tuple(register(reg) for reg in getattr(instr, field)))
+
+    def compile_statement(self, node: Any) -> None:
+        # Rotated loop conditions, compiled after the body, keep the loop's position
+        saved = (self.line, self.column)
+        if node.line:
+            self.line, self.column = node.line, node.column
+        self.compile_statement_node(node)
+        self.line, self.column = saved
+
+    def compile_statement_node(self, node: Any) -> None:
+        mark = self.top
+        if isinstance(node, VarDecl):
+            if node.value:
+                self.compile_expression(node.value, self.variable(node.name))
+            else:
+                self.emit(RegOp.LOADK, self.variable(node.name), self.add_constant(0))
+        elif isinstance(node, Assignment):
+            if isinstance(node.name, IndexExpr):
+                array = self.compile_expression(node.name.array)
+                index = self.temp()
+                self.emit(RegOp.TOINT, index, self.compile_expression(node.name.index))
+                value = self.compile_expression(node.value)
+                self.emit(RegOp.SETINDEX, array, index, value)
+            elif not isinstance(node.name, MemberExpr):
+                # Member assignment is a no-op; its value is not evaluated
+                self.compile_expression(node.value, self.variable(node.name))
+        elif isinstance(node, FunctionDef):
+            self.emit(RegOp.DEFINE, node)
+        elif isinstance(node, IfStmt):
+            else_jump = self.compile_jump(node.condition, False)
+            for stmt in node.then_branch or []:
+                self.compile_statement(stmt)
+            if node.else_branch:
+                end_jump = self.emit(RegOp.JMP)
+                self.patch(else_jump)
+                for stmt in node.else_branch:
+                    self.compile_statement(stmt)
+                self.patch(end_jump)
+            else:
+                self.patch(else_jump)
+        elif isinstance(node, WhileStmt):
+            entry = self.emit(RegOp.JMP)
+            top = self.compile_loop_body(node.body, entry)
+            self.patch(self.compile_jump(node.condition, True), top)
+            self.patch_breaks()
+        elif isinstance(node, ForStmt):
+            iterator = self.temp()
+            self.emit(RegOp.ITER, iterator, self.compile_expression(node.iterable))
+            entry = self.emit(RegOp.JMP)
+            top = self.compile_loop_body(node.body, entry)
+            self.emit(RegOp.FORNEXT, self.variable(node.var), iterator, top)
+            self.patch_breaks()
+        elif isinstance(node, BreakStmt):
+            # Only loop breaks get here: programs with other breaks run on the stack VM
+            self.loops[-1][0].append(self.emit(RegOp.JMP))
+        elif isinstance(node, ContinueStmt):
+            self.loops[-1][1].append(self.emit(RegOp.JMP))
+        elif isinstance(node, CallExpr):
+            if node.name == 'print' or node.name == 'println':
+                self.emit(RegOp.PRINT, tuple(self.compile_expression(arg) for arg in node.args))
+            else:
+                self.emit(RegOp.EXEC, node)
+        elif isinstance(node, (BinOp, UnaryOp)):
+            self.compile_expression(node)
+        elif not isinstance(node, (Number, String, Identifier, IndexExpr, MemberExpr, ArrayLiteral)):
+            # return, switch, try; literals, names and other expressions
+            # as statements are not evaluated at all
+            self.emit(RegOp.EXEC, node)
+        self.top = mark
+
+    def compile_loop_body(self, body: List[Any], entry: int) -> int:
+        """Body of a rotated loop; returns its first pc. Continue jumps and
+        the entry jump land on the loop test, which follows."""
+        top = len(self.code)
+        self.loops.append(([], []))
+        for stmt in body or []:
+            self.compile_statement(stmt)
+        self.patch(entry)
+        for index in self.loops[-1][1]:
+            self.patch(index)
+        return top
+
+    def patch_breaks(self) -> None:
+        for index in self.loops.pop()[0]:
+            self.patch(index)
+
+    def compile_jump(self, node: Any, when: bool) -> int:
+        """Jump taken when node's truth equals when; returns it for patching"""
+        if isinstance(node, BinOp) and (node.op, when) in COMPARE_JUMPS:
+            left = self.compile_expression(node.left)
+            right = self.compile_expression(node.right)
+            return self.emit(COMPARE_JUMPS[(node.op, when)], left, right)
+        if isinstance(node, UnaryOp) and node.op in ('!', 'num!'):
+            return self.compile_jump(node.operand, not when)
+        value = self.compile_expression(node)
+        return self.emit(RegOp.JT if when else RegOp.JF, value)
+
+    def compile_expression(self, node: Any, dst: Optional[int] = None) -> int:
+        """Register holding node's value. With dst the value goes there;
+        without, names and literals return their fixed register."""
+        if isinstance(node, Identifier):
+            reg = self.variable(node.name)
+            if dst is not None:
+                self.emit(RegOp.MOVE, dst, reg)
+                return dst
+            return reg
+        if isinstance(node, (Number, String)):
+            if dst is None:
+                return self.constant_register(node.value)
+            self.emit(RegOp.LOADK, dst, self.add_constant(node.value))
+            return dst
+
+        target = self.temp() if dst is None else dst
+        if isinstance(node, BinOp) and node.op in BINARY_OPS:
+            opcode = BINARY_OPS[node.op]
+            left = self.compile_expression(node.left)
+            if opcode in CONSTANT_OPS and isinstance(node.right, (Number, String)):
+                self.emit(CONSTANT_OPS[opcode], target, left, self.add_constant(node.right.value))
+            else:
+                self.emit(opcode, target, left, self.compile_expression(node.right))
+        elif isinstance(node, UnaryOp) and node.op in ('-', '!', 'num!'):
+            operand = self.compile_expression(node.operand)
+            self.emit(RegOp.NEG if node.op == '-' else RegOp.NOT, target, operand)
+        elif isinstance(node, CallExpr) and node.name in BUILTINS:
+            # Expression calls reach builtins first
+            args = tuple(self.compile_expression(arg) for arg in node.args)
+            self.emit(RegOp.CALLB, target, BUILTINS[node.name], args)
+        elif isinstance(node, ArrayLiteral):
+            if all(isinstance(element, (Number, String)) for element in node.elements):
+                items = tuple(element.value for element in node.elements)
+                self.emit(RegOp.NEWARRAY, target, self.add_constant(items))
+            else:
+                self.emit(RegOp.BUILD, target,
+                          tuple(self.compile_expression(element) for element in node.elements))
+        elif isinstance(node, IndexExpr):
+            array = self.compile_expression(node.array)
+            self.emit(RegOp.INDEX, target, array, self.compile_expression(node.index))
+        elif isinstance(node, MemberExpr):
+            self.emit(RegOp.MEMBER, target, self.compile_expression(node.object_expr), node.member)
+        else:
+            # Proc calls and unknown operators
+            self.emit(RegOp.EVAL, target, node)
+        return target
+
+# ============================================================================
+# REGISTER VIRTUAL MACHINE
+# ============================================================================
+
+# Register value of a variable not defined yet: reads as 0.0 (like a
+# missing name on the tree-walker) but is not written back
+UNSET = float(0)
+
+# Opcode numbers for the dispatch loop
+MOVE, LOADK = RegOp.MOVE.value, RegOp.LOADK.value
+ADD, SUB, MUL, DIV, MOD, RANGE = (RegOp.ADD.value, RegOp.SUB.value, RegOp.MUL.value,
+                                  RegOp.DIV.value, RegOp.MOD.value, RegOp.RANGE.value)
+ADDK, SUBK, MULK, DIVK, MODK = (RegOp.ADDK.value, RegOp.SUBK.value, RegOp.MULK.value,
+                                RegOp.DIVK.value, RegOp.MODK.value)
+EQ, NE, LT, GT, LE, GE = (RegOp.EQ.value, RegOp.NE.value, RegOp.LT.value,
+                          RegOp.GT.value, RegOp.LE.value, RegOp.GE.value)
+AND, OR, NOT, NEG = RegOp.AND.value, RegOp.OR.value, RegOp.NOT.value, RegOp.NEG.value
+JMP, JT, JF = RegOp.JMP.value, RegOp.JT.value, RegOp.JF.value
+JLT, JLE, JGT, JGE, JEQ, JNE = (RegOp.JLT.value, RegOp.JLE.value, RegOp.JGT.value,
+                                RegOp.JGE.value, RegOp.JEQ.value, RegOp.JNE.value)
+JNLT, JNLE, JNGT, JNGE = RegOp.JNLT.value, RegOp.JNLE.value, RegOp.JNGT.value, RegOp.JNGE.value
+ITER, FORNEXT, HALT = RegOp.ITER.value, RegOp.FORNEXT.value, RegOp.HALT.value
+NEWARRAY, BUILD, INDEX, SETINDEX, TOINT, MEMBER = (
+    RegOp.NEWARRAY.value, RegOp.BUILD.value, RegOp.INDEX.value, RegOp.SETINDEX.value,
+    RegOp.TOINT.value, RegOp.MEMBER.value)
+CALLB, PRINT, DEFINE, EXEC, EVAL = (RegOp.CALLB.value, RegOp.PRINT.value, RegOp.DEFINE.value,
+                                    RegOp.EXEC.value, RegOp.EVAL.value)
+
+# FORNEXT sentinel for an exhausted iterator
+_EXHAUSTED = object()
+
+def _add(a: Any, b: Any) -> Any:
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) + str(b)
+    return a + b
+
+def _div(a: Any, b: Any) -> Any:
+    if b == 0:
+        raise ZeroDivisionError("Division by zero")
+    return a / b
+
+def _mod(a: Any, b: Any) -> Any:
+    if b == 0:
+        raise ZeroDivisionError("Modulo by zero")
+    return float(int(a) % int(b))
+
+def _iterate(value: Any) -> Any:
+    if isinstance(value, list):
+        return iter(value)
+    if isinstance(value, (int, float)):
+        return (float(i) for i in range(int(value)))
+    return iter(())
+
+class RegisterVM:
+    """Virtual machine that executes register instructions
+
+    Variables live in registers while the VM runs; ctx.variables is only
+    brought up to date around EXEC/EVAL and when the run ends.
+    """
+
+    def __init__(self, program: RegisterProgram, ctx: Optional[ExecutionContext] = None,
+                 interpreter: Optional[Interpreter] = None):
+        self.program = program
+        self.ctx = ctx or ExecutionContext()
+        self.interpreter = interpreter or Interpreter(context=self.ctx)
+        self.constants = program.constants
+        self.code = [(instr.opcode.value, instr.a, instr.b, instr.c) for instr in program.code]
+        self.registers: List[Any] = [0.0] * program.register_count
+        for reg, idx in program.constant_registers.items():
+            self.registers[reg] = self.constants[idx]
+        self.variables = list(program.variables.items())
+        self.pc = 0
+        self.cycles = 0
+        self.synced = True  # ctx.variables holds every variable's value
+
+    def load_variables(self) -> None:
+        registers = self.registers
+        variables = self.ctx.variables
+        for name, reg in self.variables:
+            registers[reg] = variables.get(name, UNSET)
+        self.synced = False
+
+    def store_variables(self) -> None:
+        registers = self.registers
+        variables = self.ctx.variables
+        for name, reg in self.variables:
+            value = registers[reg]
+            if value is not UNSET:
+                variables[name] = value
+        self.synced = True
+
+    def execute(self) -> None:
+        self.load_variables()
+        try:
+            self._run()
+        except Exception as e:
+            # Errors inside EXEC/EVAL are located by the tree-walker
+            if error_position(e)[0] is None:
+                line, column = decode_position(self.program.linetable, self.pc - 1)
+                if line:
+                    e.lyra_position = (line, column)
+            raise
+        finally:
+            # After an error in EXEC/EVAL ctx.variables is already current
+            # (the tree-walker's view after the failure)
+            if not self.synced:
+                self.store_variables()
+
+    def _run(self) -> None:
+        registers = self.registers
+        constants = self.constants
+        code = self.code
+        pc = self.pc
+        cycles = 0
+        try:
+            while True:
+                op, a, b, c = code[pc]
+                pc += 1
+                cycles += 1
+                if op == ADD:
+                    x = registers[b]
+                    y = registers[c]
+                    if x.__class__ is float and y.__class__ is float:
+                        registers[a] = x + y
+                    else:
+                        registers[a] = _add(x, y)
+                elif op == ADDK:
+                    x = registers[b]
+                    y = constants[c]
+                    if x.__class__ is float and y.__class__ is float:
+                        registers[a] = x + y
+                    else:
+                        registers[a] = _add(x, y)
+                elif op == JLT:
+                    if registers[a] < registers[b]:
+                        pc = c
+                elif op == MOVE:
+                    registers[a] = registers[b]
+                elif op == JNE:
+                    if registers[a] != registers[b]:
+                        pc = c
+                elif op == JEQ:
+                    if registers[a] == registers[b]:
+                        pc = c
+                elif op == MODK:
+                    registers[a] = _mod(registers[b], constants[c])
+                elif op == SUBK:
+                    registers[a] = registers[b] - constants[c]
+                elif op == MULK:
+                    registers[a] = registers[b] * constants[c]
+                elif op == SUB:
+                    registers[a] = registers[b] - registers[c]
+                elif op == MUL:
+                    registers[a] = registers[b] * registers[c]
+                elif op == JMP:
+                    pc = a
+                elif op == JLE:
+                    if registers[a] <= registers[b]:
+                        pc = c
+                elif op == JGT:
+                    if registers[a] > registers[b]:
+                        pc = c
+                elif op == JGE:
+                    if registers[a] >= registers[b]:
+                        pc = c
+                elif op == JNLT:
+                    if not registers[a] < registers[b]:
+                        pc = c
+                elif op == JNLE:
+                    if not registers[a] <= registers[b]:
+                        pc = c
+                elif op == JNGT:
+                    if not registers[a] > registers[b]:
+                        pc = c
+                elif op == JNGE:
+                    if not registers[a] >= registers[b]:
+                        pc = c
+                elif op == JF:
+                    if not registers[a]:
+                        pc = b
+                elif op == JT:
+                    if registers[a]:
+                        pc = b
+                elif op == LOADK:
+                    registers[a] = constants[b]
+                elif op == INDEX:
+                    array = registers[b]
+                    idx = int(registers[c])
+                    if not isinstance(array, list):
+                        raise TypeError(f"Cannot index non-array type")
+                    if idx < 0 or idx >= len(array):
+                        raise IndexError(f"Index {idx} out of bounds")
+                    registers[a] = array[idx]
+                elif op == SETINDEX:
+                    array = registers[a]
+                    idx = registers[b]
+                    if isinstance(array, list) and 0 <= idx < len(array):
+                        array[idx] = registers[c]
+                elif op == TOINT:
+                    registers[a] = int(registers[b])
+                elif op == FORNEXT:
+                    item = next(registers[b], _EXHAUSTED)
+                    if item is not _EXHAUSTED:
+                        registers[a] = item
+                        pc = c
+                elif op == LT:
+                    registers[a] = 1.0 if registers[b] < registers[c] else 0.0
+                elif op == LE:
+                    registers[a] = 1.0 if registers[b] <= registers[c] else 0.0
+                elif op == GT:
+                    registers[a] = 1.0 if registers[b] > registers[c] else 0.0
+                elif op == GE:
+                    registers[a] = 1.0 if registers[b] >= registers[c] else 0.0
+                elif op == EQ:
+                    registers[a] = 1.0 if registers[b] == registers[c] else 0.0
+                elif op == NE:
+                    registers[a] = 1.0 if registers[b] != registers[c] else 0.0
+                elif op == AND:
+                    registers[a] = 1.0 if (registers[b] and registers[c]) else 0.0
+                elif op == OR:
+                    registers[a] = 1.0 if (registers[b] or registers[c]) else 0.0
+                elif op == NOT:
+                    registers[a] = 1.0 if not registers[b] else 0.0
+                elif op == NEG:
+                    registers[a] = -registers[b]
+                elif op == DIV:
+                    registers[a] = _div(registers[b], registers[c])
+                elif op == DIVK:
+                    registers[a] = _div(registers[b], constants[c])
+                elif op == MOD:
+                    registers[a] = _mod(registers[b], registers[c])
+                elif op == RANGE:
+                    registers[a] = list(range(int(registers[b]), int(registers[c])))
+                elif op == CALLB:
+                    registers[a] = b([registers[reg] for reg in c], self.ctx)
+                elif op == PRINT:
+                    self.ctx.write_line(' '.join(str(registers[reg]) for reg in a))
+                elif op == ITER:
+                    registers[a] = _iterate(registers[b])
+                elif op == NEWARRAY:
+                    registers[a] = list(constants[b])
+                elif op == BUILD:
+                    registers[a] = [registers[reg] for reg in b]
+                elif op == MEMBER:
+                    obj = registers[b]
+                    registers[a] = float(len(obj)) if c == 'length' and isinstance(obj, list) else 0.0
+                elif op == EVAL:
+                    self.store_variables()
+                    value = self.interpreter.evaluate(b, self.ctx)
+                    self.load_variables()
+                    registers[a] = value
+                elif op == EXEC:
+                    self.store_variables()
+                    result = self.interpreter.execute(a, self.ctx)
+                    self.load_variables()
+                    if result.__class__ is str and result.startswith('RETURN:'):
+                        return  # Top-level return ends the program
+                elif op == DEFINE:
+                    self.ctx.define_function(a)
+                elif op == HALT:
+                    return
+        finally:
+            self.pc = pc
+            self.cycles += cycles
+
+def compile_register_program(program: Program) -> RegisterProgram:
+    return RegisterCompiler().compile_program(program)
+
+def run_register(program: Program, ctx: ExecutionContext,
+                 interpreter: Optional[Interpreter] = None) -> Any:
+    """Compile program to registers and run it in ctx (lyra --register)"""
+    extern = [cell.func_def for cell in ctx.function_cells.values()]
+    if has_unstructured_jumps(program.statements) or has_unstructured_jumps(extern):
+        # break/continue flags need the stack VM's flag checks
+        try:
+            from .lyra_bytecode import run_bytecode
+        except ImportError:
+            from lyra_bytecode import run_bytecode
+        return run_bytecode(program, ctx, interpreter)
+    vm = RegisterVM(compile_register_program(program), ctx, interpreter)
+    vm.execute()
+    return vm
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+LYRA PERSISTENT REPL
+Version: 1.0.3
+Author: Seread335
+Interactive session on one long-lived interpreter
+
+Architecture:
+1. One Interpreter and one ExecutionContext live for the whole session,
+   so variables and procs entered earlier stay defined
+2. Lines are buffered until braces, brackets and parens balance; only the
+   finished entry is parsed, never the entries before it
+3. Parsed entries are cached by source text: re-entering a proc or a
+   statement reuses its AST (and the call-site caches warmed on it)
+4. Procs are bound as soon as their entry runs; redefinition rebinds the
+   existing cell, so callers entered earlier see the new body
+5. :time <expr> and :profile report from the interpreter's own counters
+"""
+
+import time
+from typing import Dict, List, Optional, TextIO
+
+try:
+    from .lyra_interpreter import (
+        Interpreter, ExecutionContext, ErrorReporter, Lexer, Program, FunctionDef,
+        BinOp, UnaryOp, Number, String, Identifier, IndexExpr, MemberExpr, CallExpr, ArrayLiteral,
+        TokenType, BACKEND_STACKLESS, describe_error, parse_code
+    )
+except ImportError:
+    from lyra_interpreter import (
+        Interpreter, ExecutionContext, ErrorReporter, Lexer, Program, FunctionDef,
+        BinOp, UnaryOp, Number, String, Identifier, IndexExpr, MemberExpr, CallExpr, ArrayLiteral,
+        TokenType, BACKEND_STACKLESS, describe_error, parse_code
+    )
+
+PROMPT = ">>> "
+CONTINUATION_PROMPT = "... "
+
+# Bare expressions whose value is echoed (statement calls print themselves)
+ECHOED = (BinOp, UnaryOp, Number, String, Identifier, IndexExpr, MemberExpr, ArrayLiteral)
+
+OPENERS = {TokenType.LBRACE, TokenType.LPAREN, TokenType.LBRACKET}
+CLOSERS = {TokenType.RBRACE, TokenType.RPAREN, TokenType.RBRACKET}
+
+def nesting_delta(line: str) -> int:
+    """Open minus closed brackets on one line (0 if it does not lex)"""
+    try:
+        tokens = Lexer(line).tokenize()
+    except Exception:
+        return 0
+    return sum((token.type in OPENERS) - (token.type in CLOSERS) for token in tokens)
+
+class ReplSession:
+    """State of one interactive session"""
+
+    def __init__(self, backend: Optional[str] = None, output: Optional[TextIO] = None) -> None:
+        self.output = output
+        self.context = ExecutionContext(ErrorReporter("<repl>", output=output), output)
+        if backend == BACKEND_STACKLESS:
+            try:
+                from .lyra_stackless import StacklessInterpreter
+            except ImportError:
+                from lyra_stackless import StacklessInterpreter
+            self.interpreter: Interpreter = StacklessInterpreter(context=self.context)
+        else:
+            self.interpreter = Interpreter(context=self.context)
+        self.entries: Dict[str, Program] = {}
+        self.buffer: List[str] = []
+        self.depth = 0
+        self.profiling = False
+        # Session counters for :profile
+        self.runs = 0
+        self.cache_hits = 0
+        self.parse_time = 0.0
+        self.run_time = 0.0
+
+    @property
+    def prompt(self) -> str:
+        return CONTINUATION_PROMPT if self.buffer else PROMPT
+
+    def write(self, text: str) -> None:
+        print(text, file=self.output)
+
+    def feed(self, line: str) -> None:
+        """Take one input line; runs the entry once it is complete"""
+        if not self.buffer:
+            command = line.strip()
+            if command.startswith(':'):
+                self.command(command)
+                return
+            if not command:
+                return
+        self.buffer.append(line)
+        self.depth += nesting_delta(line)
+        # A blank line submits an unbalanced entry so its error shows
+        if self.depth > 0 and line.strip():
+            return
+        code = '\n'.join(self.buffer)
+        self.buffer = []
+        self.depth = 0
+        self.run_entry(code)
+
+    def compile(self, code: str) -> Program:
+        """Parsed entry, from the cache when the same text was entered before"""
+        program = self.entries.get(code)
+        if program is not None:
+            self.cache_hits += 1
+            return program
+        start = time.perf_counter()
+        program = parse_code(code)
+        self.parse_time += time.perf_counter() - start
+        self.entries[code] = program
+        return program
+
+    def memo_counts(self) -> tuple:
+        if self.context.memo is None:
+            return (0, 0)
+        stats = self.context.memo.stats()
+        return (stats['cache_hits'], stats['cache_misses'])
+
+    def timing_line(self, label: str, elapsed: float, memo_before: tuple) -> str:
+        """Wall time plus the memo hits and misses since memo_before"""
+        hits, misses = (now - before for now, before in zip(self.memo_counts(), memo_before))
+        line = f"[{label}] {elapsed * 1000:.3f}ms"
+        if hits or misses:
+            line += f" (memo: {hits} hits, {misses} misses)"
+        return line
+
+    def run_entry(self, code: str) -> None:
+        ctx = self.context
+        memo_before = self.memo_counts()
+        try:
+            program = self.compile(code)
+            start = time.perf_counter()
+            try:
+                statements = program.statements
+                if len(statements) == 1 and isinstance(statements[0], ECHOED):
+                    self.write(str(self.interpreter.evaluate(statements[0], ctx)))
+                else:
+                    self.interpreter.interpret(program, ctx)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.run_time += elapsed
+                self.runs += 1
+                # A stray break/continue must not leak into the next entry
+                ctx.break_flag = ctx.continue_flag = False
+                ctx.error_reporter.errors.clear()
+            for stmt in statements:
+                if isinstance(stmt, FunctionDef):
+                    self.write(f"proc {stmt.name} defined")
+            if self.profiling:
+                self.write(self.timing_line("PROFILE", elapsed, memo_before))
+        except Exception as e:
+            self.write(f"Error: {describe_error(e)}")
+
+    def command(self, command: str) -> None:
+        name, _, rest = command.partition(' ')
+        if name == ':time':
+            self.time_expression(rest.strip())
+        elif name == ':profile':
+            self.profiling = not self.profiling
+            self.write(f"[PROFILE] {'on' if self.profiling else 'off'}")
+            self.profile_report()
+        elif name == ':help':
+            self.write(":time <expr>   evaluate once and report wall time")
+            self.write(":profile       toggle per-entry timing and show session counters")
+            self.write("exit           leave the REPL")
+        else:
+            self.write(f"Error: Unknown command {name} (try :help)")
+
+    def time_expression(self, code: str) -> None:
+        if not code:
+            self.write("Error: usage :time <expr>")
+            return
+        ctx = self.context
+        memo_before = self.memo_counts()
+        try:
+            program = self.compile(code)
+            if len(program.statements) != 1:
+                self.write("Error: :time takes a single expression")
+                return
+            node = program.statements[0]
+            start = time.perf_counter()
+            if isinstance(node, ECHOED + (CallExpr,)):
+                value = self.interpreter.evaluate(node, ctx)
+            else:
+                value = self.interpreter.execute(node, ctx)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            self.write(f"Error: {describe_error(e)}")
+            return
+        finally:
+            ctx.break_flag = ctx.continue_flag = False
+        if value is not None:
+            self.write(str(value))
+        self.write(self.timing_line("TIME", elapsed, memo_before))
+
+    def profile_report(self) -> None:
+        ctx = self.context
+        self.write(f"[PROFILE] Entries run: {self.runs} ({self.cache_hits} from the parse cache, "
+                   f"{len(self.entries)} cached)")
+        self.write(f"[PROFILE] Parse time: {self.parse_time * 1000:.3f}ms, "
+                   f"run time: {self.run_time * 1000:.3f}ms")
+        self.write(f"[PROFILE] Variables: {len(ctx.variables)}, procs: {len(ctx.function_cells)}")
+        for line in ctx.memo_report():
+            self.write(f"[PROFILE] {line}")
+
+def repl(backend: Optional[str] = None) -> None:
+    """Interactive REPL on one persistent session"""
+    print("╔═════════════════════════════════════╗")
+    print("║   LYRA INTERPRETER v1.0             ║")
+    print("║   Type 'exit' to quit, :help        ║")
+    print("╚═════════════════════════════════════╝")
+    print()
+
+    session = ReplSession(backend)
+    while True:
+        try:
+            line = input(session.prompt)
+        except (KeyboardInterrupt, EOFError):
+            print("\nGoodbye!")
+            break
+        if not session.buffer and line.strip().lower() == 'exit':
+            break
+        try:
+            session.feed(line)
+        except KeyboardInterrupt:
+            # Abandon the running or half-typed entry, keep the session
+            session.buffer = []
+            session.depth = 0
+            print("\nKeyboardInterrupt")
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+LYRA CONCURRENT RUNNERS
+Version: 1.0.3
+Author: Seread335
+Runs many Lyra programs without paying interpreter setup per program
+
+Architecture:
+1. Programs are parsed once and cached; the AST is shared read-only
+2. One re-entrant Interpreter serves every worker
+3. Each run gets its own ExecutionContext with private output/input streams
+4. Batch mode spreads files over reusable worker processes
+"""
+
+import glob
+import io
+import json
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
+
+try:
+    from .lyra_interpreter import (
+        Interpreter, Program, BACKEND_TREE_WALKING, describe_error, parse_code,
+        prepare_program, run_program
+    )
+except ImportError:
+    from lyra_interpreter import (
+        Interpreter, Program, BACKEND_TREE_WALKING, describe_error, parse_code,
+        prepare_program, run_program
+    )
+
+# ============================================================================
+# RUN RESULT
+# ============================================================================
+
+@dataclass
+class RunResult:
+    """Outcome of a single program run"""
+    filename: str
+    output: str = ""
+    status: str = "ok"      # ok | error | timeout
+    exit_code: int = 0      # 0 ok, 1 uncaught error, 124 timeout
+    error: str = ""         # Uncaught error message, if any
+    elapsed: float = 0.0    # Wall time in seconds
+    errors: List[Dict[str, Any]] = field(default_factory=list)  # Reported (caught) errors
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+@dataclass
+class RunOptions:
+    """Command-line settings for a run, applied as run_file applies them"""
+    backend: str = BACKEND_TREE_WALKING
+    inline_size: Optional[int] = None    # --inline-size (--optimize only)
+    memo_size: Optional[int] = None      # --memo-size
+    no_memo: List[str] = field(default_factory=list)  # --no-memo
+    jit_threshold: Optional[int] = None  # --jit-threshold
+
+    def prepare(self, code: str, filename: str, log: Optional[TextIO] = None) -> Any:
+        """Program to run for code (a fresh .lyrc, or the optimized AST)"""
+        return prepare_program(code, filename, self.backend, self.inline_size, log=log)
+
+    def run(self, program: Any, filename: str, **streams: Any) -> Any:
+        """run_program with these settings; streams: interpreter, output, input_stream"""
+        return run_program(program, filename, self.backend, memo_size=self.memo_size,
+                           no_memo=self.no_memo, jit_threshold=self.jit_threshold, **streams)
+
+# ============================================================================
+# PROGRAM CACHE
+# ============================================================================
+
+class ProgramCache:
+    """Thread-safe cache of parsed programs, keyed by absolute path
+
+    File entries are re-parsed when the file's mtime changes; in-memory
+    entries registered with add() never expire. Loads hold the lock while
+    parsing, so threads that miss on the same file parse it once (parsing
+    holds the GIL anyway, so other misses lose no parallelism).
+    """
+
+    def __init__(self) -> None:
+        # key -> (mtime or None, program, --optimize summaries)
+        self._programs: Dict[Any, Tuple[Optional[int], Any, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, filename: str, options: Optional[RunOptions] = None,
+             log: Optional[TextIO] = None) -> Any:
+        """Parsed program for filename; with options, prepared as run_file
+        would prepare it (log gets the --optimize summaries, on hits too)"""
+        path = os.path.abspath(filename)
+        key = path if options is None else (path, options.backend, options.inline_size)
+        with self._lock:
+            entry = self._programs.get(key)
+            # In-memory entries (mtime None) never go stale
+            mtime = None if entry is not None and entry[0] is None else os.stat(path).st_mtime_ns
+            if entry is not None and entry[0] == mtime:
+                self.hits += 1
+            else:
+                self.misses += 1
+                with open(path, 'r', encoding='utf-8') as f:
+                    code = f.read()
+                summaries = io.StringIO()
+                if options is None:
+                    program = parse_code(code)
+                else:
+                    program = options.prepare(code, path, log=summaries)
+                entry = self._programs[key] = (mtime, program, summaries.getvalue())
+        if log is not None:
+            log.write(entry[2])
+        return entry[1]
+
+    def add(self, name: str, code: str) -> Program:
+        program = parse_code(code)
+        with self._lock:
+            self._programs[os.path.abspath(name)] = (None, program, "")
+        return program
+
+    def __len__(self) -> int:
+        return len(self._programs)
+
+# ============================================================================
+# THREAD POOL RUNNER
+# ============================================================================
+
+class ThreadPoolRunner:
+    """Run Lyra programs concurrently on a thread pool
+
+    Threads only overlap while a program is blocked in input(); pure
+    computation is still serialized by the GIL.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 backend: str = BACKEND_TREE_WALKING) -> None:
+        self.backend = backend
+        self.interpreter = Interpreter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="lyra")
+        self.programs = ProgramCache()
+
+    def load(self, filename: str) -> Program:
+        """Parse a file once; later calls return the shared Program"""
+        return self.programs.load(filename)
+
+    def add_program(self, name: str, code: str) -> Program:
+        """Register in-memory source under a name usable with submit()"""
+        return self.programs.add(name, code)
+
+    def submit(self, filename: str,
+               stdin: Union[str, TextIO, None] = None) -> "Future[RunResult]":
+        """Schedule a run; stdin is the text (or stream) read by input()"""
+        return self.executor.submit(self._run, filename, stdin)
+
+    def run_all(self, filenames: List[str],
+                stdin: Union[str, TextIO, None] = None) -> List[RunResult]:
+        """Run every file and return results in submission order
+
+        A stdin stream is read once and each run gets its own copy, so
+        concurrent input() calls do not consume each other's lines.
+        """
+        if stdin is not None and not isinstance(stdin, str):
+            stdin = stdin.read()
+        futures = [self.submit(name, stdin) for name in filenames]
+        return [future.result() for future in futures]
+
+    def _run(self, filename: str, stdin: Union[str, TextIO, None]) -> RunResult:
+        result = RunResult(filename)
+        output = io.StringIO()
+        input_stream = io.StringIO(stdin) if isinstance(stdin, str) else stdin
+        start = time.perf_counter()
+        try:
+            program = self.load(filename)
+            ctx = run_program(program, filename, self.backend,
+                              interpreter=self.interpreter,
+                              output=output, input_stream=input_stream)
+            result.errors = ctx.error_reporter.errors
+        except Exception as e:
+            output.write(f"Error: {describe_error(e)}\n")
+            result.status = "error"
+            result.exit_code = 1
+            result.error = str(e)
+        result.elapsed = time.perf_counter() - start
+        result.output = output.getvalue()
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ThreadPoolRunner":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+# ============================================================================
+# PROCESS POOL BATCH RUNNER
+# ============================================================================
+
+class BatchTimeout(BaseException):
+    """Raised inside a worker when a file exceeds its time budget.
+
+    Derives from BaseException so Lyra try/catch blocks cannot swallow it.
+    """
+
+def _raise_batch_timeout(signum: int, frame: Any) -> None:
+    raise BatchTimeout()
+
+def _run_file_worker(filename: str, options: RunOptions, timeout: Optional[float]) -> RunResult:
+    """Load and run one file inside a pool worker, as a cold run would"""
+    result = RunResult(filename)
+    output = io.StringIO()
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    start = time.perf_counter()
+    try:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _raise_batch_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with open(filename, 'r', encoding='utf-8') as f:
+            code = f.read()
+        # Pass summaries of --optimize are not part of the program's output
+        program = options.prepare(code, filename, log=io.StringIO())
+        ctx = options.run(program, filename, output=output, input_stream=io.StringIO(""))
+        result.errors = [{k: v for k, v in err.items() if k != 'time'}
+                         for err in ctx.error_reporter.errors]
+    except BatchTimeout:
+        result.status = "timeout"
+        result.exit_code = 124
+        result.error = f"Timed out after {timeout}s"
+    except Exception as e:
+        output.write(f"Error: {describe_error(e)}\n")
+        result.status = "error"
+        result.exit_code = 1
+        result.error = str(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result.elapsed = time.perf_counter() - start
+    result.output = output.getvalue()
+    return result
+
+@dataclass
+class BatchSummary:
+    """Collected results of a batch run"""
+    results: List[RunResult]
+    jobs: int
+    elapsed: float
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for r in self.results if r.status == "ok")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r.status == "error")
+
+    @property
+    def timed_out(self) -> int:
+        return sum(1 for r in self.results if r.status == "timeout")
+
+    @property
+    def exit_code(self) -> int:
+        return 0 if self.passed == len(self.results) else 1
+
+    def to_text(self) -> str:
+        lines = ["=" * 60, "LYRA BATCH SUMMARY", "=" * 60]
+        for r in self.results:
+            lines.append(f"  {r.status:<8} {r.elapsed:8.3f}s  {r.filename}")
+            if r.error:
+                lines.append(f"           {r.error}")
+        lines.append("-" * 60)
+        lines.append(f"Total: {len(self.results)} | Passed: {self.passed} | "
+                     f"Failed: {self.failed} | Timed out: {self.timed_out}")
+        lines.append(f"Wall time: {self.elapsed:.3f}s (jobs: {self.jobs})")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'jobs': self.jobs,
+            'elapsed': self.elapsed,
+            'total': len(self.results),
+            'passed': self.passed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'results': [asdict(r) for r in self.results],
+        }, indent=2, default=str)
+
+def expand_batch_paths(paths: List[str]) -> List[str]:
+    """Expand directories to the .lyra files they contain"""
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.lyra"))))
+        else:
+            files.append(path)
+    return files
+
+def run_batch(filenames: List[str], jobs: Optional[int] = None,
+              timeout: Optional[float] = None,
+              backend: str = BACKEND_TREE_WALKING,
+              options: Optional[RunOptions] = None) -> BatchSummary:
+    """Run files across a process pool; workers are reused between files
+
+    Args:
+        filenames: Lyra files to run
+        jobs: Worker processes (default: CPU count)
+        timeout: Per-file time budget in seconds
+        backend: Execution backend for every file
+        options: Full run settings, overriding backend
+    """
+    if options is None:
+        options = RunOptions(backend)
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    results: List[RunResult] = []
+    pool = multiprocessing.Pool(processes=jobs)
+    stuck = False
+    try:
+        pending = [pool.apply_async(_run_file_worker, (name, options, timeout))
+                   for name in filenames]
+        # Workers enforce the timeout themselves where SIGALRM exists; the
+        # batch deadline only catches platforms (Windows) where it does not.
+        # Files run `jobs` at a time, so that many rounds fit in the budget.
+        deadline = None
+        if timeout is not None:
+            rounds = math.ceil(len(filenames) / jobs)
+            deadline = time.monotonic() + timeout * rounds + 5.0
+        for name, pending_result in zip(filenames, pending):
+            try:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                results.append(pending_result.get(timeout=wait))
+            except multiprocessing.TimeoutError:
+                stuck = True
+                results.append(RunResult(name, status="timeout", exit_code=124,
+                                         error=f"Timed out after {timeout}s"))
+            except Exception as e:
+                results.append(RunResult(name, status="error", exit_code=1, error=str(e)))
+    finally:
+        if stuck:
+            # Runaway workers never return; kill them instead of joining
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+    return BatchSummary(results, jobs, time.perf_counter() - start)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+LYRA WARM INTERPRETER SERVER
+Version: 1.0.3
+Author: Seread335
+Keeps one interpreter and a parsed-program cache alive between runs
+
+Usage:
+  lyra --server [--socket PATH]        # start the daemon (foreground)
+  python lyra_client.py file.lyra      # run a file on it
+
+The `lyra` launcher uses the client automatically whenever the default
+socket exists and belongs to the current user. The server only binds in
+a directory it owns that no one else can write to. See lyra_client.py
+for the wire protocol.
+"""
+
+import io
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from typing import Optional, Tuple
+
+try:
+    from .lyra_interpreter import Interpreter, describe_error
+    from .lyra_runner import ProgramCache, RunOptions
+    from .lyra_client import CONTROL, EXIT, INPUT_REQUEST, LOG, check_socket, default_socket_path
+except ImportError:
+    from lyra_interpreter import Interpreter, describe_error
+    from lyra_runner import ProgramCache, RunOptions
+    from lyra_client import CONTROL, EXIT, INPUT_REQUEST, LOG, check_socket, default_socket_path
+
+class _RemoteInput:
+    """input() stream that asks the connected client for each line"""
+
+    def __init__(self, reader: io.TextIOWrapper, writer: io.TextIOWrapper) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def readline(self) -> str:
+        self.writer.write(f"{CONTROL}{INPUT_REQUEST}\n")
+        self.writer.flush()
+        line = self.reader.readline()
+        if line.startswith(CONTROL):
+            return ""
+        return line
+
+def parse_request(request: str) -> Tuple[str, RunOptions]:
+    """(filename, options) of a request line; ValueError if malformed"""
+    backend, filename, *settings = request.split('\t')
+    if not filename:
+        raise ValueError("no file")
+    options = RunOptions(backend)
+    for setting in settings:
+        name, _, value = setting.partition('=')
+        if name == "no_memo":
+            options.no_memo = [n for n in value.split(',') if n]
+        elif name in ("inline_size", "memo_size", "jit_threshold"):
+            setattr(options, name, int(value))
+        else:
+            raise ValueError(f"unknown setting {name!r}")
+    return filename, options
+
+class LyraRequestHandler(socketserver.StreamRequestHandler):
+    """Runs one file per connection and streams its output back"""
+
+    def handle(self) -> None:
+        reader = io.TextIOWrapper(self.rfile, encoding='utf-8', newline='\n')
+        writer = io.TextIOWrapper(self.wfile, encoding='utf-8', newline='\n',
+                                  line_buffering=True)
+        request = reader.readline().rstrip('\n')
+        try:
+            filename, options = parse_request(request)
+        except ValueError:
+            writer.write(f"Error: Bad request: {request!r}\n{CONTROL}{EXIT} 2\n")
+            writer.flush()
+            return
+
+        # Exit codes match a cold run: 1 after an uncaught error
+        exit_code = 0
+        try:
+            summaries = io.StringIO()
+            program = self.server.programs.load(filename, options, log=summaries)
+            for line in summaries.getvalue().splitlines(keepends=True):
+                writer.write(f"{CONTROL}{LOG} {line}")
+            options.run(program, filename, interpreter=self.server.interpreter,
+                        output=writer, input_stream=_RemoteInput(reader, writer))
+        except FileNotFoundError:
+            writer.write(f"Error: File not found: {filename}\n")
+            exit_code = 1
+        except OSError:
+            return  # Client disconnected
+        except Exception as e:
+            writer.write(f"Error: {describe_error(e)}\n")
+            exit_code = 1
+        self.server.runs += 1
+        try:
+            writer.write(f"{CONTROL}{EXIT} {exit_code}\n")
+            writer.flush()
+        except OSError:
+            pass
+
+class LyraServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server sharing one re-entrant interpreter"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+        self.interpreter = Interpreter()
+        self.programs = ProgramCache()
+        self.runs = 0
+        super().__init__(socket_path, LyraRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+def _check_socket_dir(socket_path: str) -> None:
+    """Create the socket's directory 0700 if missing; refuse a shared one
+
+    Anyone who can write to the directory could swap the socket for their
+    own, so it must belong to us and be closed to group and others.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"Refusing to bind in {directory}: not a directory owned by this user")
+    if info.st_mode & 0o022:
+        raise RuntimeError(f"Refusing to bind in {directory}: writable by other users")
+
+def _clear_stale_socket(socket_path: str) -> None:
+    """Remove a socket file left by a dead server; fail if one is alive"""
+    if not os.path.lexists(socket_path):
+        return
+    check_socket(socket_path)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A Lyra server is already listening on {socket_path}")
+
+def _stop_on_sigterm(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Run the server in the foreground until interrupted"""
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: --server needs Unix domain sockets, which this platform lacks")
+        sys.exit(1)
+    socket_path = socket_path or default_socket_path()
+    try:
+        _check_socket_dir(socket_path)
+        _clear_stale_socket(socket_path)
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    server = LyraServer(socket_path)
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    print(f"Lyra server listening on {socket_path} (Ctrl+C to stop)")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.runs} runs, {len(server.programs)} cached programs")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else None)
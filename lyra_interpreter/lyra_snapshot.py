@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+LYRA SESSION SNAPSHOTS
+Version: 1.0.3
+Author: Seread335
+Saves the globals and procs of a finished run so later runs start from them
+
+Usage:
+  lyra --snapshot init.lyrasnap init.lyra          # run the init phase, save its state
+  lyra --resume init.lyrasnap main.lyra            # run main.lyra on that state
+
+File layout (.lyrasnap):
+  magic  b"LYRASNAP"          8 bytes
+  header <HBBI                version, byte order (0 little, 1 big), pad, payload size
+  payload                     marshal of {'source', 'procs', 'variables', 'blobs'}
+  padding                     to an 8-byte boundary
+  blobs                       raw float64 data of large numeric arrays
+
+Architecture:
+1. Procs are stored as AST tuples (class index, line, column, fields...)
+   with runtime caches dropped, so resuming never re-lexes or re-parses
+   them and errors in resumed procs keep their source positions
+2. Variables keep their values; lists shared between variables stay shared
+3. Arrays of at least BLOB_MIN_LENGTH floats are written as raw doubles and
+   read back through mmap, converted to a list in one C-level call
+4. Only marshal and raw doubles are read: loading a snapshot runs no code
+"""
+
+import marshal
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+try:
+    from .lyra_interpreter import ExecutionContext, FunctionDef
+    from .lyra_passes import CACHE_FIELDS, NODE_FIELDS
+except ImportError:
+    from lyra_interpreter import ExecutionContext, FunctionDef
+    from lyra_passes import CACHE_FIELDS, NODE_FIELDS
+
+MAGIC = b"LYRASNAP"
+VERSION = 3
+HEADER = struct.Struct("<HBBI")
+PAYLOAD_START = len(MAGIC) + HEADER.size
+
+# Smaller numeric arrays are cheaper to keep inside the marshal payload
+BLOB_MIN_LENGTH = 256
+
+# Class indexes are positions in NODE_FIELDS; the version guards the order
+NODE_CLASSES = list(NODE_FIELDS)
+NODE_INDEX = {cls: index for index, cls in enumerate(NODE_CLASSES)}
+
+# Tags heading encoded tuples: non-negative tags are node classes
+TUPLE, LIST, REF, BLOB = -1, -2, -3, -4
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+class SnapshotError(Exception):
+    """File is not a snapshot this version can read"""
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.lists: Dict[int, int] = {}
+        self.blobs: List[Tuple[int, int]] = []
+        self.data: List[bytes] = []
+        self.size = 0
+
+    def node(self, node: Any) -> Any:
+        cls = node.__class__
+        if cls in NODE_INDEX:
+            # Caches are rebuilt on first use
+            return (NODE_INDEX[cls], node.line, node.column) + tuple(
+                None if name in CACHE_FIELDS else self.node(getattr(node, name))
+                for name in NODE_FIELDS[cls])
+        if cls is list:
+            return [self.node(item) for item in node]
+        if cls is tuple:
+            return (TUPLE,) + tuple(self.node(item) for item in node)
+        return node
+
+    def value(self, value: Any) -> Any:
+        if value.__class__ is not list:
+            return value
+        key = id(value)
+        if key in self.lists:
+            return (REF, self.lists[key])
+        index = self.lists[key] = len(self.lists)
+        if len(value) >= BLOB_MIN_LENGTH and all(item.__class__ is float for item in value):
+            data = array('d', value).tobytes()
+            self.blobs.append((self.size, len(value)))
+            self.data.append(data)
+            self.size += len(data)
+            return (BLOB, index, len(self.blobs) - 1)
+        return (LIST, index, [self.value(item) for item in value])
+
+def save_snapshot(ctx: ExecutionContext, path: str, source: str = "") -> Tuple[int, int]:
+    """Write ctx's globals and procs to path; returns (variables, procs)"""
+    encoder = _Encoder()
+    procs = [encoder.node(cell.func_def) for cell in ctx.function_cells.values()]
+    variables = {name: encoder.value(value) for name, value in ctx.variables.items()}
+    payload = marshal.dumps({'source': source, 'procs': procs, 'variables': variables,
+                             'blobs': encoder.blobs})
+    header = MAGIC + HEADER.pack(VERSION, sys.byteorder == 'big', 0, len(payload))
+    padding = _align(len(header) + len(payload)) - len(header) - len(payload)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+        f.write(b"\0" * padding)
+        for data in encoder.data:
+            f.write(data)
+    return len(variables), len(procs)
+
+# ============================================================================
+# READING
+# ============================================================================
+
+def _decode_node(value: Any) -> Any:
+    cls = value.__class__
+    if cls is tuple:
+        tag = value[0]
+        if tag == TUPLE:
+            return tuple(_decode_node(item) for item in value[1:])
+        node_class = NODE_CLASSES[tag]
+        node = object.__new__(node_class)
+        if value[1]:
+            node.line, node.column = value[1], value[2]
+        for name, field in zip(NODE_FIELDS[node_class], value[3:]):
+            setattr(node, name, _decode_node(field))
+        return node
+    if cls is list:
+        return [_decode_node(item) for item in value]
+    return value
+
+class Snapshot:
+    """Globals and procs loaded from a .lyrasnap file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise SnapshotError(f"Not a Lyra snapshot: {path}") from None
+            with mapped, memoryview(mapped) as view:
+                self._load(view)
+
+    def _load(self, view: memoryview) -> None:
+        if len(view) < PAYLOAD_START or view[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"Not a Lyra snapshot: {self.path}")
+        version, big_endian, _, size = HEADER.unpack_from(view, len(MAGIC))
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version} (expected {VERSION})")
+        payload = marshal.loads(view[PAYLOAD_START:PAYLOAD_START + size])
+        self.source: str = payload['source']
+        self.procs: List[FunctionDef] = [_decode_node(proc) for proc in payload['procs']]
+
+        data_start = _align(PAYLOAD_START + size)
+        swap = big_endian != (sys.byteorder == 'big')
+        blobs = []
+        for offset, count in payload['blobs']:
+            start = data_start + offset
+            with view[start:start + count * 8] as raw:
+                if swap:
+                    numbers = array('d')
+                    numbers.frombytes(raw)
+                    numbers.byteswap()
+                    blobs.append(numbers.tolist())
+                else:
+                    with raw.cast('d') as doubles:
+                        blobs.append(doubles.tolist())
+
+        lists: Dict[int, list] = {}
+
+        def decode(value: Any) -> Any:
+            if value.__class__ is not tuple:
+                return value
+            tag = value[0]
+            if tag == REF:
+                return lists[value[1]]
+            if tag == BLOB:
+                result = lists[value[1]] = blobs[value[2]]
+                return result
+            # Registered before its items, so self-references resolve
+            result = lists[value[1]] = []
+            result.extend(decode(item) for item in value[2])
+            return result
+
+        self.variables: Dict[str, Any] = {name: decode(value)
+                                          for name, value in payload['variables'].items()}
+
+    def restore(self, ctx: ExecutionContext) -> None:
+        """Define the saved procs and globals in ctx"""
+        for func_def in self.procs:
+            ctx.define_function(func_def)
+        ctx.variables.update(self.variables)
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+LYRA STACKLESS INTERPRETER
+Version: 1.0.3
+Author: Seread335
+Tree-walking interpreter whose Lyra call frames live on a heap-allocated stack
+
+Usage:
+  lyra --stackless program.lyra
+
+The regular interpreter nests several Python frames per Lyra call, so
+`fact(n)` fails with RecursionError a few hundred calls deep. Here every
+step that may call a proc is a generator: instead of calling a child step
+it yields it, and one driver loop keeps the generators on a list. Lyra
+recursion depth is then limited only by memory.
+
+Architecture:
+1. Marking: nodes whose subtree may call a proc are found once per program
+2. Driver: runs the generator stack, passing results and exceptions up
+3. Steps: generator versions of execute/evaluate for the marked nodes
+
+Unmarked nodes (loops, arithmetic and builtin calls without proc calls)
+run on the regular recursive interpreter at full speed: their Python
+depth is bounded by the nesting of the source, not by the call depth.
+"""
+
+from typing import Any, Generator, List, Optional
+
+try:
+    from .lyra_interpreter import (
+        ASTNode, Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        TryStmt, SwitchStmt, ForStmt, MemberExpr, BUILTINS, TAIL_CALL, FunctionCell,
+        MemoCache, ExecutionContext, Interpreter, build_jump_table, error_position, select_body
+    )
+    from .lyra_passes import CACHE_FIELDS, STATEMENT_LISTS, node_fields
+except ImportError:
+    from lyra_interpreter import (
+        ASTNode, Program, VarDecl, Assignment, BinOp, UnaryOp, Number, String, Identifier,
+        CallExpr, IfStmt, WhileStmt, FunctionDef, ReturnStmt, ArrayLiteral, IndexExpr,
+        TryStmt, SwitchStmt, ForStmt, MemberExpr, BUILTINS, TAIL_CALL, FunctionCell,
+        MemoCache, ExecutionContext, Interpreter, build_jump_table, error_position, select_body
+    )
+    from lyra_passes import CACHE_FIELDS, STATEMENT_LISTS, node_fields
+
+Step = Generator[Any, Any, Any]
+
+# Statement calls that can never reach a proc (procs shadow other builtins)
+PRINT_CALLS = frozenset(('print', 'println'))
+
+class StacklessInterpreter(Interpreter):
+    """Interpreter with Lyra recursion depth limited only by memory"""
+
+    def __init__(self, error_reporter=None, context: Optional[ExecutionContext] = None) -> None:
+        super().__init__(error_reporter, context)
+        # Nodes that may call a proc, so they run as generator steps
+        self.deep_nodes: set = set()
+        self.marked: set = set()
+        # Largest generator stack seen by the driver
+        self.max_stack = 0
+
+    # ========================================================================
+    # MARKING
+    # ========================================================================
+
+    def mark(self, node: Any, statement: bool = False) -> bool:
+        """Record every node below node that may call a proc"""
+        deep = False
+        for name, value in node_fields(node):
+            if name in CACHE_FIELDS:
+                continue
+            if isinstance(value, ASTNode):
+                deep |= self.mark(value)
+            elif isinstance(value, list):
+                in_block = name in STATEMENT_LISTS
+                for item in value:
+                    if isinstance(item, ASTNode):
+                        deep |= self.mark(item, in_block)
+                    elif isinstance(item, tuple):
+                        # Switch case: (label expression, statement list)
+                        label, statements = item
+                        deep |= self.mark(label)
+                        for stmt in statements:
+                            deep |= self.mark(stmt, True)
+        if isinstance(node, CallExpr):
+            deep |= node.name not in BUILTINS or (statement and node.name not in PRINT_CALLS)
+        elif isinstance(node, FunctionDef):
+            deep = False  # Defining a proc runs none of its body
+        if deep:
+            self.deep_nodes.add(node)
+        return deep
+
+    # ========================================================================
+    # DRIVER
+    # ========================================================================
+
+    def interpret(self, ast: Program, ctx: Optional[ExecutionContext] = None):
+        if ctx is None:
+            ctx = self.context
+        if ast not in self.marked:
+            self.mark(ast)
+            self.marked.add(ast)
+        # One driver run per statement that calls procs; the rest run
+        # directly, outside any generator frame (measurably faster)
+        deep = self.deep_nodes
+        for statement in ast.statements:
+            if statement in deep:
+                result = self.drive(self.exec_step(statement, ctx))
+            else:
+                result = self.execute(statement, ctx)
+            if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                return result[7:]
+        return None
+
+    def drive(self, root: Step) -> Any:
+        """Run root and every step it yields; returns root's result
+
+        A step yields a child step to run it and receives its result (or
+        its exception) at the yield. The list is the Lyra call stack.
+        """
+        stack = [root]
+        value = None
+        error = None
+        max_stack = self.max_stack
+        while True:
+            step = stack[-1]
+            try:
+                if error is None:
+                    child = step.send(value)
+                else:
+                    exc, error = error, None
+                    child = step.throw(exc)
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    self.max_stack = max_stack
+                    return stop.value
+                value = stop.value
+                continue
+            except Exception as exc:
+                stack.pop()
+                if not stack:
+                    self.max_stack = max_stack
+                    raise
+                # Each frame re-adds itself; don't keep one entry per Lyra call,
+                # only the innermost statement's position for error reports
+                if getattr(exc, 'lyra_position', None) is None:
+                    line, column = error_position(exc)
+                    if line:
+                        exc.lyra_position = (line, column)
+                error = exc.with_traceback(None)
+                continue
+            stack.append(child)
+            value = None
+            if len(stack) > max_stack:
+                max_stack = len(stack)
+
+    # ========================================================================
+    # STEPS
+    # ========================================================================
+
+    def exec_block(self, statements: List[Any], ctx: ExecutionContext) -> Step:
+        """Statements of an if branch; break/continue end the branch"""
+        deep = self.deep_nodes
+        for stmt in statements:
+            result = (yield self.exec_step(stmt, ctx)) if stmt in deep else self.execute(stmt, ctx)
+            if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                return result
+            if ctx.break_flag or ctx.continue_flag:
+                break
+        return None
+
+    def exec_step(self, node: Any, ctx: ExecutionContext) -> Step:
+        """Generator version of Interpreter.execute for marked statements"""
+        deep = self.deep_nodes
+        if isinstance(node, VarDecl):
+            value = (yield self.eval_step(node.value, ctx)) if node.value in deep \
+                else self.evaluate(node.value, ctx)
+            ctx.variables[node.name] = value
+            return None
+        elif isinstance(node, Assignment):
+            if isinstance(node.name, IndexExpr):
+                target = node.name
+                arr = (yield self.eval_step(target.array, ctx)) if target.array in deep \
+                    else self.evaluate(target.array, ctx)
+                idx = (yield self.eval_step(target.index, ctx)) if target.index in deep \
+                    else self.evaluate(target.index, ctx)
+                idx = int(idx)
+                value = (yield self.eval_step(node.value, ctx)) if node.value in deep \
+                    else self.evaluate(node.value, ctx)
+                if isinstance(arr, list) and 0 <= idx < len(arr):
+                    arr[idx] = value
+                return None
+            elif isinstance(node.name, MemberExpr):
+                return None
+            value = (yield self.eval_step(node.value, ctx)) if node.value in deep \
+                else self.evaluate(node.value, ctx)
+            ctx.variables[node.name] = value
+            return None
+        elif isinstance(node, ReturnStmt):
+            if node.tail_call:
+                args = yield self.eval_args(node.value.args, ctx)
+                ctx.tail_call = (node.value.name, args)
+                return TAIL_CALL
+            value = (yield self.eval_step(node.value, ctx)) if node.value in deep \
+                else self.evaluate(node.value, ctx)
+            return f"RETURN:{value}"
+        elif isinstance(node, IfStmt):
+            condition = (yield self.eval_step(node.condition, ctx)) if node.condition in deep \
+                else self.evaluate(node.condition, ctx)
+            if self.is_truthy(condition):
+                return (yield self.exec_block(node.then_branch, ctx))
+            elif node.else_branch:
+                return (yield self.exec_block(node.else_branch, ctx))
+            return None
+        elif isinstance(node, (WhileStmt, ForStmt)):
+            return (yield self.loop_step(node, ctx))
+        elif isinstance(node, TryStmt):
+            try:
+                for stmt in node.try_block:
+                    result = (yield self.exec_step(stmt, ctx)) if stmt in deep else self.execute(stmt, ctx)
+                    if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                        return result
+            except Exception as e:
+                error_msg = str(e)
+                ctx.error_reporter.report_exception(e)
+                if node.catch_var:
+                    ctx.variables[node.catch_var] = error_msg
+                for stmt in node.catch_block:
+                    result = (yield self.exec_step(stmt, ctx)) if stmt in deep else self.execute(stmt, ctx)
+                    if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                        return result
+            return None
+        elif isinstance(node, SwitchStmt):
+            return (yield self.switch_step(node, ctx))
+        elif isinstance(node, CallExpr):
+            if node.name in PRINT_CALLS:
+                args = yield self.eval_args(node.args, ctx)
+                ctx.write_line(' '.join(str(value) for value in args))
+                return None
+            # User-defined function (procs shadow builtins in statements)
+            cached = node.target
+            if cached is not None and cached[1] is ctx and cached[0].__class__ is FunctionCell:
+                cell = cached[0]
+            else:
+                cell = ctx.function_cells.get(node.name)
+                if cell is not None and node.name not in BUILTINS:
+                    node.target = (cell, ctx)
+            if cell is not None:
+                args = yield self.eval_args(node.args, ctx)
+                return (yield self.run_step(cell, args, ctx, statement=True))
+            return None
+        elif isinstance(node, (BinOp, UnaryOp)):
+            return (yield self.eval_step(node, ctx))
+        return None
+
+    def loop_step(self, node: Any, ctx: ExecutionContext) -> Step:
+        deep = self.deep_nodes
+        if isinstance(node, WhileStmt):
+            items = None
+        else:
+            iterable = (yield self.eval_step(node.iterable, ctx)) if node.iterable in deep \
+                else self.evaluate(node.iterable, ctx)
+            if isinstance(iterable, list):
+                items = iterable
+            elif isinstance(iterable, (int, float)):
+                items = (float(i) for i in range(int(iterable)))
+            else:
+                return None
+            items = iter(items)
+        while True:
+            if items is None:
+                condition = (yield self.eval_step(node.condition, ctx)) if node.condition in deep \
+                    else self.evaluate(node.condition, ctx)
+                if not self.is_truthy(condition):
+                    return None
+            else:
+                item = next(items, StopIteration)
+                if item is StopIteration:
+                    return None
+                ctx.variables[node.var] = item
+            for stmt in node.body:
+                result = (yield self.exec_step(stmt, ctx)) if stmt in deep else self.execute(stmt, ctx)
+                if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                    return result
+                if ctx.break_flag:
+                    ctx.break_flag = False
+                    return None
+                if ctx.continue_flag:
+                    ctx.continue_flag = False
+                    break
+
+    def switch_step(self, node: SwitchStmt, ctx: ExecutionContext) -> Step:
+        deep = self.deep_nodes
+        expr_val = (yield self.eval_step(node.expr, ctx)) if node.expr in deep \
+            else self.evaluate(node.expr, ctx)
+        if node.jump_table is None:
+            node.jump_table = build_jump_table(node.cases)
+        if node.jump_table is not False:
+            start = self.find_switch_case(node, expr_val, ctx)
+        else:
+            start = None
+            for index, (case_val, _) in enumerate(node.cases):
+                label = (yield self.eval_step(case_val, ctx)) if case_val in deep \
+                    else self.evaluate(case_val, ctx)
+                if label == expr_val:
+                    start = index
+                    break
+        if start is not None:
+            statements = [stmt for _, body in node.cases[start:] for stmt in body]
+        else:
+            statements = node.default_case or []
+        for stmt in statements:
+            result = (yield self.exec_step(stmt, ctx)) if stmt in deep else self.execute(stmt, ctx)
+            if result is not None and isinstance(result, str) and result.startswith('RETURN:'):
+                return result
+            if ctx.break_flag:
+                ctx.break_flag = False
+                return None
+        return None
+
+    def eval_args(self, args: List[Any], ctx: ExecutionContext) -> Step:
+        deep = self.deep_nodes
+        values = []
+        for arg in args:
+            values.append((yield self.eval_step(arg, ctx)) if arg in deep else self.evaluate(arg, ctx))
+        return values
+
+    def eval_step(self, node: Any, ctx: ExecutionContext) -> Step:
+        """Generator version of Interpreter.evaluate for marked expressions"""
+        deep = self.deep_nodes
+        if isinstance(node, CallExpr):
+            args = yield self.eval_args(node.args, ctx)
+            cached = node.target
+            if cached is None or (cached[1] is not ctx and cached[1] is not None):
+                target = self.resolve_call(node, ctx)
+                if target is None:
+                    return 0.0
+            else:
+                target = cached[0]
+            if target.__class__ is FunctionCell:
+                return (yield self.call_step(target, args, ctx))
+            return target(args, ctx)
+        elif isinstance(node, BinOp):
+            left = (yield self.eval_step(node.left, ctx)) if node.left in deep \
+                else self.evaluate(node.left, ctx)
+            right = (yield self.eval_step(node.right, ctx)) if node.right in deep \
+                else self.evaluate(node.right, ctx)
+            return self.binary_op(node.op, left, right)
+        elif isinstance(node, UnaryOp):
+            operand = (yield self.eval_step(node.operand, ctx)) if node.operand in deep \
+                else self.evaluate(node.operand, ctx)
+            if node.op == '-':
+                return -operand
+            elif node.op == 'num!':
+                return 0.0 if operand != 0 else 1.0
+            elif node.op == '!':
+                return 0.0 if self.is_truthy(operand) else 1.0
+        elif isinstance(node, ArrayLiteral):
+            return (yield self.eval_args(node.elements, ctx))
+        elif isinstance(node, IndexExpr):
+            arr = (yield self.eval_step(node.array, ctx)) if node.array in deep \
+                else self.evaluate(node.array, ctx)
+            idx = (yield self.eval_step(node.index, ctx)) if node.index in deep \
+                else self.evaluate(node.index, ctx)
+            idx = int(idx)
+            if not isinstance(arr, list):
+                raise TypeError(f"Cannot index non-array type")
+            if idx < 0 or idx >= len(arr):
+                raise IndexError(f"Index {idx} out of bounds")
+            return arr[idx]
+        elif isinstance(node, MemberExpr):
+            obj = (yield self.eval_step(node.object_expr, ctx)) if node.object_expr in deep \
+                else self.evaluate(node.object_expr, ctx)
+            if node.member == 'length' and isinstance(obj, list):
+                return float(len(obj))
+        return 0.0
+
+    def binary_op(self, op: str, left: Any, right: Any) -> Any:
+        """BinOp on evaluated operands (same rules as Interpreter.evaluate)"""
+        if op == 'num+':
+            return left + right
+        elif op == '+':
+            if isinstance(left, str) or isinstance(right, str):
+                return str(left) + str(right)
+            return left + right
+        elif op == '-':
+            return left - right
+        elif op == '*':
+            return left * right
+        elif op == '/':
+            if right == 0:
+                raise ZeroDivisionError("Division by zero")
+            return left / right
+        elif op == '%':
+            if right == 0:
+                raise ZeroDivisionError("Modulo by zero")
+            return float(int(left) % int(right))
+        elif op == '==':
+            return 1.0 if left == right else 0.0
+        elif op == '!=':
+            return 1.0 if left != right else 0.0
+        elif op == '<':
+            return 1.0 if left < right else 0.0
+        elif op == '>':
+            return 1.0 if left > right else 0.0
+        elif op == '<=':
+            return 1.0 if left <= right else 0.0
+        elif op == '>=':
+            return 1.0 if left >= right else 0.0
+        elif op == 'num&&':
+            return 1.0 if left != 0 and right != 0 else 0.0
+        elif op == 'num||':
+            return 1.0 if left != 0 or right != 0 else 0.0
+        elif op == '&&':
+            return 1.0 if self.is_truthy(left) and self.is_truthy(right) else 0.0
+        elif op == '||':
+            return 1.0 if self.is_truthy(left) or self.is_truthy(right) else 0.0
+        elif op == '..':
+            return list(range(int(left), int(right)))
+        elif op == 'str+':
+            return str(left) + str(right)
+        return 0.0
+
+    def call_step(self, cell: FunctionCell, args: List[Any], ctx: ExecutionContext) -> Step:
+        """Step for Interpreter.call_user_function
+        
+        Not a step itself: an uncached call runs the body step directly,
+        keeping one generator fewer on the stack per Lyra call.
+        """
+        memoize = cell.memoize
+        if memoize is None:
+            memoize = self.decide_memoize(cell, ctx)
+        if not memoize or 0.0 in args or len(args) < len(cell.params):
+            return self.run_step(cell, args, ctx)
+        return self.memo_step(cell, args, ctx)
+
+    def memo_step(self, cell: FunctionCell, args: List[Any], ctx: ExecutionContext) -> Step:
+        key = (cell.func_def, *args)
+        try:
+            result = ctx.memo.get(key)
+        except TypeError:
+            return (yield self.run_step(cell, args, ctx))
+        if result is MemoCache.MISS:
+            cell.memo_misses += 1
+            result = yield self.run_step(cell, args, ctx)
+            ctx.memo.put(key, result)
+        else:
+            cell.memo_hits += 1
+        return result
+
+    def run_step(self, cell: FunctionCell, args: List[Any], ctx: ExecutionContext,
+                 statement: bool = False) -> Step:
+        """Interpreter.run_user_function as a step"""
+        deep = self.deep_nodes
+        saved_vars = ctx.variables.copy()
+        func_def = cell.func_def
+        tail_calls = 0
+        while True:
+            variables = ctx.variables
+            for param, value in zip(cell.params, args):
+                variables[param] = value
+            result = 0
+            exec_result = None
+            for stmt in select_body(func_def, args):
+                exec_result = (yield self.exec_step(stmt, ctx)) if stmt in deep \
+                    else self.execute(stmt, ctx)
+                if exec_result is not None and isinstance(exec_result, str) and exec_result.startswith('RETURN:'):
+                    break
+                # Last statement is return value if not explicitly returned
+                if statement and isinstance(stmt, (BinOp, UnaryOp, Number, String, Identifier, CallExpr)):
+                    result = (yield self.eval_step(stmt, ctx)) if stmt in deep \
+                        else self.evaluate(stmt, ctx)
+                exec_result = None
+            if exec_result is not TAIL_CALL:
+                break
+            name, args = ctx.tail_call
+            if ctx.function_cells.get(name) is cell and cell.func_def is func_def:
+                tail_calls += 1
+                statement = False
+                continue
+            target = ctx.function_cells.get(name)
+            value = (yield self.call_step(target, args, ctx)) if target is not None else 0.0
+            exec_result = f"RETURN:{value}"
+            break
+        if exec_result is not None:
+            result = float(exec_result[7:])
+        elif tail_calls:
+            result = 0.0
+        ctx.variables = saved_vars
+        return result
@@ -0,0 +1,50 @@
+#!/bin/bash
+# --optimize --snapshot must save the globals and procs of the init phase
+# even though the init phase itself never reads them; --resume then runs
+# a second program on that state. Errors in resumed procs keep the
+# positions they have in the init program.
+#
+# usage: bash tests/test_snapshot_optimize.sh
+
+LYRA="python3 $(cd "$(dirname "$0")/.." && pwd)/lyra_interpreter/lyra_interpreter.py"
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+cd "$WORK" || exit 1
+
+cat > init.lyra <<'EOF'
+var limit: i32 = 10;
+var names: [str] = ["a", "b"];
+proc triple(n: i32) -> i32 { return n * 3; }
+var big: i32 = triple(limit);
+proc ratio(a: i32) -> i32 {
+    return a / (limit - 10);
+}
+EOF
+cat > main.lyra <<'EOF'
+println(limit, names, big, triple(4));
+EOF
+cat > fail.lyra <<'EOF'
+println(ratio(1));
+EOF
+
+fail=0
+check() {
+    if [ "$2" != "$3" ]; then
+        echo "FAIL $1"
+        echo "  expected: $3"
+        echo "  got:      $2"
+        fail=1
+    fi
+}
+
+saved=$($LYRA --optimize --snapshot init.lyrasnap init.lyra 2>/dev/null)
+check "snapshot" "$saved" "[INFO] Snapshot saved to init.lyrasnap: 3 variables, 2 procs"
+for backend in "" --optimize --bytecode; do
+    resumed=$($LYRA $backend --resume init.lyrasnap main.lyra 2>/dev/null)
+    check "resume ${backend:-tree-walking}" "$resumed" "10.0 ['a', 'b'] 30.0 12.0"
+    failed=$($LYRA $backend --resume init.lyrasnap fail.lyra 2>/dev/null | grep '^Error')
+    check "error position ${backend:-tree-walking}" "$failed" "Error: Division by zero (line 6, column 5)"
+done
+
+[ $fail -eq 0 ] && echo "OK: --optimize --snapshot keeps globals, procs and positions"
+exit $fail